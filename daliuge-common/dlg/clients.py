@@ -21,6 +21,7 @@
 #
 from __future__ import annotations
 
+import json
 import logging
 import os
 import urllib.parse
@@ -118,6 +119,25 @@ class BaseDROPManagerClient(RestClient):
         )
         return ret
 
+    def graph_status_changes(self, sessionId, since=None):
+        """
+        Returns a dictionary with the current graph status ``version`` of
+        session `sessionId`, and the ``status`` of the DROPs that changed after
+        version `since` (a value previously returned by this method). If
+        `since` is not given the status of all DROPs is returned.
+        """
+        url = f"/sessions/{quote(sessionId)}/graph/status/delta"
+        if since is not None:
+            url += f"?since={quote(json.dumps(since))}"
+        ret = self._get_json(url)
+        logger.debug(
+            "Successfully read graph status changes from session %s on %s:%s",
+            sessionId,
+            self.host,
+            self.port,
+        )
+        return ret
+
     def graph(self, sessionId):
         """
         Returns a dictionary where the key are the DROP UIDs, and the values are
@@ -218,6 +238,7 @@ class BaseDROPManagerClient(RestClient):
     addGraphSpec = append_graph
     deploySession = deploy_session
     getGraphStatus = graph_status
+    getGraphStatusChanges = graph_status_changes
     getGraphSize = graph_size
     getGraph = graph
 
@@ -26,7 +26,7 @@ import logging
 """Common utilities used by daliuge packages"""
 from .osutils import terminate_or_kill, wait_or_kill
 from .network import check_port, connect_to, portIsClosed, portIsOpen, write_to
-from .streams import ZlibCompressedStream, JSONStream
+from .streams import ZlibCompressedStream, JSONStream, JSONArrayReader
 
 logger = logging.getLogger(__name__)
 
@@ -84,10 +84,35 @@ class dropdict(dict):
             self.update({"oid": None})
         super().__init_subclass__()
 
+    @staticmethod
+    def _link_key(link):
+        if isinstance(link, dict):
+            return next(iter(link.items()))
+        return link, None
+
+    def _links_index(self, key):
+        """
+        Returns the set of (oid, name) pairs in the `key` list of links.
+
+        The set lives next to the list, outside the dictionary's contents, so
+        it's not serialised. It is rebuilt if the list is replaced or shrinks,
+        and extended if it grew since it was last seen.
+        """
+        links = self[key]
+        index = self.__dict__.setdefault("_links", {})
+        tracked, seen, count = index.get(key, (None, None, 0))
+        if tracked is not links or count > len(links):
+            seen, count = set(), 0
+        if count < len(links):
+            seen.update(self._link_key(link) for link in links[count:])
+        index[key] = (links, seen, len(links))
+        return seen
+
     def _addSomething(self, other, key, name=None):
         if key not in self:
             self[key] = []
-        if other["oid"] not in self[key]:
+        seen = self._links_index(key)
+        if (other["oid"], name or None) not in seen:
             # TODO: Returning just the other drop OID instead of the named
             #       port list is not a good solution. Required for the dask
             #       tests.
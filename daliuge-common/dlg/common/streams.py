@@ -20,7 +20,9 @@
 #    MA 02111-1307  USA
 #
 """Common stream utilities"""
+import codecs
 import json
+import re
 import types
 import zlib
 
@@ -191,3 +193,93 @@ class JSONStream(object):
                 break
 
         return b"".join(response)
+
+
+class JSONArrayReader(object):
+    """
+    An iterable over the elements of a JSON array read from `content`, the
+    reverse of JSONStream. Elements are decoded as soon as they have been read
+    instead of loading and parsing the whole document at once, so large
+    arrays can be consumed with little memory. Errors in the document are
+    raised as ValueErrors while iterating.
+    """
+
+    _WHITESPACE = re.compile(r"[ \t\n\r]*")
+    _NUMBER_CHARS = ("", ".", "e", "E", "+", "-") + tuple("0123456789")
+
+    def __init__(self, content, blocksize=65536):
+        self.content = content
+        self.blocksize = blocksize
+        self.decoder = json.JSONDecoder()
+        self.textdecoder = codecs.getincrementaldecoder("utf8")()
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0  # characters discarded from buf so far
+        self.eof = False
+
+    def _fill(self):
+        # Read at least as much as we already have buffered, so parsing
+        # elements bigger than blocksize doesn't become quadratic
+        n = max(self.blocksize, len(self.buf) - self.pos)
+        data = self.content.read(n)
+        self.eof = not data
+        if isinstance(data, bytes):
+            data = self.textdecoder.decode(data, final=self.eof)
+        self.buf = self.buf[self.pos :] + data
+        self.offset += self.pos
+        self.pos = 0
+
+    def _peek(self):
+        """Skips whitespace, returning the next character ("" at the end)"""
+        while True:
+            self.pos = self._WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def _expect(self, chars):
+        c = self._peek()
+        if not c or c not in chars:
+            raise ValueError(
+                "Expected one of %r at position %d of JSON array, found %r"
+                % (chars, self.offset + self.pos, c)
+            )
+        self.pos += 1
+        return c
+
+    def _decode(self):
+        self._peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # numbers at the end of the buffer might continue in the next read
+            if (
+                not self.eof
+                and isinstance(obj, (int, float))
+                and self.buf[end : end + 1] in self._NUMBER_CHARS
+            ):
+                self._fill()
+                continue
+            self.pos = end
+            return obj
+
+    def __iter__(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+        else:
+            while True:
+                yield self._decode()
+                if self._expect(",]") == "]":
+                    break
+        if self._peek():
+            raise ValueError(
+                "Extra data after JSON array at position %d" % (self.offset + self.pos)
+            )
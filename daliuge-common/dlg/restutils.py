@@ -20,11 +20,16 @@
 #    MA 02111-1307  USA
 #
 import codecs
+import collections
 import http.client
 import io
 import json
 import logging
+import selectors
+import socket
 import socketserver
+import threading
+import time
 import urllib.parse
 import wsgiref.simple_server
 
@@ -42,12 +47,156 @@ class ThreadingWSGIServer(
     daemon_threads = True
     allow_reuse_address = True
 
+    def __init__(self, *args, **kwargs):
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def process_request_thread(self, request, client_address):
+        with self._connections_lock:
+            self._connections.add(request)
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self._connections_lock:
+                self._connections.discard(request)
+
+    def server_close(self):
+        super().server_close()
+        # Persistent connections would otherwise keep being served by their
+        # threads (and thus by this server's application) after closing
+        with self._connections_lock:
+            connections = list(self._connections)
+        for conn in connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class KeepAliveServerHandler(wsgiref.simple_server.ServerHandler):
+    http_version = "1.1"
+    keep_alive = True
+
+    def cleanup_headers(self):
+        super().cleanup_headers()
+        # Without a Content-Length the end of the body is signaled by closing
+        # the connection
+        if "Content-Length" not in self.headers:
+            self.keep_alive = False
+        if not self.keep_alive:
+            self.headers["Connection"] = "close"
+
+    def handle_error(self):
+        self.keep_alive = False
+        super().handle_error()
+
 
 class LoggingWSGIRequestHandler(wsgiref.simple_server.WSGIRequestHandler):
+    """
+    Serves HTTP/1.1 persistent connections, which are closed after being idle
+    for `timeout` seconds. Connections are also closed after responses without
+    a Content-Length (which are delimited by closing the connection) and
+    after requests with a chunked body, which the application might not have
+    read completely.
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = 15
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately, don't let the body wait for
+        # the client to acknowledge the headers
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
     def log_message(self, fmt, *args):
         pass
         # logger.debug(fmt, *args)
 
+    def handle(self):
+        self.close_connection = True
+        try:
+            self.handle_one_request()
+            while not self.close_connection:
+                self.handle_one_request()
+        except (socket.timeout, ConnectionError):
+            pass
+
+    def handle_one_request(self):
+        self.close_connection = True
+        self.raw_requestline = self.rfile.readline(65537)
+        if not self.raw_requestline:
+            return
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ""
+            self.request_version = ""
+            self.command = ""
+            self.send_error(414)
+            return
+
+        if not self.parse_request():  # An error code has been sent, just exit
+            return
+
+        chunked_body = "chunked" in self.headers.get("Transfer-Encoding", "").lower()
+        if chunked_body:
+            body = self.rfile
+        else:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = _RequestBody(self.rfile, length)
+        handler = KeepAliveServerHandler(
+            body,
+            self.wfile,
+            self.get_stderr(),
+            self.get_environ(),
+            multithread=False,
+        )
+        handler.request_handler = self  # backpointer for logging
+        handler.keep_alive = not (self.close_connection or chunked_body)
+        handler.run(self.server.get_app())
+
+        if not handler.keep_alive:
+            self.close_connection = True
+            return
+        body.drain()
+
+
+class _RequestBody(object):
+    """
+    The body of a request given to the WSGI application, limited to its
+    Content-Length so whatever the application didn't read can be skipped
+    before the next request arrives on the same connection
+    """
+
+    def __init__(self, rfile, length):
+        self._rfile = rfile
+        self._remaining = length
+
+    def _limit(self, size):
+        if size is None or size < 0:
+            return self._remaining
+        return min(size, self._remaining)
+
+    def read(self, size=-1):
+        data = self._rfile.read(self._limit(size))
+        self._remaining -= len(data)
+        return data
+
+    def readline(self, size=-1):
+        data = self._rfile.readline(self._limit(size))
+        self._remaining -= len(data)
+        return data
+
+    def readlines(self, hint=-1):
+        return list(iter(self.readline, b""))
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+    def drain(self):
+        while self._remaining > 0 and self.read(64 * 1024):
+            pass
+
 
 class RestServerWSGIServer:
     def __init__(self, wsgi_app, listen="localhost", port=8080):
@@ -108,24 +257,161 @@ class chunked(object):
         return chunk(data)
 
 
+class ConnectionPool(object):
+    """
+    A pool of persistent HTTP connections, keyed by host and port.
+
+    At most `max_idle` idle connections are kept per host, and connections
+    idle for more than `idle_timeout` seconds are not reused (servers close
+    them eventually). The pool also records the outcome of the last request
+    sent to each host, so the liveness of a host can be known without having
+    to probe it.
+    """
+
+    def __init__(self, max_idle=8, idle_timeout=10):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        # key: (host, port), value: deque of (connection, idle since)
+        self._idle = collections.defaultdict(collections.deque)
+        # key: (host, port), value: (alive, when)
+        self._liveness = {}
+
+    def acquire(self, host, port, timeout, reuse=True):
+        """
+        Returns a connection to `host`:`port`, and whether it was reused from
+        the pool. New connections are attempted for up to `timeout` seconds,
+        since the remote server might still be starting up.
+        """
+        key = (host, port)
+        with self._lock:
+            idle = self._idle[key]
+            while idle:
+                conn, since = idle.pop()
+                if (
+                    reuse
+                    and time.time() - since < self.idle_timeout
+                    and not _is_dropped(conn)
+                ):
+                    return conn, True
+                conn.close()
+        return self._connect(host, port, timeout), False
+
+    def _connect(self, host, port, timeout):
+        start = time.time()
+        while True:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+            try:
+                conn.connect()
+                break
+            except ConnectionRefusedError:
+                conn.close()
+                if time.time() - start >= timeout:
+                    self.failed(host, port)
+                    raise
+                time.sleep(0.1)
+            except OSError:
+                conn.close()
+                self.failed(host, port)
+                raise
+        # The timeout only applies to establishing the connection
+        conn.sock.settimeout(None)
+        return conn
+
+    def release(self, host, port, conn):
+        """Gives back a connection that can be reused"""
+        with self._lock:
+            idle = self._idle[(host, port)]
+            if len(idle) < self.max_idle:
+                idle.append((conn, time.time()))
+                return
+        conn.close()
+
+    def succeeded(self, host, port):
+        """Records that a request to `host`:`port` got a response"""
+        self._liveness[(host, port)] = (True, time.time())
+
+    def failed(self, host, port):
+        """Records that a request to `host`:`port` failed"""
+        self._liveness[(host, port)] = (False, time.time())
+        with self._lock:
+            idle = self._idle.pop((host, port), ())
+        for conn, _ in idle:
+            conn.close()
+
+    def liveness(self, host, port, max_age):
+        """
+        Returns whether `host`:`port` was alive according to the last request
+        sent to it, or ``None`` if no request was sent in the last `max_age`
+        seconds.
+        """
+        alive, when = self._liveness.get((host, port), (None, 0))
+        if time.time() - when > max_age:
+            return None
+        return alive
+
+    def clear(self):
+        """Closes all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, collections.defaultdict(collections.deque)
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
+
+
+def _is_dropped(conn):
+    # An idle connection has nothing to read, unless it was closed remotely.
+    # Unlike select.select, selectors work with file descriptors >= 1024
+    try:
+        with selectors.DefaultSelector() as selector:
+            selector.register(conn.sock, selectors.EVENT_READ)
+            return bool(selector.select(0))
+    except (OSError, ValueError, KeyError):
+        return True
+
+
+#: The connection pool used by default by all RestClients
+connection_pool = ConnectionPool()
+
+# Maximum size of an unread response that is read to reuse its connection
+_MAX_DISCARDED_RESPONSE = 64 * 1024
+
+
 class RestClient(object):
     """
     The base class for our REST clients
     """
 
-    def __init__(self, host, port, url_prefix="", timeout=10):
+    def __init__(self, host, port, url_prefix="", timeout=10, pool=None):
         self.host = host
         self.port = int(port)
         self.url_prefix = url_prefix
         self.timeout = timeout
+        self._pool = pool or connection_pool
         self._conn = None
         self._resp = None
 
     def _close(self):
-        if self._resp:
-            self._resp.close()
-        if self._conn:
-            self._conn.close()
+        # Connections go back to the pool only once their last response has
+        # been fully read, otherwise they couldn't be used for a new request.
+        # Small responses that were not read (e.g., the acknowledgement of a
+        # POST) are read here so the connection can be reused
+        conn, resp = self._conn, self._resp
+        self._conn = self._resp = None
+        if conn is None:
+            return
+        if resp is not None and not resp.isclosed() and resp.length is not None:
+            if resp.length <= _MAX_DISCARDED_RESPONSE:
+                try:
+                    resp.read()
+                except (OSError, http.client.HTTPException):
+                    pass
+        if resp is not None and resp.isclosed() and conn.sock is not None:
+            self._pool.release(self.host, self.port, conn)
+            return
+        if resp is not None:
+            resp.close()
+        conn.close()
 
     __del__ = _close
 
@@ -184,20 +470,20 @@ class RestClient(object):
         url = self.url_prefix + url
         logger.debug("Sending %s request to %s:%d%s", method, self.host, self.port, url)
 
-        if not common.portIsOpen(self.host, self.port, timeout):
-            raise RestClientException(
-                "Cannot connect to %s:%d after %.2f [s]"
-                % (self.host, self.port, self.timeout)
-            )
-
         if content and hasattr(content, "read"):
             headers["Transfer-Encoding"] = "chunked"
             headers["Origin"] = "http://dlg-trans.local:8084"
             content = chunked(content)
 
-        self._conn = http.client.HTTPConnection(self.host, self.port)
-        self._conn.request(method, url, content, headers)
-        self._resp = self._conn.getresponse()
+        self._close()
+        try:
+            self._resp = self._send(method, url, content, headers)
+        except RestClientException:
+            raise
+        except (OSError, http.client.HTTPException):
+            self._pool.failed(self.host, self.port)
+            raise
+        self._pool.succeeded(self.host, self.port)
 
         # Server errors are encoded in the body as json content
         if self._resp.status != http.HTTPStatus.OK:
@@ -230,5 +516,33 @@ class RestClient(object):
             raise ex
 
         if not self._resp.length:
+            self._resp.read()
             return None, None
         return codecs.getreader("utf-8")(self._resp), self._resp
+
+    def _send(self, method, url, content, headers):
+        reuse = True
+        while True:
+            try:
+                self._conn, reused = self._pool.acquire(
+                    self.host, self.port, self.timeout, reuse=reuse
+                )
+            except OSError:
+                raise RestClientException(
+                    "Cannot connect to %s:%d after %.2f [s]"
+                    % (self.host, self.port, self.timeout)
+                )
+            try:
+                self._conn.request(method, url, content, headers)
+                return self._conn.getresponse()
+            except ConnectionError:
+                # The server might have closed an idle connection just before
+                # we reused it; if so try once more with a new connection,
+                # unless we already consumed the content we were sending
+                self._conn.close()
+                if not reused or isinstance(content, chunked):
+                    raise
+            logger.debug(
+                "Stale connection to %s:%d, reconnecting", self.host, self.port
+            )
+            reuse = False
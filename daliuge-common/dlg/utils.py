@@ -23,8 +23,10 @@
 Module containing miscellaneous utility classes and functions.
 """
 import base64
+import contextlib
 import errno
 import functools
+import gc
 import importlib
 import io
 import logging
@@ -362,6 +364,37 @@ def object_tracking(name):
     return track_current_drop
 
 
+_gc_pause_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """
+    Pauses the cyclic garbage collector within this context. Creating many
+    objects, like the DROPs of a large graph, otherwise triggers collections
+    that repeatedly traverse all the objects created so far.
+
+    The collector is process-wide, so pauses of different threads (e.g.,
+    sessions being deployed concurrently) are counted, and the collector is
+    only re-enabled once the last of them ends.
+    """
+    global _gc_pauses, _gc_was_enabled
+    with _gc_pause_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_pause_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
 def get_symbol(name):
     """Gets the global symbol ``name``, which is an "absolute path" to a python
     name in the form of ``pkg.subpkg.subpkg.module.name``"""
@@ -547,4 +580,5 @@ portIsOpen = common.portIsOpen
 write_to = common.write_to
 
 JSONStream = common.JSONStream
+JSONArrayReader = common.JSONArrayReader
 ZlibCompressedStream = common.ZlibCompressedStream
@@ -1,10 +1,13 @@
 from abc import ABC, abstractmethod
 from collections import OrderedDict
 from concurrent.futures import Future
-from typing import List, Callable
+from typing import List, Callable, Optional
 import logging
 import math
+import os
+import queue
 import threading
+import time
 
 from dlg.drop_loaders import load_pickle
 from dlg.drop import track_current_drop
@@ -74,6 +77,94 @@ def run_on_daemon_thread(func: Callable, *args, **kwargs) -> Future:
 _SYNC_DROP_RUNNER = SyncDropRunner()
 
 
+class AppDispatcher(object):
+    """
+    A bounded pool of daemon threads dispatching the execution of
+    InputFiredAppDROPs.
+
+    Work items submitted to this dispatcher only *schedule* applications on
+    their DropRunner and react to their completion; they never wait for an
+    application to finish running. Because of that a small, fixed number of
+    threads is enough to drive any number of applications, and a dispatcher
+    thread can never deadlock waiting on work queued behind it.
+
+    Besides the current queue depth, the dispatcher keeps track of the latency
+    between a work item being submitted and it starting to be processed.
+    """
+
+    def __init__(self, max_workers=None):
+        if max_workers is None:
+            max_workers = max(4, os.cpu_count() or 1)
+        self._max_workers = max_workers
+        self._queue = queue.SimpleQueue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._dispatched = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    def submit(self, func: Callable, *args):
+        """Queues `func(*args)` for execution on a dispatcher thread"""
+        self._queue.put((time.time(), func, args))
+        if len(self._workers) < self._max_workers:
+            self._start_worker()
+
+    def _start_worker(self):
+        with self._lock:
+            if len(self._workers) >= self._max_workers:
+                return
+            t = threading.Thread(
+                target=self._work,
+                name="App dispatcher %d" % len(self._workers),
+            )
+            t.daemon = True
+            self._workers.append(t)
+        t.start()
+
+    def _work(self):
+        while True:
+            submitted, func, args = self._queue.get()
+            latency = time.time() - submitted
+            with self._lock:
+                self._dispatched += 1
+                self._total_latency += latency
+                self._max_latency = max(self._max_latency, latency)
+            try:
+                func(*args)
+            except:
+                logger.exception("Unexpected exception while dispatching %r", func)
+
+    @property
+    def metrics(self) -> dict:
+        """
+        Returns the number of worker threads and pending work items, plus the
+        mean and maximum dispatch latency (in seconds) observed so far
+        """
+        with self._lock:
+            dispatched = self._dispatched
+            return {
+                "workers": len(self._workers),
+                "queue_depth": self._queue.qsize(),
+                "dispatched": dispatched,
+                "mean_latency": self._total_latency / dispatched if dispatched else 0.0,
+                "max_latency": self._max_latency,
+            }
+
+
+_APP_DISPATCHER = None
+_APP_DISPATCHER_LOCK = threading.Lock()
+
+
+def get_app_dispatcher() -> AppDispatcher:
+    """Returns the process-wide AppDispatcher, creating it if necessary"""
+    global _APP_DISPATCHER
+    if _APP_DISPATCHER is None:
+        with _APP_DISPATCHER_LOCK:
+            if _APP_DISPATCHER is None:
+                _APP_DISPATCHER = AppDispatcher()
+    return _APP_DISPATCHER
+
+
 # ===============================================================================
 # AppDROP classes follow
 # ===============================================================================
@@ -443,11 +534,23 @@ class InputFiredAppDROP(AppDROP):
             else:
                 self.async_execute()
 
-    def async_execute(self):
-        # TODO Do we need another thread pool for this?
-        # Careful, trying to run this on the same threadpool as the
-        # DropRunner can cause deadlocks
-        return run_on_daemon_thread(self._execute_and_log_exception)
+    def async_execute(self) -> Future:
+        """
+        Triggers the execution of this application without blocking the
+        caller, returning a Future that resolves once the execution is over.
+
+        Applications are scheduled on their DropRunner from the process-wide
+        AppDispatcher, and their completion is handled via a callback on the
+        DropRunner's future instead of a thread blocking on it. Applications
+        using the synchronous DropRunner run in the thread that executes them,
+        so those still get a thread of their own to avoid tying up the
+        dispatcher for an unbounded amount of time.
+        """
+        if isinstance(self._drop_runner, SyncDropRunner):
+            return run_on_daemon_thread(self._execute_and_log_exception)
+        done = Future()
+        get_app_dispatcher().submit(self._dispatch_run, done, 0)
+        return done
 
     def _execute_and_log_exception(self):
         try:
@@ -455,6 +558,80 @@ class InputFiredAppDROP(AppDROP):
         except:
             logger.exception("Unexpected exception during drop (%r) execution", self)
 
+    @track_current_drop
+    def _dispatch_run(self, done: Future, tries: int):
+        try:
+            if tries == 0:
+                logger.debug("Executing %r", self.oid)
+                self.execStatus = AppDROPStates.RUNNING
+            fut = self._submit_run()
+        except:
+            logger.exception("Unexpected exception during drop (%r) execution", self)
+            done.set_result(None)
+            return
+
+        dispatcher = get_app_dispatcher()
+        fut.add_done_callback(
+            lambda f: dispatcher.submit(self._on_run_done, f, done, tries)
+        )
+
+    @track_current_drop
+    def _on_run_done(self, fut: Future, done: Future, tries: int):
+        try:
+            tries = self._check_run_result(fut, tries)
+            if tries is not None and tries < self.n_tries:
+                self._dispatch_run(done, tries)
+                return
+            if self.execStatus != AppDROPStates.CANCELLED:
+                self._conclude_execution()
+        except:
+            logger.exception("Unexpected exception during drop (%r) execution", self)
+        done.set_result(None)
+
+    def _submit_run(self) -> Future:
+        try:
+            return self._drop_runner.run_drop(self)
+        except BaseException as e:
+            fut = Future()
+            fut.set_exception(e)
+            return fut
+
+    def _check_run_result(self, fut: Future, tries: int) -> Optional[int]:
+        """
+        Checks the outcome of a single run of this application. Returns None
+        if the execution is over, either because it was successful (in which
+        case the application moves to FINISHED) or because it was cancelled,
+        and the updated number of failed tries otherwise.
+        """
+        try:
+            fut.result()
+        except:
+            if self.execStatus == AppDROPStates.CANCELLED:
+                return None
+            tries += 1
+            logger.exception(
+                "Error while executing %r (try %s/%s)",
+                self,
+                tries,
+                self.n_tries,
+            )
+            return tries
+
+        if self.execStatus != AppDROPStates.CANCELLED:
+            self.execStatus = AppDROPStates.FINISHED
+        return None
+
+    def _conclude_execution(self, _send_notifications=True):
+        # We gave up running the application, go to error
+        drop_state = DROPStates.COMPLETED
+        if self.execStatus != AppDROPStates.FINISHED:
+            self.execStatus = AppDROPStates.ERROR
+            drop_state = DROPStates.ERROR
+
+        self.status = drop_state
+        if _send_notifications:
+            self._notifyAppIsFinished()
+
     @track_current_drop
     def execute(self, _send_notifications=True):
         """
@@ -470,36 +647,15 @@ class InputFiredAppDROP(AppDROP):
         # Run at most self._n_tries if there are errors during the execution
         logger.debug("Executing %r", self.oid)
         tries = 0
-        drop_state = DROPStates.COMPLETED
         self.execStatus = AppDROPStates.RUNNING
         while tries < self.n_tries:
-            try:
-                fut = self._drop_runner.run_drop(self)
-                fut.result()
-
-                if self.execStatus == AppDROPStates.CANCELLED:
-                    return
-                self.execStatus = AppDROPStates.FINISHED
+            tries = self._check_run_result(self._submit_run(), tries)
+            if tries is None:
                 break
-            except:
-                if self.execStatus == AppDROPStates.CANCELLED:
-                    return
-                tries += 1
-                logger.exception(
-                    "Error while executing %r (try %s/%s)",
-                    self,
-                    tries,
-                    self.n_tries,
-                )
 
-        # We gave up running the application, go to error
-        if tries == self.n_tries:
-            self.execStatus = AppDROPStates.ERROR
-            drop_state = DROPStates.ERROR
-
-        self.status = drop_state
-        if _send_notifications:
-            self._notifyAppIsFinished()
+        if self.execStatus == AppDROPStates.CANCELLED:
+            return
+        self._conclude_execution(_send_notifications)
 
     def _run(self):
         """
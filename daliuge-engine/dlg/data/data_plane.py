@@ -0,0 +1,240 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+Direct data access for applications running in a different process than the
+one holding their input and output DROPs.
+
+Applications executed by a process pool see their DROPs through
+`rpc.DropProxy` objects, which turn every `open`/`read`/`write`/`close` into
+an RPC call to the owning NodeManager. For local DROPs whose storage can be
+reached from any process (files, shared memory blocks) the worker is instead
+given the DataIO object needed to read or write the storage directly, and only
+control operations and other attribute accesses go through RPC. Data held in
+the parent's memory is copied once into a shared memory block (or inlined when
+small), and outputs backed by memory are written into a shared memory block
+that the parent copies into the DROP once the application finishes.
+"""
+import copy
+import io
+import logging
+import random
+import sys
+
+from .. import rpc
+from ..ddap_protocol import DROPStates
+from .io import FileIO, MemoryIO, OpenMode, SharedMemoryIO
+
+if sys.version_info >= (3, 8):
+    from ..shared_memory import DlgSharedMemory
+
+logger = logging.getLogger(__name__)
+
+# Inputs held in memory up to this size are sent to workers along with the
+# application instead of through a shared memory block
+_INLINE_SIZE = 64 * 1024
+
+
+class _BlockIO(SharedMemoryIO):
+    """
+    A SharedMemoryIO on an existing, named shared memory block. Like MemoryIO
+    it returns bytes when reading (unless opened with `zerocopy=True`) and an
+    empty buffer at the end of the data.
+    """
+
+    def __init__(self, name, **kwargs):
+        super().__init__(None, None)
+        self._name = name
+        self._zerocopy = False
+
+    def _open(self, zerocopy=False, **kwargs):
+        self._zerocopy = zerocopy
+        return super()._open(**kwargs)
+
+    def _read(self, count=65536, **kwargs):
+        chunk = super()._read(count, **kwargs)
+        if chunk is None:
+            return b""
+        return chunk if self._zerocopy else chunk.tobytes()
+
+
+class DataPlaneInfo:
+    """
+    Information needed by a worker process to access the data of a DROP
+    directly. `io` is a closed DataIO object that workers copy and open, and
+    `block` the name of the temporary shared memory block (if any) that backs
+    it on behalf of the DROP.
+    """
+
+    def __init__(self, proxy_info: rpc.ProxyInfo, io, size=None, block=None):
+        self.proxy_info = proxy_info
+        self.io = io
+        self.size = size
+        self.block = block
+
+    def release(self):
+        """Destroys the temporary shared memory block, if any"""
+        if self.block is None:
+            return
+        block = DlgSharedMemory(self.block)
+        block.close()
+        block.unlink()
+        self.block = None
+
+    def __repr__(self):
+        return f"<DataPlaneInfo {self.proxy_info.uid} via {type(self.io).__name__}>"
+
+
+def _new_block(size=65536):
+    block = DlgSharedMemory(None, max(size, 1))
+    return block, _BlockIO(block.name)
+
+
+def input_info(drop):
+    """
+    Returns the DataPlaneInfo through which workers can read the data of the
+    given input DROP, or None if it needs to be read through RPC.
+    """
+    if isinstance(drop, rpc.DropProxy) or drop.status != DROPStates.COMPLETED:
+        return None
+    proxy_info = rpc.ProxyInfo.from_data_drop(drop)
+    drop_io = drop.getIO()
+    if isinstance(drop_io, (FileIO, SharedMemoryIO)):
+        return DataPlaneInfo(proxy_info, drop_io, drop.size)
+    if not isinstance(drop_io, MemoryIO):
+        return None
+
+    data = drop_io.buffer()
+    try:
+        size = len(data)
+        if size <= _INLINE_SIZE:
+            return DataPlaneInfo(proxy_info, MemoryIO(io.BytesIO(data)), size)
+        block, block_io = _new_block(size)
+        block.buf[:size] = data
+        block.close()
+        return DataPlaneInfo(proxy_info, block_io, size, block.name)
+    finally:
+        data.release()
+
+
+def output_info(drop):
+    """
+    Returns the DataPlaneInfo through which workers can write the data of the
+    given output DROP, or None if it needs to be written through RPC. DROPs
+    with streaming consumers are always written through RPC, since their
+    consumers need to see the data as it is written.
+    """
+    if (
+        isinstance(drop, rpc.DropProxy)
+        or drop.status != DROPStates.INITIALIZED
+        or drop.streamingConsumers
+    ):
+        return None
+    proxy_info = rpc.ProxyInfo.from_data_drop(drop)
+    drop_io = drop.getIO()
+    if isinstance(drop_io, (FileIO, SharedMemoryIO)):
+        return DataPlaneInfo(proxy_info, drop_io)
+    if not isinstance(drop_io, MemoryIO):
+        return None
+    block, block_io = _new_block()
+    block.close()
+    return DataPlaneInfo(proxy_info, block_io, block=block.name)
+
+
+def apply_output(drop, info: DataPlaneInfo, nbytes: int):
+    """
+    Makes the `nbytes` bytes written by a worker through `info` part of the
+    given output DROP.
+    """
+    if not nbytes:
+        return
+    if info.block is None:
+        drop.markWritten(nbytes)
+        return
+    block = DlgSharedMemory(info.block)
+    try:
+        with block.buf[:nbytes] as data:
+            drop.write(data)
+    finally:
+        block.close()
+
+
+class DataPlaneDrop(rpc.DropProxy):
+    """
+    A DropProxy that reads or writes the data of its DROP directly from the
+    worker process, forwarding everything else through RPC.
+    """
+
+    def __init__(self, rpc_client, info: DataPlaneInfo):
+        super().__init__(rpc_client, info.proxy_info)
+        self._info = info
+        self._rios = {}
+        self._wio = None
+        self._written = 0
+
+    def open(self, **kwargs):
+        drop_io = copy.copy(self._info.io)
+        drop_io.open(OpenMode.OPEN_READ, **kwargs)
+        while True:
+            descriptor = random.randint(-(2**31), 2**31 - 1)
+            if descriptor not in self._rios:
+                break
+        self._rios[descriptor] = drop_io
+        return descriptor
+
+    def read(self, descriptor, count=65536, **kwargs):
+        return self._rios[descriptor].read(count, **kwargs)
+
+    def close(self, descriptor, **kwargs):
+        self._rios.pop(descriptor).close(**kwargs)
+
+    def write(self, data, **kwargs):
+        if not len(data):
+            return 0
+        if self._wio is None:
+            self._wio = copy.copy(self._info.io)
+            self._wio.open(OpenMode.OPEN_WRITE)
+        nbytes = self._wio.write(data)
+        nbytes = 0 if nbytes is None else nbytes
+        self._written += nbytes
+        return nbytes
+
+    @property
+    def size(self):
+        if self._info.size is None:
+            return self._written
+        return self._info.size
+
+    def closeWriter(self):
+        """
+        Closes the storage opened for writing, if any, returning the number of
+        bytes written into it.
+        """
+        for drop_io in self._rios.values():
+            drop_io.close()
+        self._rios.clear()
+        if self._wio is not None:
+            self._wio.close()
+            self._wio = None
+        return self._written
+
+    def __repr__(self):
+        return f"<DataPlaneDrop with {self._info}>"
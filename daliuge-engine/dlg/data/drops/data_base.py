@@ -238,6 +238,25 @@ class DataDROP(AbstractDROP):
         if not checksum_disabled:
             self._updateChecksum(data)
 
+        self._updateWritingStatus()
+        return nbytes
+
+    def markWritten(self, nbytes: int):
+        """
+        Records that `nbytes` bytes were written into the storage of this
+        DROP without going through `write` (e.g., by an application running in
+        a different process). Streaming consumers are not notified, and the
+        checksum of the data is calculated on demand once the DROP is
+        COMPLETED.
+        """
+        if self.status not in [DROPStates.INITIALIZED, DROPStates.WRITING]:
+            raise Exception("No more writing expected")
+        if self._size is None:
+            self._size = 0
+        self._size += nbytes
+        self._updateWritingStatus()
+
+    def _updateWritingStatus(self):
         # If we know how much data we'll receive, keep track of it and
         # automatically switch to COMPLETED
         if self._expectedSize > 0:
@@ -258,8 +277,6 @@ class DataDROP(AbstractDROP):
         else:
             self.status = DROPStates.WRITING
 
-        return nbytes
-
     def _updateChecksum(self, chunk):
         # see __init__ for the initialization to None
         if self._checksum is None:
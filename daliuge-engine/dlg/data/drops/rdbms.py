@@ -19,16 +19,105 @@
 #    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
 #    MA 02111-1307  USA
 #
+import atexit
 import contextlib
 import importlib
+import itertools
+import threading
 
 from dlg.data.drops.data_base import DataDROP, logger
 from dlg.exceptions import InvalidDropException
 from dlg.data.io import ErrorIO
-from dlg.meta import dlg_dict_param
+from dlg.meta import dlg_dict_param, dlg_int_param
 from dlg.utils import prepare_sql
 
 
+class _ConnectionPool(object):
+    """
+    The idle database connections of the RDBMSDrops of a session, per thread
+    and per (dbmodule, dbparams). DB-API connections cannot be shared between
+    threads in general, so each thread gets back the connections it opened.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._closed = False
+
+    @contextlib.contextmanager
+    def connection(self, db_drv, dbparams):
+        """
+        Yields a connection to the database described by `db_drv` and
+        `dbparams`, reusing the one this thread used last for it if possible.
+        Connections that fail are closed instead of being reused.
+        """
+        key = (
+            threading.current_thread(),
+            db_drv.__name__,
+            repr(sorted(dbparams.items())),
+        )
+        # Nested uses (e.g. inserting while iterating over a select) get their
+        # own connection
+        with self._lock:
+            conn = self._idle.pop(key, None)
+        if conn is None:
+            conn = db_drv.connect(**dbparams)
+        reuse = False
+        try:
+            yield conn
+            # End the transaction a SELECT may have opened, otherwise the idle
+            # connection holds its locks and later queries read its snapshot
+            conn.rollback()
+            reuse = True
+        finally:
+            with self._lock:
+                reuse = reuse and not self._closed and key not in self._idle
+                if reuse:
+                    self._idle[key] = conn
+            if not reuse:
+                with contextlib.suppress(Exception):
+                    conn.close()
+
+    def close(self):
+        """
+        Closes the idle connections. Connections in use are closed when they
+        are released.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, {}
+        for conn in idle.values():
+            # Some drivers (e.g. sqlite3) refuse to close connections opened by
+            # other threads, those are closed once garbage-collected instead
+            with contextlib.suppress(Exception):
+                conn.close()
+
+
+# Connection pools, per session
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _session_pool(session_id):
+    with _pools_lock:
+        pool = _pools.get(session_id)
+        if pool is None:
+            pool = _pools[session_id] = _ConnectionPool()
+        return pool
+
+
+def close_connections(session_id=""):
+    """Closes the database connections kept for the RDBMSDrops of a session"""
+    with _pools_lock:
+        pool = _pools.pop(session_id, None)
+    if pool is not None:
+        pool.close()
+
+
+# RDBMSDrops created outside of a session share a pool that is never destroyed
+atexit.register(close_connections)
+
+
 ##
 # @brief RDBMS
 # @details A Drop allowing storage and retrieval from a SQL DB.
@@ -42,6 +131,7 @@ from dlg.utils import prepare_sql
 # @param vals {}/Json/ComponentParameter/NoPort/ReadWrite//False/False/Json encoded values dictionary used for INSERT. The keys of ``vals`` are used as the column names.
 # @param condition /String/ComponentParameter/NoPort/ReadWrite//False/False/Condition for SELECT. For this the WHERE statement must be written using the "{X}" or "{}" placeholders
 # @param selectVals {}/Json/ComponentParameter/NoPort/ReadWrite//False/False/Values for the WHERE statement
+# @param batch_size 0/Integer/ComponentParameter/NoPort/ReadWrite//False/False/Number of inserted rows buffered before they are written and committed together. Buffered rows are written at the latest when the drop completes
 # @param dropclass dlg.data.drops.rdbms.RDBMSDrop/String/ComponentParameter/NoPort/ReadWrite//False/False/Drop class
 # @param base_name rdbms/String/ComponentParameter/NoPort/ReadOnly//False/False/Base name of application class
 # @param dummy /Object/ApplicationArgument/InputOutput/ReadWrite//False/False/Dummy port
@@ -52,6 +142,7 @@ class RDBMSDrop(DataDROP):
     """
 
     dbparams = dlg_dict_param("dbparams", {})
+    batch_size = dlg_int_param("batch_size", 0)
 
     def initialize(self, **kwargs):
         DataDROP.initialize(self, **kwargs)
@@ -73,36 +164,128 @@ class RDBMSDrop(DataDROP):
         # Data store for reproducibility
         self._querylog = []
 
+        # Rows waiting to be inserted, and INSERT statements per set of columns
+        self._pending_rows = []
+        self._pending_lock = threading.Lock()
+        self._insert_sqls = {}
+
     def getIO(self):
         # This Drop cannot be accessed directly
         return ErrorIO()
 
     def _connection(self):
-        return contextlib.closing(self._db_drv.connect(**self.dbparams))
+        pool = _session_pool(self._dlg_session_id)
+        return pool.connection(self._db_drv, self.dbparams)
 
     def _cursor(self, conn):
         return contextlib.closing(conn.cursor())
 
+    def _insert_sql(self, columns):
+        try:
+            return self._insert_sqls[columns]
+        except KeyError:
+            sql = "INSERT into %s (%s) VALUES (%s)" % (
+                self._db_table,
+                ",".join(columns),
+                ",".join(["{}"] * len(columns)),
+            )
+            sql, _ = prepare_sql(sql, self._db_drv.paramstyle, columns)
+            self._insert_sqls[columns] = sql
+            return sql
+
+    def _bind(self, values):
+        # Mirrors how prepare_sql binds values for each paramstyle
+        if self._db_drv.paramstyle in ("format", "pyformat"):
+            return {"n%d" % (i): v for i, v in enumerate(values)}
+        return list(values)
+
+    def _insert_rows(self, rows):
+        """
+        Inserts the (columns, values) tuples in `rows` using a single
+        transaction, with one `executemany` call per group of consecutive rows
+        with the same columns.
+        """
+        with self._connection() as c:
+            with self._cursor(c) as cur:
+                try:
+                    for columns, group in itertools.groupby(rows, lambda r: r[0]):
+                        sql = self._insert_sql(columns)
+                        params = [self._bind(values) for _, values in group]
+                        logger.debug(
+                            "Executing SQL for %d rows: %s", len(params), sql
+                        )
+                        cur.executemany(sql, params)
+                    c.commit()
+                except Exception:
+                    with contextlib.suppress(Exception):
+                        c.rollback()
+                    raise
+
     def insert(self, vals: dict):
         """
         Inserts the values contained in the ``vals`` dictionary into the
         underlying table. The keys of ``vals`` are used as the column names.
+
+        If this Drop has a ``batch_size`` the row is buffered instead, and
+        written together with other rows once ``batch_size`` of them have been
+        gathered, or when the Drop is flushed.
         """
-        with self._connection() as c:
-            with self._cursor(c) as cur:
-                # vals is a dictionary, its keys are the column names and its
-                # values are the values to insert
-                sql = "INSERT into %s (%s) VALUES (%s)" % (
-                    self._db_table,
-                    ",".join(vals.keys()),
-                    ",".join(["{}"] * len(vals)),
-                )
-                sql, vals = prepare_sql(
-                    sql, self._db_drv.paramstyle, list(vals.values())
-                )
-                logger.debug("Executing SQL with parameters: %s / %r", sql, vals)
-                cur.execute(sql, vals)
-                c.commit()
+        # vals is a dictionary, its keys are the column names and its
+        # values are the values to insert
+        row = (tuple(vals.keys()), tuple(vals.values()))
+        if self.batch_size <= 1:
+            self._insert_rows((row,))
+            return
+        with self._pending_lock:
+            self._pending_rows.append(row)
+            if len(self._pending_rows) < self.batch_size:
+                return
+            rows, self._pending_rows = self._pending_rows, []
+        self._insert_rows(rows)
+
+    def insert_many(self, rows):
+        """
+        Inserts each of the dictionaries in ``rows`` into the underlying table,
+        as `insert` does. Rows are written and committed in groups of
+        ``batch_size`` rows (or all at once if this Drop has no batch size),
+        after any rows buffered previously.
+        """
+        self.flush()
+        batch_size = self.batch_size if self.batch_size > 1 else None
+        rows = iter(rows)
+        while True:
+            batch = [
+                (tuple(vals.keys()), tuple(vals.values()))
+                for vals in itertools.islice(rows, batch_size)
+            ]
+            if not batch:
+                break
+            self._insert_rows(batch)
+
+    def flush(self):
+        """Writes the rows buffered by `insert` into the underlying table"""
+        with self._pending_lock:
+            rows, self._pending_rows = self._pending_rows, []
+        if rows:
+            self._insert_rows(rows)
+
+    def setCompleted(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Error while writing the buffered rows of %r", self)
+            self.setError()
+            return
+        super().setCompleted()
+
+    def _select_sql(self, columns, condition, vals):
+        # Build up SQL with optional columns and conditions
+        columns = columns or ("*",)
+        sql = ["SELECT %s FROM %s" % (",".join(columns), self._db_table)]
+        if condition:
+            sql.append(" WHERE ")
+            sql.append(condition)
+        return prepare_sql("".join(sql), self._db_drv.paramstyle, vals)
 
     def select(self, columns=None, condition=None, vals=()):
         """
@@ -112,17 +295,11 @@ class RDBMSDrop(DataDROP):
         in which case a list of ``vals`` to be applied as query parameters can
         also be given.
         """
+        self.flush()
         with self._connection() as c:
             with self._cursor(c) as cur:
-                # Build up SQL with optional columns and conditions
-                columns = columns or ("*",)
-                sql = ["SELECT %s FROM %s" % (",".join(columns), self._db_table)]
-                if condition:
-                    sql.append(" WHERE ")
-                    sql.append(condition)
-
                 # Go, go, go!
-                sql, vals = prepare_sql("".join(sql), self._db_drv.paramstyle, vals)
+                sql, vals = self._select_sql(columns, condition, vals)
                 logger.debug("Executing SQL with parameters: %s / %r", sql, vals)
                 cur.execute(sql, vals)
                 if cur.description:
@@ -132,12 +309,34 @@ class RDBMSDrop(DataDROP):
                 self._querylog.append((sql, vals, ret))
                 return ret
 
+    def iselect(self, columns=None, condition=None, vals=(), arraysize=1000):
+        """
+        Like `select`, but yields the selected rows one by one as they are
+        fetched from the database, ``arraysize`` rows at a time, instead of
+        fetching the whole result set in memory. The rows are not kept in this
+        Drop's query log.
+        """
+        self.flush()
+        with self._connection() as c:
+            with self._cursor(c) as cur:
+                sql, vals = self._select_sql(columns, condition, vals)
+                logger.debug("Executing SQL with parameters: %s / %r", sql, vals)
+                cur.execute(sql, vals)
+                self._querylog.append((sql, vals, None))
+                if not cur.description:
+                    return
+                cur.arraysize = arraysize
+                rows = cur.fetchmany()
+                while rows:
+                    yield from rows
+                    rows = cur.fetchmany()
+
     @property
     def dataURL(self) -> str:
         return "rdbms://%s/%s/%r" % (
             self._db_drv.__name__,
             self._db_table,
-            self._db_params,
+            self.dbparams,
         )
 
     # Override
@@ -22,8 +22,12 @@
 """
 Drops that interact with S3
 """
+import collections
+import contextlib
+import threading
 from asyncio.log import logger
-from io import BytesIO
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple
 
 from overrides import overrides
@@ -31,6 +35,7 @@ from overrides import overrides
 try:
     import boto3
     import botocore
+    import botocore.config
 
 except ImportError:
     logger.warning("BOTO bindings are not available")
@@ -44,10 +49,43 @@ from dlg.meta import (
     dlg_streaming_input,
     dlg_string_param,
     dlg_list_param,
+    dlg_float_param,
+    dlg_int_param,
 )
 
 # from dlg.named_port_utils import identify_named_ports, check_ports_dict
 
+# S3 multipart upload limits
+_MIN_PART_SIZE = 5 * 1024**2
+_MAX_PART_SIZE = 5 * 1024**3
+_MAX_PARTS = 10000
+
+# Parts are kept under this size when the object size is known, unless that
+# would need more than _MAX_PARTS parts
+_MAX_PREFERRED_PART_SIZE = 64 * 1024**2
+_PREFERRED_PARTS = 1000
+
+# Number of parts after which the part size doubles when the object size is
+# not known, so that up to ~5 TB can be written without exceeding _MAX_PARTS
+_PART_GROWTH_INTERVAL = 1000
+
+_READ_CHUNK_SIZE = 8 * 1024**2
+_DEFAULT_MAX_WORKERS = 4
+
+
+def _part_size(expected_size: int) -> int:
+    """
+    Returns the size of the parts used to upload an object of
+    `expected_size` bytes, or of unknown size if `expected_size` is not positive
+    """
+    if expected_size <= 0:
+        return _MIN_PART_SIZE
+    size = min(-(-expected_size // _PREFERRED_PARTS), _MAX_PREFERRED_PART_SIZE)
+    size = max(size, -(-expected_size // _MAX_PARTS), _MIN_PART_SIZE)
+    # Round up to whole MBs
+    size = -(-size // 1024**2) * 1024**2
+    return min(size, _MAX_PART_SIZE)
+
 
 ##
 # @brief S3
@@ -61,6 +99,7 @@ from dlg.meta import (
 # @param Key /String/ComponentParameter/NoPort/ReadWrite//False/False/The S3 object key
 # @param profile_name /String/ComponentParameter/NoPort/ReadWrite//False/False/The S3 profile name
 # @param endpoint_url /String/ComponentParameter/NoPort/ReadWrite//False/False/The URL exposing the S3 REST API
+# @param max_concurrency 4/Integer/ComponentParameter/NoPort/ReadWrite//False/False/Maximum number of parts uploaded or downloaded concurrently
 # @param dropclass dlg.data.drops.s3_drop.S3DROP/String/ComponentParameter/NoPort/ReadWrite//False/False/Drop class
 # @param base_name s3_drop/String/ComponentParameter/NoPort/ReadOnly//False/False/Base name of application class
 # @param streaming False/Boolean/ComponentParameter/NoPort/ReadWrite//False/False/Specifies whether this data component streams input and output data
@@ -89,6 +128,8 @@ class S3DROP(DataDROP):
     aws_secret_access_key = dlg_string_param("aws_secret_access_key", None)
     profile_name = dlg_string_param("profile_name", None)
     endpoint_url = dlg_string_param("endpoint_url", None)
+    data_volume = dlg_float_param("data_volume", None)
+    max_concurrency = dlg_int_param("max_concurrency", _DEFAULT_MAX_WORKERS)
 
     def initialize(self, **kwargs):
         self.keyargs = {
@@ -141,13 +182,30 @@ class S3DROP(DataDROP):
             self.Bucket,
             self.Key,
             self.endpoint_url,
-            self._expectedSize,
+            self._expected_object_size(),
+            max_workers=self.max_concurrency,
         )
 
+    def _expected_object_size(self) -> int:
+        """
+        The size of the data this DROP will hold if known, or estimated from
+        its data volume (in MB) otherwise, used to size its upload parts
+        """
+        if self._expectedSize > 0:
+            return self._expectedSize
+        if self.data_volume and self.data_volume > 0:
+            return int(self.data_volume * 1024**2)
+        return -1
+
 
 class S3IO(DataIO):
     """
     IO class for the S3 Drop
+
+    Data written into this IO is gathered into part-sized buffers that are
+    uploaded concurrently as parts of a multipart upload, while reads are served
+    from ranged GETs issued ahead of the reader. In both cases at most
+    ``max_workers`` requests are in flight at any time.
     """
 
     _desc = None
@@ -161,6 +219,7 @@ class S3IO(DataIO):
         Key=None,
         endpoint_url=None,
         expectedSize=-1,
+        max_workers=_DEFAULT_MAX_WORKERS,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -183,11 +242,12 @@ class S3IO(DataIO):
         self._profile_name = profile_name
         self._bucket = Bucket
         self._key = Key
+        self._max_workers = max(1, max_workers)
         self._s3_endpoint_url = endpoint_url
         self._s3 = self._get_s3_connection()
         self.url = f"{endpoint_url}/{Bucket}/{Key}"
         self._expectedSize = expectedSize
-        self._buffer = b""
+        self._executor = None
         if self._mode == 1:
             try:
                 self._s3Stream = self._open()
@@ -199,22 +259,41 @@ class S3IO(DataIO):
     def _get_s3_connection(self):
         s3 = None
         if self._s3 is None:
+            # Parts are uploaded and downloaded from several threads at once,
+            # each of which needs its own connection
+            config = botocore.config.Config(
+                max_pool_connections=max(10, self._max_workers)
+            )
             if self._profile_name is not None or (
                 self._s3_access_key_id is not None
                 and self._s3_secret_access_key is not None
             ):
                 logger.debug("Opening boto3 session")
-                session = boto3.Session(profile_name=self._profile_name)
+                session = boto3.Session(
+                    aws_access_key_id=self._s3_access_key_id,
+                    aws_secret_access_key=self._s3_secret_access_key,
+                    profile_name=self._profile_name,
+                )
                 s3 = session.client(
                     service_name="s3",
                     endpoint_url=self._s3_endpoint_url,
+                    config=config,
                 )
             else:
-                s3 = boto3.resource("s3")
+                s3 = boto3.client(
+                    "s3", endpoint_url=self._s3_endpoint_url, config=config
+                )
         else:
             s3 = self._s3
         return s3
 
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="S3IO"
+            )
+        return self._executor
+
     def _open(self, **kwargs):
         logger.debug("Opening S3 object %s in mode %s", self._key, self._mode)
         if self._mode == OpenMode.OPEN_WRITE:
@@ -228,62 +307,143 @@ class S3IO(DataIO):
                     self._s3.create_bucket(Bucket=self._bucket)
                 except botocore.exceptions.ClientError as e:
                     raise e
-            resp = self._s3.create_multipart_upload(
-                Bucket=self._bucket,
-                Key=self._key,
-            )
-            self._uploadId = resp["UploadId"]
-            self._buffer = b""
+            # The multipart upload is only created once the first part is
+            # full; smaller objects are sent with a single PUT on close
+            self._uploadId = None
+            self._partSize = _part_size(self._expectedSize)
+            self._buffer = bytearray(self._partSize)
+            self._buffered = 0
+            self._freeBuffers = []
             self._written = 0
             self._partNo = 1
-            self._parts = {"Parts": []}
+            self._parts = []
+            self._uploads = []
+            self._uploadError = None
+            # Bounds the number of parts held in memory: the one being filled
+            # plus those queued or being uploaded
+            self._uploadSlots = threading.BoundedSemaphore(2 * self._max_workers)
             return self._s3
         else:
-            s3Object = self._s3.get_object(Bucket=self._bucket, Key=self._key)
-            self._desc = s3Object["Body"]
-        return s3Object["Body"]
+            self._objectSize = self._get_object_head()["ContentLength"]
+            self._readChunk = memoryview(b"")
+            self._nextRange = 0
+            self._readahead = collections.deque()
+            self._fill_readahead()
+        return self._s3
+
+    def _get_range(self, start, end):
+        s3Object = self._s3.get_object(
+            Bucket=self._bucket, Key=self._key, Range=f"bytes={start}-{end - 1}"
+        )
+        with contextlib.closing(s3Object["Body"]) as body:
+            return body.read()
+
+    def _fill_readahead(self):
+        executor = self._get_executor()
+        while (
+            len(self._readahead) < self._max_workers
+            and self._nextRange < self._objectSize
+        ):
+            start = self._nextRange
+            end = min(start + _READ_CHUNK_SIZE, self._objectSize)
+            self._readahead.append(executor.submit(self._get_range, start, end))
+            self._nextRange = end
+
+    def _next_chunk(self):
+        if not self._readahead:
+            return False
+        self._readChunk = memoryview(self._readahead.popleft().result())
+        self._fill_readahead()
+        return True
 
     @overrides
     def _read(self, count=-1, **kwargs):
         # Read data from S3 and give it back to our reader
-        if not self._desc:
-            self._desc = self._open()
-        if count != -1:
-            return self._desc.read(count)
-        else:
-            return self._desc.read()
-
-    def _writeBuffer2S3(self, write_buffer=b""):
+        if not self._readChunk and not self._next_chunk():
+            return b""
+        if 0 <= count <= len(self._readChunk):
+            data = bytes(self._readChunk[:count])
+            self._readChunk = self._readChunk[count:]
+            return data
+        data = bytearray()
+        while count < 0 or len(data) < count:
+            if not self._readChunk and not self._next_chunk():
+                break
+            n = len(self._readChunk)
+            if count >= 0:
+                n = min(n, count - len(data))
+            data += self._readChunk[:n]
+            self._readChunk = self._readChunk[n:]
+        return bytes(data)
+
+    def _upload_part(self, part_no, buf, nbytes):
         try:
-            with BytesIO(write_buffer) as f:
-                self._s3.upload_part(
-                    Body=f,
-                    Bucket=self._bucket,
-                    Key=self._key,
-                    UploadId=self._uploadId,
-                    PartNumber=self._partNo,
-                )
+            # Only the last part is smaller than its buffer
+            body = buf if nbytes == len(buf) else bytes(memoryview(buf)[:nbytes])
+            resp = self._s3.upload_part(
+                Body=body,
+                Bucket=self._bucket,
+                Key=self._key,
+                UploadId=self._uploadId,
+                PartNumber=part_no,
+            )
             logger.debug(
-                "Wrote %d bytes part %d to S3: %s",
-                len(write_buffer),
-                self._partNo,
-                self.url,
+                "Wrote %d bytes part %d to S3: %s", nbytes, part_no, self.url
             )
-            self._partNo += 1
-            self._written += len(write_buffer)
-        except botocore.exceptions.ClientError as e:
-            logger.error("Writing to S3 failed")
-            return -1
+            return {"ETag": resp["ETag"], "PartNumber": part_no}
+        except Exception as e:
+            # Stops further writes, the upload is aborted on close
+            logger.error("Writing part %d to S3 failed", part_no)
+            self._uploadError = e
+            raise
+        finally:
+            if len(buf) == self._partSize:
+                self._freeBuffers.append(buf)
+            self._uploadSlots.release()
+
+    def _writeBuffer2S3(self):
+        """Hands the current buffer over to the upload threads"""
+        if self._uploadId is None:
+            resp = self._s3.create_multipart_upload(
+                Bucket=self._bucket,
+                Key=self._key,
+            )
+            self._uploadId = resp["UploadId"]
+
+        # Wait for a free slot before queueing more data
+        self._uploadSlots.acquire()
+        self._uploads.append(
+            self._get_executor().submit(
+                self._upload_part, self._partNo, self._buffer, self._buffered
+            )
+        )
+        self._written += self._buffered
+        self._partNo += 1
+
+        # S3 allows at most 10000 parts, so keep growing them if we didn't
+        # know beforehand how much data would come
+        if self._partNo % _PART_GROWTH_INTERVAL == 0:
+            self._partSize = min(self._partSize * 2, _MAX_PART_SIZE)
+            self._freeBuffers = []
+        try:
+            self._buffer = self._freeBuffers.pop()
+        except IndexError:
+            self._buffer = bytearray(self._partSize)
+        self._buffered = 0
 
     @overrides
     def _write(self, data, **kwargs) -> int:
         """ """
-        self._buffer += data
-        PART_SIZE = 5 * 1024**2
-        logger.debug("Length of S3 buffer: %d", len(self._buffer))
-        if len(self._buffer) >= PART_SIZE:
-            self._writeBuffer2S3(self._buffer[:PART_SIZE])
-            self._buffer = self._buffer[PART_SIZE:]
+        if self._uploadError is not None:
+            raise self._uploadError
+        view = memoryview(data).cast("B")
+        while view:
+            n = min(len(view), self._partSize - self._buffered)
+            self._buffer[self._buffered : self._buffered + n] = view[:n]
+            self._buffered += n
+            view = view[n:]
+            if self._buffered == self._partSize:
+                self._writeBuffer2S3()
         return len(data)  # we return the length of what we have received
         # to keep the client happy
 
@@ -298,36 +458,65 @@ class S3IO(DataIO):
             return object_head["ContentLength"]
         return -1
 
-    @overrides
-    def _close(self, **kwargs):
-        if self._mode == OpenMode.OPEN_WRITE:
-            if (
-                len(self._buffer) > 0
-            ):  # write, if there is still something in the buffer
-                self._writeBuffer2S3(self._buffer)
-            # complete multipart upload and cleanup
-            res = self._s3.list_parts(
-                Bucket=self._bucket, Key=self._key, UploadId=self._uploadId
+    def _complete_upload(self):
+        if self._uploadId is None:
+            self._s3.put_object(
+                Body=bytes(memoryview(self._buffer)[: self._buffered]),
+                Bucket=self._bucket,
+                Key=self._key,
             )
-            parts = [
-                {"ETag": p["ETag"], "PartNumber": p["PartNumber"]} for p in res["Parts"]
-            ]
+            self._written += self._buffered
+            return
+        try:
+            if self._uploadError is not None:
+                raise self._uploadError
+            if self._buffered > 0:  # write, if there is still something in the buffer
+                self._writeBuffer2S3()
+            parts = [upload.result() for upload in self._uploads]
             # TODO: Check checksum!
-            res = self._s3.complete_multipart_upload(
+            self._s3.complete_multipart_upload(
                 Bucket=self._bucket,
                 Key=self._key,
                 UploadId=self._uploadId,
                 MultipartUpload={"Parts": parts},
             )
-            del self._buffer
-            logger.info(
-                "Wrote a total of %.1f MB to %s",
-                self._written / (1024**2),
-                self.url,
+        except Exception:
+            self._abort_upload()
+            raise
+
+    def _abort_upload(self):
+        # Parts still being uploaded would otherwise be stored after the abort
+        futures.wait(self._uploads)
+        try:
+            self._s3.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._uploadId
             )
+        except Exception:
+            logger.exception("Aborting the upload of %s failed", self.url)
 
-        self._desc.close()
-        del self._s3
+    @overrides
+    def _close(self, **kwargs):
+        try:
+            if self._mode == OpenMode.OPEN_WRITE:
+                self._complete_upload()
+                del self._buffer
+                self._freeBuffers = []
+                logger.info(
+                    "Wrote a total of %.1f MB to %s",
+                    self._written / (1024**2),
+                    self.url,
+                )
+            else:
+                for download in self._readahead:
+                    download.cancel()
+                self._readahead.clear()
+                self._readChunk = memoryview(b"")
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            self._desc.close()
+            del self._s3
 
     def _exists(self) -> Tuple[bool, bool]:
         """
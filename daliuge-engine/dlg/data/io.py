@@ -236,21 +236,28 @@ class ErrorIO(DataIO):
 class MemoryIO(DataIO):
     """
     A DataIO class that reads/write from/into the BytesIO object given at
-    construction time
+    construction time.
+
+    Readers share a read-only view of the underlying buffer. When opened with
+    `zerocopy=True` they are handed memoryview slices of it instead of copies
+    of the data.
     """
 
-    _desc: io.BytesIO  # TODO: This might actually be a problem
+    _desc: Union[io.BytesIO, memoryview]
 
     def __init__(self, buf: io.BytesIO, **kwargs):
         super().__init__()
         self._buf = buf
+        self._pos = 0
+        self._zerocopy = False
 
-    def _open(self, **kwargs):
+    def _open(self, zerocopy=False, **kwargs):
         if self._mode == OpenMode.OPEN_WRITE:
             return self._buf
         elif self._mode == OpenMode.OPEN_READ:
-            # TODO: potentially wasteful copy
-            return io.BytesIO(self._buf.getbuffer())
+            self._pos = 0
+            self._zerocopy = zerocopy
+            return self._buf.getbuffer().toreadonly()
         else:
             raise ValueError()
 
@@ -261,12 +268,18 @@ class MemoryIO(DataIO):
 
     @overrides
     def _read(self, count=65536, **kwargs):
-        return self._desc.read(count)
+        start = self._pos
+        end = len(self._desc)
+        if count >= 0:
+            end = min(start + count, end)
+        self._pos = end
+        chunk = self._desc[start:end]
+        return chunk if self._zerocopy else chunk.tobytes()
 
     @overrides
     def _close(self, **kwargs):
         if self._mode == OpenMode.OPEN_READ:
-            self._desc.close()
+            self._desc.release()
         # If we're writing we don't close the descriptor because it's our
         # self._buf, which won't be readable afterwards
 
@@ -283,12 +296,16 @@ class MemoryIO(DataIO):
 
     @overrides
     def delete(self):
-        self._buf.close()
+        try:
+            self._buf.close()
+        except BufferError:
+            # Readers still hold views of our data, which will be freed
+            # together with the last of them
+            logger.debug("Memory buffer still referenced by readers, not closing it")
 
     @overrides
     def buffer(self) -> memoryview:
-        # TODO: This may also be an issue
-        return self._buf.getbuffer()
+        return self._buf.getbuffer().toreadonly()
 
 
 # pylint: disable=possibly-used-before-assignment
@@ -317,15 +334,11 @@ class SharedMemoryIO(DataIO):
     def _write(self, data, **kwargs) -> int:
         total_size = len(data) + self._written
         if total_size > self._buf.size:
-            self._buf.resize(total_size)
-            self._buf.buf[self._written: total_size] = data
-            self._written = total_size
-        else:
-            self._buf.buf[self._written: total_size] = data
-            self._written = total_size
-            self._buf.resize(total_size)
-            # It may be inefficient to resize many times, but assuming data is written 'once' this is
-            # might be tolerable and guarantees that the size of the underlying buffer is tight.
+            # Grow geometrically so writing N bytes costs amortised O(N); the
+            # block is trimmed down to the written size once, on close
+            self._buf.resize(max(total_size, 2 * self._buf.size))
+        self._buf.buf[self._written: total_size] = data
+        self._written = total_size
         return len(data)
 
     @overrides
@@ -333,23 +346,30 @@ class SharedMemoryIO(DataIO):
         if self._pos == self._buf.size:
             return None
         start = self._pos
-        end = self._pos + count
-        end = min(end, self._buf.size)
-        out = self._buf.buf[start:end]
+        end = self._buf.size
+        if count >= 0:
+            end = min(start + count, end)
+        out = self._buf.buf[start:end].toreadonly()
         self._pos = end
         return out
 
     @overrides
     def _close(self, **kwargs):
-        if self._mode == OpenMode.OPEN_WRITE:
+        if self._mode == OpenMode.OPEN_WRITE and self._written != self._buf.size:
             self._buf.resize(self._written)
         self._buf.close()
         self._buf = None
 
     @overrides
     def _size(self, **kwargs) -> int:
+        if self._mode == OpenMode.OPEN_WRITE:
+            return self._written
         return self._buf.size
 
+    @overrides
+    def buffer(self) -> memoryview:
+        return self._buf.buf.toreadonly()
+
     @overrides
     def exists(self) -> bool:
         return self._buf is not None
@@ -23,7 +23,8 @@
 Module containing the core DROP classes.
 """
 import ast
-import inspect
+import copy
+import functools
 import logging
 import os
 import threading
@@ -104,19 +105,107 @@ logger = logging.getLogger(__name__)
 
 
 class ListAsDict(list):
-    """A list that adds drop UIDs to a set as they get appended to the list"""
+    """
+    A list that adds drop UIDs to a set as they get appended to the list. The
+    set is only created when the first drop is appended.
+    """
+
+    __slots__ = ("set",)
 
-    def __init__(self, my_set):
-        self.set = my_set
+    def __init__(self):
+        self.set = None
 
     def append(self, drop):
         super(ListAsDict, self).append(drop)
+        if self.set is None:
+            self.set = set()
         self.set.add(drop.uid)
 
+    def has_uid(self, uid):
+        return self.set is not None and uid in self.set
+
+
+class _LazyLock(object):
+    """
+    A lock attribute that is created on first use. The lock is then stored in
+    the instance's dictionary, where it is found directly from then on.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __set_name__(self, owner, name):
+        self._name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        # setdefault is atomic, so racing threads get the same lock
+        return obj.__dict__.setdefault(self._name, self._factory())
+
 
 track_current_drop = object_tracking("drop")
 
 
+@functools.lru_cache(maxsize=1024)
+def _cached_literal_eval(value):
+    return ast.literal_eval(value)
+
+
+def _literal_eval(value):
+    """
+    Memoised version of ast.literal_eval; since the same literals are found in
+    many DROPs of a graph each caller gets its own copy of the cached result
+    """
+    return copy.deepcopy(_cached_literal_eval(value))
+
+
+def _scalar_converter(convert):
+    def converter(value):
+        if value is not None and value != "":
+            value = convert(value)
+        return value
+
+    return converter
+
+
+def _literal_converter(attr_name, param_type, expected_type):
+    def converter(value):
+        if isinstance(value, str):
+            value = _literal_eval(value) if value else expected_type()
+        if value is not None and not isinstance(value, expected_type):
+            raise Exception(
+                f"{param_type} {attr_name} is not a {expected_type.__name__}. "
+                f"Type is {type(value)}"
+            )
+        return value
+
+    return converter
+
+
+def _get_param_converter(attr_name, member):
+    """
+    Returns the function converting the values given for the dlg parameter
+    `member` into the value of the `attr_name` attribute, or None if `member`
+    is not a dlg parameter.
+    """
+    if isinstance(member, dlg_float_param):
+        return _scalar_converter(float)
+    elif isinstance(member, dlg_bool_param):
+        return _scalar_converter(bool)
+    elif isinstance(member, dlg_int_param):
+        return _scalar_converter(int)
+    elif isinstance(member, dlg_string_param):
+        return _scalar_converter(str)
+    elif isinstance(member, dlg_enum_param):
+        return _scalar_converter(member.cls)
+    elif isinstance(member, dlg_list_param):
+        return _literal_converter(attr_name, "dlg_list_param", list)
+    elif isinstance(member, dlg_dict_param):
+        return _literal_converter(attr_name, "dlg_dict_param", dict)
+    return None
+
+
 # ===============================================================================
 # DROP classes follow
 # ===============================================================================
@@ -168,27 +257,69 @@ class AbstractDROP(EventFirer, EventHandler):
     _env_var_matcher = re.compile(r"\$[A-z|\d]+\..+")
     _dlg_var_matcher = re.compile(r"\$DLG_.+")
 
+    # The attributes all DROPs have are kept in slots rather than in the
+    # instance's dictionary, which then only holds those of subclasses
+    _slots = (
+        "_oid",
+        "_uid",
+        "_type",
+        "_dlg_session_id",
+        "name",
+        "lg_key",
+        "_consumers",
+        "_producers",
+        "_streamingConsumers",
+        "_finishedProducers",
+        "_refCount",
+        "_location",
+        "_parent",
+        "_status",
+        "_phase",
+        "_targetPhase",
+        "_checksum",
+        "_checksumType",
+        "_size",
+        "_committed",
+        "_merkleRoot",
+        "_merkleTree",
+        "_merkleData",
+        "_reproducibility",
+        "_wio",
+        "_rios",
+        "_executionMode",
+        "_node",
+        "_dataIsland",
+        "_expireAfterUse",
+        "_expirationDate",
+        "_expectedSize",
+        "_persist",
+        "_parameters",
+    )
+    __slots__ = _slots + ("_listeners",)
+
+    # Locks are only created if they are used
+    _finishedProducersLock = _LazyLock(threading.Lock)
+    _refLock = _LazyLock(threading.Lock)
+    _statusLock = _LazyLock(threading.RLock)
+
     _known_locks = ("_finishedProducersLock", "_refLock")
     _known_rlocks = ("_statusLock",)
 
     def __getstate__(self):
         state = self.__dict__.copy()
+        for attr_name in AbstractDROP._slots:
+            try:
+                state[attr_name] = getattr(self, attr_name)
+            except AttributeError:
+                pass
         for attr_name in AbstractDROP._known_locks + AbstractDROP._known_rlocks:
-            del state[attr_name]
-        del state["_listeners"]
+            state.pop(attr_name, None)
         return state
 
     def __setstate__(self, state):
-        for attr_name in AbstractDROP._known_locks:
-            state[attr_name] = threading.Lock()
-        for attr_name in AbstractDROP._known_rlocks:
-            state[attr_name] = threading.RLock()
-
-        self.__dict__.update(state)
-
-        import collections
-
-        self._listeners = collections.defaultdict(list)
+        for attr_name, value in state.items():
+            setattr(self, attr_name, value)
+        self._listeners = None
 
     @track_current_drop
     def __init__(self, oid, uid, **kwargs):
@@ -244,16 +375,13 @@ class AbstractDROP(EventFirer, EventHandler):
         # Obviously the normal way of doing this is using a dictionary, but
         # for the time being and while testing the integration with TBU's ceda
         # library we need to expose a list.
-        self._consumers_uids = set()
-        self._consumers = ListAsDict(self._consumers_uids)
-        self._producers_uids = set()
-        self._producers = ListAsDict(self._producers_uids)
+        self._consumers = ListAsDict()
+        self._producers = ListAsDict()
 
         # Set holding the state of the producers that have finished their
         # execution. Once all producers have finished, this DROP moves
         # itself to the COMPLETED state
         self._finishedProducers = []
-        self._finishedProducersLock = threading.Lock()
 
         # Streaming consumers are objects that consume the data written in
         # this DROP *as it gets written*, and therefore don't have to
@@ -264,15 +392,12 @@ class AbstractDROP(EventFirer, EventHandler):
         # not because it's technically impossible.
         # See comment above in self._consumers/self._producers for separate set
         # with uids
-        self._streamingConsumers_uids = set()
-        self._streamingConsumers = ListAsDict(self._streamingConsumers_uids)
+        self._streamingConsumers = ListAsDict()
 
         self._refCount = 0
-        self._refLock = threading.Lock()
         self._location = None
         self._parent = None
         self._status = None
-        self._statusLock = threading.RLock()
 
         # Current and target phases.
         # Phases represent the resiliency of data. An initial phase of PLASMA
@@ -372,121 +497,68 @@ class AbstractDROP(EventFirer, EventHandler):
             self._expireAfterUse = False
 
         # Useful to have access to all EAGLE parameters without a prior knowledge
-        self._parameters = dict(kwargs)
+        # kwargs is our own copy, so there is no need to copy it again
+        self._parameters = kwargs
         self.autofill_environment_variables()
-        kwargs.update(self._parameters)
         # Sub-class initialization; mark ourselves as INITIALIZED after that
         self.initialize(**kwargs)
         self._status = (
             DROPStates.INITIALIZED
         )  # no need to use synchronised self.status here
 
-    _members_cache = {}
+    _binding_plans = {}
 
-    def _get_members(self):
+    def _get_binding_plan(self):
+        """
+        Returns the list of (name, converter, default) tuples used to bind the
+        dlg parameters declared by this DROP's class (and its parents) to
+        instance attributes. Plans are computed once per class.
+        """
         cls = self.__class__
-        if cls not in AbstractDROP._members_cache:
-            members = [
-                (name, val)
-                for c in cls.__mro__[:-1]
-                for name, val in vars(c).items()
-                if not (inspect.isfunction(val) or isinstance(val, property))
-            ]
-            # logger.info("GOT MEMBEEEERS: %r", members)
-
-            AbstractDROP._members_cache[cls] = members
-        return AbstractDROP._members_cache[cls]
+        plan = AbstractDROP._binding_plans.get(cls)
+        if plan is None:
+            # Parameters declared in parent classes are bound after (and thus
+            # override) those re-declared by subclasses with the same name
+            params = {}
+            for c in cls.__mro__[:-1]:
+                for name, val in vars(c).items():
+                    converter = _get_param_converter(name, val)
+                    if converter is not None:
+                        params.pop(name, None)
+                        params[name] = (name, converter, val.default_value)
+            plan = list(params.values())
+            AbstractDROP._binding_plans[cls] = plan
+        return plan
 
     def _extract_attributes(self, **kwargs):
         """
         Extracts component and app params then assigns them to class instance attributes.
         Component params take pro
         """
-
-        def get_param_value(attr_name, default_value):
-            has_component_param = attr_name in kwargs
-            has_app_param = (
-                "applicationArgs" in kwargs and attr_name in kwargs["applicationArgs"]
-            )
-            param = default_value
-            if has_component_param and has_app_param:
-                logger.warning(
-                    f"Drop has both component and app param {attr_name}. Using component param."
-                )
-            if has_component_param:
-                param = kwargs.get(attr_name)
-            elif has_app_param:
-                if kwargs["applicationArgs"].get(attr_name).usage in [
-                    "InputPort",
-                    "OutputPort",
-                    "InputOutput",
-                ]:
-                    # inp = kwargs["input"]
-                    # param = pickle.loads(
-                    #     droputils.allDropContents()
-                    #     )
-                    pass
-                else:
-                    param = kwargs["applicationArgs"].get(attr_name).value
-            return param
-
-        # Take a class dlg defined parameter class attribute and create an instanced attribute on object
-        for attr_name, member in self._get_members():
-            if isinstance(member, dlg_float_param):
-                value = get_param_value(attr_name, member.default_value)
-                if value is not None and value != "":
-                    value = float(value)
-            elif isinstance(member, dlg_bool_param):
-                value = get_param_value(attr_name, member.default_value)
-                if value is not None and value != "":
-                    value = bool(value)
-            elif isinstance(member, dlg_int_param):
-                value = get_param_value(attr_name, member.default_value)
-                if value is not None and value != "":
-                    value = int(value)
-            elif isinstance(member, dlg_string_param):
-                value = get_param_value(attr_name, member.default_value)
-                if value is not None and value != "":
-                    value = str(value)
-            elif isinstance(member, dlg_enum_param):
-                value = get_param_value(attr_name, member.default_value)
-                if value is not None and value != "":
-                    value = member.cls(value)
-            elif isinstance(member, dlg_list_param):
-                value = get_param_value(attr_name, member.default_value)
-                if isinstance(value, str):
-                    if value == "":
-                        value = []
-                    else:
-                        value = ast.literal_eval(value)
-                if value is not None and not isinstance(value, list):
-                    raise Exception(
-                        f"dlg_list_param {attr_name} is not a list. Type is {type(value)}"
+        app_args = kwargs.get("applicationArgs") or {}
+        for attr_name, converter, default_value in self._get_binding_plan():
+            value = default_value
+            if attr_name in kwargs:
+                if attr_name in app_args:
+                    logger.warning(
+                        f"Drop has both component and app param {attr_name}. Using component param."
                     )
-            elif isinstance(member, dlg_dict_param):
-                value = get_param_value(attr_name, member.default_value)
-                if isinstance(value, str):
-                    if value == "":
-                        value = {}
-                    else:
-                        value = ast.literal_eval(value)
-                if value is not None and not isinstance(value, dict):
-                    raise Exception(
-                        "dlg_dict_param {} is not a dict. It is a {}".format(
-                            attr_name, type(value)
-                        )
-                    )
-            else:
-                continue
-            setattr(self, attr_name, value)
+                value = kwargs[attr_name]
+            elif attr_name in app_args:
+                app_arg = app_args[attr_name]
+                if app_arg.usage not in ("InputPort", "OutputPort", "InputOutput"):
+                    value = app_arg.value
+            setattr(self, attr_name, converter(value))
 
     def _popArg(self, kwargs, key, default):
         """
         Pops the specified key arg from kwargs else returns the default
         """
-        if key not in kwargs:
-            logger.debug("Defaulting %s to %s in %r", key, str(default), self)
-        return kwargs.pop(key, default)
+        if key in kwargs:
+            return kwargs.pop(key)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Defaulting %s to %s in %r", key, default, self)
+        return default
 
     def __hash__(self):
         return hash(self._uid)
@@ -517,9 +589,12 @@ class AbstractDROP(EventFirer, EventHandler):
         discovered.
         """
         for param_key, param_val in self.parameters.items():
-            if self._env_var_matcher.fullmatch(str(param_val)):
+            # Both syntaxes start with "$"; skip everything else quickly
+            if not isinstance(param_val, str) or not param_val.startswith("$"):
+                continue
+            if self._env_var_matcher.fullmatch(param_val):
                 self.parameters[param_key] = self.get_environment_variable(param_val)
-            if self._dlg_var_matcher.fullmatch(str(param_val)):
+            if self._dlg_var_matcher.fullmatch(param_val):
                 self.parameters[param_key] = getDlgVariable(param_val)
 
     def get_environment_variable(self, key: str):
@@ -920,7 +995,7 @@ class AbstractDROP(EventFirer, EventHandler):
         # An object cannot be a normal and streaming consumer at the same time,
         # see the comment in the __init__ method
         cuid = consumer.uid
-        if cuid in self._streamingConsumers_uids:
+        if self._streamingConsumers.has_uid(cuid):
             raise InvalidRelationshipException(
                 DROPRel(consumer, DROPLinkType.CONSUMER, self),
                 "Consumer already registered as a streaming consumer",
@@ -928,7 +1003,7 @@ class AbstractDROP(EventFirer, EventHandler):
 
         # Add if not already present
         # Add the reverse reference too automatically
-        if cuid in self._consumers_uids:
+        if self._consumers.has_uid(cuid):
             return
         # logger.debug("Adding new consumer %r to %r", consumer.oid, self.oid)
         self._consumers.append(consumer)
@@ -973,7 +1048,7 @@ class AbstractDROP(EventFirer, EventHandler):
 
         # Don't add twice
         puid = producer.uid
-        if puid in self._producers_uids:
+        if self._producers.has_uid(puid):
             return
 
         self._producers.append(producer)
@@ -1059,14 +1134,14 @@ class AbstractDROP(EventFirer, EventHandler):
         # An object cannot be a normal and streaming streamingConsumer at the same time,
         # see the comment in the __init__ method
         scuid = streamingConsumer.uid
-        if scuid in self._consumers_uids:
+        if self._consumers.has_uid(scuid):
             raise InvalidRelationshipException(
                 DROPRel(streamingConsumer, DROPLinkType.STREAMING_CONSUMER, self),
                 "Consumer is already registered as a normal consumer",
             )
 
         # Add if not already present
-        if scuid in self._streamingConsumers_uids:
+        if self._streamingConsumers.has_uid(scuid):
             return
         logger.debug(
             "Adding new streaming streaming consumer for %r: %s",
@@ -26,12 +26,13 @@ to avoid cyclic imports.
 
 import io
 import logging
+import math
 import pickle
 import re
 from typing import Any
 import numpy as np
 
-from dlg.data.io import OpenMode
+from dlg.data.io import MemoryIO, OpenMode, SharedMemoryIO
 
 from typing import TYPE_CHECKING
 
@@ -53,10 +54,30 @@ def save_pickle(drop: "DataDROP", data: Any):
     pickle.dump(data, drop)
 
 
+def _in_local_memory(drop: "DataDROP") -> bool:
+    """Whether the data of `drop` is held in memory by this process"""
+    # Imported here to avoid cyclic imports
+    from dlg.data.drops.data_base import DataDROP
+
+    return isinstance(drop, DataDROP) and isinstance(
+        drop.getIO(), (MemoryIO, SharedMemoryIO)
+    )
+
+
 def load_pickle(drop: "DataDROP") -> Any:
     """Loads a pkl formatted data object stored in a DataDROP.
     Note: does not support streaming mode.
+
+    Drops holding their data in memory are unpickled straight from a read-only
+    view of it, without any intermediate copies.
     """
+    if _in_local_memory(drop):
+        desc = drop.open(zerocopy=True)
+        try:
+            return pickle.loads(drop.read(desc, -1) or b"")
+        finally:
+            drop.close(desc)
+
     buf = io.BytesIO()
     desc = drop.open()
     while True:
@@ -86,14 +107,50 @@ def save_numpy(drop: "DataDROP", ndarray: np.ndarray):
     save_npy(drop, ndarray)
 
 
+def _npy_from_buffer(buf: memoryview, allow_pickle=False) -> np.ndarray:
+    """
+    Loads an ndarray from a buffer holding it in npy format. Arrays of plain
+    dtypes are read-only and share memory with `buf`.
+    """
+    version = np.lib.format.read_magic(io.BytesIO(buf[:8]))
+    if version == (1, 0):
+        header_len = 10 + int.from_bytes(buf[8:10], "little")
+        read_header = np.lib.format.read_array_header_1_0
+    elif version == (2, 0):
+        header_len = 12 + int.from_bytes(buf[8:12], "little")
+        read_header = np.lib.format.read_array_header_2_0
+    else:
+        return np.load(io.BytesIO(buf), allow_pickle=allow_pickle)
+
+    header = io.BytesIO(buf[:header_len])
+    np.lib.format.read_magic(header)
+    shape, fortran_order, dtype = read_header(header)
+    if dtype.hasobject:
+        return np.load(io.BytesIO(buf), allow_pickle=allow_pickle)
+
+    array = np.frombuffer(buf, dtype=dtype, count=math.prod(shape), offset=header_len)
+    if fortran_order:
+        return array.reshape(shape[::-1]).transpose()
+    return array.reshape(shape)
+
+
 def load_npy(drop: "DataDROP", allow_pickle=False) -> np.ndarray:
     """
-    Loads a numpy ndarray from a drop in npy format
+    Loads a numpy ndarray from a drop in npy format.
+
+    For drops holding their data in memory the result is a read-only array
+    sharing memory with the drop rather than a copy of it.
     """
     dropio = drop.getIO()
     dropio.open(OpenMode.OPEN_READ)
-    res = np.load(io.BytesIO(dropio.buffer()), allow_pickle=allow_pickle)
-    dropio.close()
+    try:
+        buf = dropio.buffer()
+        if isinstance(buf, memoryview):
+            res = _npy_from_buffer(buf, allow_pickle=allow_pickle)
+        else:
+            res = np.load(io.BytesIO(buf), allow_pickle=allow_pickle)
+    finally:
+        dropio.close()
     return res
 
 
@@ -22,6 +22,7 @@
 
 from collections import defaultdict
 import logging
+import threading
 from abc import ABC, abstractmethod
 from typing import Optional, Union, List, DefaultDict
 
@@ -67,11 +68,14 @@ class EventFirer(object):
 
     __ALL_EVENTS = object()
 
+    # Used to create listener tables, which are only created on subscription
+    __listeners_creation_lock = threading.Lock()
+
     def __init__(self):
         # Union string key with object to handle __ALL_EVENTS above
-        self._listeners: DefaultDict[
-            Union[str, object], List[EventHandler]
-        ] = defaultdict(list)
+        self._listeners: Optional[
+            DefaultDict[Union[str, object], List[EventHandler]]
+        ] = None
 
     def subscribe(
         self, listener: EventHandler, eventType: Optional[str] = None
@@ -88,6 +92,10 @@ class EventFirer(object):
         #     listener,
         # )
         eventType = eventType or EventFirer.__ALL_EVENTS
+        if self._listeners is None:
+            with EventFirer.__listeners_creation_lock:
+                if self._listeners is None:
+                    self._listeners = defaultdict(list)
         self._listeners[eventType].append(listener)
 
     def unsubscribe(
@@ -104,6 +112,8 @@ class EventFirer(object):
         ) if hasattr(listener, "oid") else None
 
         eventType = eventType or EventFirer.__ALL_EVENTS
+        if self._listeners is None:
+            return
         if listener in self._listeners[eventType]:
             self._listeners[eventType].remove(listener)
 
@@ -117,6 +127,9 @@ class EventFirer(object):
 
         # Which listeners should we call?
         listeners: List[EventHandler] = []
+        if self._listeners is None:
+            logger.debug("No listeners found for eventType=%s", eventType)
+            return
         if eventType in self._listeners:
             listeners += self._listeners[eventType]
         if EventFirer.__ALL_EVENTS in self._listeners:
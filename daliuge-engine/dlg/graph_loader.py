@@ -25,13 +25,14 @@ full JSON representation.
 """
 
 import collections
+import functools
 import importlib
 import logging
 
 from typing import List
 from dlg.common.reproducibility.constants import ReproducibilityFlags
 
-from . import droputils
+from . import droputils, utils
 from .apps.socket_listener import SocketListenerApp
 from .ddap_protocol import DROPRel, DROPLinkType
 from .drop import (
@@ -184,7 +185,7 @@ def check_dropspec(n, dropSpec):
         )
 
 
-def loadDropSpecs(dropSpecList):
+def loadDropSpecs(dropSpecList, reprodata=True):
     """
     Loads the DROP definitions from `dropSpectList`, checks that
     the DROPs are correctly specified, and return a dictionary containing
@@ -192,16 +193,18 @@ def loadDropSpecs(dropSpecList):
     the OID of each DROP. Unlike `readObjectGraph` and `readObjectGraphS`,
     this method doesn't actually create the DROPs themselves.
 
-    Slices off graph-wise reproducibility data for later use
+    Slices off graph-wise reproducibility data for later use, unless
+    `reprodata` is ``False``
     """
 
     # Step #1: Check the DROP specs and collect them
     dropSpecs = {}
-    reprodata = None
     if dropSpecList is None:
         raise InvalidGraphException("DropSpec is empty %r" % dropSpecList)
-    if dropSpecList[-1].get("rmode"):
+    if reprodata and dropSpecList[-1].get("rmode"):
         reprodata = dropSpecList.pop()
+    else:
+        reprodata = None
     for n, dropSpec in enumerate(dropSpecList):
         # "categoryType" and 'oid' are mandatory
         check_dropspec(n, dropSpec)
@@ -245,80 +248,242 @@ def loadDropSpecs(dropSpecList):
     return dropSpecs, reprodata
 
 
-def createGraphFromDropSpecList(dropSpecList, session=None):
-    logger.debug("Found %d DROP definitions", len(dropSpecList))
+def _dropRelationships(dropSpec):
+    """
+    Yields the (attribute, OID) pairs of all the relationships declared in
+    `dropSpec`
+    """
+    for attr in dropSpec:
+        # 1-N relationships
+        if attr in __TOMANY:
+            rels = dropSpec[attr]
+        # N-1 relationships
+        elif attr in __TOONE:
+            rels = (dropSpec[attr],)
+        else:
+            continue
+        for rel in rels:
+            oid = list(rel.keys())[0] if isinstance(rel, dict) else rel
+            yield attr, oid
 
-    # Step #1: create the actual DROPs
-    drops = collections.OrderedDict()
-    logger.info("Creating %d drops", len(dropSpecList))
-    for n, dropSpec in enumerate(dropSpecList):
-        check_dropspec(n, dropSpec)
-        #        dropType = dropSpec.pop("categoryType")
-        # backwards compatibility
-        dropType = dropSpec["categoryType"]
-        # if dropType.lower() in ["application", "app"]:
-        #     dropType = "dropclass"
-        # if dropType.lower() == "data":
-        #     dropType = "dropclass"
-
-        cf = __CREATION_FUNCTIONS[dropType.lower()]
-        session_id = session.sessionId if session else ""
-        drop = cf(dropSpec, session_id=session_id)
-        if session is not None:
-            # Now using per-drop reproducibility setting.
-            drop.reproducibility_level = ReproducibilityFlags(
-                int(dropSpec.get("reprodata", {}).get("rmode", "0"))
+
+def _linkDrops(drop, attr, lhDrop):
+    """Establishes the relationship `attr` of `drop` towards `lhDrop`"""
+
+    # 1-N relationships
+    if attr in __TOMANY:
+        link = __TOMANY[attr]
+        relFuncName = LINKTYPE_1TON_APPEND_METHOD[link]
+        try:
+            relFunc = getattr(drop, relFuncName)
+        except AttributeError:
+            logger.error(
+                '%r cannot be linked to %r due to missing method "%s"',
+                drop,
+                lhDrop,
+                relFuncName,
             )
-            # session.reprodata['rmode']
-        drops[drop.oid] = drop
+            raise
+        relFunc(lhDrop)
 
-    # Step #2: establish relationships
-    logger.info("Establishing relationships between drops")
-    for dropSpec in dropSpecList:
-        # 'oid' is mandatory
-        oid = dropSpec["oid"]
-        drop = drops[oid]
+    # N-1 relationships
+    else:
+        link = __TOONE[attr]
+        propName = LINKTYPE_NTO1_PROPERTY[link]
+        setattr(drop, propName, lhDrop)
 
-        for attr in dropSpec:
-            # 1-N relationships
-            if attr in __TOMANY:
-                link = __TOMANY[attr]
-                for rel in dropSpec[attr]:
-                    oid = list(rel.keys())[0] if isinstance(rel, dict) else rel
-                    if oid in drops:
-                        lhDrop = drops[oid]
-                    else:
-                        continue
-                    relFuncName = LINKTYPE_1TON_APPEND_METHOD[link]
-                    try:
-                        relFunc = getattr(drop, relFuncName)
-                    except AttributeError:
-                        logger.error(
-                            '%r cannot be linked to %r due to missing method "%s"',
-                            drop,
-                            lhDrop,
-                            relFuncName,
-                        )
-                        raise
-                    relFunc(lhDrop)
 
-            # N-1 relationships
-            elif attr in __TOONE:
-                link = __TOONE[attr]
-                rel = dropSpec[attr]
-                rel = list(rel.keys())[0] if isinstance(rel, dict) else rel
-                lhDrop = drops[rel]
-                propName = LINKTYPE_NTO1_PROPERTY[link]
-                setattr(drop, propName, lhDrop)
-
-    # We're done! Return the roots of the graph to the caller
-    logger.info("Calculating graph roots")
-    roots: List[AbstractDROP] = [
-        drop for drop in drops.values() if not droputils.getUpstreamObjects(drop)
-    ]
-    logger.info("%d graph roots found, bye-bye!", len(roots))
+def _linkAttribute(linkType):
+    """Returns the DROP specification attribute used for `linkType`"""
+    if linkType in __TOMANY:
+        return __TOMANY[linkType]
+    return __TOONE[linkType]
+
+
+def _isNTo1(attr):
+    return attr in __TOONE
+
+
+@functools.lru_cache(maxsize=None)
+def _getDropClass(className):
+    """
+    Returns the class named by the fully-qualified `className`. Classes are
+    looked up only once, since many DROPs in a graph share the same class.
+    """
+    parts = className.split(".")
+
+    # Support old "dfms..." package names (pre-Oct2017)
+    if parts[0] == "dfms":
+        parts[0] = "dlg"
+
+    module = importlib.import_module(".".join(parts[:-1]))
+    return getattr(module, parts[-1])
+
+
+@functools.lru_cache(maxsize=None)
+def _getStorageTypes():
+    # STORAGE_TYPES are deprecated, but here for backwards compatibility
+    STORAGE_TYPES = {
+        "Memory": InMemoryDROP,
+        "SharedMemory": SharedMemoryDROP,
+        "File": FileDROP,
+        "NGAS": NgasDROP,
+        "null": NullDROP,
+        "json": JsonDROP,
+        "ParameterSet": ParameterSetDROP,
+        "EnvironmentVariables": EnvironmentVarDROP,
+    }
+
+    try:
+        from .data.drops.s3_drop import S3DROP
+
+        STORAGE_TYPES["S3"] = S3DROP
+    except ImportError:
+        pass
+    return STORAGE_TYPES
+
+
+def _createDrop(n, dropSpec, session):
+    check_dropspec(n, dropSpec)
+    #        dropType = dropSpec.pop("categoryType")
+    # backwards compatibility
+    dropType = dropSpec["categoryType"]
+    # if dropType.lower() in ["application", "app"]:
+    #     dropType = "dropclass"
+    # if dropType.lower() == "data":
+    #     dropType = "dropclass"
+
+    cf = __CREATION_FUNCTIONS[dropType.lower()]
+    session_id = session.sessionId if session else ""
+    drop = cf(dropSpec, session_id=session_id)
+    if session is not None:
+        # Now using per-drop reproducibility setting.
+        drop.reproducibility_level = ReproducibilityFlags(
+            int(dropSpec.get("reprodata", {}).get("rmode", "0"))
+        )
+        # session.reprodata['rmode']
+    return drop
 
-    return roots
+
+class GraphBuilder(object):
+    """
+    Creates the DROPs of a graph and establishes their relationships
+    incrementally, as their specifications are added in one or more batches.
+
+    Within a batch DROPs are first all created and then linked together, in
+    the order in which they are given. Relationships towards DROPs that don't
+    exist yet are kept pending until the DROP on the other end is added in a
+    later batch. Once all batches have been added `finish` returns the roots
+    of the graph.
+    """
+
+    def __init__(self, session=None):
+        self._session = session
+        self._drops = collections.OrderedDict()
+        # key: OID of a DROP not created yet, value: list of (drop, attribute)
+        # relationships waiting for it
+        self._pending = collections.defaultdict(list)
+
+    def __len__(self):
+        return len(self._drops)
+
+    def __contains__(self, oid):
+        return oid in self._drops
+
+    def add(self, dropSpecList):
+        """
+        Creates the DROPs for the DROP specifications in `dropSpecList` and
+        links them with each other and with those added previously. No DROP
+        is kept if any of them fails to be created.
+        """
+        with utils.gc_paused():
+            self._add(dropSpecList)
+
+    def _add(self, dropSpecList):
+
+        # Step #1: create the actual DROPs
+        logger.info("Creating %d drops", len(dropSpecList))
+        drops = collections.OrderedDict()
+        for n, dropSpec in enumerate(dropSpecList, len(self._drops)):
+            drop = _createDrop(n, dropSpec, self._session)
+            drops[drop.oid] = drop
+        self._drops.update(drops)
+
+        # Step #2: establish relationships, first those that previous batches
+        # were waiting for and then those from this batch
+        logger.info("Establishing relationships between drops")
+        for oid, lhDrop in drops.items():
+            for drop, attr in self._pending.pop(oid, ()):
+                _linkDrops(drop, attr, lhDrop)
+        for dropSpec in dropSpecList:
+            # 'oid' is mandatory
+            drop = self._drops[dropSpec["oid"]]
+            for attr, oid in _dropRelationships(dropSpec):
+                lhDrop = self._drops.get(oid, None)
+                if lhDrop is None:
+                    self._pending[oid].append((drop, attr))
+                else:
+                    _linkDrops(drop, attr, lhDrop)
+
+    def link(self, linkType, lhOID, rhOID):
+        """
+        Links the DROP with OID `lhOID` to the one with OID `rhOID` using
+        `linkType`, like `addLink` does for their specifications
+        """
+        attr = _linkAttribute(linkType)
+        _linkDrops(self._drops[lhOID], attr, self._drops[rhOID])
+
+    def finish(self):
+        """
+        Checks that no mandatory relationship is left pending and returns the
+        roots of the graph. The builder is emptied afterwards.
+        """
+
+        # Relationships to unknown DROPs are ignored, except N-1 ones
+        for oid, pending in self._pending.items():
+            for drop, attr in pending:
+                if _isNTo1(attr):
+                    raise KeyError(oid)
+                logger.debug("Ignoring %s relationship of %r to %s", attr, drop, oid)
+
+        # We're done! Return the roots of the graph to the caller
+        logger.info("Calculating graph roots")
+        roots: List[AbstractDROP] = [
+            drop
+            for drop in self._drops.values()
+            if not droputils.getUpstreamObjects(drop)
+        ]
+        logger.info("%d graph roots found, bye-bye!", len(roots))
+
+        self._drops = collections.OrderedDict()
+        self._pending.clear()
+        return roots
+
+
+def createGraphFromDropSpecList(dropSpecList, session=None):
+    logger.debug("Found %d DROP definitions", len(dropSpecList))
+    builder = GraphBuilder(session)
+    builder.add(list(dropSpecList))
+    return builder.finish()
+
+
+def batchDropSpecs(dropSpecs, batchSize):
+    """
+    Groups the DROP specifications yielded by `dropSpecs`, which can be any
+    iterable (like a JSONArrayReader), into lists of at most `batchSize`
+    elements. Each list is yielded together with a flag indicating whether it
+    is the last one, which is the only list that can end with graph-wide
+    reproducibility data.
+    """
+    batch = []
+    for dropSpec in dropSpecs:
+        batch.append(dropSpec)
+        # One element is always held back, so we know which batch is the last
+        if len(batch) > batchSize:
+            yield batch[:batchSize], False
+            batch = batch[batchSize:]
+    if batch:
+        yield batch, True
 
 
 def _createData(dropSpec, dryRun=False, session_id=None):
@@ -326,34 +491,12 @@ def _createData(dropSpec, dryRun=False, session_id=None):
     kwargs = _getKwargs(dropSpec)
 
     if dropSpec["categoryType"] == "Data":
-        dataClassName = dropSpec["dropclass"]
-        parts = dataClassName.split(".")
-        module = importlib.import_module(".".join(parts[:-1]))
-        storageType = getattr(module, parts[-1])
+        storageType = _getDropClass(dropSpec["dropclass"])
     else:
-        # STORAGE_TYPES are deprecated, but here for backwards compatibility
-
         # Fall back to old behaviour or to FileDROP
         # if nothing else is specified
-        STORAGE_TYPES = {
-            "Memory": InMemoryDROP,
-            "SharedMemory": SharedMemoryDROP,
-            "File": FileDROP,
-            "NGAS": NgasDROP,
-            "null": NullDROP,
-            "json": JsonDROP,
-            "ParameterSet": ParameterSetDROP,
-            "EnvironmentVariables": EnvironmentVarDROP,
-        }
-
-        try:
-            from .data.drops.s3_drop import S3DROP
-
-            STORAGE_TYPES["S3"] = S3DROP
-        except ImportError:
-            pass
         if "storage" in dropSpec:
-            storageType = STORAGE_TYPES[dropSpec["storage"]]
+            storageType = _getStorageTypes()[dropSpec["storage"]]
             # pass
         else:
             storageType = FileDROP
@@ -370,15 +513,7 @@ def _createContainer(dropSpec, dryRun=False, session_id=None):
 
     # if no 'container' is specified, we default to ContainerDROP
     if "dropclass" in dropSpec:
-        containerTypeName = dropSpec["dropclass"]
-        parts = containerTypeName.split(".")
-
-        # Support old "dfms..." package names (pre-Oct2017)
-        if parts[0] == "dfms":
-            parts[0] = "dlg"
-
-        module = importlib.import_module(".".join(parts[:-1]))
-        containerType = getattr(module, parts[-1])
+        containerType = _getDropClass(dropSpec["dropclass"])
     else:
         containerType = ContainerDROP
 
@@ -403,15 +538,9 @@ def _createApp(dropSpec, dryRun=False, session_id=None):
     appName = dropSpec.get("dropclass", "")
     if not appName:
         dropSpec.get("Application", "")
-    parts = appName.split(".")
-
-    # Support old "dfms..." package names (pre-Oct2017)
-    if parts[0] == "dfms":
-        parts[0] = "dlg"
 
     try:
-        module = importlib.import_module(".".join(parts[:-1]))
-        appType = getattr(module, parts[-1])
+        appType = _getDropClass(appName)
     except (ImportError, AttributeError, ValueError):
         raise InvalidGraphException(
             "drop %s specifies non-existent application: %s" % (oid, appName)
@@ -118,6 +118,8 @@ configured (and/or hardcoded) DLM
 @author: rtobar
 """
 
+import collections
+import heapq
 import logging
 import random
 import string
@@ -127,8 +129,8 @@ import time
 from typing import Dict
 from . import registry
 from .hsm import manager
+from .replication import ReplicationQueue, ReplicationStates, copy_drop
 from .hsm.store import AbstractStore
-from .. import droputils
 from ..ddap_protocol import DROPStates, DROPPhases, AppDROPStates
 from ..drop import AbstractDROP
 from ..data.drops.container import ContainerDROP
@@ -205,6 +207,24 @@ class DropEventListener(object):
         elif event.type == "status":
             if event.status == DROPStates.COMPLETED:
                 self._dlm.handleCompletedDrop(event.uid)
+            elif event.status == DROPStates.EXPIRED:
+                self._dlm.handleExpiredDrop(event.uid)
+
+
+class ConsumerFinishedListener(object):
+    """
+    Listens for the execStatus of the consumers of expire-after-use DROPs
+    """
+
+    def __init__(self, dlm):
+        self._dlm = dlm
+
+    def handleEvent(self, event):
+        if event.execStatus in _FINISHED_CONSUMER_STATES:
+            self._dlm.handleFinishedConsumer(event.uid)
+
+
+_FINISHED_CONSUMER_STATES = (AppDROPStates.FINISHED, AppDROPStates.ERROR)
 
 
 class DataLifecycleManager:
@@ -213,7 +233,13 @@ class DataLifecycleManager:
     """
 
     def __init__(
-        self, check_period=0, cleanup_period=0, enable_drop_replication=False
+        self,
+        check_period=0,
+        cleanup_period=0,
+        enable_drop_replication=False,
+        replication_workers=2,
+        replications_per_store=1,
+        replication_bandwidth=None,
     ):
         self._reg = registry.InMemoryRegistry()
         self._listener = DropEventListener(self)
@@ -223,12 +249,36 @@ class DataLifecycleManager:
         else:
             self._hsm = None
 
+        # Replication happens in the background, see replicateDrop
+        self._replication_workers = replication_workers
+        self._replications_per_store = replications_per_store
+        self._replication_bandwidth = replication_bandwidth
+        self._replicator = None
+        self._replicatorLock = threading.Lock()
+
         # TODO: When iteration over the values of _drops we always do _drops.values()
         # instead of _drops.itervalues() to get a full, thread-safe copy of the
         # dictionary values. Maybe there's a better approach for thread-safety
         # here
         self._drops: Dict[str, AbstractDROP] = {}
 
+        # Instead of checking all DROPs on every run of the DROPChecker and the
+        # DROPGarbageCollector we keep track of those that will need expiring
+        # or deleting, driven by the events the DROPs fire:
+        #  * lifespan-driven DROPs are kept in a heap of (expiration date, uid)
+        #  * expire-after-use DROPs keep the set of local consumers they still
+        #    wait on (data uid -> consumer uids, and consumer uid -> data uids)
+        #  * expire-after-use DROPs with remote consumers are polled instead
+        #  * DROPs ready to expire, and EXPIRED DROPs waiting for deletion
+        self._expiryLock = threading.Lock()
+        self._expirationHeap = []
+        self._pendingConsumers: Dict[str, set] = {}
+        self._consumerWaiters: Dict[str, set] = collections.defaultdict(set)
+        self._polledDrops: Dict[str, AbstractDROP] = {}
+        self._expirableDrops = collections.deque()
+        self._expiredDrops = collections.deque()
+        self._consumerListener = ConsumerFinishedListener(self)
+
         self._check_period = check_period
         self._cleanup_period = cleanup_period
         self._drop_checker = None
@@ -257,6 +307,8 @@ class DataLifecycleManager:
             self._drop_checker.join()
         if self._drop_garbage_collector:
             self._drop_garbage_collector.join()
+        if self._replicator:
+            self._replicator.shutdown()
 
         # Unsubscribe to all events coming from the DROPs
         for drop in self._drops.values():
@@ -278,32 +330,35 @@ class DataLifecycleManager:
         drop.status = DROPStates.DELETED
 
     def deleteExpiredDrops(self):
-        for drop in list(self._drops.values()):
-            if drop.status == DROPStates.EXPIRED:
+        with self._expiryLock:
+            uids = list(self._expiredDrops)
+            self._expiredDrops.clear()
+        for uid in uids:
+            drop = self._drops.get(uid)
+            if drop is not None and drop.status == DROPStates.EXPIRED:
                 self._deleteDrop(drop)
 
     def expireCompletedDrops(self):
         now = time.time()
-        for drop in self._drops.values():
-
-            if drop.status != DROPStates.COMPLETED:
-                continue
-
-            # Expire-after-use: mark as expired if all consumers
-            # are finished using this DROP
-            if not drop.persist and drop.expireAfterUse:
-                allDone = all(
-                    c.execStatus
-                    in [AppDROPStates.FINISHED, AppDROPStates.ERROR]
-                    for c in drop.consumers
-                )
-                if not allDone:
-                    continue
-
-            # Otherwise, we check the expiration date
-            # (if no lifespan was specified for the DROP, its expiration
-            # date will be -1 and it will be skipped)
-            elif drop.expirationDate == -1 or now <= drop.expirationDate:
+        with self._expiryLock:
+            candidates = list(self._expirableDrops)
+            self._expirableDrops.clear()
+            heap = self._expirationHeap
+            while heap and heap[0][0] < now:
+                candidates.append(heapq.heappop(heap)[1])
+            polled = list(self._polledDrops.values())
+
+        # Remote consumers don't send us their events, so we still need to ask
+        for drop in polled:
+            if all(c.execStatus in _FINISHED_CONSUMER_STATES for c in drop.consumers):
+                with self._expiryLock:
+                    self._polledDrops.pop(drop.uid, None)
+                candidates.append(drop.uid)
+
+        beingRead = []
+        for uid in candidates:
+            drop = self._drops.get(uid)
+            if drop is None or drop.status != DROPStates.COMPLETED:
                 continue
 
             if drop.isBeingRead():
@@ -312,12 +367,66 @@ class DataLifecycleManager:
                     "will skip expiration for the time being",
                     drop,
                 )
+                beingRead.append(uid)
                 continue
 
             # Finally!
             logger.debug("Marking %r as EXPIRED", drop)
             drop.status = DROPStates.EXPIRED
 
+        if beingRead:
+            with self._expiryLock:
+                self._expirableDrops.extend(beingRead)
+
+    def _scheduleExpiration(self, drop):
+        # Expire-after-use: expire when all consumers are finished using the DROP
+        if not drop.persist and drop.expireAfterUse:
+            self._waitForConsumers(drop)
+
+        # Otherwise the expiration date is used (if no lifespan was specified
+        # for the DROP, its expiration date is -1 and it never expires)
+        elif drop.expirationDate != -1:
+            with self._expiryLock:
+                heapq.heappush(self._expirationHeap, (drop.expirationDate, drop.uid))
+
+    def _waitForConsumers(self, drop):
+        consumers = drop.consumers
+        if not all(isinstance(c, AbstractDROP) for c in consumers):
+            with self._expiryLock:
+                self._polledDrops[drop.uid] = drop
+            return
+
+        with self._expiryLock:
+            if not consumers:
+                self._expirableDrops.append(drop.uid)
+                return
+            self._pendingConsumers[drop.uid] = {c.uid for c in consumers}
+            for c in consumers:
+                if c.uid not in self._consumerWaiters:
+                    c.subscribe(self._consumerListener, "execStatus")
+                self._consumerWaiters[c.uid].add(drop.uid)
+
+        # Some consumers might have finished already
+        for c in consumers:
+            if c.execStatus in _FINISHED_CONSUMER_STATES:
+                self.handleFinishedConsumer(c.uid)
+
+    def handleFinishedConsumer(self, uid):
+        with self._expiryLock:
+            for dataUid in self._consumerWaiters.pop(uid, ()):
+                pending = self._pendingConsumers.get(dataUid)
+                if pending is None:
+                    continue
+                pending.discard(uid)
+                if not pending:
+                    del self._pendingConsumers[dataUid]
+                    self._expirableDrops.append(dataUid)
+
+    def handleExpiredDrop(self, uid):
+        if uid in self._drops:
+            with self._expiryLock:
+                self._expiredDrops.append(uid)
+
     def _disappeared(self, drop):
         return drop.status != DROPStates.DELETED and not drop.exists()
 
@@ -455,22 +564,22 @@ class DataLifecycleManager:
         drop.subscribe(self._listener)
         self._reg.addDrop(drop)
 
-        # TODO: We currently use a background thread that scans
-        #       all DROPs for their status and compares its expiration date
-        #       with the current time in order to determine which DROPs must be
-        #       moved to EXPIRED. We might want to explore other alternatives to
-        #       perform this task, like using threading.Timers (probably not) or
-        #       any other that doesn't mean looping over all DROPs
+        # We missed the COMPLETED event of DROPs that are already completed
+        if drop.status == DROPStates.COMPLETED:
+            self._scheduleExpiration(drop)
 
     def remove_drops(self, drop_oids):
         """
         Remove drops from DLM's monitoring
         """
-        self._drops = {
-            oid: drop
-            for oid, drop in self._drops.items()
-            if oid not in drop_oids
-        }
+        # Entries in the expiration heap and queues for these drops are simply
+        # skipped once they come up
+        with self._expiryLock:
+            for uid in drop_oids:
+                self._drops.pop(uid, None)
+                self._pendingConsumers.pop(uid, None)
+                self._consumerWaiters.pop(uid, None)
+                self._polledDrops.pop(uid, None)
 
     def handleOpenedDrop(self, oid, uid):
         drop = self._drops[uid]
@@ -481,13 +590,17 @@ class DataLifecycleManager:
         """
         :param string uid:
         """
+        drop = self._drops.get(uid)
+        if drop is None:
+            return
+        self._scheduleExpiration(drop)
+
         # Check the kind of storage used by this DROP. If it's already persisted
         # in a persistent storage media we don't need to save it again
 
         if not self._enable_drop_replication:
             return
 
-        drop = self._drops[uid]
         if drop.persist and self.isReplicable(drop):
             logger.debug(
                 "Replicating %r because it's marked to be persisted", drop
@@ -500,8 +613,13 @@ class DataLifecycleManager:
     def isReplicable(self, drop):
         return not isinstance(drop, ContainerDROP)
 
-    def replicateDrop(self, drop):
+    def replicateDrop(self, drop, priority=None):
         """
+        Queues the replication of `drop` into the slowest store of the HSM.
+        Replications are carried out in the background, smaller `priority`
+        values first (by default the DROP's size, so big DROPs don't hold up
+        many small ones). Their progress is recorded in the registry.
+
         :param dlg.drop.AbstractDROP drop:
         """
 
@@ -509,6 +627,47 @@ class DataLifecycleManager:
         if drop.status != DROPStates.COMPLETED:
             raise Exception("%r not in COMPLETED state" % (drop,))
 
+        if priority is None:
+            priority = drop.size or 0
+        self._getReplicator().submit(drop, self._hsm.getSlowestStore(), priority)
+
+    def waitForReplications(self, timeout=None):
+        """
+        Waits until all queued replications have finished, returning ``False``
+        if `timeout` expired before that.
+        """
+        if self._replicator is None:
+            return True
+        return self._replicator.join(timeout)
+
+    def _getReplicator(self):
+        with self._replicatorLock:
+            if self._replicator is None:
+                self._replicator = ReplicationQueue(
+                    self._replicateInto,
+                    workers=self._replication_workers,
+                    max_per_store=self._replications_per_store,
+                    bandwidth=self._replication_bandwidth,
+                    on_state_change=self._recordReplicationState,
+                )
+            return self._replicator
+
+    def _recordReplicationState(self, drop, state):
+        # Keep the transfer progress of the ongoing replication, if any
+        progress = self._reg.getReplicationProgress(drop)
+        if state == ReplicationStates.QUEUED or progress is None:
+            transferred, total = 0, drop.size
+        else:
+            _, transferred, total = progress
+        self._reg.setReplicationProgress(drop, state, transferred, total)
+
+    def _replicateInto(self, drop, store, throttle):
+
+        # The DROP might have moved on (e.g., expired) while queued
+        if drop.status != DROPStates.COMPLETED:
+            logger.info("%r no longer COMPLETED, skipping its replication", drop)
+            return
+
         # Get the size of the DROP. This cannot currently be done in some of them,
         # like in the AbstractDROP
         size = drop.size
@@ -516,19 +675,15 @@ class DataLifecycleManager:
             return
 
         # Check which layer of the hsm should host the replicated copy
-        store = self._hsm.getSlowestStore()
         availableSpace = store.getAvailableSpace()
 
         if size > availableSpace:
             raise Exception(
-                "Cannot replicate DROP to store %s: not enough space left"
+                "Cannot replicate DROP to store %s: not enough space left" % (store,)
             )
 
         # Create new DROP and write the contents of the original into it
-        # TODO: In a real world application this will probably happen in a separate
-        #       worker thread with a working queue, or in separate threads, one
-        #       for each replication task (or a mix of the two)
-        newDrop, newUid = self._replicate(drop, store)
+        newDrop, newUid = self._replicate(drop, store, throttle)
 
         # The DROPs (both) should now be tagged as SOLID
         newDrop.phase = DROPPhases.SOLID
@@ -542,7 +697,7 @@ class DataLifecycleManager:
     def getDropUids(self, drop):
         return self._reg.getDropUids(drop)
 
-    def _replicate(self, drop: AbstractDROP, store: AbstractStore):
+    def _replicate(self, drop: AbstractDROP, store: AbstractStore, throttle=None):
 
         # Dummy, but safe, new UID
         newUid = "uid:" + "".join(
@@ -556,11 +711,24 @@ class DataLifecycleManager:
 
         logger.debug("Creating new DROP with uid %s from %r", newUid, drop)
 
-        # For the time being we manually copy the contents of the current DROP into it
         newDrop = store.createDrop(
             drop.oid, newUid, expectedSize=drop.size, persist=drop.persist
         )
-        droputils.copyDropContents(drop, newDrop)
+
+        def progress(transferred, total):
+            self._reg.setReplicationProgress(
+                drop, ReplicationStates.RUNNING, transferred, total
+            )
+
+        try:
+            copy_drop(drop, newDrop, throttle=throttle, progress=progress)
+        except:
+            # Don't leave partial copies behind, we might be retried
+            try:
+                newDrop.delete()
+            except Exception:
+                logger.exception("Error while removing partial copy %r", newDrop)
+            raise
 
         logger.debug("%r successfully replicated to %r", drop, newDrop)
 
@@ -103,6 +103,20 @@ class Registry:
         never been accessed
         """
 
+    @abstractmethod
+    def setReplicationProgress(self, drop, state, transferred=0, total=None):
+        """
+        Records the state of the replication of the given DROP instance, and
+        how many of its bytes have been transferred so far out of `total`
+        """
+
+    @abstractmethod
+    def getReplicationProgress(self, drop):
+        """
+        Returns a (state, transferred, total) tuple describing the replication
+        of the given DROP instance, or None if it has never been replicated
+        """
+
     def _checkDropIsInRegistry(self, oid):
         if not oid in self._drops:
             raise Exception("DROP %s is not present in the registry" % (oid))
@@ -112,6 +126,7 @@ class InMemoryRegistry(Registry):
     def __init__(self):
         super(InMemoryRegistry, self).__init__()
         self._drops = {}
+        self._replications = {}
 
     def addDrop(self, drop):
         """
@@ -153,6 +168,12 @@ class InMemoryRegistry(Registry):
         else:
             return -1
 
+    def setReplicationProgress(self, drop, state, transferred=0, total=None):
+        self._replications[drop.uid] = (state, transferred, total)
+
+    def getReplicationProgress(self, drop):
+        return self._replications.get(drop.uid)
+
 
 class RDBMSRegistry(Registry):
     def __init__(self, dbModuleName, *connArgs):
@@ -183,6 +204,12 @@ class RDBMSRegistry(Registry):
     # dlg_dropaccesstime:
     #   oid (FK, PK)
     #   accessTime (PK)
+    #
+    # dlg_dropreplication:
+    #   uid         (FK, PK)
+    #   state       (int)
+    #   transferred (int)
+    #   total       (int)
 
     # A small helper class to make all methods transactional, and to create
     # connections when needed
@@ -277,3 +304,33 @@ class RDBMSRegistry(Registry):
             if row is None:
                 return -1
             return row[0]
+
+    def setReplicationProgress(self, drop, state, transferred=0, total=None, conn=None):
+        with self.transactional(self, conn) as conn:
+            cur = conn.cursor()
+            self.execute(
+                cur,
+                "UPDATE dlg_dropreplication SET state = {0}, transferred = {1}, total = {2} WHERE uid = {3}",
+                (state, transferred, total, drop.uid),
+            )
+            if cur.rowcount == 0:
+                self.execute(
+                    cur,
+                    "INSERT INTO dlg_dropreplication (uid, state, transferred, total) VALUES ({0},{1},{2},{3})",
+                    (drop.uid, state, transferred, total),
+                )
+            cur.close()
+
+    def getReplicationProgress(self, drop, conn=None):
+        with self.transactional(self, conn) as conn:
+            cur = conn.cursor()
+            self.execute(
+                cur,
+                "SELECT state, transferred, total FROM dlg_dropreplication WHERE uid = {0}",
+                (drop.uid,),
+            )
+            row = cur.fetchone()
+            cur.close()
+            if row is None:
+                return None
+            return tuple(row)
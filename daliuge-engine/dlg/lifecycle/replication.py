@@ -0,0 +1,322 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+Asynchronous replication of DROPs into the stores of the HSM.
+
+Replications are queued by priority and carried out by a small pool of worker
+threads, so the threads delivering DROP events are not held up while data is
+being copied. Each store accepts a limited number of concurrent replications
+and, optionally, a maximum bandwidth. Failed replications are retried a few
+times before giving up.
+"""
+
+import collections
+import errno
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+from ..data.drops.file import FileDROP
+
+logger = logging.getLogger(__name__)
+
+# Errors indicating that a given zero-copy system call cannot be used for a
+# pair of files, in which case we fall back to the next mechanism
+_UNSUPPORTED_ERRNOS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP)
+
+
+class ReplicationStates:
+    """
+    The states a replication goes through, as recorded in the DLM registry
+    """
+
+    QUEUED, RUNNING, FINISHED, ERROR = range(4)
+
+
+class Throttle(object):
+    """
+    Limits the rate at which bytes are transferred by one or more threads. A
+    `bandwidth` of 0 or ``None`` means no limit.
+    """
+
+    def __init__(self, bandwidth=None):
+        self._bandwidth = bandwidth
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def consume(self, nbytes):
+        """Blocks until `nbytes` can be considered transferred"""
+        if not self._bandwidth:
+            return
+        with self._lock:
+            now = time.time()
+            self._next = max(now, self._next) + nbytes / self._bandwidth
+            delay = self._next - now
+        time.sleep(delay)
+
+
+def _transfer_range(src_fd, dst_fd, offset, count, use_copy_file_range):
+    if use_copy_file_range:
+        return os.copy_file_range(
+            src_fd, dst_fd, count, offset_src=offset, offset_dst=offset
+        )
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+def copy_file(src, dst, chunk_size, throttle=None, progress=None):
+    """
+    Copies file `src` into `dst` using ``copy_file_range`` (or ``sendfile`` if
+    the former cannot be used for these files), so the data doesn't need to go
+    through user space. Copying happens in `chunk_size` steps; after each of
+    them `throttle` is consulted and `progress` is called with the number of
+    bytes copied so far and the total.
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        total = os.fstat(src_fd).st_size
+        use_copy_file_range = hasattr(os, "copy_file_range")
+        offset = 0
+        while offset < total:
+            count = min(chunk_size, total - offset)
+            try:
+                n = _transfer_range(
+                    src_fd, dst_fd, offset, count, use_copy_file_range
+                )
+            except OSError as e:
+                if not use_copy_file_range or e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                use_copy_file_range = False
+                continue
+            if n == 0:
+                break
+            offset += n
+            if throttle:
+                throttle.consume(n)
+            if progress:
+                progress(offset, total)
+        if offset != total:
+            raise IOError(f"Copied {offset} bytes of {total} from {src} to {dst}")
+    return total
+
+
+def copy_drop(source, target, chunk_size=4 * 1024**2, throttle=None, progress=None):
+    """
+    Copies the contents of DROP `source` into DROP `target`, moving it to
+    COMPLETED. File-to-file copies are done by the kernel; other DROPs are
+    copied through their read/write methods in `chunk_size` steps.
+    """
+    if isinstance(source, FileDROP) and isinstance(target, FileDROP):
+        # The target's size (and, on demand, checksum) are worked out from the
+        # file itself, since the data doesn't go through target.write()
+        copy_file(source.path, target.path, chunk_size, throttle, progress)
+        target.setCompleted()
+        return
+
+    total = source.size
+    copied = 0
+    desc = source.open()
+    try:
+        buf = source.read(desc, chunk_size)
+        while buf:
+            copied += target.write(buf)
+            if throttle:
+                throttle.consume(len(buf))
+            if progress:
+                progress(copied, total)
+            buf = source.read(desc, chunk_size)
+    finally:
+        source.close(desc)
+    target.setCompleted()
+
+
+class _ReplicationTask(object):
+    def __init__(self, drop, store, priority):
+        self.drop = drop
+        self.store = store
+        self.priority = priority
+        self.tries = 0
+
+
+class ReplicationQueue(object):
+    """
+    A priority queue of replications, executed by a pool of `workers` threads.
+
+    Each replication consists of calling `replicate(drop, store, throttle)` for
+    a given DROP and target store. Lower `priority` values are replicated
+    first; at most `max_per_store` replications run concurrently towards the
+    same store, sharing a `bandwidth` (in bytes/s, no limit if 0 or ``None``)
+    for that store. Replications raising an exception are retried up to
+    `max_tries` times in total, waiting `retry_delay` seconds times the number
+    of failed attempts in between. `on_state_change(drop, state)` is called
+    with the ReplicationStates each replication goes through.
+    """
+
+    def __init__(
+        self,
+        replicate,
+        workers=2,
+        max_per_store=1,
+        bandwidth=None,
+        max_tries=3,
+        retry_delay=1.0,
+        on_state_change=None,
+    ):
+        self._replicate = replicate
+        self._max_per_store = max_per_store
+        self._bandwidth = bandwidth
+        self._max_tries = max_tries
+        self._retry_delay = retry_delay
+        self._on_state_change = on_state_change
+
+        # key: store, value: heap of (priority, seq, task)
+        self._queues = collections.defaultdict(list)
+        self._running = collections.Counter()
+        self._throttles = {}
+        self._seq = itertools.count()
+        self._unfinished = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"DLMReplicator-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, drop, store, priority=0):
+        """Queues the replication of `drop` into `store`"""
+        task = _ReplicationTask(drop, store, priority)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Replication queue has been shut down")
+            self._unfinished += 1
+        self._notify(task.drop, ReplicationStates.QUEUED)
+        self._push(task)
+
+    def _push(self, task):
+        with self._cond:
+            if self._stopped:
+                self._unfinished -= 1
+                self._cond.notify_all()
+                return
+            heapq.heappush(
+                self._queues[task.store], (task.priority, next(self._seq), task)
+            )
+            self._cond.notify_all()
+
+    def _pop(self):
+        # Pick the best task among those whose store can take one more
+        best = None
+        for store, queue in self._queues.items():
+            if not queue or self._running[store] >= self._max_per_store:
+                continue
+            if best is None or queue[0] < self._queues[best][0]:
+                best = store
+        if best is None:
+            return None
+        self._running[best] += 1
+        return heapq.heappop(self._queues[best])[2]
+
+    def _throttle(self, store):
+        with self._cond:
+            if store not in self._throttles:
+                self._throttles[store] = Throttle(self._bandwidth)
+            return self._throttles[store]
+
+    def _notify(self, drop, state):
+        if self._on_state_change:
+            try:
+                self._on_state_change(drop, state)
+            except Exception:
+                logger.exception("Error while recording replication state of %r", drop)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                task = self._pop()
+                while task is None and not self._stopped:
+                    self._cond.wait()
+                    task = self._pop()
+                if task is None:
+                    return
+
+            task.tries += 1
+            self._notify(task.drop, ReplicationStates.RUNNING)
+            try:
+                self._replicate(task.drop, task.store, self._throttle(task.store))
+                failed = False
+            except Exception:
+                logger.exception(
+                    "Error while replicating %r (try %d/%d)",
+                    task.drop,
+                    task.tries,
+                    self._max_tries,
+                )
+                failed = True
+
+            with self._cond:
+                self._running[task.store] -= 1
+                self._cond.notify_all()
+
+            if failed and task.tries < self._max_tries:
+                retry = threading.Timer(
+                    self._retry_delay * task.tries, self._push, (task,)
+                )
+                retry.daemon = True
+                retry.start()
+                continue
+
+            self._notify(
+                task.drop,
+                ReplicationStates.ERROR if failed else ReplicationStates.FINISHED,
+            )
+            with self._cond:
+                self._unfinished -= 1
+                self._cond.notify_all()
+
+    def join(self, timeout=None):
+        """
+        Waits until all submitted replications have finished (including their
+        retries). Returns ``False`` if `timeout` expired before that.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def shutdown(self, wait=True):
+        """
+        Stops the queue. Queued replications are discarded, and those running
+        are waited for if `wait` is ``True``.
+        """
+        with self._cond:
+            self._stopped = True
+            for queue in self._queues.values():
+                self._unfinished -= len(queue)
+                queue.clear()
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
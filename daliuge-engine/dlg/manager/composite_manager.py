@@ -40,10 +40,15 @@ from dlg.exceptions import (
     DaliugeException,
     SubManagerException,
 )
+from .. import restutils
 from ..utils import portIsOpen
 
 logger = logging.getLogger(__name__)
 
+# Seconds between checks of the sub-DMs' presence, and for which the outcome of
+# a request sent to a sub-DM is taken as a sign of its presence
+_DM_CHECK_PERIOD = 60
+
 
 def uid_for_drop(dropSpec):
     if "uid" in dropSpec:
@@ -209,7 +214,7 @@ class CompositeManager(DROPManager):
                         "Couldn't contact manager for host %s:%d, will try again later",
                         host, self._dmPort,
                     )
-            if self._dmCheckerEvt.wait(60):
+            if self._dmCheckerEvt.wait(_DM_CHECK_PERIOD):
                 break
 
     @property
@@ -250,15 +255,19 @@ class CompositeManager(DROPManager):
         else:
             port = port or self._dmPort
 
+        # Requests recently sent to the DM already tell whether it's there
+        dm_is_there = restutils.connection_pool.liveness(host, port, _DM_CHECK_PERIOD)
+        if dm_is_there is not None:
+            return dm_is_there
+
         logger.debug("Checking DM presence at %s port %d", host, port)
         dm_is_there = portIsOpen(host, port, timeout)
         return dm_is_there
 
     def dmAt(self, host, port=None):
-        if not self.check_dm(host, port):
-            raise SubManagerException(
-                f"Manager expected but not running in {host}:{port}"
-            )
+        # The DM's presence is not checked beforehand; if it's not there the
+        # client fails to connect, and that failure is recorded by the
+        # connection pool for check_dm to use
         if not ":" in host:
             port = port or self._dmPort
         else:
@@ -381,6 +390,8 @@ class CompositeManager(DROPManager):
             self._partitionAttr,
         )
         perPartition = collections.defaultdict(list)
+        if not isinstance(graphSpec, list):
+            graphSpec = list(graphSpec)
         if "rmode" in graphSpec[-1]:
             init_pg_repro_data(graphSpec)
             self._graph["reprodata"] = graphSpec.pop()
@@ -526,6 +537,29 @@ class CompositeManager(DROPManager):
         )
         return allStatus
 
+    def _getGraphStatusChanges(self, dm, host, sessionId, since):
+        return {host: dm.getGraphStatusChanges(sessionId, since.get(host))}
+
+    def getGraphStatusChanges(self, sessionId, since=None):
+        """
+        Returns the status of the DROPs that changed after `since` in all
+        underlying DMs. Versions are tracked per DM, so both `since` and the
+        returned ``version`` are dictionaries keyed by DM host.
+        """
+        changesPerHost = {}
+        self.replicate(
+            sessionId,
+            functools.partial(self._getGraphStatusChanges, since=since or {}),
+            "getting graph status changes",
+            collect=changesPerHost,
+        )
+        version = {}
+        allStatus = {}
+        for host, changes in changesPerHost.items():
+            version[host] = changes["version"]
+            allStatus.update(changes["status"])
+        return {"version": version, "status": allStatus}
+
     def _getGraph(self, dm, host, sessionId):
         return dm.getGraph(sessionId)
 
@@ -90,6 +90,14 @@ class DROPManager(object):
         Returns the status of the graph being executed in session `sessionId`.
         """
 
+    @abc.abstractmethod
+    def getGraphStatusChanges(self, sessionId, since=None):
+        """
+        Returns the status of the DROPs of the graph being executed in session
+        `sessionId` that changed after graph status version `since`, together
+        with the current version.
+        """
+
     @abc.abstractmethod
     def getGraph(self, sessionId):
         """
@@ -28,11 +28,14 @@ from __future__ import annotations
 import abc
 import collections
 import copy
+import itertools
 import logging
 from typing import Optional
 
+import msgpack
 from psutil import cpu_count
 import os
+import pickle
 import queue
 import signal
 import sys
@@ -47,7 +50,10 @@ from .session import Session
 
 from .. import rpc, utils
 from ..ddap_protocol import DROPStates
+from ..event import Event
 from ..apps.app_base import AppDROP, DropRunner
+from ..data import data_plane
+from ..data.drops import rdbms
 from ..exceptions import (
     NoSessionException,
     SessionAlreadyExistsException,
@@ -145,8 +151,9 @@ class NodeManagerProcessDropRunner(NodeManagerDropRunner):
     _rpc_client: typing.Optional[rpc.RPCClient]
     _rpc_endpoint: typing.Tuple[str, int]
 
-    def __init__(self, max_workers: int):
+    def __init__(self, max_workers: int, use_data_plane: bool = True):
         self._max_workers = max_workers
+        self._use_data_plane = use_data_plane
         self._process_pool: typing.Optional[ProcessPoolExecutor] = None
 
     def start(self, rpc_endpoint):
@@ -171,9 +178,7 @@ class NodeManagerProcessDropRunner(NodeManagerDropRunner):
         cls._rpc_client.start()
 
     def run_drop(self, app_drop: AppDROP):
-        inputs_proxy_info, outputs_proxy_info = (
-            NodeManagerProcessDropRunner._get_proxy_infos(app_drop)
-        )
+        inputs_proxy_info, outputs_proxy_info = self._get_proxy_infos(app_drop)
 
         # MP Queues pickle on a background thread - we need to ensure that we don't
         # modify the input app_drop reference outside of the scope of this method
@@ -183,36 +188,114 @@ class NodeManagerProcessDropRunner(NodeManagerDropRunner):
         copied_drop._inputs = collections.OrderedDict()
         copied_drop._outputs = collections.OrderedDict()
 
-        return self._process_pool.submit(
-            NodeManagerProcessDropRunner._run_app_drop,
-            copied_drop,
-            inputs_proxy_info,
-            outputs_proxy_info,
+        # Inputs read directly by the worker must not expire while it runs
+        inputs = [
+            i
+            for i, info in zip(app_drop.inputs, inputs_proxy_info)
+            if isinstance(info, data_plane.DataPlaneInfo)
+        ]
+        for i in inputs:
+            i.incrRefCount()
+
+        done = Future()
+        try:
+            fut = self._process_pool.submit(
+                NodeManagerProcessDropRunner._run_app_drop,
+                copied_drop,
+                inputs_proxy_info,
+                outputs_proxy_info,
+            )
+        except:
+            self._release_data_plane(inputs, inputs_proxy_info, outputs_proxy_info)
+            raise
+        fut.add_done_callback(
+            lambda f: self._on_app_drop_run(
+                f, done, app_drop, inputs, inputs_proxy_info, outputs_proxy_info
+            )
         )
+        return done
+
+    def _on_app_drop_run(
+        self, fut, done, app_drop, inputs, inputs_proxy_info, outputs_proxy_info
+    ):
+        """
+        Makes the data written directly by the worker part of the output DROPs
+        before handing over the result of the execution
+        """
+        try:
+            result, written = fut.result()
+            for output, info in zip(app_drop.outputs, outputs_proxy_info):
+                if isinstance(info, data_plane.DataPlaneInfo):
+                    data_plane.apply_output(output, info, written.get(output.uid))
+        except BaseException as e:
+            self._release_data_plane(inputs, inputs_proxy_info, outputs_proxy_info)
+            done.set_exception(e)
+            return
+        self._release_data_plane(inputs, inputs_proxy_info, outputs_proxy_info)
+        done.set_result(result)
+
+    @staticmethod
+    def _release_data_plane(inputs, inputs_proxy_info, outputs_proxy_info):
+        for i in inputs:
+            i.decrRefCount()
+        for info in itertools.chain(inputs_proxy_info, outputs_proxy_info):
+            if isinstance(info, data_plane.DataPlaneInfo):
+                info.release()
 
     @classmethod
     def _run_app_drop(cls, app_drop, inputs_proxy_info, outputs_proxy_info):
-        cls._setup_drop_proxies(app_drop, inputs_proxy_info, outputs_proxy_info)
-        return app_drop.run()
+        outputs = cls._setup_drop_proxies(
+            app_drop, inputs_proxy_info, outputs_proxy_info
+        )
+        written = {}
+        try:
+            return app_drop.run(), written
+        finally:
+            for output in outputs:
+                written[output.uid] = output.closeWriter()
 
     @classmethod
     def _setup_drop_proxies(
         cls, app_drop: AppDROP, inputs_proxy_info, outputs_proxy_info
     ):
+        """
+        Adds the inputs and outputs of the application, returning those whose
+        data is written directly by this process
+        """
         app_drop._rpc_endpoint = cls._rpc_endpoint
         for input_proxy_info in inputs_proxy_info:
-            app_drop.addInput(
-                rpc.DropProxy(cls._rpc_client, input_proxy_info), back=False
-            )
+            app_drop.addInput(cls._drop_proxy(input_proxy_info), back=False)
+        direct_outputs = []
         for output_proxy_info in outputs_proxy_info:
-            app_drop.addOutput(
-                rpc.DropProxy(cls._rpc_client, output_proxy_info), back=False
-            )
+            output = cls._drop_proxy(output_proxy_info)
+            if isinstance(output, data_plane.DataPlaneDrop):
+                direct_outputs.append(output)
+            app_drop.addOutput(output, back=False)
+        return direct_outputs
 
     @classmethod
-    def _get_proxy_infos(cls, app_drop):
-        inputs = [rpc.ProxyInfo.from_data_drop(i) for i in app_drop.inputs]
-        outputs = [rpc.ProxyInfo.from_data_drop(o) for o in app_drop.outputs]
+    def _drop_proxy(cls, proxy_info):
+        if isinstance(proxy_info, data_plane.DataPlaneInfo):
+            return data_plane.DataPlaneDrop(cls._rpc_client, proxy_info)
+        return rpc.DropProxy(cls._rpc_client, proxy_info)
+
+    def _get_proxy_infos(self, app_drop):
+        """
+        Returns how the inputs and outputs of the application can be reached
+        from a worker process: either directly through their DataPlaneInfo, or
+        through RPC with their ProxyInfo
+        """
+        if self._use_data_plane:
+            input_info, output_info = data_plane.input_info, data_plane.output_info
+        else:
+            input_info = output_info = lambda drop: None
+        inputs = [
+            input_info(i) or rpc.ProxyInfo.from_data_drop(i) for i in app_drop.inputs
+        ]
+        outputs = [
+            output_info(o) or rpc.ProxyInfo.from_data_drop(o)
+            for o in app_drop.outputs
+        ]
         return inputs, outputs
 
     def close(self):
@@ -350,6 +433,10 @@ class NodeManagerBase(DROPManager):
         self._check_session_id(sessionId)
         return self._sessions[sessionId].getGraphStatus()
 
+    def getGraphStatusChanges(self, sessionId, since=None):
+        self._check_session_id(sessionId)
+        return self._sessions[sessionId].getGraphStatusChanges(since)
+
     def getGraph(self, sessionId):
         self._check_session_id(sessionId)
         #  TODO: Ensure returns reproducibility data.
@@ -406,6 +493,7 @@ class NodeManagerBase(DROPManager):
         session = self._sessions.pop(sessionId)
         if hasattr(self, "_memoryManager"):
             self._memoryManager.shutdown_session(sessionId)
+        rdbms.close_connections(sessionId)
         self._dlm.remove_drops(session.drops)
         session.destroy()
 
@@ -453,11 +541,74 @@ class NodeManagerBase(DROPManager):
         self._check_session_id(sessionId)
         return self._sessions[sessionId].get_drop_property(uuid, prop_name)
 
+    def describe_drop_attribute(self, sessionId, uid, name):
+        self._check_session_id(sessionId)
+        return self._sessions[sessionId].describe_drop_attribute(uid, name)
+
     def call_drop(self, sessionId, uid, method, *args):
         self._check_session_id(sessionId)
         return self._sessions[sessionId].call_drop(uid, method, *args)
 
 
+def _encode_event(evt):
+    """
+    Encodes an event for publishing. Events are normally made of plain values
+    and are encoded with msgpack; the rest are pickled.
+    """
+    try:
+        return b"m" + msgpack.packb(evt.__dict__, use_bin_type=True)
+    except (TypeError, ValueError):
+        return b"p" + pickle.dumps(evt.__dict__, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode_event(frame):
+    frame = memoryview(frame)
+    if frame[:1] == b"m":
+        attrs = msgpack.unpackb(frame[1:], raw=False, strict_map_key=False)
+    else:
+        attrs = pickle.loads(frame[1:])
+    evt = Event.__new__(Event)
+    evt.__dict__.update(attrs)
+    return evt
+
+
+# Sent by publishers to new subscribers; encoded events are always longer
+_WELCOME_MSG = b"w"
+
+
+class _Wakeup(object):
+    """
+    A pipe used by any thread to wake up a thread polling on it, suitable for
+    zmq.Poller.
+    """
+
+    def __init__(self):
+        self._r, self._w = os.pipe()
+        os.set_blocking(self._r, False)
+        os.set_blocking(self._w, False)
+
+    def fileno(self):
+        return self._r
+
+    def set(self):
+        try:
+            os.write(self._w, b"\0")
+        except BlockingIOError:
+            # The pipe is full, so the other end will wake up anyway
+            pass
+
+    def clear(self):
+        try:
+            while os.read(self._r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self._r)
+        os.close(self._w)
+
+
 class ZMQPubSubMixIn(object):
     """
     ZeroMQ-based event publisher and subscriber.
@@ -474,6 +625,11 @@ class ZMQPubSubMixIn(object):
     Queue object (self._subscriptions), enabling any local thread to indicate a
     new peer to subscribe to in a thread-safe manner.
 
+    Both threads block on a zmq.Poller until there is something for them to do.
+    Threads putting values into their Queues also wake them up through a pipe
+    that their pollers watch. Events are published in batches, one event per
+    frame of a multipart message, with all the events queued at the time.
+
     Note that we investigated not using Queue objects to communicate between
     threads, and use inproc:// ZeroMQ sockets instead. This works, but at a
     cost: all threads putting values into these sockets would need to check,
@@ -486,6 +642,9 @@ class ZMQPubSubMixIn(object):
 
     subscription = collections.namedtuple("subscription", "endpoint finished_evt")
 
+    # Maximum number of events published in a single message
+    _EVENTS_BATCH_SIZE = 1000
+
     def __init__(self, host, events_port):
         self._events_host = host
         self._events_port = events_port
@@ -495,7 +654,9 @@ class ZMQPubSubMixIn(object):
         super(ZMQPubSubMixIn, self).start()
         self._events_in = queue.Queue()
         self._events_out = queue.Queue()
+        self._events_out_wakeup = _Wakeup()
         self._subscriptions = queue.Queue()
+        self._subscriptions_wakeup = _Wakeup()
 
         # Starts background threads, but wait until their sockets are created
         timeout = 30
@@ -519,62 +680,91 @@ class ZMQPubSubMixIn(object):
     def shutdown(self):
         super(ZMQPubSubMixIn, self).shutdown()
         self._pubsub_running = False
+        self._events_out_wakeup.set()
+        self._subscriptions_wakeup.set()
+        self._events_in.put(None)
         self._event_deliverer.join()
         self._event_publisher.join()
         self._event_receiver.join()
+        self._events_out_wakeup.close()
+        self._subscriptions_wakeup.close()
         logger.info("ZeroMQ event publisher/subscriber finished")
 
     def publish_event(self, evt):
         self._events_out.put(evt)
+        self._events_out_wakeup.set()
 
     def subscribe(self, host, port):
         timeout = 5
         finished_evt = threading.Event()
         endpoint = "tcp://%s:%d" % (utils.zmq_safe(host), port)
         self._subscriptions.put(ZMQPubSubMixIn.subscription(endpoint, finished_evt))
+        self._subscriptions_wakeup.set()
         if not finished_evt.wait(timeout):
             raise DaliugeException(
                 "ZMQ subscription not achieved within %d seconds" % (timeout,)
             )
         logger.info("Subscribed for events originating from %s", endpoint)
 
+    @staticmethod
+    def _take(q, max_items=None):
+        """Returns the items currently in `q`, up to `max_items`"""
+        items = []
+        try:
+            while max_items is None or len(items) < max_items:
+                items.append(q.get_nowait())
+        except queue.Empty:
+            pass
+        return items
+
     def _publish_events(self, sock_created):
         import zmq
 
-        pub = self._context.socket(zmq.PUB)  # @UndefinedVariable
+        # An XPUB socket greets new subscribers once their subscription is in
+        # place, so they know they won't miss any event
+        pub = self._context.socket(zmq.XPUB)  # @UndefinedVariable
         pub.set_hwm(0)  # Never drop messages that should be sent
+        pub.setsockopt(zmq.XPUB_WELCOME_MSG, _WELCOME_MSG)
         endpoint = "tcp://%s:%d" % (
             utils.zmq_safe(self._events_host),
             self._events_port,
         )
         pub.bind(endpoint)
         logger.info("Publishing events via ZeroMQ on %s", endpoint)
+        poller = zmq.Poller()
+        poller.register(self._events_out_wakeup.fileno(), zmq.POLLIN)
+        poller.register(pub, zmq.POLLIN)
         sock_created.set()
 
         while self._pubsub_running:
-            try:
-                obj = self._events_out.get_nowait()
-            except queue.Empty:
-                time.sleep(0.01)
-                continue
+            ready = dict(poller.poll())
+            self._events_out_wakeup.clear()
 
-            while self._pubsub_running:
+            # Subscription messages are of no use to us
+            while pub in ready:
                 try:
-                    pub.send_pyobj(obj, flags=zmq.NOBLOCK)  # @UndefinedVariable
-                    break
+                    pub.recv(flags=zmq.NOBLOCK)
                 except zmq.error.Again:
-                    logger.debug("Got an 'Again' when publishing event")
-                    time.sleep(0.01)
-                    continue
+                    break
+
+            while self._pubsub_running:
+                events = self._take(self._events_out, self._EVENTS_BATCH_SIZE)
+                if not events:
+                    break
+                # PUB sockets never block when sending
+                pub.send_multipart([_encode_event(evt) for evt in events])
         pub.close()
 
     def _deliver_events(self):
-        while self._pubsub_running:
-            try:
-                evt = self._events_in.get_nowait()
-                self.deliver_event(evt)
-            except queue.Empty:
-                time.sleep(0.01)
+        while True:
+            events = self._events_in.get()
+            if events is None:
+                break
+            for evt in events:
+                try:
+                    self.deliver_event(evt)
+                except Exception:
+                    logger.exception("Error while delivering event %r", evt)
 
     def _receive_events(self, sock_created):
         import zmq
@@ -584,50 +774,73 @@ class ZMQPubSubMixIn(object):
         sub_endpoints = set()
         sub.setsockopt(zmq.SUBSCRIBE, b"")  # @UndefinedVariable
         sub_monitor = sub.get_monitor_socket()
+        poller = zmq.Poller()
+        poller.register(sub, zmq.POLLIN)
+        poller.register(sub_monitor, zmq.POLLIN)
+        poller.register(self._subscriptions_wakeup.fileno(), zmq.POLLIN)
         sock_created.set()
 
+        # Subscriptions are finished once their endpoint is connected and its
+        # publisher has greeted us. Greetings don't say who they come from, so
+        # connected subscriptions finish when all connected publishers did
         pending_connections = {}
+        connected = {}
+        ungreeted = 0
         while self._pubsub_running:
-            # A new subscription has been requested
-            try:
-                subscription = self._subscriptions.get_nowait()
-                if subscription.endpoint in sub_endpoints:
-                    subscription.finished_evt.set()
-                else:
-                    sub.connect(subscription.endpoint)
-                    pending_connections[subscription.endpoint] = (
-                        subscription.finished_evt
-                    )
-            except queue.Empty:
-                pass
-
-            try:
-                msg = recv_monitor_message(sub_monitor, flags=zmq.NOBLOCK)
+            ready = dict(poller.poll())
+
+            # New subscriptions have been requested
+            if self._subscriptions_wakeup.fileno() in ready:
+                self._subscriptions_wakeup.clear()
+                for subscription in self._take(self._subscriptions):
+                    if subscription.endpoint in sub_endpoints:
+                        subscription.finished_evt.set()
+                    else:
+                        sub.connect(subscription.endpoint)
+                        pending_connections[subscription.endpoint] = (
+                            subscription.finished_evt
+                        )
+
+            while sub_monitor in ready:
+                try:
+                    msg = recv_monitor_message(sub_monitor, flags=zmq.NOBLOCK)
+                except zmq.error.Again:
+                    break
                 if msg["event"] != zmq.EVENT_CONNECTED:
                     continue
                 endpoint = utils.b2s(msg["endpoint"])
                 sub_endpoints.add(endpoint)
-                finished_evt = pending_connections.pop(endpoint)
-                finished_evt.set()
-            except zmq.error.Again:
-                pass
+                ungreeted += 1
+                finished_evt = pending_connections.pop(endpoint, None)
+                if finished_evt:
+                    connected[endpoint] = finished_evt
 
-            try:
-                evt = sub.recv_pyobj(flags=zmq.NOBLOCK)  # @UndefinedVariable
-                self._events_in.put(evt)
-            except zmq.error.Again:
-                time.sleep(0.01)
-            except Exception:
-                # Figure out what to do here
-                logger.exception(
-                    "Something bad happened in %s:%d to ZMQ :'(",
-                    self._events_host,
-                    self._events_port,
-                )
-                break
+            while sub in ready:
+                try:
+                    frames = sub.recv_multipart(flags=zmq.NOBLOCK, copy=False)
+                except zmq.error.Again:
+                    break
+                except Exception:
+                    # Figure out what to do here
+                    logger.exception(
+                        "Something bad happened in %s:%d to ZMQ :'(",
+                        self._events_host,
+                        self._events_port,
+                    )
+                    self._pubsub_running = False
+                    break
+                if len(frames) == 1 and frames[0].bytes == _WELCOME_MSG:
+                    ungreeted -= 1
+                    continue
+                self._events_in.put([_decode_event(f.buffer) for f in frames])
+
+            if ungreeted <= 0 and connected:
+                for finished_evt in connected.values():
+                    finished_evt.set()
+                connected.clear()
 
         # Flush pending connection events to avoid callers hanging out forever
-        for evt in pending_connections:
+        for evt in itertools.chain(pending_connections.values(), connected.values()):
             evt.set()
 
         sub_monitor.close()
@@ -58,6 +58,9 @@ class ReplayManager(DROPManager):
             self._status_file.close()
         self._status_file = open(self._status_filename)
         self._last_graph_status = None
+        # bumped with each status line read, kept per DROP when it changes
+        self._graph_status_version = 0
+        self._drop_status_versions = {}
         self._session_status_reqno = 0
         self._status = SessionStates.PRISTINE
 
@@ -108,7 +111,7 @@ class ReplayManager(DROPManager):
                 "Requesting status of graph that is not running yet"
             )
 
-        while True:
+        while not self._status_file.closed:
             l = self._status_file.readline()
             if not l:
                 self._status_file.close()
@@ -122,11 +125,30 @@ class ReplayManager(DROPManager):
                 continue
 
             graph_status = content["gs"]
+            self._graph_status_version += 1
+            last_status = self._last_graph_status or {}
+            for oid, drop_status in graph_status.items():
+                if last_status.get(oid) != drop_status:
+                    self._drop_status_versions[oid] = self._graph_status_version
             self._last_graph_status = graph_status
 
             logger.info("Serving graph status")
             return graph_status
 
+        return self._last_graph_status
+
+    def getGraphStatusChanges(self, session_id, since=None):
+        graph_status = self.getGraphStatus(session_id) or {}
+        version = self._graph_status_version
+        if since is None or since > version:
+            since = 0
+        status = {
+            oid: drop_status
+            for oid, drop_status in graph_status.items()
+            if self._drop_status_versions.get(oid, 0) > since
+        }
+        return {"version": version, "status": status}
+
     def getGraph(self, session_id):
         self.check_session_id(session_id)
         logger.info("Serving graph")
@@ -185,6 +185,10 @@ class ManagerRestServer(RestServer):
             "/api/sessions/<sessionId>/graph/status",
             callback=self.getGraphStatus,
         )
+        app.get(
+            "/api/sessions/<sessionId>/graph/status/delta",
+            callback=self.getGraphStatusChanges,
+        )
         app.post(
             "/api/sessions/<sessionId>/graph/append",
             callback=self.addGraphParts,
@@ -333,6 +337,13 @@ class ManagerRestServer(RestServer):
     def getGraphStatus(self, sessionId):
         return self.dm.getGraphStatus(sessionId)
 
+    @daliuge_aware
+    def getGraphStatusChanges(self, sessionId):
+        # "since" is the (JSON-encoded) version returned by a previous call
+        since = bottle.request.params.get("since", None)
+        since = json.loads(since) if since else None
+        return self.dm.getGraphStatusChanges(sessionId, since)
+
     # TODO: addGraphParts v/s addGraphSpec
     @daliuge_aware
     def addGraphParts(self, sessionId):
@@ -353,7 +364,9 @@ class ManagerRestServer(RestServer):
         else:
             json_content = bottle.request.body
 
-        graph_parts = bottle.json_loads(json_content.read())
+        # Graph parts are decoded as they are read, so managers can process
+        # them before the whole body has been parsed
+        graph_parts = utils.JSONArrayReader(json_content)
 
         return self.dm.addGraphSpec(sessionId, graph_parts)
         # return {"graph_parts": graph_parts}
@@ -500,6 +513,10 @@ class CompositeManagerRestServer(ManagerRestServer):
             "/api/node/<node>/sessions/<sessionId>/graph/status",
             callback=self.getNodeGraphStatus,
         )
+        app.get(
+            "/api/node/<node>/sessions/<sessionId>/graph/status/delta",
+            callback=self.getNodeGraphStatusChanges,
+        )
 
         # The non-REST mappings that serve HTML-related content
         app.get("/", callback=self.visualizeDIM)
@@ -612,6 +629,16 @@ class CompositeManagerRestServer(ManagerRestServer):
         with NodeManagerClient(host=node, port=port) as dm:
             return dm.graph_status(sessionId)
 
+    @daliuge_aware
+    def getNodeGraphStatusChanges(self, node, sessionId):
+        if node not in self.dm.nodes:
+            raise Exception(f"{node} not in current list of nodes")
+        since = bottle.request.params.get("since", None)
+        since = json.loads(since) if since else None
+        node, port = node.split(":")
+        with NodeManagerClient(host=node, port=port) as dm:
+            return dm.graph_status_changes(sessionId, since)
+
     # ===========================================================================
     # non-REST methods
     # ===========================================================================
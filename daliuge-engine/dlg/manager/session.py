@@ -44,7 +44,6 @@ from .. import utils
 from ..common.reproducibility.constants import ReproducibilityFlags, ALL_RMODES
 from ..ddap_protocol import DROPLinkType, DROPRel, DROPStates
 from ..drop import (
-    AbstractDROP,
     LINKTYPE_1TON_APPEND_METHOD,
     LINKTYPE_1TON_BACK_APPEND_METHOD,
 )
@@ -61,6 +60,10 @@ from ..exceptions import (
 
 logger = logging.getLogger(__name__)
 
+# Number of DROP specifications validated and created at a time when graphs
+# are added to a session from a stream
+_GRAPH_SPEC_BATCH_SIZE = 1000
+
 
 class SessionStates:
     """
@@ -132,6 +135,93 @@ class EndListener(object):
         self._session.end()
 
 
+class GraphStatusIndex(object):
+    """
+    The status of the DROPs of a session, indexed by UID.
+
+    The index is kept up to date from the ``status`` and ``execStatus`` events
+    fired by the DROPs, so querying it doesn't require traversing the graph.
+    Each change bumps a version number, which lets callers ask only for the
+    entries that changed after a version they have already seen.
+    """
+
+    _FINAL_STATES = (DROPStates.ERROR, DROPStates.COMPLETED, DROPStates.CANCELLED)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._drops = {}  # key: uid, value: drop
+        self._entries = {}  # key: uid, value: (oid, status dictionary)
+        self._changes = collections.OrderedDict()  # key: uid, value: version
+        self._pending = {}  # drops not in a final state, in insertion order
+        self._version = 0
+
+    @property
+    def version(self):
+        with self._lock:
+            return self._version
+
+    def add(self, drop):
+        """Starts tracking the status of `drop`"""
+        self._drops[drop.uid] = drop
+        self._pending[drop.uid] = drop
+        self._update(drop)
+        drop.subscribe(self, "status")
+        if isinstance(drop, AppDROP):
+            drop.subscribe(self, "execStatus")
+
+    def handleEvent(self, evt):
+        drop = self._drops.get(evt.uid)
+        if drop is not None:
+            self._update(drop)
+
+    def _update(self, drop):
+        # The status is read under our lock (rather than taken from the event)
+        # so that events delivered out of order can't leave stale values behind
+        with self._lock:
+            entry = {"status": drop.status}
+            if isinstance(drop, AppDROP):
+                entry["execStatus"] = drop.execStatus
+            uid = drop.uid
+            if self._entries.get(uid, (None, None))[1] == entry:
+                return
+            self._version += 1
+            self._entries[uid] = (drop.oid, entry)
+            self._changes[uid] = self._version
+            self._changes.move_to_end(uid)
+            if entry["status"] in self._FINAL_STATES:
+                self._pending.pop(uid, None)
+
+    def pending(self):
+        """
+        Returns the DROPs that have not reached a final state (COMPLETED,
+        ERROR or CANCELLED) yet, in the order they were added.
+        """
+        with self._lock:
+            return list(self._pending.values())
+
+    def status(self):
+        """Returns the status of all DROPs, keyed by OID"""
+        with self._lock:
+            return {oid: dict(entry) for oid, entry in self._entries.values()}
+
+    def changes(self, since=0):
+        """
+        Returns a tuple with the current version of the index, and the status
+        of the DROPs (keyed by OID) that changed after version `since`. Versions
+        unknown to this index result in the status of all DROPs being returned.
+        """
+        with self._lock:
+            if since > self._version:
+                since = 0
+            status = {}
+            for uid in reversed(self._changes):
+                if self._changes[uid] <= since:
+                    break
+                oid, entry = self._entries[uid]
+                status[oid] = dict(entry)
+            return self._version, status
+
+
 track_current_session = utils.object_tracking("session")
 
 
@@ -163,6 +253,8 @@ class Session(object):
         self._sessionId = sessionId
         self._graph = {}  # key: oid, value: dropSpec dictionary
         self._drops = {}  # key: oid, value: actual drop object
+        self._graphBuilder = graph_loader.GraphBuilder(self)
+        self._graphBuilderError = None
         self._statusLock = threading.Lock()
         self._roots = []
         self._proxyinfo = []
@@ -171,6 +263,7 @@ class Session(object):
         self._error_status_listener = None
         self._nm = nm
         self._dropsubs = {}
+        self._statusIndex = GraphStatusIndex()
         self._graphreprodata = None
         self._reprofinished = False
 
@@ -261,12 +354,23 @@ class Session(object):
         """
         Adds the graph specification given in `graphSpec` to the
         graph specification currently held by this session. A graphSpec is a
-        list of dictionaries, each of which contains the information of one
-        DROP. Each DROP specification is checked to see it contains
+        list of dictionaries, each of which contains the information of one DROP.
+        Each DROP specification is checked to see it contains
         all the necessary details to construct a proper DROP. If one
         DROP specification is found to be inconsistent the whole operation
         will fail.
 
+        The DROPs themselves are created and linked as their specifications
+        are added, but errors doing so are reported only by `deploy`.
+
+        `graphSpec` can also be any other iterable (like a JSONArrayReader
+        decoding a request body), in which case DROP specifications are
+        checked and their DROPs created in batches as they are read, without
+        holding the whole graph in memory first. If a batch is then found to be
+        inconsistent, or `graphSpec` fails to be read, after earlier batches
+        were added, the error is raised again by `deploy` so that a partial
+        graph is never deployed.
+
         This operation also 'slices off' a dictionary containing graph-wide
         reproducibility information. This is stored as a class variable for later use.
 
@@ -290,25 +394,42 @@ class Session(object):
 
         self.status = SessionStates.BUILDING
 
+        if isinstance(graphSpec, list):
+            batches = [(graphSpec, True)]
+        else:
+            batches = graph_loader.batchDropSpecs(graphSpec, _GRAPH_SPEC_BATCH_SIZE)
+
         # This will check the consistency of each dropSpec
-        logger.debug("Trying to add graphSpec:")
-        for x in graphSpec:
-            logger.debug("%s: %s", x, x.keys())
+        added = False
         try:
-            graphSpecDict, self._graphreprodata = graph_loader.loadDropSpecs(graphSpec)
-            # Check for duplicates
-            duplicates = set(graphSpecDict) & set(self._graph)
-            if duplicates:
-                logger.exception(
-                    "Trying to add drops with OIDs that already exist: %r", duplicates
+            for batch, last in batches:
+                logger.debug("Trying to add graphSpec with %d DROPs", len(batch))
+                graphSpecDict, reprodata = graph_loader.loadDropSpecs(
+                    batch, reprodata=last
                 )
-                raise InvalidGraphException
+                # Check for duplicates
+                duplicates = set(graphSpecDict) & set(self._graph)
+                if duplicates:
+                    logger.exception(
+                        "Trying to add drops with OIDs that already exist: %r",
+                        duplicates,
+                    )
+                    raise InvalidGraphException
 
-            self._graph.update(graphSpecDict)
+                self._graph.update(graphSpecDict)
+                self._buildGraph(self._graphBuilder.add, batch)
+                added = True
+                if last:
+                    self._graphreprodata = reprodata
 
-            logger.debug("Added a graph definition with %d DROPs", len(graphSpecDict))
-        except InvalidGraphException as e:
+                logger.debug(
+                    "Added a graph definition with %d DROPs", len(graphSpecDict)
+                )
+        except Exception as e:
             logger.exception(e)
+            if added and self._graphBuilderError is None:
+                # The graph is incomplete, deploying it must fail
+                self._graphBuilderError = e
             raise e
 
     @track_current_session
@@ -338,6 +459,18 @@ class Session(object):
             raise InvalidGraphException("No DROP found for %s %r" % (oids, missingOids))
 
         graph_loader.addLink(linkType, lhDropSpec, rhOID, force=force)
+        self._buildGraph(self._graphBuilder.link, linkType, lhOID, rhOID)
+
+    def _buildGraph(self, method, *args):
+        # DROPs are created as their specs are added, but errors doing so are
+        # only reported when the session is deployed
+        if self._graphBuilderError is not None:
+            return
+        try:
+            method(*args)
+        except Exception as e:
+            logger.warning("Error while creating DROPs, will fail on deploy: %s", e)
+            self._graphBuilderError = e
 
     @track_current_session
     def deploy(
@@ -384,43 +517,47 @@ class Session(object):
 
         self.status = SessionStates.DEPLOYING
 
-        # Create the real DROPs from the graph specs
-        logger.info("Creating DROPs for session %s", self._sessionId)
+        # The real DROPs were created as graph specs were added, we only need
+        # to check the graph is complete
+        logger.info("Finishing DROPs for session %s", self._sessionId)
 
-        try:
-            self._roots = graph_loader.createGraphFromDropSpecList(
-                self._graph.values(), session=self
-            )
+        # Registering many DROPs would otherwise trigger costly GC collections
+        with utils.gc_paused():
+            try:
+                if self._graphBuilderError is not None:
+                    raise self._graphBuilderError
+                self._roots = self._graphBuilder.finish()
 
-        except KeyError as e:
-            logger.exception(e)
-            raise e
-        except ModuleNotFoundError as e:
-            logger.exception(e)
-            raise e
-        logger.info("%d drops successfully created", len(self._graph))
+            except KeyError as e:
+                logger.exception(e)
+                raise e
+            except ModuleNotFoundError as e:
+                logger.exception(e)
+                raise e
+            logger.info("%d drops successfully created", len(self._graph))
 
-        #  Add listeners for reproducibility information
-        repro_listener = ReproFinishedListener(self._graph, self)
+            #  Add listeners for reproducibility information
+            repro_listener = ReproFinishedListener(self._graph, self)
 
-        for drop, _ in droputils.breadFirstTraverse(self._roots):
+            for drop, _ in droputils.breadFirstTraverse(self._roots):
 
-            # Register them
-            self._drops[drop.uid] = drop
+                # Register them
+                self._drops[drop.uid] = drop
+                self._statusIndex.add(drop)
 
-            # Add a reference to the RPC server endpoint that exposes this drop,
-            # which is our containing Node Manager.
-            # This information is usually not necessary, but there are cases in
-            # which we actually need it (like in the DynlibProcApp)
-            if self._nm:
-                drop._rpc_endpoint = self._nm.rpc_endpoint
+                # Add a reference to the RPC server endpoint that exposes this drop,
+                # which is our containing Node Manager.
+                # This information is usually not necessary, but there are cases in
+                # which we actually need it (like in the DynlibProcApp)
+                if self._nm:
+                    drop._rpc_endpoint = self._nm.rpc_endpoint
 
-            # Register them with the error handler
-            if event_listeners:
-                for l in event_listeners:
-                    drop.subscribe(l)
-            #  Register each drop for reproducibility listening
-            drop.subscribe(repro_listener, "reproducibility")
+                # Register them with the error handler
+                if event_listeners:
+                    for l in event_listeners:
+                        drop.subscribe(l)
+                #  Register each drop for reproducibility listening
+                drop.subscribe(repro_listener, "reproducibility")
 
         logger.info("Stored all drops, proceeding with further customization")
 
@@ -448,7 +585,7 @@ class Session(object):
         # Foreach
         if foreach:
             logger.info("Invoking 'foreach' on each drop")
-            for drop, _ in droputils.breadFirstTraverse(self._roots):
+            for drop in self._drops.values():
                 foreach(drop)
             logger.info("'foreach' invoked for each drop")
 
@@ -486,15 +623,14 @@ class Session(object):
         self.finish()
 
     def trigger_drops(self, uids):
-        for drop, downStreamDrops in droputils.breadFirstTraverse(self._roots):
-            downStreamDrops[:] = [
-                dsDrop for dsDrop in downStreamDrops if isinstance(dsDrop, AbstractDROP)
-            ]
-            if drop.uid in uids:
-                if isinstance(drop, InputFiredAppDROP):
-                    drop.async_execute()
-                else:
-                    drop.setCompleted()
+        for uid in uids:
+            drop = self._drops.get(uid)
+            if drop is None:
+                continue
+            if isinstance(drop, InputFiredAppDROP):
+                drop.async_execute()
+            else:
+                drop.setCompleted()
 
     @track_current_session
     def deliver_event(self, evt):
@@ -594,10 +730,7 @@ class Session(object):
     def finish(self):
         self.status = SessionStates.FINISHED
         logger.info("Session %s finished", self._sessionId)
-        for drop, downStreamDrops in droputils.breadFirstTraverse(self._roots):
-            downStreamDrops[:] = [
-                dsDrop for dsDrop in downStreamDrops if isinstance(dsDrop, AbstractDROP)
-            ]
+        for drop in self._statusIndex.pending():
             if drop.status in (DROPStates.INITIALIZED, DROPStates.WRITING):
                 drop.setCompleted()
 
@@ -605,14 +738,11 @@ class Session(object):
     def end(self):
         self.status = SessionStates.FINISHED
         logger.info("Session %s ended", self._sessionId)
-        for drop, downStreamDrops in droputils.breadFirstTraverse(self._roots):
-            downStreamDrops[:] = [
-                dsDrop for dsDrop in downStreamDrops if isinstance(dsDrop, AbstractDROP)
-            ]
+        for drop in self._statusIndex.pending():
             if drop.status in (DROPStates.INITIALIZED, DROPStates.WRITING):
                 drop.skip()
 
-    def getGraphStatus(self):
+    def _check_graph_status_available(self):
         if self.status not in (
             SessionStates.RUNNING,
             SessionStates.FINISHED,
@@ -622,22 +752,21 @@ class Session(object):
                 "The session is currently not running, cannot get graph status"
             )
 
-        # We shouldn't traverse the full graph because there might be nodes
-        # attached to our DROPs that are actually part of other DM (and have been
-        # wired together by the DIM after deploying each individual graph on
-        # each of the DMs).
-        # We recognize such nodes because they are actually not an instance of
-        # AbstractDROP (they are DropProxy instances).
-        statusDict = collections.defaultdict(dict)
-        for drop, downStreamDrops in droputils.breadFirstTraverse(self._roots):
-            downStreamDrops[:] = [
-                dsDrop for dsDrop in downStreamDrops if isinstance(dsDrop, AbstractDROP)
-            ]
-            if isinstance(drop, AppDROP):
-                statusDict[drop.oid]["execStatus"] = drop.execStatus
-            statusDict[drop.oid]["status"] = drop.status
+    def getGraphStatus(self):
+        # Only the DROPs hosted by this session are indexed; DropProxy instances
+        # linking them to DROPs in other DMs are not part of it
+        self._check_graph_status_available()
+        return self._statusIndex.status()
 
-        return statusDict
+    def getGraphStatusChanges(self, since=None):
+        """
+        Returns a dictionary with the current graph status ``version`` and the
+        ``status`` of the DROPs that changed after version `since`. A `since`
+        of ``None`` or 0 returns the status of all DROPs.
+        """
+        self._check_graph_status_available()
+        version, status = self._statusIndex.changes(since or 0)
+        return {"version": version, "status": status}
 
     @track_current_session
     def cancel(self):
@@ -646,10 +775,7 @@ class Session(object):
             raise InvalidSessionState(
                 "Can't cancel this session in its current status: %d" % (status)
             )
-        for drop, downStreamDrops in droputils.breadFirstTraverse(self._roots):
-            downStreamDrops[:] = [
-                dsDrop for dsDrop in downStreamDrops if isinstance(dsDrop, AbstractDROP)
-            ]
+        for drop in self._statusIndex.pending():
             if drop.status not in (
                 DROPStates.ERROR,
                 DROPStates.COMPLETED,
@@ -689,6 +815,23 @@ class Session(object):
         except AttributeError:
             raise DaliugeException("%r has no property called %s" % (drop, prop_name))
 
+    def describe_drop_attribute(self, uid, name):
+        """
+        Returns the class of the given drop, whether its attribute `name` is a
+        method, and the value of the attribute if it is not
+        """
+        if uid not in self._drops:
+            raise NoDropException(uid)
+        drop = self._drops[uid]
+        try:
+            value = getattr(drop, name)
+        except AttributeError:
+            raise DaliugeException("%r has no attribute called %s" % (drop, name))
+        drop_class = "%s.%s" % (type(drop).__module__, type(drop).__qualname__)
+        if inspect.ismethod(value):
+            return drop_class, True, None
+        return drop_class, False, value
+
     def call_drop(self, uid, method, *args):
         if uid not in self._drops:
             raise NoDropException(uid)
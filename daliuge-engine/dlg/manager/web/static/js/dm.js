@@ -605,22 +605,34 @@ function startGraphStatusUpdates(serverUrl, sessionId, selectedNode, delay,
 	if (selectedNode) {
 		url += '/node/' + selectedNode;
 	}
-	url += '/sessions/' + sessionId + '/graph/status';
+	url += '/sessions/' + sessionId + '/graph/status/delta';
 	var updateStatesDelayTimerActive = false;
 	var updateStatesDelayTimer;
 
+	// Only the drops whose status changed since the last version we received
+	// are sent by the server, so we keep the full picture here
+	var graphStatus = {};
+	var graphStatusVersion = null;
+
 	function updateStates() {
-		d3.json(url).then(function (response, error) {
+		var deltaUrl = url;
+		if (graphStatusVersion !== null) {
+			deltaUrl += '?since=' + encodeURIComponent(JSON.stringify(graphStatusVersion));
+		}
+		d3.json(deltaUrl).then(function (response, error) {
 			if (error) {
 				console.error(error);
 				return;
 			}
+			graphStatusVersion = response['version'];
+			Object.assign(graphStatus, response['status']);
+
 			// Change from {B:{status:2,execStatus:0}, A:{status:1}, ...}
 			//          to [{status:1},{status:2,execStatus:0}...]
 			// (i.e., sort by key and get values only)
-			var keys = Object.keys(response);
+			var keys = Object.keys(graphStatus);
 			keys.sort();
-			var statuses = keys.map(function (k) { return response[k] });
+			var statuses = keys.map(function (k) { return graphStatus[k] });
 			// console.log(statuses)
 			// This works assuming that the status list comes in the same order
 			// that the graph was created, which is true
@@ -26,13 +26,16 @@ This module contains all client and server RPC classes for all the different
 technologies we support.
 """
 
+import asyncio
 import collections
 import dataclasses
 import logging
-import queue
 import threading
+import traceback
+from concurrent.futures import Future
 
 import gevent
+import gevent.event
 import zerorpc
 
 from . import utils
@@ -53,6 +56,12 @@ class RPCObject(object):
 class RPCClientBase(RPCObject):
     """Base class for all RPC clients"""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Remote drops' classes, and which of their attributes are methods
+        self._drop_classes = {}
+        self._drop_methods = set()
+
     def get_drop_attribute(self, hostname, port, session_id, uid, name):
 
         hostname = hostname.split(":")[0]
@@ -65,7 +74,6 @@ class RPCClientBase(RPCObject):
             hostname,
             port,
         )
-        hostname = hostname.split(":")[0]
 
         client, closer = self.get_rpc_client(hostname, port)
 
@@ -78,19 +86,45 @@ class RPCClientBase(RPCObject):
             def __call__(self, *args):
                 return client.call_drop(session_id, uid, name, *args)
 
-        # Shortcut to avoid extra calls
-        known_methods = ()
-        # known_methods = ('open', 'read', 'write', 'close')
-        closeit = False
+        # Methods of drop classes we have seen before need no extra calls
+        drop_key = (hostname, port, session_id, uid)
+        drop_class = self._drop_classes.get(drop_key)
+        if (drop_class, name) in self._drop_methods:
+            return remote_method()
+
+        closeit = True
         try:
-            if name in known_methods or client.has_method(session_id, uid, name):
-                return remote_method()
-            closeit = True
-            return client.get_drop_property(session_id, uid, name)
+            drop_class, is_method, value = client.describe_drop_attribute(
+                session_id, uid, name
+            )
+            self._drop_classes[drop_key] = drop_class
+            if not is_method:
+                return value
+            self._drop_methods.add((drop_class, name))
+            closeit = False
+            return remote_method()
         finally:
             if closeit:
                 closer()
 
+    async def acall_drop(self, hostname, port, session_id, uid, name, *args):
+        """Calls method `name` of a remote drop from an asyncio event loop"""
+        client, closer = self.get_rpc_client(hostname.split(":")[0], port)
+        try:
+            future = client.submit("call_drop", session_id, uid, name, *args)
+            return await asyncio.wrap_future(future)
+        finally:
+            closer()
+
+    async def aget_drop_property(self, hostname, port, session_id, uid, name):
+        """Gets property `name` of a remote drop from an asyncio event loop"""
+        client, closer = self.get_rpc_client(hostname.split(":")[0], port)
+        try:
+            future = client.submit("get_drop_property", session_id, uid, name)
+            return await asyncio.wrap_future(future)
+        finally:
+            closer()
+
 
 class RPCServerBase(RPCObject):
     """Base class for all RPC server"""
@@ -100,11 +134,51 @@ class RPCServerBase(RPCObject):
         self._rpc_port = port
 
 
+class ZeroRPCEndpointClient(object):
+    """
+    The client-side view of a remote ZeroRPC endpoint, usable from any thread.
+
+    Requests are queued and handed over to the ZeroRPC client running on the
+    endpoint's own gevent thread, which is woken up by them. All requests
+    pending at that point are sent together.
+    """
+
+    def __init__(self):
+        self._requests = collections.deque()
+        self.wakeup = None
+
+    def submit(self, method, *args) -> Future:
+        """Sends a request, returning a Future with its eventual result"""
+        future = Future()
+        self._requests.append(ZeroRPCClient.request(method, args, future))
+        self.wakeup.send()
+        return future
+
+    def take_requests(self):
+        """Returns all the requests queued so far"""
+        requests = []
+        while self._requests:
+            requests.append(self._requests.popleft())
+        return requests
+
+    def call_drop(self, session_id, uid, name, *args):
+        return self.submit("call_drop", session_id, uid, name, *args).result()
+
+    def get_drop_property(self, session_id, uid, name):
+        return self.submit("get_drop_property", session_id, uid, name).result()
+
+    def describe_drop_attribute(self, session_id, uid, name):
+        future = self.submit("describe_drop_attribute", session_id, uid, name)
+        return future.result()
+
+    def has_method(self, session_id, uid, name):
+        return self.submit("has_method", session_id, uid, name).result()
+
+
 class ZeroRPCClient(RPCClientBase):
     """ZeroRPC client support"""
 
-    request = collections.namedtuple("request", "method args queue")
-    response = collections.namedtuple("response", "value is_exception")
+    request = collections.namedtuple("request", "method args future")
 
     def __init__(self, *args, **kwargs):
         super(ZeroRPCClient, self).__init__(*args, **kwargs)
@@ -130,6 +204,8 @@ class ZeroRPCClient(RPCClientBase):
 
     def shutdown(self):
         super(ZeroRPCClient, self).shutdown()
+        for client in self._zrpcclients.values():
+            client.wakeup.send()
         for t in self._zrpcclientthreads:
             t.join(10)
             if t.is_alive():
@@ -149,70 +225,76 @@ class ZeroRPCClient(RPCClientBase):
 
             # We start the new client on its own thread so it uses gevent, etc.
             # In this thread we create simply enqueue requests
-            req_queue = queue.Queue()
+            client = ZeroRPCEndpointClient()
+            client_ready = threading.Event()
             tname_tpl, args = "zrpc(%s:%d)", (host, port)
             t = threading.Thread(
                 target=self.run_zrpcclient,
-                args=(host, port, req_queue),
+                args=(host, port, client, client_ready),
                 name=tname_tpl % args,
             )
             t.start()
+            client_ready.wait()
 
-            class QueueingClient(object):
-                def __make_call(self, method, *args):
-                    res_queue = queue.Queue()
-                    request = ZeroRPCClient.request(method, args, res_queue)
-                    req_queue.put(request)
-                    x = res_queue.get()
-                    if x.is_exception:
-                        raise x.value
-                    return x.value
-
-                def call_drop(self, session_id, uid, name, *args):
-                    return self.__make_call("call_drop", session_id, uid, name, *args)
-
-                def get_drop_property(self, session_id, uid, name):
-                    return self.__make_call("get_drop_property", session_id, uid, name)
-
-                def has_method(self, session_id, uid, name):
-                    return self.__make_call("has_method", session_id, uid, name)
-
-            client = QueueingClient()
             self._zrpcclients[endpoint] = client
             self._zrpcclientthreads.append(t)
             return client
 
-    def run_zrpcclient(self, host, port, req_queue):
+    def run_zrpcclient(self, host, port, endpoint_client, client_ready):
         host = host.split(":")[0]
         client = zerorpc.Client("tcp://%s:%d" % (host, port), context=self._context)
 
-        forwarder = gevent.spawn(self.forward_requests, req_queue, client)
-        gevent.joinall([forwarder])
-
+        # Requests wake this thread up from other threads through an async
+        # watcher, whose callback runs on this thread's hub
+        stopped = gevent.event.Event()
+
+        def forward_requests():
+            if not self.rpc_running:
+                stopped.set()
+                return
+            requests = endpoint_client.take_requests()
+            if requests:
+                gevent.spawn(self.send_requests, client, requests)
+
+        wakeup = gevent.get_hub().loop.async_()
+        wakeup.start(forward_requests)
+        endpoint_client.wakeup = wakeup
+        client_ready.set()
+        stopped.wait()
+        wakeup.stop()
+
+        for req in endpoint_client.take_requests():
+            req.future.set_exception(RuntimeError("RPC client has been shut down"))
         logger.info("Closing %s:%d ZeroRPC client", host, port)
         client.close()
 
-    def forward_requests(self, req_queue, client):
-        while self.rpc_running:
-            try:
-                req = req_queue.get_nowait()
-                gevent.spawn(self.queue_request, client, req)
-            except queue.Empty:
-                gevent.sleep(0.005)
-
-    def process_response(self, req, async_response):
+    def send_requests(self, client, requests):
+        """
+        Sends the given requests to the remote endpoint, batching them into a
+        single call if there are more than one
+        """
+        if len(requests) == 1:
+            req = requests[0]
+            # Pass "async" in a dictionary; 3.7+ fails because it's a keyword
+            async_result = client(req.method, *req.args, **{"async": True})
+        else:
+            calls = [(req.method, req.args) for req in requests]
+            async_result = client("call_batch", calls, **{"async": True})
         try:
-            x = ZeroRPCClient.response(async_response.get_nowait(), False)
+            value = async_result.get()
         except Exception as e:
-            if isinstance(e, gevent.Timeout):
-                raise RuntimeError("Timed out on AsyncResult.get_nowait")
-            x = ZeroRPCClient.response(e, True)
-        req.queue.put(x)
-
-    def queue_request(self, client, req):
-        # Pass "async" in a dictionary; 3.7+ fails because it's a keyword
-        async_result = client.__call__(req.method, *req.args, **{"async": True})
-        async_result.rawlink(lambda x: self.process_response(req, x))
+            for req in requests:
+                req.future.set_exception(e)
+            return
+
+        if len(requests) == 1:
+            requests[0].future.set_result(value)
+            return
+        for req, (succeeded, result) in zip(requests, value):
+            if succeeded:
+                req.future.set_result(result)
+            else:
+                req.future.set_exception(zerorpc.RemoteError(*result))
 
     def get_rpc_client(self, hostname, port):
         # hostname = hostname.split(":")[0]
@@ -233,6 +315,23 @@ class ZeroRPCServer(RPCServerBase):
     def rpc_endpoint(self):
         return self._rpc_host, self._rpc_port
 
+    def call_batch(self, calls):
+        """
+        Executes a batch of calls sent together by a ZeroRPCClient, returning
+        whether each of them succeeded along with its result, or the name,
+        message and traceback of the error it raised
+        """
+        results = []
+        for method, args in calls:
+            try:
+                if method.startswith("_"):
+                    raise AttributeError("Method %s cannot be called" % method)
+                results.append((True, getattr(self, method)(*args)))
+            except Exception as e:
+                error = (type(e).__name__, str(e), traceback.format_exc())
+                results.append((False, error))
+        return results
+
     def start(self):
         super(ZeroRPCServer, self).start()
 
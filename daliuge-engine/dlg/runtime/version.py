@@ -0,0 +1,9 @@
+# THIS FILE IS GENERATED BY SETUP.PY
+# DO NOT MODIFY BY HAND
+version = '4.7.2'
+git_version = 'Unknown'
+full_version = '4.7.2'
+is_release = True
+
+if not is_release:
+    version = full_version
\ No newline at end of file
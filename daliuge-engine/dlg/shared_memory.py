@@ -182,14 +182,28 @@ class DlgSharedMemory:
 
     def resize(self, new_size):
         """
-        Replaces current file with larger block, containing old data.
+        Resizes this block in place, keeping its contents.
+        The underlying shared memory object is truncated to the new size and remapped, so no data
+        is copied and other processes attached to this block keep seeing the same memory.
+        Views previously taken from `buf` stay valid as long as they do not reach past the new size.
         """
-        old_data = bytes(self._buf)
-        self.close()
-        self.unlink()
-        self.__init__(self._name, new_size)
-        if new_size < len(old_data):
+        if new_size <= 0:
+            raise ValueError("'size' must be positive")
+        if new_size < self._size:
             warnings.warn("Shrinking shared block, may lose data", BytesWarning)
-            self._buf[:] = old_data[0:new_size]
-        else:
-            self._buf[0 : len(old_data)] = old_data
+        try:
+            self._buf.release()
+        except BufferError:
+            # Someone still holds an export of our view, let it die with them
+            pass
+        old_mmap = self._mmap
+        os.ftruncate(self._fd, new_size)
+        self._mmap = mmap.mmap(self._fd, new_size)
+        try:
+            old_mmap.close()
+        except BufferError:
+            # Readers still hold views into the old mapping, which remains alive until they are
+            # released.
+            pass
+        self._size = new_size
+        self._buf = memoryview(self._mmap)
@@ -138,6 +138,7 @@ install_requires = [
     "dill",
     "docker",
     "lockfile",
+    "msgpack",
     # 0.10.6 builds correctly with old (<=3.10) Linux kernels
     "netifaces>=0.10.6",
     "numpy",
@@ -0,0 +1,87 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures how many DROPs of different classes can be
+created per second, using keyword arguments similar to those found in the
+DROP specifications of a physical graph.
+"""
+
+import sys
+import time
+from optparse import OptionParser
+
+from dlg.apps.simple import DictGatherApp, RandomArrayApp, SleepApp
+from dlg.data.drops.data_base import NullDROP
+from dlg.data.drops.memory import InMemoryDROP
+
+# Parameters that every DROP specification carries, plus some application
+# parameters that aren't bound to any attribute
+common_kwargs = {
+    "categoryType": "Application",
+    "name": "drop",
+    "lg_key": "-1",
+    "node": "localhost",
+    "island": "localhost",
+    "rank": [0],
+    "loop_ctx": None,
+    "weight": 5,
+    "iid": "0/0",
+    "input_error_threshold": 0,
+    "n_tries": 1,
+    "log_level": "",
+}
+
+classes = [
+    (InMemoryDROP, {}),
+    (NullDROP, {}),
+    (SleepApp, {"sleep_time": "0.5"}),
+    (RandomArrayApp, {"integer": "1", "low": "0", "high": "1000", "size": "50"}),
+    (DictGatherApp, {"value_dict": "{'a': 1, 'b': [1, 2, 3]}"}),
+]
+
+
+def measure(cls, kwargs, n):
+    """Returns the number of `cls` instances created per second"""
+    kwargs = dict(common_kwargs, **kwargs)
+    start = time.time()
+    for i in range(n):
+        cls(str(i), str(i), **kwargs)
+    return n / (time.time() - start)
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--drops",
+        action="store",
+        type="int",
+        dest="drops",
+        help="Number of DROPs to create for each class",
+        default=20000,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    print("class,drops,drops/s")
+    for cls, kwargs in classes:
+        rate = measure(cls, kwargs, options.drops)
+        print("%s,%d,%.0f" % (cls.__name__, options.drops, rate))
@@ -0,0 +1,100 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures how much memory (RSS) each DROP of different
+classes takes, both for isolated DROPs and for DROPs linked in chains of
+data -> application -> data, like those found in physical graphs. Each
+measurement runs in a fresh process.
+"""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from optparse import OptionParser
+
+import psutil
+
+from dlg.apps.simple import CopyApp, SleepApp
+from dlg.data.drops.data_base import NullDROP
+from dlg.data.drops.memory import InMemoryDROP
+
+# Parameters that every DROP specification carries
+common_kwargs = {
+    "name": "drop",
+    "lg_key": "-1",
+    "node": "localhost",
+    "island": "localhost",
+    "rank": [0],
+    "loop_ctx": None,
+    "iid": "0/0",
+    "dlg_session_id": "s",
+}
+
+classes = [InMemoryDROP, NullDROP, SleepApp, CopyApp]
+
+
+def create(cls, n):
+    return [cls(str(i), str(i), **common_kwargs) for i in range(n)]
+
+
+def create_chains(_cls, n):
+    """Creates n/3 chains of InMemoryDROP -> CopyApp -> InMemoryDROP"""
+    drops = []
+    for i in range(n // 3):
+        a = InMemoryDROP(f"a{i}", f"a{i}", **common_kwargs)
+        b = CopyApp(f"b{i}", f"b{i}", **common_kwargs)
+        c = InMemoryDROP(f"c{i}", f"c{i}", **common_kwargs)
+        b.addInput(a)
+        b.addOutput(c)
+        drops += [a, b, c]
+    return drops
+
+
+def measure(f, cls, n):
+    """Returns the number of bytes of RSS used per DROP created by `f`"""
+    process = psutil.Process()
+    # Let modules and caches be loaded beforehand
+    f(cls, 10)
+    start = process.memory_info().rss
+    drops = f(cls, n)
+    return (process.memory_info().rss - start) / len(drops)
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--drops",
+        action="store",
+        type="int",
+        dest="drops",
+        help="Number of DROPs to create in each measurement",
+        default=100000,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    print("class,drops,bytes/drop")
+    measurements = [(create, cls, cls.__name__) for cls in classes]
+    measurements.append((create_chains, None, "chains"))
+    for f, cls, name in measurements:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            rss = executor.submit(measure, f, cls, options.drops).result()
+        print("%s,%d,%.0f" % (name, options.drops, rss))
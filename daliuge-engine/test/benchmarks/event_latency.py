@@ -0,0 +1,151 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures how long it takes the completion of a DROP to
+reach its consumer in a different NodeManager. Two NodeManagers on loopback run
+a chain of applications alternating between them, so every link of the chain
+is a hop through the event publishing mechanism. The CPU time used by both
+NodeManagers while idle is measured too.
+"""
+
+import sys
+import threading
+import time
+from optparse import OptionParser
+
+from dlg.ddap_protocol import DROPLinkType, DROPRel
+from dlg.manager.node_manager import NodeManager
+
+default_repro = {
+    "rmode": "1",
+    "RERUN": {
+        "lg_blockhash": "x",
+        "pgt_blockhash": "y",
+        "pg_blockhash": "z",
+    },
+}
+default_graph_repro = {
+    "rmode": "1",
+    "meta_data": {"repro_protocol": 0.1, "hashing_alg": "_sha3.sha3_256"},
+    "merkleroot": "a",
+    "RERUN": {
+        "signature": "b",
+    },
+}
+
+
+def conninfo(n):
+    return "localhost", 5553 + n, 6666 + n
+
+
+class CompletionListener(threading.Event):
+    def handleEvent(self, _evt):
+        self.set()
+
+
+def chain(hops):
+    """
+    Returns the graphs for each NodeManager for a chain of `hops` applications,
+    and the relationships between them. Application i consumes data i-1 from
+    the other NodeManager, and produces data i in its own
+    """
+    graphs = [[], []]
+    rels = []
+    graphs[0].append({"oid": "D0", "categoryType": "Data"})
+    for i in range(1, hops + 1):
+        graphs[i % 2].append(
+            {
+                "oid": f"A{i}",
+                "categoryType": "Application",
+                "dropclass": "dlg.apps.simple.SleepApp",
+                "outputs": [f"D{i}"],
+            }
+        )
+        graphs[i % 2].append({"oid": f"D{i}", "categoryType": "Data"})
+        rels.append(DROPRel(f"A{i}", DROPLinkType.CONSUMER, f"D{i - 1}"))
+    for graph in graphs:
+        for drop in graph:
+            if drop["categoryType"] == "Data":
+                drop["dropclass"] = "dlg.data.drops.memory.InMemoryDROP"
+            drop["reprodata"] = default_repro.copy()
+        graph.append(default_graph_repro.copy())
+    return graphs, rels
+
+
+def measure(nms, hops, session_id):
+    """Returns the time it takes for the completion of D0 to reach the chain's end"""
+    graphs, rels = chain(hops)
+    for n, (nm, graph) in enumerate(zip(nms, graphs)):
+        nm.createSession(session_id)
+        nm.addGraphSpec(session_id, graph)
+        nm.add_node_subscriptions(session_id, {conninfo(1 - n): rels})
+        nm.deploySession(session_id)
+
+    first = nms[0]._sessions[session_id].drops["D0"]
+    last = nms[hops % 2]._sessions[session_id].drops[f"D{hops}"]
+    done = CompletionListener()
+    last.subscribe(done, "dropCompleted")
+    start = time.time()
+    first.setCompleted()
+    if not done.wait(600):
+        raise RuntimeError("Chain of %d hops didn't finish" % hops)
+    duration = time.time() - start
+    for nm in nms:
+        nm.destroySession(session_id)
+    return duration
+
+
+def idle_cpu(seconds):
+    """Returns the CPU time used by this process while sleeping"""
+    start = time.process_time()
+    time.sleep(seconds)
+    return time.process_time() - start
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--hops",
+        action="store",
+        type="int",
+        dest="hops",
+        help="Maximum number of hops in the chain",
+        default=1000,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    nms = []
+    try:
+        for n in range(2):
+            _, events_port, rpc_port = conninfo(n)
+            nms.append(NodeManager(events_port=events_port, rpc_port=rpc_port))
+        print("idle CPU usage: %.1f%%" % (idle_cpu(5) / 5 * 100))
+        print("hops,total [s],per hop [ms]")
+        hops = 10
+        while hops <= options.hops:
+            duration = measure(nms, hops, f"s{hops}")
+            print("%d,%.3f,%.2f" % (hops, duration, duration / hops * 1000))
+            hops *= 10
+    finally:
+        for nm in nms:
+            nm.shutdown()
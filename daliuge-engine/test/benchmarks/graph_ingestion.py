@@ -0,0 +1,109 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures the time and peak memory it takes a Session to
+ingest and deploy chains of increasing numbers of DROPs, either from a fully
+parsed graph or from a graph decoded while being read (as the NodeManager
+REST interface does).
+"""
+
+import gc
+import io
+import json
+import sys
+import time
+import tracemalloc
+from optparse import OptionParser
+
+from dlg import utils
+from dlg.manager.session import Session
+
+
+def chain(n):
+    """Returns the JSON representation of a chain of `n` apps and data DROPs"""
+    graph = []
+    for i in range(n):
+        data = {
+            "oid": f"D{i}",
+            "categoryType": "Data",
+            "dropclass": "dlg.data.drops.memory.InMemoryDROP",
+        }
+        if i:
+            data["producers"] = [f"A{i}"]
+            graph.append(
+                {
+                    "oid": f"A{i}",
+                    "categoryType": "Application",
+                    "dropclass": "dlg.apps.simple.SleepApp",
+                    "inputs": [f"D{i - 1}"],
+                    "outputs": [f"D{i}"],
+                }
+            )
+        graph.append(data)
+    return json.dumps(graph).encode("utf8")
+
+
+def measure(content, stream):
+    """
+    Adds the graph in `content` to a new Session and deploys it, returning the
+    time it took and the peak memory allocated while doing so
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    with Session("bench") as session:
+        body = io.BytesIO(content)
+        if stream:
+            session.addGraphSpec(utils.JSONArrayReader(body))
+        else:
+            session.addGraphSpec(json.loads(body.read()))
+        session.deploy()
+        duration = time.time() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return duration, peak
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--drops",
+        action="store",
+        type="int",
+        dest="drops",
+        help="Maximum number of data DROPs in the graph",
+        default=100000,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    print("drops,parsed [s],parsed [MB],streamed [s],streamed [MB]")
+    n = 1000
+    while n <= options.drops:
+        content = chain(n)
+        parsed, parsed_peak = measure(content, False)
+        streamed, streamed_peak = measure(content, True)
+        print(
+            "%d,%.3f,%.1f,%.3f,%.1f"
+            % (n, parsed, parsed_peak / 1e6, streamed, streamed_peak / 1e6)
+        )
+        n *= 10
@@ -0,0 +1,139 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures the time it takes a NodeManager to run a CopyApp
+between two memory DROPs of increasing sizes when applications are executed
+by a thread pool, by a process pool accessing their data through RPC, and by a
+process pool accessing their data directly.
+"""
+
+import os
+import sys
+import threading
+import time
+from optparse import OptionParser
+
+from dlg.manager.node_manager import NodeManager
+
+default_repro = {
+    "rmode": "1",
+    "RERUN": {
+        "lg_blockhash": "x",
+        "pgt_blockhash": "y",
+        "pg_blockhash": "z",
+    },
+}
+default_graph_repro = {
+    "rmode": "1",
+    "meta_data": {"repro_protocol": 0.1, "hashing_alg": "_sha3.sha3_256"},
+    "merkleroot": "a",
+    "RERUN": {
+        "signature": "b",
+    },
+}
+
+
+def graph():
+    """Returns a graph copying the contents of memory DROP A into C"""
+    drops = [
+        {
+            "oid": "A",
+            "categoryType": "Data",
+            "dropclass": "dlg.data.drops.memory.InMemoryDROP",
+            "consumers": ["B"],
+        },
+        {
+            "oid": "B",
+            "categoryType": "Application",
+            "dropclass": "dlg.apps.simple.CopyApp",
+            "outputs": ["C"],
+        },
+        {
+            "oid": "C",
+            "categoryType": "Data",
+            "dropclass": "dlg.data.drops.memory.InMemoryDROP",
+        },
+    ]
+    for drop in drops:
+        drop["reprodata"] = default_repro.copy()
+    return drops + [default_graph_repro.copy()]
+
+
+class CompletionListener(threading.Event):
+    def handleEvent(self, _evt):
+        self.set()
+
+
+def measure(nm, size, session_id):
+    """
+    Runs the copy of `size` bytes in the given NodeManager, returning the
+    time it took
+    """
+    nm.createSession(session_id)
+    nm.addGraphSpec(session_id, graph())
+    nm.deploySession(session_id)
+    drops = nm._sessions[session_id].drops
+    data = os.urandom(size)
+
+    done = CompletionListener()
+    drops["C"].subscribe(done, "dropCompleted")
+    start = time.time()
+    drops["A"].write(data)
+    drops["A"].setCompleted()
+    if not done.wait(600):
+        raise RuntimeError("Copy of %d bytes didn't finish" % size)
+    duration = time.time() - start
+    assert drops["C"].size == size
+    nm.destroySession(session_id)
+    return duration
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-s",
+        "--size",
+        action="store",
+        type="int",
+        dest="size",
+        help="Maximum amount of data to copy, in MB",
+        default=256,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    threads_nm = NodeManager(events_port=5553, rpc_port=6666)
+    rpc_nm = NodeManager(events_port=5554, rpc_port=6667, use_processes=True)
+    rpc_nm._drop_runner._use_data_plane = False
+    shm_nm = NodeManager(events_port=5555, rpc_port=6668, use_processes=True)
+    try:
+        print("size [MB],threads [s],processes-rpc [s],processes-shm [s]")
+        size = 1
+        while size <= options.size:
+            times = [
+                measure(nm, size * 1024 * 1024, "s%d_%d" % (i, size))
+                for i, nm in enumerate((threads_nm, rpc_nm, shm_nm))
+            ]
+            print("%d,%.3f,%.3f,%.3f" % (size, *times))
+            size *= 4
+    finally:
+        for nm in (threads_nm, rpc_nm, shm_nm):
+            nm.shutdown()
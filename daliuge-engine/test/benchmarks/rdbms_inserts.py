@@ -0,0 +1,87 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures how many rows per second can be inserted into
+an RDBMSDrop backed by an sqlite3 database, one by one with different batch
+sizes, and through insert_many.
+"""
+
+import contextlib
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+from dlg.data.drops.rdbms import RDBMSDrop
+
+
+def rdbms_drop(dbfile, batch_size):
+    with contextlib.closing(sqlite3.connect(dbfile)) as conn:
+        conn.execute("DROP TABLE IF EXISTS t")
+        conn.execute("CREATE TABLE t(a_string varchar(64), an_integer integer)")
+    return RDBMSDrop(
+        "a",
+        "a",
+        dbmodule="sqlite3",
+        dbtable="t",
+        dbparams={"database": dbfile},
+        batch_size=batch_size,
+    )
+
+
+def measure(drop, rows, many):
+    """Returns the rate at which `rows` rows are inserted into `drop`"""
+    start = time.time()
+    if many:
+        drop.insert_many({"a_string": str(i), "an_integer": i} for i in range(rows))
+    else:
+        for i in range(rows):
+            drop.insert({"a_string": str(i), "an_integer": i})
+    drop.setCompleted()
+    return rows / (time.time() - start)
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-r",
+        "--rows",
+        action="store",
+        type="int",
+        dest="rows",
+        help="Number of rows to insert in each mode",
+        default=2000,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    dbfile = os.path.join(tempfile.mkdtemp(), "rdbms_inserts.db")
+    try:
+        print("mode,batch size,rows/s")
+        for batch_size in (0, 100, 1000):
+            rate = measure(rdbms_drop(dbfile, batch_size), options.rows, False)
+            print("insert,%d,%.0f" % (batch_size, rate))
+        rate = measure(rdbms_drop(dbfile, 1000), options.rows * 10, True)
+        print("insert_many,1000,%.0f" % rate)
+    finally:
+        os.unlink(dbfile)
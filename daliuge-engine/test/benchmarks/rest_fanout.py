@@ -0,0 +1,114 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures how long it takes a DataIslandManager to fan a
+request out to an increasing number of NodeManagers, with and without reusing
+HTTP connections across requests. NodeManagers are simulated by local servers
+that answer the session status request; each of them takes one thread and a
+few file descriptors, so large numbers of nodes might require raising the
+process' limits.
+"""
+
+import sys
+import threading
+import time
+from optparse import OptionParser
+
+import bottle
+
+from dlg import restutils
+from dlg.manager.composite_manager import DataIslandManager
+from dlg.restutils import ConnectionPool, RestServerWSGIServer
+
+
+def start_node_managers(n):
+    """Starts `n` stand-in NodeManager servers, returning them"""
+    app = bottle.Bottle()
+    app.get(
+        "/api/sessions/<sessionId>/status",
+        callback=lambda sessionId: {"status": 0},
+    )
+    servers = []
+    for _ in range(n):
+        server = RestServerWSGIServer(app, "localhost", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def measure(servers, requests, pool):
+    """
+    Sends `requests` session status requests through a DataIslandManager in
+    charge of `servers`, using `pool` to connect to them. Returns the time it
+    took for the first request, and the average time of the rest.
+    """
+    restutils.connection_pool = pool
+    hosts = ["localhost:%d" % server.server.server_port for server in servers]
+    dim = DataIslandManager(dmHosts=hosts)
+    try:
+        start = time.time()
+        dim.getSessionStatus("bench")
+        first = time.time() - start
+        start = time.time()
+        for _ in range(requests - 1):
+            dim.getSessionStatus("bench")
+        rest = (time.time() - start) / max(1, requests - 1)
+    finally:
+        dim.shutdown()
+        pool.clear()
+    return first, rest
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--nodes",
+        action="store",
+        type="int",
+        dest="nodes",
+        help="Maximum number of NodeManagers to simulate",
+        default=1024,
+    )
+    parser.add_option(
+        "-r",
+        "--requests",
+        action="store",
+        type="int",
+        dest="requests",
+        help="Number of requests to fan out for each number of nodes",
+        default=10,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    servers = start_node_managers(options.nodes)
+    print("nodes,first [s],pooled [s],unpooled [s]")
+    nodes = 1
+    while nodes <= options.nodes:
+        first, pooled = measure(servers[:nodes], options.requests, ConnectionPool())
+        _, unpooled = measure(
+            servers[:nodes], options.requests, ConnectionPool(max_idle=0)
+        )
+        print("%d,%.4f,%.4f,%.4f" % (nodes, first, pooled, unpooled))
+        nodes *= 2
+    for server in servers:
+        server.server_close()
@@ -0,0 +1,134 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures the average time per call it takes to access the
+attributes of a DROP held by a NodeManager through RPC, when calls are issued
+one after the other, from several threads at once, or from an asyncio event
+loop.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from optparse import OptionParser
+
+from dlg import rpc
+from dlg.manager.node_manager import NodeManager
+
+default_repro = {
+    "rmode": "1",
+    "RERUN": {
+        "lg_blockhash": "x",
+        "pgt_blockhash": "y",
+        "pg_blockhash": "z",
+    },
+}
+default_graph_repro = {
+    "rmode": "1",
+    "meta_data": {"repro_protocol": 0.1, "hashing_alg": "_sha3.sha3_256"},
+    "merkleroot": "a",
+    "RERUN": {
+        "signature": "b",
+    },
+}
+
+
+def sequential(proxy, calls):
+    for _ in range(calls):
+        proxy.status
+        proxy.isCompleted()
+
+
+def threaded(proxy, calls, threads=10):
+    workers = [
+        threading.Thread(target=sequential, args=(proxy, calls // threads))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def asynchronous(client, calls):
+    async def run():
+        await asyncio.gather(
+            *[
+                client.acall_drop("localhost", 6666, "s", "A", "isCompleted")
+                for _ in range(calls)
+            ]
+        )
+
+    asyncio.run(run())
+
+
+def measure(f, *args):
+    """Returns the time it takes to run `f`, in microseconds"""
+    start = time.time()
+    f(*args)
+    return (time.time() - start) * 1e6
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-c",
+        "--calls",
+        action="store",
+        type="int",
+        dest="calls",
+        help="Number of calls to make in each mode",
+        default=2000,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+    calls = options.calls
+
+    nm = NodeManager(events_port=5553, rpc_port=6666)
+    client = rpc.RPCClient()
+    client.start()
+    try:
+        nm.createSession("s")
+        graph = [
+            {
+                "oid": "A",
+                "categoryType": "Data",
+                "dropclass": "dlg.data.drops.memory.InMemoryDROP",
+                "reprodata": default_repro.copy(),
+            },
+            default_graph_repro.copy(),
+        ]
+        nm.addGraphSpec("s", graph)
+        nm.deploySession("s")
+        proxy = rpc.DropProxy(client, rpc.ProxyInfo("localhost", 6666, "s", "A"))
+
+        # Each iteration of sequential and threaded makes two calls
+        print("mode,calls,time per call [us]")
+        duration = measure(sequential, proxy, calls)
+        print("sequential,%d,%.1f" % (2 * calls, duration / calls / 2))
+        duration = measure(threaded, proxy, calls)
+        print("threads,%d,%.1f" % (2 * calls, duration / calls / 2))
+        duration = measure(asynchronous, client, calls)
+        print("asyncio,%d,%.1f" % (calls, duration / calls))
+    finally:
+        client.shutdown()
+        nm.shutdown()
@@ -0,0 +1,84 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures how long it takes to write increasing amounts of
+data into a SharedMemoryIO in fixed-size chunks. Write cost should grow
+linearly with the total amount of data written.
+"""
+
+import sys
+import time
+from optparse import OptionParser
+
+from dlg.data.io import OpenMode, SharedMemoryIO
+from dlg.shared_memory import DlgSharedMemory
+
+
+def measure(total_size, chunk_size):
+    """
+    Writes `total_size` bytes into a new SharedMemoryIO in chunks of
+    `chunk_size` bytes, returning the time it took to write and close it
+    """
+    chunk = b"x" * chunk_size
+    io = SharedMemoryIO("bench", "shm")
+    start = time.time()
+    io.open(OpenMode.OPEN_WRITE)
+    for _ in range(total_size // chunk_size):
+        io.write(chunk)
+    io.close()
+    duration = time.time() - start
+
+    block = DlgSharedMemory("shm_bench")
+    block.close()
+    block.unlink()
+    return duration
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-s",
+        "--size",
+        action="store",
+        type="int",
+        dest="size",
+        help="Maximum number of MB to write",
+        default=1024,
+    )
+    parser.add_option(
+        "-c",
+        "--chunk",
+        action="store",
+        type="int",
+        dest="chunk",
+        help="Size of each written chunk, in KB",
+        default=64,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    mb = 1024 * 1024
+    size = 16
+    print("MB,seconds,seconds/MB")
+    while size <= options.size:
+        duration = measure(size * mb, options.chunk * 1024)
+        print("%d,%.3f,%.6f" % (size, duration, duration / size))
+        size *= 2
@@ -28,6 +28,7 @@ Created on 22 Jun 2015
 import os
 import shutil
 import tempfile
+import threading
 import time
 import unittest
 
@@ -37,6 +38,7 @@ from dlg.data.drops.directorycontainer import DirectoryContainer
 from dlg.data.drops.file import FileDROP
 from dlg.droputils import DROPWaiterCtx
 from dlg.lifecycle import dlm
+from dlg.lifecycle.replication import ReplicationQueue, ReplicationStates, copy_file
 
 
 class TestDataLifecycleManager(unittest.TestCase):
@@ -66,16 +68,23 @@ class TestDataLifecycleManager(unittest.TestCase):
             self._writeAndClose(drop)
 
             # The call to close() should have turned it into a SOLID object
-            # because the DLM replicated it
+            # because the DLM replicated it (in the background)
+            self.assertTrue(manager.waitForReplications(10))
             self.assertEqual(DROPPhases.SOLID, drop.phase)
             self.assertEqual(2, len(manager.getDropUids(drop)))
+            self.assertEqual(
+                (ReplicationStates.FINISHED, 1, 1),
+                manager._reg.getReplicationProgress(drop),
+            )
 
             # Try the same with a non-persisted data object, it shouldn't be replicated
             drop = FileDROP("oid:B", "uid:B1", expectedSize=1, persist=False)
             manager.addDrop(drop)
             self._writeAndClose(drop)
+            self.assertTrue(manager.waitForReplications(10))
             self.assertEqual(DROPPhases.GAS, drop.phase)
             self.assertEqual(1, len(manager.getDropUids(drop)))
+            self.assertIsNone(manager._reg.getReplicationProgress(drop))
 
     def test_expiringNormalDrop(self):
         with dlm.DataLifecycleManager(check_period=0.5) as manager:
@@ -182,3 +191,128 @@ class TestDataLifecycleManager(unittest.TestCase):
             self.assertFalse(a.exists())
             self.assertTrue(b.exists())
             b.delete()
+
+    def test_expirationIsEventDriven(self):
+        """
+        Drops are expired as their lifespan runs out or their consumers finish,
+        and deleted once expired, without the DLM looking at any other drop
+        """
+        evt = threading.Event()
+
+        class MyApp(BarrierAppDROP):
+            def run(self):
+                pass
+
+        class BlockedApp(BarrierAppDROP):
+            def run(self):
+                evt.wait()
+
+        with dlm.DataLifecycleManager() as manager:
+            a = DirectoryContainer(
+                "a", "a", expireAfterUse=True, dirname=tempfile.mkdtemp()
+            )
+            b = DirectoryContainer("b", "b", lifespan=0.5, dirname=tempfile.mkdtemp())
+            c = MyApp("c", "c")
+            d = BlockedApp("d", "d")
+            a.addConsumer(c)
+            a.addConsumer(d)
+            manager.addDrop(b)
+            b.setCompleted()
+
+            # Only one of the consumers is done, and b has still some life left
+            with DROPWaiterCtx(self, c, 1):
+                manager.addDrop(a)
+                a.setCompleted()
+            manager.expireCompletedDrops()
+            self.assertEqual(DROPStates.COMPLETED, a.status)
+            self.assertEqual(DROPStates.COMPLETED, b.status)
+
+            with DROPWaiterCtx(self, d, 1):
+                evt.set()
+            manager.expireCompletedDrops()
+            self.assertEqual(DROPStates.EXPIRED, a.status)
+            self.assertEqual(DROPStates.COMPLETED, b.status)
+
+            time.sleep(0.6)
+            manager.expireCompletedDrops()
+            self.assertEqual(DROPStates.EXPIRED, b.status)
+
+            manager.deleteExpiredDrops()
+            for drop in (a, b):
+                self.assertEqual(DROPStates.DELETED, drop.status)
+                self.assertFalse(drop.exists())
+
+
+class TestReplicationQueue(unittest.TestCase):
+    def test_priorityAndConcurrency(self):
+        """Replications are done by priority, one at a time per store"""
+        replicated = []
+        running = {"slow": 0, "fast": 0}
+        lock = threading.Lock()
+        started = threading.Event()
+        evt = threading.Event()
+
+        def replicate(drop, store, throttle):
+            with lock:
+                running[store] += 1
+                self.assertEqual(1, running[store])
+            if drop == "blocker":
+                started.set()
+                evt.wait()
+            with lock:
+                running[store] -= 1
+                replicated.append(drop)
+
+        # The blocker keeps the "slow" store busy while the rest are queued
+        queue = ReplicationQueue(replicate, workers=4)
+        queue.submit("blocker", "slow")
+        self.assertTrue(started.wait(5))
+        for priority in (3, 1, 2, 0):
+            queue.submit(f"slow{priority}", "slow", priority)
+        queue.submit("fast", "fast")
+        self.assertFalse(queue.join(0.1))
+        evt.set()
+        self.assertTrue(queue.join(5))
+        queue.shutdown()
+        self.assertEqual("fast", replicated[0])
+        self.assertEqual(
+            ["blocker", "slow0", "slow1", "slow2", "slow3"], replicated[1:]
+        )
+
+    def test_retries(self):
+        states = []
+        tries = []
+
+        def replicate(drop, store, throttle):
+            tries.append(drop)
+            if len(tries) < 3:
+                raise IOError("Try again")
+
+        queue = ReplicationQueue(
+            replicate,
+            max_tries=3,
+            retry_delay=0.01,
+            on_state_change=lambda drop, state: states.append(state),
+        )
+        queue.submit("a", "store")
+        self.assertTrue(queue.join(5))
+        queue.shutdown()
+        self.assertEqual(3, len(tries))
+        self.assertEqual(ReplicationStates.QUEUED, states[0])
+        self.assertEqual(ReplicationStates.FINISHED, states[-1])
+        self.assertEqual(3, states.count(ReplicationStates.RUNNING))
+
+    def test_copyFile(self):
+        data = os.urandom(1024 * 1024 + 13)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src = os.path.join(tmpdir, "src")
+            dst = os.path.join(tmpdir, "dst")
+            with open(src, "wb") as f:
+                f.write(data)
+            progress = []
+            copy_file(
+                src, dst, 64 * 1024, progress=lambda n, total: progress.append(n)
+            )
+            with open(dst, "rb") as f:
+                self.assertEqual(data, f.read())
+            self.assertEqual(len(data), progress[-1])
@@ -26,6 +26,7 @@ import tempfile
 
 from dlg.data.drops.memory import InMemoryDROP
 from dlg.lifecycle.registry import RDBMSRegistry
+from dlg.lifecycle.replication import ReplicationStates
 
 
 DBFILE = tempfile.mktemp()
@@ -42,6 +43,9 @@ class TestRDBMSRegistry(unittest.TestCase):
         cur.execute(
             "CREATE TABLE dlg_dropaccesstime(oid varchar(64), accessTime TIMESTAMP, PRIMARY KEY (oid, accessTime))"
         )
+        cur.execute(
+            "CREATE TABLE dlg_dropreplication(uid varchar(64) PRIMARY KEY, state integer, transferred integer, total integer)"
+        )
         conn.close()
 
     def tearDown(self):
@@ -103,3 +107,19 @@ class TestRDBMSRegistry(unittest.TestCase):
         registry.recordNewAccess("a")
 
         self.assertNotEqual(-1, registry.getLastAccess("a"))
+
+    def test_replicationProgress(self):
+
+        a1 = InMemoryDROP("a", "a1")
+        registry = RDBMSRegistry("sqlite3", DBFILE)
+        registry.addDrop(a1)
+
+        self.assertIsNone(registry.getReplicationProgress(a1))
+        registry.setReplicationProgress(a1, ReplicationStates.RUNNING, 10, 100)
+        self.assertEqual(
+            (ReplicationStates.RUNNING, 10, 100), registry.getReplicationProgress(a1)
+        )
+        registry.setReplicationProgress(a1, ReplicationStates.FINISHED, 100, 100)
+        self.assertEqual(
+            (ReplicationStates.FINISHED, 100, 100), registry.getReplicationProgress(a1)
+        )
@@ -32,6 +32,8 @@ from dlg import droputils
 from dlg.common import dropdict
 from dlg.ddap_protocol import DROPStates, DROPRel, DROPLinkType
 from dlg.apps.app_base import BarrierAppDROP
+from dlg.event import Event
+from dlg.manager import node_manager
 from dlg.manager.node_manager import NodeManager
 
 try:
@@ -701,6 +703,23 @@ class TestDMMultiThreading(NodeManagerTestsBase, unittest.TestCase):
             self.assertEqual(1, len(dm._sessions[sessionID].drops))
             dm.destroySession(sessionID)
 
+class TestEventEncoding(unittest.TestCase):
+    def test_roundtrip(self):
+        evt = Event("dropCompleted")
+        evt.uid = "A"
+        evt.status = DROPStates.COMPLETED
+        evt.reprodata = {"rmode": "1", 2: [b"x", None]}
+        frame = node_manager._encode_event(evt)
+        self.assertEqual(b"m", frame[:1])
+        self.assertEqual(evt.__dict__, node_manager._decode_event(frame).__dict__)
+
+        # Values msgpack can't deal with are still sent
+        evt.value = {1, 2}
+        frame = node_manager._encode_event(evt)
+        self.assertEqual(b"p", frame[:1])
+        self.assertEqual(evt.__dict__, node_manager._decode_event(frame).__dict__)
+
+
 class TestDMMultiProcessing(NodeManagerTestsBase, unittest.TestCase):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -0,0 +1,76 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+import json
+import os
+import tempfile
+import unittest
+
+from dlg.manager import replay
+from dlg.manager.replay import ReplayManager
+
+
+class TestReplayManager(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        graph_file = os.path.join(self._dir.name, "graph.json")
+        status_file = os.path.join(self._dir.name, "status.json")
+        with open(graph_file, "w") as f:
+            json.dump({"ssid": "s", "g": {"A": {}, "B": {}}}, f)
+        statuses = [
+            {"A": {"status": 0}, "B": {"status": 0}},
+            {"A": {"status": 1}, "B": {"status": 0}},
+            {"A": {"status": 2}, "B": {"status": 1}},
+        ]
+        with open(status_file, "w") as f:
+            for gs in statuses:
+                f.write(json.dumps({"ssid": "s", "gs": gs}) + "\n")
+                f.write(json.dumps({"ssid": "other", "gs": {}}) + "\n")
+        self.dm = ReplayManager(graph_file, status_file)
+        for _ in range(replay.run_step):
+            self.dm.getSessionStatus("s")
+
+    def tearDown(self):
+        self.dm._status_file.close()
+        self._dir.cleanup()
+
+    def test_graph_status_changes(self):
+        changes = self.dm.getGraphStatusChanges("s")
+        self.assertEqual(
+            {"version": 1, "status": {"A": {"status": 0}, "B": {"status": 0}}},
+            changes,
+        )
+        changes = self.dm.getGraphStatusChanges("s", changes["version"])
+        self.assertEqual({"version": 2, "status": {"A": {"status": 1}}}, changes)
+        changes = self.dm.getGraphStatusChanges("s", changes["version"])
+        self.assertEqual(
+            {"version": 3, "status": {"A": {"status": 2}, "B": {"status": 1}}},
+            changes,
+        )
+        # the replay is over, nothing changes anymore
+        for _ in range(2):
+            changes = self.dm.getGraphStatusChanges("s", changes["version"])
+            self.assertEqual({"version": 3, "status": {}}, changes)
+        # unknown versions get the whole status
+        self.assertEqual(
+            {"A": {"status": 2}, "B": {"status": 1}},
+            self.dm.getGraphStatusChanges("s", 1234)["status"],
+        )
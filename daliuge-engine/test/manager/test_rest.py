@@ -19,6 +19,8 @@
 #    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
 #    MA 02111-1307  USA
 #
+import os
+import resource
 import tempfile
 import threading
 import unittest
@@ -32,7 +34,7 @@ from dlg.manager.client import NodeManagerClient, DataIslandManagerClient
 from dlg.manager.composite_manager import DataIslandManager
 from dlg.manager.node_manager import NodeManager
 from dlg.manager.rest import NMRestServer, CompositeManagerRestServer
-from dlg.restutils import RestClient
+from dlg.restutils import ConnectionPool, RestClient
 
 default_repro = {
     "rmode": "1",
@@ -278,6 +280,115 @@ class TestRest(unittest.TestCase):
         self.assertTrue(response)
         c.destroySession(sid)
 
+    def test_graph_status_changes(self):
+        sid = "1234"
+        graph_spec = add_test_reprodata(
+            [
+                {
+                    "categoryType": "Data",
+                    "dropclass": "dlg.data.drops.memory.InMemoryDROP",
+                    "oid": "a",
+                    "node": hostname,
+                },
+                {
+                    "categoryType": "Data",
+                    "dropclass": "dlg.data.drops.memory.InMemoryDROP",
+                    "oid": "b",
+                    "node": hostname,
+                },
+            ]
+        )
+        c = DataIslandManagerClient(hostname)
+        c.createSession(sid)
+        c.addGraphSpec(sid, graph_spec)
+        c.deploySession(sid, completed_uids=["a"])
+
+        # The DIM keeps one version per node
+        changes = c.graph_status_changes(sid)
+        self.assertEqual(c.graph_status(sid), changes["status"])
+        self.assertEqual({"a", "b"}, set(changes["status"]))
+        self.assertEqual([hostname], list(changes["version"]))
+        changes = c.graph_status_changes(sid, changes["version"])
+        self.assertEqual({}, changes["status"])
+
+        nm = NodeManagerClient(hostname)
+        version = nm.graph_status_changes(sid)["version"]
+        self.dm._sessions[sid].drops["b"].setCompleted()
+        changes = nm.graph_status_changes(sid, version)
+        self.assertEqual(["b"], list(changes["status"]))
+        c.destroySession(sid)
+
+    def test_connection_reuse(self):
+        pool = ConnectionPool()
+        key = (hostname, constants.NODE_DEFAULT_REST_PORT)
+        with RestClient(
+            hostname, constants.NODE_DEFAULT_REST_PORT, url_prefix="/api", pool=pool
+        ) as c:
+            c._get_json("/sessions")
+            c._get_json("/sessions")
+        self.assertEqual(1, len(pool._idle[key]))
+        conn = pool._idle[key][0][0]
+
+        # Requests, including failed ones, go through the same connection
+        with RestClient(
+            hostname, constants.NODE_DEFAULT_REST_PORT, url_prefix="/api", pool=pool
+        ) as c:
+            self.assertRaises(
+                exceptions.NoSessionException, c._get_json, "/sessions/a/status"
+            )
+            c._post_json("/sessions", '{"sessionId": "a"}')
+            c._DELETE("/sessions/a")
+        self.assertEqual([conn], [conn for conn, _ in pool._idle[key]])
+        self.assertTrue(pool.liveness(hostname, constants.NODE_DEFAULT_REST_PORT, 60))
+
+        # A server restart leaves a stale connection behind, which is replaced
+        self._dm_server.stop()
+        self._dm_t.join()
+        self._dm_t = threading.Thread(
+            target=self._dm_server.start,
+            args=(hostname, constants.NODE_DEFAULT_REST_PORT),
+        )
+        self._dm_t.start()
+        with RestClient(
+            hostname, constants.NODE_DEFAULT_REST_PORT, url_prefix="/api", pool=pool
+        ) as c:
+            self.assertEqual([], c._get_json("/sessions"))
+        self.assertEqual(1, len(pool._idle[key]))
+        self.assertIsNot(conn, pool._idle[key][0][0])
+
+        # Connection failures mark the host as not alive
+        c = RestClient(hostname, 1, timeout=0.5, pool=pool)
+        self.assertRaises(Exception, c._GET, "/")
+        self.assertFalse(pool.liveness(hostname, 1, 60))
+
+    def test_connection_reuse_high_fds(self):
+        # Connections on file descriptors >= 1024 are reused too
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < 1200:
+            if hard != resource.RLIM_INFINITY and hard < 1200:
+                self.skipTest("Can't open enough file descriptors")
+            resource.setrlimit(resource.RLIMIT_NOFILE, (1200, hard))
+        fds = [os.open(os.devnull, os.O_RDONLY) for _ in range(1100)]
+        try:
+            pool = ConnectionPool()
+            key = (hostname, constants.NODE_DEFAULT_REST_PORT)
+            with RestClient(
+                hostname, constants.NODE_DEFAULT_REST_PORT, url_prefix="/api", pool=pool
+            ) as c:
+                c._get_json("/sessions")
+            conn = pool._idle[key][0][0]
+            self.assertGreaterEqual(conn.sock.fileno(), 1024)
+            with RestClient(
+                hostname, constants.NODE_DEFAULT_REST_PORT, url_prefix="/api", pool=pool
+            ) as c:
+                c._get_json("/sessions")
+            self.assertEqual([conn], [conn for conn, _ in pool._idle[key]])
+            pool.clear()
+        finally:
+            for fd in fds:
+                os.close(fd)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
     def test_submit_method(self):
         c = NodeManagerClient(hostname)
         response = c.get_submission_method()
@@ -0,0 +1,120 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+import asyncio
+import threading
+import unittest
+
+import zerorpc
+
+from dlg import rpc
+from dlg.ddap_protocol import DROPStates
+from dlg.manager.node_manager import NodeManager
+
+from test.manager.test_dm import add_test_reprodata, memory
+
+hostname = "localhost"
+rpc_port = 6666
+
+
+class TestRPC(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.nm = NodeManager(host=hostname, events_port=5553, rpc_port=rpc_port)
+        self.nm.createSession("s")
+        self.nm.addGraphSpec("s", add_test_reprodata([memory("A"), memory("B")]))
+        self.nm.deploySession("s")
+        self.client = rpc.RPCClient()
+        self.client.start()
+
+    def tearDown(self):
+        self.client.shutdown()
+        self.nm.shutdown()
+        super().tearDown()
+
+    def _proxy(self, uid):
+        info = rpc.ProxyInfo(hostname, rpc_port, "s", uid)
+        return rpc.DropProxy(self.client, info)
+
+    def test_drop_proxy(self):
+        a = self._proxy("A")
+        self.assertEqual("A", a.oid)
+        self.assertEqual(DROPStates.INITIALIZED, a.status)
+        a.write(b"abc")
+        a.setCompleted()
+        self.assertEqual(DROPStates.COMPLETED, a.status)
+        self.assertEqual(3, a.size)
+        self.assertRaises(zerorpc.RemoteError, getattr, a, "unknown")
+
+        # Methods of known drop classes are called directly
+        b = self._proxy("B")
+        self.assertEqual("B", b.oid)
+        self.assertFalse(b.isCompleted())
+        self.assertIn(
+            ("dlg.data.drops.memory.InMemoryDROP", "isCompleted"),
+            self.client._drop_methods,
+        )
+
+    def test_concurrent_calls(self):
+        a = self._proxy("A")
+        results = []
+
+        def get_oids():
+            results.extend(a.oid for _ in range(50))
+
+        threads = [threading.Thread(target=get_oids) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(["A"] * 500, results)
+
+    def test_asyncio(self):
+        async def call():
+            return await asyncio.gather(
+                *[
+                    self.client.aget_drop_property(
+                        hostname, rpc_port, "s", uid, "oid"
+                    )
+                    for uid in ("A", "B") * 50
+                ],
+                self.client.acall_drop(hostname, rpc_port, "s", "A", "isCompleted"),
+            )
+
+        results = asyncio.run(call())
+        self.assertEqual(["A", "B"] * 50 + [False], results)
+
+        async def fail():
+            await self.client.acall_drop(hostname, rpc_port, "s", "C", "oid")
+
+        self.assertRaises(zerorpc.RemoteError, asyncio.run, fail())
+
+    def test_call_batch(self):
+        results = self.nm.call_batch(
+            [
+                ("get_drop_property", ("s", "A", "oid")),
+                ("get_drop_property", ("s", "C", "oid")),
+                ("_check_session_id", ("s",)),
+            ]
+        )
+        self.assertEqual((True, "A"), results[0])
+        self.assertEqual([False, False], [r[0] for r in results[1:]])
+        self.assertEqual("NoDropException", results[1][1][0])
@@ -28,14 +28,21 @@ Test the S3 Drop
 # If the profile is not present in the current user's account
 # we simply skip the test
 
+import os
 import unittest
+import unittest.mock
+
+from dlg import droputils
+from dlg.data.io import OpenMode
 
 run_tests = True
 try:
     import boto3
+    from dlg.data.drops import s3_drop
     from dlg.data.drops.s3_drop import S3DROP
 except ImportError:
     run_tests = False
+boto_available = run_tests
 
 if run_tests:
     PROFILE = "acacia-awicenec"
@@ -121,3 +128,116 @@ class TestS3Drop(unittest.TestCase):
         written = drop.write(testdata)
         self.assertEqual(written, len(testdata))
         drop.delete()
+
+
+try:
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+
+@skipIf(not boto_available or mock_aws is None, "moto is not available")
+class TestS3DropMoto(unittest.TestCase):
+    """
+    Runs the S3DROP against moto's in-process S3 stand-in
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.env = unittest.mock.patch.dict(
+            os.environ, {"AWS_DEFAULT_REGION": "us-east-1"}
+        )
+        self.env.start()
+        self.mock = mock_aws()
+        self.mock.start()
+
+    def tearDown(self):
+        self.mock.stop()
+        self.env.stop()
+        super().tearDown()
+
+    def _drop(self, oid, **kwargs):
+        return S3DROP(
+            oid,
+            oid,
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+            Bucket="dlg",
+            Key=oid,
+            **kwargs,
+        )
+
+    def _roundtrip(self, drop, data, chunk_size):
+        for i in range(0, len(data), chunk_size):
+            drop.write(data[i : i + chunk_size])
+        drop.setCompleted()
+        self.assertTrue(drop.exists())
+        self.assertEqual(len(data), drop.size)
+        self.assertEqual(data, droputils.allDropContents(drop))
+
+    def test_part_size(self):
+        self.assertEqual(s3_drop._MIN_PART_SIZE, s3_drop._part_size(-1))
+        self.assertEqual(s3_drop._MIN_PART_SIZE, s3_drop._part_size(1000))
+        self.assertEqual(16 * 1024**2, s3_drop._part_size(16000 * 1024**2))
+        self.assertEqual(s3_drop._MAX_PREFERRED_PART_SIZE, s3_drop._part_size(10**11))
+        for size in (10**12, 5 * 10**12):
+            self.assertLessEqual(
+                size / s3_drop._part_size(size), s3_drop._MAX_PARTS
+            )
+
+    def test_small_object(self):
+        self._roundtrip(self._drop("small"), os.urandom(1000), 100)
+
+    def test_multipart(self):
+        data = os.urandom(s3_drop._MIN_PART_SIZE * 3 + 1234)
+        drop = self._drop("multipart", max_concurrency=2)
+        io = drop.getIO()
+        io.open(OpenMode.OPEN_WRITE)
+        for i in range(0, len(data), 1000000):
+            io.write(data[i : i + 1000000])
+        self.assertEqual(4, io._partNo)
+        io.close()
+        self.assertEqual(len(data), drop.size)
+
+        # Chunks of any size, crossing ranged GETs
+        io = drop.getIO()
+        io.open(OpenMode.OPEN_READ)
+        chunks = []
+        chunk = io.read(12345)
+        while chunk:
+            chunks.append(chunk)
+            chunk = io.read(3 * 1024**2 + 7)
+        io.close()
+        self.assertEqual(data, b"".join(chunks))
+
+    def test_expected_size(self):
+        drop = self._drop("expected", data_volume=40 * 1024)
+        self.assertEqual(40 * 1024**3, drop._expected_object_size())
+        data = os.urandom(1024**2)
+        self._roundtrip(drop, data, 4096)
+        drop = self._drop("expected2", expectedSize=len(data))
+        self.assertEqual(len(data), drop._expected_object_size())
+        for i in range(0, len(data), 4096):
+            drop.write(data[i : i + 4096])
+        # Completes automatically once all data arrives
+        self.assertTrue(drop.isCompleted())
+        self.assertEqual(data, droputils.allDropContents(drop))
+
+    def test_failed_upload_is_aborted(self):
+        drop = self._drop("failed", max_concurrency=2)
+        io = drop.getIO()
+        io.open(OpenMode.OPEN_WRITE)
+        s3 = io._s3
+        error = s3_drop.botocore.exceptions.EndpointConnectionError(endpoint_url="x")
+        with unittest.mock.patch.object(s3, "upload_part", side_effect=error):
+            try:
+                for _ in range(4):
+                    io.write(os.urandom(s3_drop._MIN_PART_SIZE))
+            except s3_drop.botocore.exceptions.EndpointConnectionError:
+                pass
+            # Closing after a failed write must not leave the parts behind
+            self.assertRaises(
+                s3_drop.botocore.exceptions.EndpointConnectionError, io.close
+            )
+        self.assertNotIn("Uploads", s3.list_multipart_uploads(Bucket="dlg"))
+        self.assertFalse(drop.exists())
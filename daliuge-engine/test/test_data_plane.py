@@ -0,0 +1,123 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+
+from dlg import droputils
+from dlg.ddap_protocol import DROPStates
+from dlg.data import data_plane
+from dlg.data.drops.file import FileDROP
+from dlg.data.drops.memory import InMemoryDROP, SharedMemoryDROP
+
+if sys.version_info >= (3, 8):
+    from dlg.shared_memory import DlgSharedMemory
+
+try:
+    from crc32c import crc32c
+except:
+    from binascii import crc32 as crc32c
+
+
+@unittest.skipIf(sys.version_info < (3, 8), "Shared memory does not work < python 3.8")
+class TestDataPlane(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for f in os.listdir(self.tmpdir):
+            os.unlink(os.path.join(self.tmpdir, f))
+        os.rmdir(self.tmpdir)
+        super().tearDown()
+
+    def _drops(self, oid):
+        drops = [
+            InMemoryDROP(oid, oid),
+            SharedMemoryDROP(oid, oid),
+            FileDROP(oid, oid, filepath=os.path.join(self.tmpdir, oid)),
+        ]
+        for drop in drops:
+            drop._rpc_endpoint = ("localhost", 6666)
+        # Shared memory blocks are named after the DROP's session
+        drops[1]._sessionId = "dp"
+        return drops
+
+    def _delete(self, drop):
+        if isinstance(drop, SharedMemoryDROP):
+            block = DlgSharedMemory(drop.getIO()._name)
+            block.close()
+            block.unlink()
+        else:
+            drop.delete()
+
+    def _worker_drop(self, info):
+        # Workers receive their information through a pipe
+        return data_plane.DataPlaneDrop(None, pickle.loads(pickle.dumps(info)))
+
+    def test_inputs(self):
+        for size in (10, data_plane._INLINE_SIZE + 1):
+            data = os.urandom(size)
+            for drop in self._drops(f"A{size}"):
+                with self.subTest(drop=drop, size=size):
+                    self.assertIsNone(data_plane.input_info(drop))
+                    drop.write(data)
+                    drop.setCompleted()
+
+                    info = data_plane.input_info(drop)
+                    worker_drop = self._worker_drop(info)
+                    self.assertEqual(size, worker_drop.size)
+                    self.assertEqual(data, droputils.allDropContents(worker_drop))
+                    self.assertEqual(0, worker_drop.closeWriter())
+                    info.release()
+
+                    # The DROP itself is untouched
+                    self.assertEqual(data, droputils.allDropContents(drop))
+                    self._delete(drop)
+
+    def test_outputs(self):
+        data = os.urandom(data_plane._INLINE_SIZE * 3)
+        for drop in self._drops("B"):
+            with self.subTest(drop=drop):
+                info = data_plane.output_info(drop)
+                worker_drop = self._worker_drop(info)
+                for i in range(0, len(data), 1000):
+                    worker_drop.write(data[i : i + 1000])
+                nbytes = worker_drop.closeWriter()
+                self.assertEqual(len(data), nbytes)
+
+                data_plane.apply_output(drop, info, nbytes)
+                info.release()
+                self.assertEqual(DROPStates.WRITING, drop.status)
+                drop.setCompleted()
+                self.assertEqual(len(data), drop.size)
+                self.assertEqual(data, droputils.allDropContents(drop))
+                self.assertEqual(crc32c(data, 0), drop.checksum)
+                self.assertIsNone(data_plane.output_info(drop))
+                self._delete(drop)
+
+    def test_streaming_outputs_use_rpc(self):
+        drop = self._drops("C")[0]
+        drop.addStreamingConsumer(InMemoryDROP("D", "D"), back=False)
+        self.assertIsNone(data_plane.output_info(drop))
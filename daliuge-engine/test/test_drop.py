@@ -23,6 +23,7 @@
 import contextlib
 import io
 import os, unittest
+import pickle
 import random
 import shutil
 import sqlite3
@@ -30,6 +31,7 @@ import string
 import sys
 import tempfile
 import subprocess
+import types
 
 from dlg import droputils
 from dlg.common.reproducibility.constants import ReproducibilityFlags
@@ -37,6 +39,7 @@ from dlg.ddap_protocol import DROPStates, ExecutionMode, AppDROPStates
 from dlg.apps.app_base import AppDROP, BarrierAppDROP, InputFiredAppDROP
 from dlg.data.drops.data_base import NullDROP
 from dlg.data.drops.container import ContainerDROP
+from dlg.data.drops import rdbms
 from dlg.data.drops.rdbms import RDBMSDrop
 from dlg.data.drops.memory import InMemoryDROP, SharedMemoryDROP
 from dlg.data.drops.directorycontainer import DirectoryContainer
@@ -44,6 +47,12 @@ from dlg.data.drops.file import FileDROP
 from dlg.droputils import DROPWaiterCtx
 from dlg.exceptions import InvalidDropException
 from dlg.apps.simple import NullBarrierApp, SimpleBranch, SleepAndCopyApp
+from dlg.meta import (
+    dlg_dict_param,
+    dlg_float_param,
+    dlg_int_param,
+    dlg_list_param,
+)
 
 try:
     from crc32c import crc32c
@@ -897,6 +906,53 @@ class TestDROP(unittest.TestCase):
         self.assertEqual(DROPStates.COMPLETED, a.status)
         self.assertEqual(AppDROPStates.FINISHED, a.execStatus)
 
+    def test_dlg_params(self):
+        class ParamsDROP(NullDROP):
+            a_float = dlg_float_param("a_float", 1.5)
+            an_int = dlg_int_param("an_int", None)
+            a_list = dlg_list_param("a_list", [])
+            a_dict = dlg_dict_param("a_dict", {})
+
+        a = ParamsDROP("a", "a", an_int="3", a_list="[1, [2]]")
+        b = ParamsDROP(
+            "b",
+            "b",
+            a_float="",
+            a_list="[1, [2]]",
+            applicationArgs={
+                "an_int": types.SimpleNamespace(usage="NoPort", value=4),
+                "a_dict": types.SimpleNamespace(usage="InputPort", value="{}"),
+            },
+        )
+        self.assertEqual(
+            (1.5, 3, [1, [2]], {}), (a.a_float, a.an_int, a.a_list, a.a_dict)
+        )
+        self.assertEqual(("", 4, {}), (b.a_float, b.an_int, b.a_dict))
+        self.assertIs(a._get_binding_plan(), b._get_binding_plan())
+
+        # Cached literals are not shared between DROPs
+        a.a_list[1].append(3)
+        self.assertEqual([1, [2]], b.a_list)
+        self.assertRaises(Exception, ParamsDROP, "c", "c", a_dict="[]")
+
+    def test_pickle(self):
+        a = InMemoryDROP("a", "a", name="A", some_param=1)
+        b = NullBarrierApp("b", "b")
+        a.addConsumer(b)
+        a.write(b"abc")
+        c = pickle.loads(pickle.dumps(a))
+        self.assertEqual(("a", "a", "A"), (c.oid, c.uid, c.name))
+        self.assertEqual(1, c.parameters["some_param"])
+        self.assertEqual(["b"], [consumer.uid for consumer in c.consumers])
+        self.assertTrue(c._consumers.has_uid("b"))
+        self.assertFalse(c._producers.has_uid("b"))
+
+        # Locks and listeners are created anew
+        self.assertIsNot(a._statusLock, c._statusLock)
+        with DROPWaiterCtx(self, c, 1):
+            c.setCompleted()
+        self.assertEqual(b"abc", droputils.allDropContents(c))
+
     def test_rdbms_drop(self):
         dbfile = f"{tempfile.mkdtemp()}/test_rdbms_drop.db"
         if os.path.isfile(dbfile):
@@ -928,6 +984,109 @@ class TestDROP(unittest.TestCase):
         finally:
             os.unlink(dbfile)
 
+    def test_rdbms_drop_batched(self):
+        dbfile = f"{tempfile.mkdtemp()}/test_rdbms_drop_batched.db"
+        with contextlib.closing(sqlite3.connect(dbfile)) as conn:
+            with contextlib.closing(conn.cursor()) as cur:
+                cur.execute("CREATE TABLE t(a_string varchar(64), an_integer integer)")
+
+        def count():
+            with contextlib.closing(sqlite3.connect(dbfile)) as conn:
+                return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+        try:
+            a = RDBMSDrop(
+                "a",
+                "a",
+                dbmodule="sqlite3",
+                dbtable="t",
+                dbparams={"database": dbfile},
+                batch_size=3,
+            )
+            for i in range(4):
+                a.insert({"a_string": str(i), "an_integer": i})
+            self.assertEqual(3, count())
+
+            # Selecting and completing the drop flush the buffered rows
+            self.assertEqual(4, len(a.select(columns=("an_integer",))))
+            a.insert({"an_integer": 4, "a_string": "4"})
+            self.assertEqual(4, count())
+            a.insert_many(
+                {"a_string": str(i), "an_integer": i} for i in range(5, 100)
+            )
+            self.assertEqual(100, count())
+            a.insert({"a_string": "100", "an_integer": 100})
+            a.setCompleted()
+            self.assertEqual(101, count())
+
+            rows = a.iselect(
+                columns=("an_integer",), condition="an_integer < {}", vals=(50,)
+            )
+            self.assertEqual(list(range(50)), [row[0] for row in rows])
+
+            # A failed batch is rolled back and doesn't break later inserts
+            self.assertRaises(
+                sqlite3.OperationalError, a.insert_many, [{"no_such_column": 1}]
+            )
+            a.insert_many([{"a_string": "x", "an_integer": -1}])
+            self.assertEqual(102, count())
+
+            # Rows that cannot be written when completing fail the drop
+            b = RDBMSDrop(
+                "b",
+                "b",
+                dbmodule="sqlite3",
+                dbtable="t",
+                dbparams={"database": dbfile},
+                batch_size=3,
+            )
+            b.insert({"no_such_column": 1})
+            b.setCompleted()
+            self.assertEqual(DROPStates.ERROR, b.status)
+        finally:
+            rdbms.close_connections()
+            os.unlink(dbfile)
+
+    def test_rdbms_drop_pooled_connections(self):
+        class TransactionalConnection(sqlite3.Connection):
+            """Opens transactions implicitly for SELECTs too, like psycopg2"""
+
+            def cursor(self, *args, **kwargs):
+                if not self.in_transaction:
+                    self.execute("BEGIN")
+                return super().cursor(*args, **kwargs)
+
+        dbfile = f"{tempfile.mkdtemp()}/test_rdbms_drop_pooled.db"
+        with contextlib.closing(sqlite3.connect(dbfile)) as conn:
+            # Readers keep their snapshot until their transaction ends
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE t(an_integer integer)")
+
+        try:
+            a = RDBMSDrop(
+                "a",
+                "a",
+                dbmodule="sqlite3",
+                dbtable="t",
+                dbparams={"database": dbfile, "factory": TransactionalConnection},
+                dlg_session_id="s",
+            )
+            self.assertEqual([], a.select())
+            with contextlib.closing(sqlite3.connect(dbfile)) as conn:
+                conn.execute("INSERT INTO t VALUES (1)")
+                conn.commit()
+            # The pooled connection doesn't read the old snapshot
+            self.assertEqual([(1,)], a.select())
+
+            # Connections are closed with their session
+            (pooled,) = rdbms._pools["s"]._idle.values()
+            rdbms.close_connections("s")
+            self.assertNotIn("s", rdbms._pools)
+            self.assertRaises(sqlite3.ProgrammingError, pooled.cursor)
+        finally:
+            rdbms.close_connections("s")
+            os.unlink(dbfile)
+
 
 class TestDROPReproducibility(unittest.TestCase):
     def test_drop_rerun(self):
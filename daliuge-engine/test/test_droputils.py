@@ -25,8 +25,10 @@ Created on 20 Jul 2015
 @author: rtobar
 """
 
+import json
 import subprocess
 import unittest
+from unittest import mock
 
 import numpy
 
@@ -174,6 +176,31 @@ class DropUtilsTest(unittest.TestCase):
         input_data = numpy.ones([3, 5])
         self._test_datadrop_function(self._test_save_load_npy, input_data)
 
+    def test_load_npy_zerocopy(self):
+        """
+        Arrays stored in memory are loaded without copying them
+        """
+        input_data = numpy.asfortranarray(numpy.arange(12.0).reshape(3, 4))
+        drop = InMemoryDROP("a", "a")
+        drop_loaders.save_npy(drop, input_data)
+        drop.setCompleted()
+        output_data = drop_loaders.load_npy(drop)
+        numpy.testing.assert_equal(input_data, output_data)
+        self.assertFalse(output_data.flags.writeable)
+        self.assertTrue(numpy.shares_memory(output_data, drop.getIO().buffer()))
+
+    def test_load_pickle_zerocopy(self):
+        """
+        Pickled data stored in memory is read without copying it first
+        """
+        drop = InMemoryDROP("a", "a")
+        drop_loaders.save_pickle(drop, {"a": [1, 2, 3]})
+        drop.setCompleted()
+        with mock.patch.object(drop, "read", wraps=drop.read) as read:
+            self.assertEqual({"a": [1, 2, 3]}, drop_loaders.load_pickle(drop))
+        self.assertEqual(1, read.call_count)
+        self.assertFalse(drop.isBeingRead())
+
     def test_DROPFile(self):
         """
         This test exercises the DROPFile mechanism to read the data represented by
@@ -301,3 +328,26 @@ class DropUtilsTest(unittest.TestCase):
         roots = droputils.get_roots(pg_spec_dropdicts)
         self.assertEqual(2, len(roots))
         self.assertListEqual(["A", "B"], sorted(roots))
+
+    def test_dropdict_links(self):
+        a = dropdict({"oid": "A", "categoryType": "Application"})
+        b = dropdict({"oid": "B", "categoryType": "Data"})
+        for _ in range(2):
+            a.addInput(b)
+            a.addInput(b, name="x")
+            a.addInput(b, name="y")
+        self.assertEqual(["B", {"B": "x"}, {"B": "y"}], a["inputs"])
+        self.assertEqual(
+            {"oid": "A", "categoryType": "Application", "inputs": a["inputs"]},
+            json.loads(json.dumps(a)),
+        )
+
+        # Links replaced or added from outside are taken into account
+        a["inputs"] = [{"B": "x"}]
+        a.addInput(b, name="x")
+        a["inputs"].append("C")
+        a.addInput({"oid": "C"})
+        self.assertEqual([{"B": "x"}, "C"], a["inputs"])
+        a["inputs"].pop()
+        a.addInput({"oid": "C"})
+        self.assertEqual([{"B": "x"}, "C"], a["inputs"])
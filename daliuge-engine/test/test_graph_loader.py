@@ -136,6 +136,78 @@ class TestGraphLoader(unittest.TestCase):
         self.assertEqual("B", b.uid)
         self.assertEqual(a, b.inputs[0])
 
+    def test_graphBuilder_batches(self):
+        def memory(oid, **rels):
+            return dict(
+                oid=oid,
+                categoryType="Data",
+                dropclass="dlg.data.drops.memory.InMemoryDROP",
+                **rels,
+            )
+
+        dropSpecList = [
+            {
+                "oid": "B",
+                "categoryType": "Application",
+                "dropclass": "test.test_graph_loader.DummyApp",
+                "inputs": ["A1", "A2"],
+                "outputs": ["C"],
+            },
+            memory("A1", consumers=["B"]),
+            memory("X", consumers=["Y"]),
+            memory("A2", consumers=["B"]),
+            memory("C", producers=["B"], parent="D"),
+            {"oid": "D", "categoryType": "container"},
+        ]
+        batches = list(graph_loader.batchDropSpecs(iter(dropSpecList), 2))
+        self.assertEqual([2, 2, 2], [len(batch) for batch, _ in batches])
+        self.assertEqual([False, False, True], [last for _, last in batches])
+
+        # Relationships across batches are established once both ends exist;
+        # those towards DROPs that never show up are ignored
+        builder = graph_loader.GraphBuilder()
+        for batch, _ in batches:
+            builder.add(batch)
+        self.assertEqual(6, len(builder))
+        roots = builder.finish()
+        self.assertEqual(["A1", "X", "A2", "D"], [drop.oid for drop in roots])
+        a1, x, a2, d = roots
+        b = a1.consumers[0]
+        self.assertEqual([a1, a2], b.inputs)
+        self.assertEqual([b], a2.consumers)
+        self.assertEqual([], x.consumers)
+        c = b.outputs[0]
+        self.assertEqual([c], d.children)
+        self.assertEqual(d, c.parent)
+
+        # N-1 relationships must be satisfied though
+        builder = graph_loader.GraphBuilder()
+        builder.add([memory("C", parent="D")])
+        self.assertRaises(KeyError, builder.finish)
+
+    def test_dropClassesLoadedOnce(self):
+        graph_loader._getDropClass.cache_clear()
+        dropSpecList = [
+            {
+                "oid": f"A{i}",
+                "categoryType": "Data",
+                "dropclass": "dlg.data.drops.memory.InMemoryDROP",
+            }
+            for i in range(3)
+        ]
+        dropSpecList.append(
+            {
+                "oid": "B",
+                "categoryType": "Application",
+                "dropclass": "dfms.apps.simple.RandomArrayApp",
+            }
+        )
+        roots = graph_loader.createGraphFromDropSpecList(dropSpecList)
+        self.assertEqual(4, len(roots))
+        self.assertIsInstance(roots[0], InMemoryDROP)
+        self.assertIsInstance(roots[-1], RandomArrayApp)
+        self.assertEqual(2, graph_loader._getDropClass.cache_info().misses)
+
     def test_removeUnmetRelationships(self):
         # Unmet relationsips are
         # DROPRel(D, CONSUMER, A)
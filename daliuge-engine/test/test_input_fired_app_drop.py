@@ -1,5 +1,6 @@
-from concurrent.futures import Future
-from dlg.apps.app_base import InputFiredAppDROP
+from concurrent.futures import Future, ThreadPoolExecutor
+from dlg.apps.app_base import DropRunner, InputFiredAppDROP, get_app_dispatcher
+from dlg.ddap_protocol import AppDROPStates, DROPStates
 from dlg.event import Event, EventHandler
 import pytest
 
@@ -40,3 +41,55 @@ def test_execute_propogates_unexpected_exception():
 
     assert "Handler throw" in str(e.value)
     assert "Drop throw" not in str(e.value)
+
+
+class PoolDropRunner(DropRunner):
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=2)
+
+    def run_drop(self, app_drop):
+        return self._pool.submit(app_drop.run)
+
+
+class MockFlakyDrop(InputFiredAppDROP):
+    def initialize(self, **kwargs):
+        super().initialize(**kwargs)
+        self.runs = 0
+
+    def run(self):
+        self.runs += 1
+        if self.runs < self.n_tries:
+            raise RuntimeError("Flaky drop")
+
+
+def test_async_execute_uses_bounded_dispatcher():
+    runner = PoolDropRunner()
+    drops = []
+    for i in range(200):
+        drop = MockFlakyDrop(str(i), str(i), n_effective_inputs=1, n_tries=2)
+        drop._drop_runner = runner
+        drops.append(drop)
+
+    futures = [drop.async_execute() for drop in drops]
+    for fut in futures:
+        fut.result(timeout=10)
+
+    for drop in drops:
+        assert drop.runs == 2
+        assert drop.execStatus == AppDROPStates.FINISHED
+        assert drop.status == DROPStates.COMPLETED
+
+    metrics = get_app_dispatcher().metrics
+    assert 0 < metrics["workers"] <= get_app_dispatcher()._max_workers
+    assert metrics["dispatched"] >= 3 * len(drops)
+    assert metrics["max_latency"] >= metrics["mean_latency"] >= 0
+
+
+def test_async_execute_gives_up_after_n_tries():
+    drop = MockThrowingDrop("t", "t", n_effective_inputs=1, n_tries=3)
+    drop._drop_runner = PoolDropRunner()
+
+    drop.async_execute().result(timeout=10)
+
+    assert drop.execStatus == AppDROPStates.ERROR
+    assert drop.status == DROPStates.ERROR
@@ -19,9 +19,16 @@
 #    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
 #    MA 02111-1307  USA
 #
+import io
+import sys
 import unittest
+from unittest import mock
 
-from dlg.data.io import NullIO, OpenMode
+from dlg.data.io import MemoryIO, NullIO, OpenMode
+
+if sys.version_info >= (3, 8):
+    from dlg.data.io import SharedMemoryIO
+    from dlg.shared_memory import DlgSharedMemory
 
 
 class TestIO(unittest.TestCase):
@@ -44,3 +51,58 @@ class TestIO(unittest.TestCase):
 
         # It's OK to close it again
         io.close()
+
+    def test_memoryReads(self):
+        buf = io.BytesIO(b"abcdef")
+        mem = MemoryIO(buf)
+
+        mem.open(OpenMode.OPEN_READ)
+        self.assertEqual(b"abcd", mem.read(4))
+        self.assertEqual(b"ef", mem.read(4))
+        self.assertEqual(b"", mem.read(4))
+        mem.close()
+
+        mem.open(OpenMode.OPEN_READ, zerocopy=True)
+        data = mem.read(-1)
+        self.assertIsInstance(data, memoryview)
+        self.assertTrue(data.readonly)
+        self.assertEqual(b"abcdef", data)
+        self.assertEqual(0, len(mem.read(4)))
+        mem.close()
+
+        # Deleting while readers still hold views is fine
+        mem.delete()
+        self.assertEqual(b"abcdef", data)
+        data.release()
+        mem.delete()
+        self.assertFalse(mem.exists())
+
+    @unittest.skipIf(
+        sys.version_info < (3, 8), "Shared memory does not work < python 3.8"
+    )
+    def test_sharedMemoryGrowth(self):
+        io = SharedMemoryIO("a", "io")
+        chunk = b"x" * 1000
+        n_chunks = 1000
+        with mock.patch.object(
+            DlgSharedMemory, "resize", autospec=True, side_effect=DlgSharedMemory.resize
+        ) as resize:
+            io.open(OpenMode.OPEN_WRITE)
+            for _ in range(n_chunks):
+                io.write(chunk)
+            self.assertEqual(len(chunk) * n_chunks, io.size())
+            io.close()
+        # Capacity doubles from the default 64 KB, plus a final trim on close
+        self.assertEqual(5, resize.call_count)
+
+        io.open(OpenMode.OPEN_READ)
+        self.assertEqual(len(chunk) * n_chunks, io.size())
+        data = io.read(len(chunk))
+        self.assertIsInstance(data, memoryview)
+        self.assertTrue(data.readonly)
+        self.assertEqual(chunk, bytes(data))
+        data.release()
+        io.close()
+        block = DlgSharedMemory("io_a")
+        block.close()
+        block.unlink()
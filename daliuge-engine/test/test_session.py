@@ -19,22 +19,26 @@
 #    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
 #    MA 02111-1307  USA
 #
+import io
 import json
 import logging
 import os
 import time
 import unittest
+from unittest import mock
+
 import pytest
 import daliuge_tests.engine.graphs as test_graphs
 
 from pathlib import Path
 from importlib.resources import files
 
+from dlg import utils
 from dlg.utils import getDlgWorkDir
 from dlg.apps.app_base import BarrierAppDROP
 from dlg.ddap_protocol import DROPLinkType, DROPStates, AppDROPStates
 from dlg.droputils import DROPWaiterCtx
-from dlg.exceptions import InvalidGraphException
+from dlg.exceptions import InvalidGraphException, InvalidSessionState
 from dlg.manager.session import SessionStates, Session, generateLogFileName
 
 default_repro = {
@@ -213,6 +217,61 @@ class TestSession(unittest.TestCase):
             c = b.outputs[0]
             self.assertEqual("C", c.oid)
 
+    def test_addGraphSpec_stream(self):
+        graphSpec = add_test_reprodata(
+            [
+                {
+                    "oid": "B",
+                    "categoryType": "Application",
+                    "dropclass": "dlg.apps.crc.CRCApp",
+                    "inputs": ["A"],
+                    "outputs": ["C"],
+                },
+                {"oid": "C", "categoryType": "container", "producers": ["B"]},
+                {"oid": "A", "categoryType": "container", "consumers": ["B"]},
+            ]
+        )
+        content = io.BytesIO(json.dumps(graphSpec).encode("utf8"))
+        with mock.patch("dlg.manager.session._GRAPH_SPEC_BATCH_SIZE", 1):
+            with Session("1") as s:
+                s.addGraphSpec(utils.JSONArrayReader(content, 10))
+                self.assertEqual(3, len(s.getGraph()))
+                self.assertEqual(default_graph_repro, s.reprodata)
+
+                # A failing first batch leaves the session untouched
+                graphSpec = [{"oid": "A", "categoryType": "container"}]
+                self.assertRaises(
+                    InvalidGraphException, s.addGraphSpec, iter(graphSpec)
+                )
+                self.assertEqual(3, len(s.getGraph()))
+
+                s.deploy()
+                self.assertEqual(["A"], [drop.oid for drop in s.roots])
+                a = s.roots[0]
+                self.assertEqual(["B"], [drop.oid for drop in a.consumers])
+                b = a.consumers[0]
+                self.assertEqual(["C"], [drop.oid for drop in b.outputs])
+
+    def test_addGraphSpec_stream_failure(self):
+        graphSpec = [
+            {"oid": "A", "categoryType": "container"},
+            {"oid": "B", "categoryType": "container"},
+            {"oid": "C", "categoryType": "container"},
+        ]
+        # A duplicate OID, then a truncated body, after some batches were added
+        bodies = [
+            (InvalidGraphException, iter(graphSpec + graphSpec[:1])),
+            (ValueError, json.dumps(graphSpec)[:-10].encode("utf8")),
+        ]
+        for error, body in bodies:
+            if isinstance(body, bytes):
+                body = utils.JSONArrayReader(io.BytesIO(body), 10)
+            with mock.patch("dlg.manager.session._GRAPH_SPEC_BATCH_SIZE", 1):
+                with Session("1") as s:
+                    self.assertRaises(error, s.addGraphSpec, body)
+                    # The batches already added are never deployed
+                    self.assertRaises(error, s.deploy)
+
     def test_cancel(self):
         """Cancels a whole graph execution"""
         with Session("1") as s:
@@ -248,6 +307,73 @@ class TestSession(unittest.TestCase):
                 self.assertEqual(DROPStates.CANCELLED, s.drops[uid].status)
             self.assertEqual(AppDROPStates.CANCELLED, s.drops["B"].execStatus)
 
+    def test_graphStatusChanges(self):
+        """Only the status of the drops that changed is reported"""
+        with Session("1") as s:
+            s.addGraphSpec(
+                add_test_reprodata(
+                    [
+                        {
+                            "oid": "A",
+                            "categoryType": "Data",
+                            "dropclass": "dlg.data.drops.memory.InMemoryDROP",
+                            "consumers": ["B"],
+                        },
+                        {
+                            "oid": "B",
+                            "categoryType": "Application",
+                            "dropclass": "dlg.apps.simple.SleepApp",
+                            "sleep_time": 0,
+                        },
+                        {
+                            "oid": "C",
+                            "categoryType": "Data",
+                            "dropclass": "dlg.data.drops.memory.InMemoryDROP",
+                            "producers": ["B"],
+                        },
+                        {
+                            "oid": "D",
+                            "categoryType": "Data",
+                            "dropclass": "dlg.data.drops.memory.InMemoryDROP",
+                        },
+                    ]
+                )
+            )
+            self.assertRaises(InvalidSessionState, s.getGraphStatusChanges)
+            s.deploy()
+
+            changes = s.getGraphStatusChanges()
+            self.assertEqual(s.getGraphStatus(), changes["status"])
+            self.assertEqual(set("ABCD"), set(changes["status"]))
+            self.assertEqual(
+                {"status": DROPStates.INITIALIZED, "execStatus": AppDROPStates.NOT_RUN},
+                changes["status"]["B"],
+            )
+
+            version = changes["version"]
+            with DROPWaiterCtx(self, s.drops["C"], 1):
+                s.drops["A"].write(b"x")
+                s.drops["A"].setCompleted()
+            changes = s.getGraphStatusChanges(version)
+            self.assertLess(version, changes["version"])
+            self.assertEqual(set("ABC"), set(changes["status"]))
+            for uid in "AC":
+                self.assertEqual(DROPStates.COMPLETED, changes["status"][uid]["status"])
+            self.assertEqual(
+                AppDROPStates.FINISHED, changes["status"]["B"]["execStatus"]
+            )
+
+            # Nothing changed since the last call
+            version = changes["version"]
+            changes = s.getGraphStatusChanges(version)
+            self.assertEqual(version, changes["version"])
+            self.assertEqual({}, changes["status"])
+
+            # Only D was left to finish
+            s.finish()
+            changes = s.getGraphStatusChanges(version)
+            self.assertEqual({"D": {"status": DROPStates.COMPLETED}}, changes["status"])
+
     def test_partial_cancel(self):
         """Like test_cancel, but only part of the graph should be cancelled"""
         with Session("1") as s:
@@ -139,3 +139,32 @@ class TestSharedMemory(unittest.TestCase):
         self.assertEqual(block_a.name, filename)
         block_a.close()
         block_a.unlink()
+
+    def test_resize_in_place(self):
+        """
+        Resizing keeps the data, and other attachments to the block see the new contents
+        """
+        block_a = DlgSharedMemory("A")
+        block_a.buf[0:4] = b"abcd"
+        view = block_a.buf[0:4]
+        block_a.resize(block_a.size * 4)
+        block_a.buf[-4:] = b"wxyz"
+        self.assertEqual(bytes(view), b"abcd")
+        self.assertEqual(bytes(block_a.buf[0:4]), b"abcd")
+        block_b = DlgSharedMemory("A")
+        self.assertEqual(block_b.size, block_a.size)
+        self.assertEqual(bytes(block_b.buf[-4:]), b"wxyz")
+        view.release()
+        block_a.close()
+        block_b.close()
+        block_a.unlink()
+
+    def test_resize_invalid(self):
+        """
+        Blocks cannot be resized to nothing
+        """
+        block_a = DlgSharedMemory("A")
+        with self.assertRaises(ValueError):
+            block_a.resize(0)
+        block_a.close()
+        block_a.unlink()
@@ -20,6 +20,7 @@
 #    MA 02111-1307  USA
 #
 import functools
+import gc
 import io
 import json
 import os
@@ -197,6 +198,58 @@ class TestUtils(unittest.TestCase):
             )
             self.assertEqual(0, len(stream.read(100).decode("latin1")))
 
+    def test_json_array_reader(self):
+        objects = [
+            {"oid": "A", "categoryType": "Data", "size": 1.5e10},
+            [1, -20, 0.25, "ä ] \"", None, True],
+            123456789,
+            {},
+        ]
+        content = json.dumps(objects, indent=2, ensure_ascii=False).encode("utf8")
+        for blocksize in (1, 2, 7, 1000):
+            reader = utils.JSONArrayReader(io.BytesIO(content), blocksize)
+            self.assertEqual(objects, list(reader))
+
+        # Reading back what JSONStream produces, also compressed
+        stream = utils.JSONStream(objects)
+        self.assertEqual(objects, list(utils.JSONArrayReader(stream, 5)))
+        stream = utils.ZlibUncompressedStream(
+            utils.ZlibCompressedStream(utils.JSONStream(objects))
+        )
+        self.assertEqual(objects, list(utils.JSONArrayReader(stream, 5)))
+
+        self.assertEqual([], list(utils.JSONArrayReader(io.BytesIO(b" [ ]\n"))))
+        for invalid in (b"", b"{}", b"[1,", b"[1 2]", b"[1,]", b"[1.]", b"[1]2"):
+            with self.assertRaises(ValueError):
+                list(utils.JSONArrayReader(io.BytesIO(invalid), 1))
+
+    def test_gc_paused(self):
+        self.assertTrue(gc.isenabled())
+        with utils.gc_paused():
+            self.assertFalse(gc.isenabled())
+            with utils.gc_paused():
+                self.assertFalse(gc.isenabled())
+            self.assertFalse(gc.isenabled())
+        self.assertTrue(gc.isenabled())
+
+        # Pauses of different threads don't necessarily end in reverse order
+        first, second = utils.gc_paused(), utils.gc_paused()
+        first.__enter__()
+        second.__enter__()
+        first.__exit__(None, None, None)
+        self.assertFalse(gc.isenabled())
+        second.__exit__(None, None, None)
+        self.assertTrue(gc.isenabled())
+
+        # A collector that was disabled beforehand stays disabled
+        gc.disable()
+        try:
+            with utils.gc_paused():
+                pass
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
     def test_get_dlg_root(self):
         # It should obey the DLG_ROOT environment variable
         old = os.environ.get("DLG_ROOT", None)
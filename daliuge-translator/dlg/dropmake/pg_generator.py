@@ -36,7 +36,13 @@ import time
 from dlg.constants import ISLAND_DEFAULT_REST_PORT
 from dlg.dropmake.lg import LG, GraphException
 from dlg.dropmake.pgt import PGT
-from dlg.dropmake.pgtp import MetisPGTP, MySarkarPGTP, MinNumPartsPGTP, PSOPGTP
+from dlg.dropmake.pgtp import (
+    MetisPGTP,
+    MySarkarPGTP,
+    MinNumPartsPGTP,
+    PSOPGTP,
+    HEFTPGTP,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -95,6 +101,7 @@ ALGO_METIS = 1
 ALGO_MY_SARKAR = 2
 ALGO_MIN_NUM_PARTS = 3
 ALGO_PSO = 4
+ALGO_HEFT = 5
 
 _known_algos = {
     "none": ALGO_NONE,
@@ -102,11 +109,13 @@ _known_algos = {
     "mysarkar": ALGO_MY_SARKAR,
     "min_num_parts": ALGO_MIN_NUM_PARTS,
     "pso": ALGO_PSO,
+    "heft": ALGO_HEFT,
     ALGO_NONE: "none",
     ALGO_METIS: "metis",
     ALGO_MY_SARKAR: "mysarkar",
     ALGO_MIN_NUM_PARTS: "min_num_parts",
     ALGO_PSO: "pso",
+    ALGO_HEFT: "heft",
 }
 
 
@@ -169,6 +178,9 @@ def partition(
     deadline = _get_algo_param(algo_params, "deadline", None)
     topk = _get_algo_param(algo_params, "topk", 30)
     swarm_size = _get_algo_param(algo_params, "swarm_size", 40)
+    processes = _get_algo_param(algo_params, "processes", 1)
+    nodes = _get_algo_param(algo_params, "nodes", None)
+    bandwidth = _get_algo_param(algo_params, "bandwidth", 1.0)
 
     max_dop = {"num_cpus": max_cpu, "mem_usage": max_mem}
 
@@ -219,6 +231,22 @@ def partition(
             topk=topk,
             swarm_size=swarm_size,
             merge_parts=could_merge,
+            processes=processes,
+        )
+
+    elif algo == ALGO_HEFT:
+        if nodes is None:
+            nodes = [{"cores": max_cpu, "memory": max_mem}] * num_partitions
+        elif isinstance(nodes, str):
+            nodes = json.loads(nodes)
+        # Partition i goes to node i, so we need one partition per node
+        num_partitions = len(nodes)
+        pgt = HEFTPGTP(
+            pgt,
+            nodes,
+            partition_label,
+            bandwidth=bandwidth,
+            merge_parts=could_merge,
         )
 
     else:
@@ -127,30 +127,44 @@ class PGManager(object):
     def get_gantt_chart(self, pgt_id, json_str=True):
         """
         Return:
-            the gantt chart matrix (numarray) given a PGT id
+            the gantt chart given a PGT id, as the start and end times and
+            the partition of its DROPs in topological order, plus the number
+            of DROPs running at each time unit
         """
         pgt = self.get_pgt(pgt_id)
         if pgt is None:
             raise GraphException("PGT {0} not found".format(pgt_id))
+        G = pgt.dag
         try:
-            gcm = DAGUtil.ganttchart_matrix(pgt.dag)
+            nodes, stts, edts = DAGUtil.gantt_intervals(G)
         except SchedulerException:
-            DAGUtil.label_schedule(pgt.dag)
-            gcm = DAGUtil.ganttchart_matrix(pgt.dag)
-
+            DAGUtil.label_schedule(G)
+            nodes, stts, edts = DAGUtil.gantt_intervals(G)
+
+        makespan = int(edts.max()) if len(edts) else 0
+        nodes = nodes.tolist()
+        gc = {
+            "makespan": makespan,
+            "node": nodes,
+            "start": stts.tolist(),
+            "end": edts.tolist(),
+            "partition": [G.nodes[n].get("gid") for n in nodes],
+            "utilisation": DAGUtil.utilisation(stts, edts, makespan).tolist(),
+        }
         if json_str:
-            gcm = json.dumps(gcm.tolist())
-        return gcm
+            gc = json.dumps(gc)
+        return gc
 
     def get_schedule_matrices(self, pgt_id, json_str=True):
         """
         Return:
-            a list of schedule matrices (numarrays) given a PGT id
+            the schedules of the partitions of a PGT given its id, each as the
+            start and end times and the lane (resource unit) of its DROPs, plus
+            the number of lanes in use at each time unit
         """
         pgt = self.get_pgt(pgt_id)
         if pgt is None:
             raise GraphException("PGT {0} not found".format(pgt_id))
-        jsobj = None
         try:
             parts = pgt._partitions
         except AttributeError:
@@ -159,12 +173,22 @@ class PGManager(object):
                     pgt_id
                 )
             )
+        jsobj = []
         for part in parts:
-            sm = part.schedule.schedule_matrix
-            if jsobj is None:
-                jsobj = sm
-            else:
-                jsobj = PGUtil.vstack_mat(jsobj, sm, separator=True)
+            sched = part.schedule
+            nodes, lanes, stts, edts = sched.intervals
+            jsobj.append(
+                {
+                    "partition": part.partition_id,
+                    "lanes": sched.max_dop,
+                    "makespan": sched.makespan,
+                    "node": nodes.tolist(),
+                    "lane": lanes.tolist(),
+                    "start": stts.tolist(),
+                    "end": edts.tolist(),
+                    "utilisation": sched.utilisation.tolist(),
+                }
+            )
         if json_str:
-            jsobj = json.dumps(jsobj.tolist())
+            jsobj = json.dumps(jsobj)
         return jsobj
@@ -20,11 +20,10 @@
 #    MA 02111-1307  USA
 #
 
-from collections import defaultdict
 import json
 import logging
 
-import networkx as nx
+import numpy as np
 
 from dlg.dropmake.pgt import PGT, GPGTException
 from dlg.dropmake.scheduler import (
@@ -32,6 +31,7 @@ from dlg.dropmake.scheduler import (
     DAGUtil,
     MinNumPartsScheduler,
     PSOScheduler,
+    HEFTScheduler,
 )
 from dlg.common import CategoryType
 
@@ -79,33 +79,32 @@ class MetisPGTP(PGT):
         self._par_label = par_label
         self._u_factor = ufactor
         self._metis_logs = []
-        self._G = self.to_partition_input()
+        self._oids = None  # oid of each METIS vertex
+        self._csr = self.to_partition_input()
         self._metis = DAGUtil.import_metis()
         self._group_workloads = dict()  # k - gid, v - a tuple of (tw, sz)
         self._merge_parts = merge_parts
         self._metis_out = None  # initial internal partition result
+        self._gids = None  # current gid of each METIS vertex
 
     def to_partition_input(self, outf=None):
         """
-        Convert to METIS format for mapping and decomposition
+        Convert to METIS format for mapping and decomposition, i.e. the CSR
+        arrays METIS itself consumes, built directly from the drop list. The
+        vertex of each drop is its GOJS key minus one.
         NOTE - Since METIS only supports Undirected Graph, we have to produce
         both upstream and downstream nodes to fit its input format
         """
-        key_dict = dict()  # key - oid, value - GOJS key
-
-        G = nx.Graph()
-        G.graph["edge_weight_attr"] = "weight"
-        G.graph["node_weight_attr"] = "weight"
-        G.graph["node_size_attr"] = "size"
-
-        for i, drop in enumerate(self._drop_list):
-            try:
-                oid = drop["oid"]
-            except KeyError:
+        key_dict = dict()  # key - oid, value - METIS vertex
+        drop_list = []
+        for drop in self._drop_list:
+            if "oid" not in drop:
                 logger.debug("Drop does not have oid: %s", drop)
-                self._drop_list.pop(i)
                 continue
-            key_dict[oid] = i + 1  # METIS index starts from 1
+            key_dict[drop["oid"]] = len(drop_list)
+            drop_list.append(drop)
+        if len(drop_list) < len(self._drop_list):
+            self._drop_list[:] = drop_list
 
         logger.info("Metis partition input progress - dropdict is built")
 
@@ -116,13 +115,16 @@ class MetisPGTP(PGT):
                 "self._drop_list, max RSS: %.2f GB",
                 resource.getrusage(resource.RUSAGE_SELF)[2] / 1024.0**2,
             )
+        n = len(drop_list)
+        self._oids = [drop["oid"] for drop in drop_list]
+        vwgt = np.ones(n, dtype=np.int64)  # task weight
+        vsize = np.ones(n, dtype=np.int64)  # data size
+        us, vs, lws = [], [], []  # edges and their weights
         tw = 1
         sz = 1
         dst = "outputs"
         ust = "inputs"
-        for i, drop in enumerate(self._drop_list):
-            oid = drop["oid"]
-            myk = i + 1
+        for i, drop in enumerate(drop_list):
             tt = drop["categoryType"]
             if tt in [CategoryType.DATA, "data"]:
                 dst = "consumers"  # outbound keyword
@@ -134,7 +136,8 @@ class MetisPGTP(PGT):
                 ust = "inputs"
                 tw = drop.get("weight", 1)
                 sz = 1
-            G.add_node(myk, weight=tw, size=sz, oid=oid)
+            vwgt[i] = tw
+            vsize[i] = sz
             adj_drops = []  # adjacent drops (all neighbours)
             if dst in drop:
                 adj_drops += drop[dst]
@@ -144,25 +147,25 @@ class MetisPGTP(PGT):
             lw = 1
             for inp in adj_drops:
                 key = list(inp.keys())[0] if isinstance(inp, dict) else inp
+                j = key_dict[key]
                 if tt in [CategoryType.DATA, "data"]:
                     lw = drop["weight"]
                 elif tt in [CategoryType.APPLICATION, "app"]:
                     # get the weight of the previous drop
-                    lw = self._drop_list[key_dict[key] - 1].get("weight", 1)
-                if lw <= 0:
-                    lw = 1
-                G.add_edge(myk, key_dict[key], weight=lw)
-        # for e in G.edges(data=True):
-        #     if (e[2]['weight'] == 0):
-        #         e[2]['weight'] = 1
+                    lw = drop_list[j].get("weight", 1)
+                us.append(i)
+                vs.append(j)
+                lws.append(max(lw, 1))
+        # each link is seen from both of its drops
+        xadj, adjncy, adjwgt = DAGUtil.to_csr(n, us, vs, lws, combine=np.maximum)
         if self._drop_list_len > 1e7:
             import resource
 
             logger.info(
-                "Max RSS after creating the Graph: %.2f GB",
+                "Max RSS after creating the CSR arrays: %.2f GB",
                 resource.getrusage(resource.RUSAGE_SELF)[2] / 1024.0**2,
             )
-        return G
+        return dict(xadj=xadj, adjncy=adjncy, vwgt=vwgt, vsize=vsize, adjwgt=adjwgt)
 
     def _set_metis_log(self, logtext):
         self._metis_logs = logtext.split("\n")
@@ -182,14 +185,11 @@ class MetisPGTP(PGT):
         1. parse METIS result, and add group node into the GOJS json
         2. also update edge weight for self._dag
         """
-        groups = set()
         # start_k = len(self._drop_list) + 1
         start_k = self._drop_list_len + 1
-        for gnode, gid in zip(self._G.nodes(data=True), metis_out):
-            groups.add(gid)
-            gnode = gnode[1]
-            self._oid_gid_map[gnode["oid"]] = gid
-            gnode["gid"] = gid
+        groups = np.unique(metis_out).tolist()
+        self._oid_gid_map.update(zip(self._oids, metis_out.tolist()))
+        self._gids = metis_out.copy()
 
         # house keeping after partitioning
         self._num_parts_done = len(groups)
@@ -202,23 +202,17 @@ class MetisPGTP(PGT):
 
         # the following is for potential partition merging into islands
         if self._merge_parts:
+            tws = np.bincount(metis_out, weights=self._csr["vwgt"])
+            szs = np.bincount(metis_out, weights=self._csr["vsize"])
             for gid in groups:
-                self._group_workloads[gid] = [0, 0]
-            for gnode in self._G.nodes(data=True):
-                tt = self._group_workloads[gnode[1]["gid"]]
-                try:
-                    tt[0] += int(gnode[1]["weight"])
-                    tt[1] += int(gnode[1]["size"])
-                except ValueError:
-                    tt[0] = 1
-                    tt[1] = 1
+                self._group_workloads[gid] = [int(tws[gid]), int(szs[gid])]
         # the following is for visualisation using GOJS
         if jsobj is not None:
             node_list = jsobj["nodeDataArray"]
             for node in node_list:
                 nid = int(node["key"])
                 gid = metis_out[nid - 1]
-                node["group"] = gid + start_k
+                node["group"] = int(gid) + start_k
 
             inner_parts = []
             for gid in groups:
@@ -242,7 +236,7 @@ class MetisPGTP(PGT):
         """
         if self._num_parts == 1:
             edgecuts = 0
-            metis_parts = [0] * len(self._G.nodes())
+            metis_parts = np.zeros(len(self._oids), dtype=np.int64)
         else:
             # prepare METIS parameters
             recursive_param = False if self._ptype == "kway" else True
@@ -262,12 +256,13 @@ class MetisPGTP(PGT):
 
             # Call METIS C-lib
             (edgecuts, metis_parts) = self._metis.part_graph(
-                self._G,
+                DAGUtil.metis_graph(**self._csr),
                 nparts=self._num_parts,
                 recursive=recursive_param,
                 objtype=self._obj_type,
                 ufactor=self._u_factor,
             )
+            metis_parts = np.array(metis_parts, dtype=np.int64)
 
         # Output some partitioning result metadata
         if outdict is not None:
@@ -311,46 +306,44 @@ class MetisPGTP(PGT):
         if not self._can_merge(new_num_parts):
             return
 
-        part_edges = defaultdict(int)  # k: from_gid + to_gid, v: sum_of_weight
-        for e in self._G.edges(data=True):
-            from_gid = self._G.nodes[e[0]]["gid"]
-            to_gid = self._G.nodes[e[1]]["gid"]
-            k = "{0}**{1}".format(from_gid, to_gid)
-            part_edges[k] += e[2]["weight"]
-
         # 1. build the bi-directional graph again
         # with each partition being a node
-        G = nx.Graph()
-        G.graph["edge_weight_attr"] = "weight"
-        G.graph["node_weight_attr"] = "weight"
-        G.graph["node_size_attr"] = "size"
-        for gid, v in self._group_workloads.items():
+        gids = np.unique(self._gids)
+        xadj = self._csr["xadj"]
+        adjncy = self._csr["adjncy"]
+        vertices = np.repeat(np.arange(len(xadj) - 1), np.diff(xadj))
+        once = vertices < adjncy  # each link is listed from both of its drops
+        part_xadj, part_adjncy, part_adjwgt = DAGUtil.to_csr(
+            len(gids),
+            np.searchsorted(gids, self._gids[vertices[once]]),
+            np.searchsorted(gids, self._gids[adjncy[once]]),
+            self._csr["adjwgt"][once],
+        )
+        twvs = []
+        szs = []
+        for gid in gids.tolist():
+            tw, sz = self._group_workloads.get(gid, (1, 1))
             # for compute islands, we need to count the # of nodes instead of
             # the actual workload
-            twv = 1 if (island_type == 1) else v[0]
-            G.add_node(gid, weight=twv, size=v[1])
-        for glinks, v in part_edges.items():
-            gl = glinks.split("**")
-            G.add_edge(int(gl[0]), int(gl[1]), weight=v)
+            twvs.append(1 if (island_type == 1) else tw)
+            szs.append(sz)
 
         if new_num_parts == 1:
-            (edgecuts, metis_parts) = (0, [0] * len(G.nodes()))
+            (edgecuts, metis_parts) = (0, np.zeros(len(gids), dtype=np.int64))
         else:
             (edgecuts, metis_parts) = self._metis.part_graph(
-                G, nparts=new_num_parts, ufactor=1
+                DAGUtil.metis_graph(
+                    part_xadj, part_adjncy, twvs, szs, part_adjwgt
+                ),
+                nparts=new_num_parts,
+                ufactor=1,
             )
-        islands = set()
-        for gid, island_id in zip(G.nodes(), metis_parts):
-            self._gid_island_id_map[gid] = island_id
-            islands.add(island_id)
+            metis_parts = np.array(metis_parts, dtype=np.int64)
+        self._gid_island_id_map.update(zip(gids.tolist(), metis_parts.tolist()))
+        islands = np.unique(metis_parts).tolist()
         if not form_island:
-            for gnode in self._G.nodes(data=True):
-                gnode = gnode[1]
-                oid = gnode["oid"]
-                old_gid = gnode["gid"]
-                new_gid = self._gid_island_id_map[old_gid]
-                self._oid_gid_map[oid] = new_gid
-                gnode["gid"] = new_gid
+            self._gids = metis_parts[np.searchsorted(gids, self._gids)]
+            self._oid_gid_map.update(zip(self._oids, self._gids.tolist()))
             self._num_parts_done = new_num_parts
         else:
             if (
@@ -638,13 +631,15 @@ class PSOPGTP(MySarkarPGTP):
         topk=30,
         swarm_size=40,
         merge_parts=False,
+        processes=1,
     ):
         """
-        PSO-based PGTP
+        PSO-based PGTP, evaluating the swarm with `processes` processes
         """
         self._deadline = deadline
         self._topk = topk
         self._swarm_size = swarm_size
+        self._processes = processes
         super(PSOPGTP, self).__init__(drop_list, 0, par_label, max_dop, merge_parts)
         self._extra_drops = None
 
@@ -659,4 +654,41 @@ class PSOPGTP(MySarkarPGTP):
             dag=self.dag,
             topk=self._topk,
             swarm_size=self._swarm_size,
+            processes=self._processes,
+        )
+
+
+class HEFTPGTP(MySarkarPGTP):
+    def __init__(
+        self,
+        drop_list,
+        nodes,
+        par_label="Partition",
+        bandwidth=1.0,
+        merge_parts=False,
+    ):
+        """
+        HEFT-based PGTP, placing drops onto `nodes`, a list of node capability
+        dictionaries (see HEFTScheduler). Partition i is deployed on node i.
+        """
+        self._nodes = nodes
+        self._bandwidth = bandwidth
+        max_dop = {"num_cpus": max(int(node.get("cores", 1)) for node in nodes)}
+        super(HEFTPGTP, self).__init__(
+            drop_list, len(nodes), par_label, max_dop, merge_parts
+        )
+
+    def get_partition_info(self):
+        return "HEFT"
+
+    def _extra_result(self, ret):
+        super(HEFTPGTP, self)._extra_result(ret)
+        ret["makespan"] = self._scheduler.makespan
+
+    def init_scheduler(self):
+        self._scheduler = HEFTScheduler(
+            self._drop_list,
+            self._nodes,
+            dag=self.dag,
+            bandwidth=self._bandwidth,
         )
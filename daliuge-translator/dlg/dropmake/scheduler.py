@@ -19,8 +19,11 @@
 #    MA 02111-1307  USA
 #
 
+import concurrent.futures
 import copy
+import ctypes
 import logging
+import multiprocessing
 import os
 import platform
 import time
@@ -29,9 +32,10 @@ from collections import defaultdict
 import networkx as nx
 import numpy as np
 import pkg_resources
-from pyswarm import pso
 
-from .utils.antichains import get_max_weighted_antichain
+from .utils.antichains import DAGWidth, get_max_width
+from .utils.critical_path import CriticalPath
+from .utils.pso import pso
 from ..common import dropdict, get_roots, CategoryType
 
 logger = logging.getLogger(__name__)
@@ -43,6 +47,11 @@ class SchedulerException(Exception):
     pass
 
 
+def _edge_weight(G, u, v):
+    """The weight of edge (u, v) of G, None if there is no such edge"""
+    return G.adj[u][v].get("weight", 0) if G.has_edge(u, v) else None
+
+
 class Schedule(object):
     """
     The scheduling solution with schedule-related properties
@@ -53,12 +62,12 @@ class Schedule(object):
         self._max_dop = (
             max_dop if type(max_dop) == int else max_dop.get("num_cpus", 1)
         )
-        DAGUtil.label_schedule(self._dag)
-        self._lpl = DAGUtil.get_longest_path(
-            self._dag, default_weight=0, show_path=True
-        )
+        critical_path = CriticalPath(self._dag, default_weight=0)
+        critical_path.label_schedule()
+        self._lpl = critical_path.longest_path(show_path=True)
         self._wkl = None
         self._sma = None
+        self._itv = None
 
     @property
     def makespan(self):
@@ -69,15 +78,18 @@ class Schedule(object):
         return self._lpl[0]
 
     @property
-    def schedule_matrix(self):
+    def max_dop(self):
+        return self._max_dop
+
+    @property
+    def intervals(self):
         """
-        Return: a self._lpl x self._max_dop matrix
-                (X - time, Y - resource unit / parallel lane)
+        Return: a tuple of four integer arrays (nodes, lanes, stt, edt) with the
+                resource unit / parallel lane each node runs on and its start
+                and end times, for the nodes that take any time, in
+                topological order
         """
-        if self._sma is not None:
-            return self._sma
-        else:
-            N = max(self.makespan, 1)
+        if self._itv is None:
             if DEBUG:
                 lpl_str = []
                 lpl_c = 0
@@ -88,9 +100,8 @@ class Schedule(object):
                 logger.debug("lpl: %s", " -> ".join(lpl_str))
                 logger.debug("lplt = %d", int(lpl_c))
 
-            # print("N (makespan) is ", N, "M is ", M)
-            ma = np.zeros((self._max_dop, N), dtype=int)
-            pr = np.zeros((self._max_dop), dtype=int)
+            nodes, lanes, stts, edts = [], [], [], []
+            pr = [0] * self._max_dop  # end time of the last node of each lane
             last_pid = -1
             prev_n = None
 
@@ -120,14 +131,43 @@ class Schedule(object):
                                 self._dag.nodes(data=True)
                             )
                         )
-                        # DAGUtil.get_max_dop(G), G.nodes(data=True)))
                     curr_pid = found
-                ma[curr_pid, stt:edt] = n
+                nodes.append(n)
+                lanes.append(curr_pid)
+                stts.append(stt)
+                edts.append(edt)
                 pr[curr_pid] = edt
                 last_pid = curr_pid
                 prev_n = n
+            self._itv = tuple(
+                np.array(a, dtype=int) for a in (nodes, lanes, stts, edts)
+            )
+        return self._itv
+
+    @property
+    def schedule_matrix(self):
+        """
+        Return: a self._max_dop x self._lpl matrix
+                (X - time, Y - resource unit / parallel lane)
+                Its size grows with the makespan, see `intervals` for a compact
+                form of the same schedule
+        """
+        if self._sma is None:
+            nodes, lanes, stts, edts = self.intervals
+            ma = np.zeros((self._max_dop, max(self.makespan, 1)), dtype=int)
+            for n, lane, stt, edt in zip(nodes, lanes, stts, edts):
+                ma[lane, stt:edt] = n
             self._sma = ma
-            return self._sma
+        return self._sma
+
+    @property
+    def utilisation(self):
+        """
+        Return: an array with the number of resource units in use at each
+                time unit of the makespan
+        """
+        _, _, stts, edts = self.intervals
+        return DAGUtil.utilisation(stts, edts, max(self.makespan, 1))
 
     @property
     def workload(self):
@@ -136,12 +176,8 @@ class Schedule(object):
             the mean # of resource units per time unit consumed by the graph/partition
         """
         if self._wkl is None:
-            c = []
-            for i in range(self.schedule_matrix.shape[1]):
-                c.append(np.count_nonzero(self.schedule_matrix[:, i]))
-            self._wkl = int(
-                np.mean(np.array(c))
-            )  # since METIS only accepts integer
+            # since METIS only accepts integer
+            self._wkl = int(np.mean(self.utilisation))
         return self._wkl
 
     @property
@@ -152,6 +188,34 @@ class Schedule(object):
         return int(float(self.workload) / self._max_dop * 100)
 
 
+class DisjointSets(object):
+    """
+    Disjoint sets of integer ids with path compression. The root of each set is
+    its smallest id, so a set keeps its id when others are merged into it.
+    """
+
+    def __init__(self):
+        self._parent = {}
+
+    def add(self, x):
+        self._parent[x] = x
+
+    def find(self, x):
+        parent = self._parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, x, y):
+        """Merges the sets with roots x and y, returning the new root"""
+        root, child = min(x, y), max(x, y)
+        self._parent[child] = root
+        return root
+
+
 class Partition(object):
     """
     Logical partition, multiple (1 ~ N) of these can be placed onto a single
@@ -168,14 +232,13 @@ class Partition(object):
         self._gid = gid
         self._dag = nx.DiGraph()
         self._ask_max_dop = max_dop
-        self._max_antichains = None  # a list of max (width) antichains
+        self._width = DAGWidth()  # tracks the DoP of self._dag
         self._lpl = None
         self._schedule = None
         self._max_dop = None
         self._parent_id = None
         self._child_parts = None
         self._tmp_merge_dag = None
-        self._tmp_new_ac = None
 
     @property
     def parent_id(self):
@@ -218,11 +281,8 @@ class Partition(object):
             self._tmp_merge_dag = None
         else:
             self._dag = nx.compose(self._dag, that._dag)
-
-        # self._max_dop
-
-        # TODO add this performance hog!
-        # self._max_antichains = None
+        self._width.update(that._width)
+        self._max_dop = self._width.width
 
     def can_add(self, u, v, gu, gv):
         """
@@ -238,37 +298,22 @@ class Partition(object):
         unew = u not in self._dag.nodes
         vnew = v not in self._dag.nodes
 
-        if DEBUG:
-            slow_max = DAGUtil.get_max_antichains(self._dag)
-            info = "Before: {0} - slow max: {1}, fast max: {2}, u: {3}, v: {4}, unew:{5}, vnew:{6}".format(
-                self._dag.edges(), slow_max, self._max_antichains, u, v, unew, vnew
-            )
-            logger.debug(info)
-            if len(slow_max) != len(self._max_antichains):
-                raise SchedulerException("ERROR - {0}".format(info))
-
         self._dag.add_node(u, weight=uw)
         self._dag.add_node(v, weight=vw)
         self._dag.add_edge(u, v)
 
-        if unew and vnew:
-            mydop = DAGUtil.get_max_dop(self._dag)
-        else:
-            mydop = self.probe_max_dop(u, v, unew, vnew)
-            # TODO - put the following code in a unit test!
-            if DEBUG:
-                mydop_slow = DAGUtil.get_max_dop(self._dag)  #
-                if mydop_slow != mydop:
-                    err_msg = (
-                        "u = {0}, v = {1}, unew = {2}, vnew = {3}".format(
-                            u, v, unew, vnew
-                        )
-                    )
-                    raise SchedulerException(
-                        "{2}: mydop = {0}, mydop_slow = {1}".format(
-                            mydop, mydop_slow, err_msg
-                        )
+        mydop = self.probe_max_dop(u, v, unew, vnew)
+        if DEBUG:
+            mydop_slow = max(len(ac) for ac in nx.antichains(self._dag))
+            if mydop_slow != mydop:
+                err_msg = "u = {0}, v = {1}, unew = {2}, vnew = {3}".format(
+                    u, v, unew, vnew
+                )
+                raise SchedulerException(
+                    "{2}: mydop = {0}, mydop_slow = {1}".format(
+                        mydop, mydop_slow, err_msg
                     )
+                )
         ret = False if mydop > self._ask_max_dop.get("num_cpus", 1) else True
         if unew:
             self.remove(u)
@@ -276,10 +321,15 @@ class Partition(object):
             self.remove(v)
         return (ret, unew, vnew)
 
-    def add(self, u, v, gu, gv, sequential=False, global_dag=None):
+    def add(
+        self, u, v, gu, gv, sequential=False, global_dag=None, added_edges=None
+    ):
         """
         Add nodes u and/or v to the partition
         if sequential is True, break antichains to sequential chains
+
+        Edges added to global_dag are appended to added_edges, if given, as
+        (u, v, weight) tuples with their previous weight, or None if new
         """
         # if (self.partition_id == 180):
         #     logger.debug("u = ", u, ", v = ", v, ", partition = ", self.partition_id)
@@ -291,111 +341,75 @@ class Partition(object):
         self._dag.add_node(v, weight=vw, num_cpus=gv["num_cpus"])
         self._dag.add_edge(u, v)
 
-        if unew and vnew:  # we know this is fast
-            self._max_antichains = DAGUtil.get_max_antichains(self._dag)
-            self._max_dop = 1
-        else:
-            if sequential and (global_dag is not None):
-                # break potential antichain to sequential chain
-                if unew:
-                    v_ups = nx.ancestors(self._dag, v)
-                    for vup in v_ups:
-                        if u == vup:
-                            continue
-                        if len(list(self._dag.predecessors(vup))) == 0:
-                            # link u to "root" parent of v to break antichain
-                            self._dag.add_edge(u, vup)
-                            # change the original global graph
-                            global_dag.add_edge(u, vup, weight=0)
-                            if not nx.is_directed_acyclic_graph(global_dag):
-                                global_dag.remove_edge(u, vup)
-                else:
-                    u_downs = nx.descendants(self._dag, u)
-                    for udo in u_downs:
-                        if udo == v:
-                            continue
-                        if len(list(self._dag.successors(udo))) == 0:
-                            # link "leaf" children of u to v to break antichain
-                            self._dag.add_edge(udo, v)
-                            # change the original global graph
-                            global_dag.add_edge(udo, v, weight=0)
-                            if not nx.is_directed_acyclic_graph(global_dag):
-                                global_dag.remove_edge(udo, v)
-
-            self._max_dop = self.probe_max_dop(u, v, unew, vnew, update=True)
-            # self._max_dop = DAGUtil.get_max_dop(self._dag)# this is too slow!
+        if sequential and (global_dag is not None) and not (unew and vnew):
+            # break potential antichain to sequential chain
+            if unew:
+                v_ups = nx.ancestors(self._dag, v)
+                for vup in v_ups:
+                    if u == vup:
+                        continue
+                    if len(list(self._dag.predecessors(vup))) == 0:
+                        # link u to "root" parent of v to break antichain
+                        self._dag.add_edge(u, vup)
+                        self._width.add_edge(u, vup)
+                        # change the original global graph
+                        if added_edges is not None:
+                            added_edges.append(
+                                (u, vup, _edge_weight(global_dag, u, vup))
+                            )
+                        global_dag.add_edge(u, vup, weight=0)
+                        if not nx.is_directed_acyclic_graph(global_dag):
+                            global_dag.remove_edge(u, vup)
+            else:
+                u_downs = nx.descendants(self._dag, u)
+                for udo in u_downs:
+                    if udo == v:
+                        continue
+                    if len(list(self._dag.successors(udo))) == 0:
+                        # link "leaf" children of u to v to break antichain
+                        self._dag.add_edge(udo, v)
+                        self._width.add_edge(udo, v)
+                        # change the original global graph
+                        if added_edges is not None:
+                            added_edges.append(
+                                (udo, v, _edge_weight(global_dag, udo, v))
+                            )
+                        global_dag.add_edge(udo, v, weight=0)
+                        if not nx.is_directed_acyclic_graph(global_dag):
+                            global_dag.remove_edge(udo, v)
+
+        self._max_dop = self.probe_max_dop(u, v, unew, vnew, update=True)
 
     def remove(self, n):
         """
         Remove node n from the partition
         """
         self._dag.remove_node(n)
+        if n in self._width:
+            # Widths can't shrink incrementally
+            self._width = DAGWidth(self._dag)
 
     def add_node(self, u, weight):
         """
         Add a single node u to the partition
         """
         self._dag.add_node(u, weight=weight)
-        self._max_dop = 1
+        self._width.add_node(u)
+        self._max_dop = self._width.width
 
     def probe_max_dop(self, u, v, unew, vnew, update=False):
         """
-        An incremental antichain (which appears significantly more efficient than the networkx antichains)
-        But only works for DoP, not for weighted width
-        """
-        if self._max_antichains is None:
-            new_ac = DAGUtil.get_max_antichains(self._dag)
-            if update:
-                self._max_antichains = new_ac
-            if len(new_ac) == 0:
-                if update:
-                    self._max_antichains = None
-                return 0
-            else:
-                return len(new_ac[0])
-        else:
-            if update and self._tmp_new_ac is not None:
-                self._max_antichains, md = self._tmp_new_ac
-                self._tmp_new_ac = None
-                return md
-
-            if unew:
-                ups = nx.descendants(self._dag, u)
-                new_node = u
-            elif vnew:
-                ups = nx.ancestors(self._dag, v)
-                new_node = v
-            else:
-                raise SchedulerException("u v are both new/old")
-            new_ac = []
-            md = 1
-            for (
-                    ma
-            ) in (
-                    self._max_antichains
-            ):  # missing elements in the current max_antichains!
-                # incremental updates
-                found = False
-                for n in ma:
-                    if n in ups:
-                        found = True
-                        break
-                if not found:
-                    mma = list(ma)
-                    mma.append(new_node)
-                    new_ac.append(mma)
-                    if len(mma) > md:
-                        md = len(mma)
-                elif len(ma) > md:
-                    md = len(ma)
-                new_ac.append(ma)  # carry over, then prune it
-            if len(new_ac) > 0:
-                self._tmp_new_ac = (new_ac, md)
-                if update:
-                    self._max_antichains = new_ac
-                return md
-            else:
-                raise SchedulerException("No antichains")
+        Returns the DoP of this partition after adding nodes `u`, `v` and the
+        edge between them, as found in the partition's DAG. The DoP is updated
+        incrementally from the previous one, and kept only if `update` is True
+        """
+        width = self._width if update else self._width.copy()
+        for n in (u, v):
+            if n in self._dag:
+                width.add_node(n)
+        if self._dag.has_edge(u, v):
+            width.add_edge(u, v)
+        return width.width
 
     @property
     def cardinality(self):
@@ -430,6 +444,10 @@ class KFamilyPartition(Partition):
         self._w_attr = max_dop.keys()
         self._tc = defaultdict(set)
         self._tmp_max_dop = {}
+        # one DAGWidth per resource attribute, and their values after merging
+        # with the partition last probed by can_merge
+        self._widths = {_w_attr: DAGWidth() for _w_attr in self._w_attr}
+        self._tmp_widths = None
 
     def add_node(self, u):
         """
@@ -442,17 +460,14 @@ class KFamilyPartition(Partition):
         kwargs["weight"] = self._global_dag.nodes[u].get("weight", 5)
         self._dag.add_node(u, **kwargs)
         for k in self._w_attr:
-            self._tmp_max_dop[k] = get_max_weighted_antichain(
-                self._dag, w_attr=k
-            )[0]
+            self._widths[k].add_node(u, int(kwargs[k]))
+            self._tmp_max_dop[k] = self._widths[k].width
         self._max_dop = self._tmp_max_dop
 
     def can_merge(self, that, u, v):
         """"""
-        dag = nx.compose(self._dag, that._dag)
-        if u is not None:
-            dag.add_edge(u, v)
         tmp_max_dop = copy.deepcopy(self._tmp_max_dop)
+        tmp_widths = {}
 
         for _w_attr in self._w_attr:
             ask_max_dop = (
@@ -460,7 +475,12 @@ class KFamilyPartition(Partition):
                 if self._ask_max_dop[_w_attr] is not None
                 else 1
             )
-            mydop = get_max_weighted_antichain(dag, w_attr=_w_attr)[0]
+            width = self._widths[_w_attr].copy()
+            width.update(that._widths[_w_attr])
+            if u is not None:
+                width.add_edge(u, v)
+            tmp_widths[_w_attr] = width
+            mydop = width.width
             curr_max = max(ask_max_dop, that._max_dop[_w_attr])
 
             if mydop <= curr_max:
@@ -472,12 +492,17 @@ class KFamilyPartition(Partition):
                 tmp_max_dop[_w_attr] = mydop
 
         self._tmp_max_dop = tmp_max_dop  # only change it when returning True
+        self._tmp_widths = tmp_widths
         return True
 
     def merge(self, that, u, v):
-        self._dag = nx.compose(self._dag, that._dag)
+        # that is dropped after merging, so there is no need to copy our DAG
+        self._dag.update(that._dag)
         if u is not None:
             self._dag.add_edge(u, v)
+        if self._tmp_widths is not None:
+            self._widths = self._tmp_widths
+            self._tmp_widths = None
         if self._tmp_max_dop is not None:
             self._max_dop = self._tmp_max_dop
             # print("Gid %d just merged with DoP %d" % (self._gid, self._tmp_max_dop))
@@ -623,17 +648,15 @@ class MySarkarScheduler(Scheduler):
         logger.debug("MySarkar time criticality called")
         return True
 
-    def _merge_two_parts(self, ugid, vgid, u, v, gu, gv, g_dict, parts, G):
+    def _merge_two_parts(self, ugid, vgid, u, v, g_dict):
         """
-        Merge two parts associated with u and v respectively
+        Merge two parts associated with u and v respectively. The part with
+        the lower gid absorbs the other one, which is removed from `g_dict`
 
         Return: None if these two parts cannot be merged
                 due to reasons such as DoP overflow
                 A ``Part`` instance
         """
-        # get the new part should we go ahead
-        # the new part should be one  of partu or partv
-        # print("\nMerging ugid %d and vgid %d, u %d and v %d" % (ugid, vgid, u, v))
         l_gid = min(ugid, vgid)
         r_gid = max(ugid, vgid)
         part_new = g_dict[l_gid]
@@ -643,31 +666,24 @@ class MySarkarScheduler(Scheduler):
             return None
 
         part_new.merge(part_removed, u, v)
-
-        # Get hold of all gnodes that belong to "part_removed"
-        # and re-assign them to the new partitions
-        for n in part_removed._dag.nodes():
-            G.nodes[n]["gid"] = l_gid
-
-        index = None
-        for i, part in enumerate(parts):
-            p_gid = part._gid
-            if p_gid > r_gid:
-                g_dict[p_gid - 1] = part
-                part._gid -= 1
-                for n in part._dag.nodes():
-                    G.nodes[n]["gid"] = part._gid
-            elif p_gid == r_gid:
-                # index = len(parts) - i - 1
-                index = i
-                del g_dict[p_gid]
-
-        if index is None:
-            raise SchedulerException("Failed to find r_gid")
-        parts[:] = parts[:index] + parts[index + 1:]
-
+        self._gid_sets.union(l_gid, r_gid)
+        del g_dict[r_gid]
         return part_new
 
+    def _compact_gids(self, parts, st_gid, g_dict, G):
+        """
+        Renumber `parts` with consecutive gids starting at st_gid, following
+        the order of their current gids, and relabel the nodes of G with them
+        """
+        g_dict.clear()
+        for new_gid, part in enumerate(
+            sorted(parts, key=lambda x: x._gid), start=st_gid
+        ):
+            part._gid = new_gid
+            g_dict[new_gid] = part
+            for n in part._dag.nodes():
+                G.nodes[n]["gid"] = new_gid
+
     def reduce_partitions(self, parts, g_dict, G):
         """
         further reduce the number of partitions by merging partitions whose max_dop
@@ -677,35 +693,27 @@ class MySarkarScheduler(Scheduler):
                  _max_dop of num_cpus as default
         step 2 - enumerate each partition p to see merging
                  between p and its neighbour is feasible
+
+        Merging leaves the surviving partition in place, so enumeration
+        resumes at the pair before it, as the pairs before that are unchanged
+        and could not be merged already.
         """
-        done_reduction = False
         num_reductions = 0
         # TODO consider other w_attrs other than CPUs!
         parts.sort(key=lambda x: x._max_dop["num_cpus"])
-        while not done_reduction:
-            for i, partA in enumerate(parts):
-                if i < len(parts) - 1:
-                    partB = parts[i + 1]
-                    new_part = self._merge_two_parts(
-                        partA._gid,
-                        partB._gid,
-                        None,
-                        None,
-                        None,
-                        None,
-                        g_dict,
-                        parts,
-                        G,
-                    )
-                    if new_part is not None:
-                        num_reductions += 1
-                        break  # force re-sorting
-                else:
-                    done_reduction = True
-                    logger.info(
-                        "Performed reductions %d times", num_reductions
-                    )
-                    break
+        i = 0
+        while i < len(parts) - 1:
+            partA = parts[i]
+            new_part = self._merge_two_parts(
+                partA._gid, parts[i + 1]._gid, None, None, g_dict
+            )
+            if new_part is None:
+                i += 1
+                continue
+            num_reductions += 1
+            del parts[i + 1 if new_part is partA else i]
+            i = max(i - 1, 0)
+        logger.info("Performed reductions %d times", num_reductions)
 
     def partition_dag(self):
         """
@@ -716,19 +724,22 @@ class MySarkarScheduler(Scheduler):
         """
         st_gid = len(self._drop_list) + 1
         init_c = st_gid
-        el = sorted(self._dag.edges(data=True), key=lambda ed: ed[2]["weight"] * -1)
         stt = time.time()
-        topo_sorted = nx.topological_sort(self._dag)
+        # the longest path is only recomputed where zeroing edges changes it
+        critical_path = CriticalPath(self._dag)
         curr_lpl = None
-        parts = []
         plots_data = []
 
+        # Every node starts in its own partition, identified by the node's
+        # initial gid. Merged partitions keep the smallest of their gids, and
+        # are renumbered consecutively once partitioning is done
+        self._gid_sets = DisjointSets()
         for n in self._dag.nodes(data=True):
             n[1]["gid"] = st_gid
             part = KFamilyPartition(st_gid, self._max_dop, global_dag=self._dag)
             part.add_node(n[0])
             self._part_dict[st_gid] = part
-            parts.append(part)  # will it get rejected?
+            self._gid_sets.add(st_gid)
             st_gid += 1
 
         for i, e in enumerate(sorted(self._dag.edges(data=True),
@@ -739,34 +750,35 @@ class MySarkarScheduler(Scheduler):
             gv = self._dag.nodes[v]
             ow = self._dag.adj[u][v]["weight"]
             self._dag.adj[u][v]["weight"] = 0  # edge zeroing
-            ugid = gu.get("gid", None)
-            vgid = gv.get("gid", None)
+            critical_path.set_edge_weight(u, v, 0)
+            ugid = self._gid_sets.find(gu["gid"])
+            vgid = self._gid_sets.find(gv["gid"])
             if ugid != vgid:  # merge existing parts
-                part = self._merge_two_parts(
-                    ugid, vgid, u, v, gu, gv, self._part_dict, parts, self._dag
-                )
+                part = self._merge_two_parts(ugid, vgid, u, v, self._part_dict)
                 if part is not None:
                     st_gid -= 1
                     self._sspace[i] = 1
                 else:
                     self._dag.adj[u][v]["weight"] = ow
+                    critical_path.set_edge_weight(u, v, ow)
                     self._part_edges.append(e)
             if self._dump_progress:
-                bb = np.median([pp._tmp_max_dop for pp in parts])
-                path, curr_lpl = DAGUtil.get_longest_path(
-                    self._dag, show_path=False, topo_sort=topo_sorted
+                bb = np.median([pp._tmp_max_dop for pp in self._part_dict.values()])
+                curr_lpl = critical_path.length
+                plots_data.append(
+                    "%d,%d,%d" % (curr_lpl, len(self._part_dict), bb)
                 )
-                plots_data.append("%d,%d,%d" % (curr_lpl, len(parts), bb))
+        # the partitions left, in gid order
+        parts = list(self._part_dict.values())
         self.reduce_partitions(parts, self._part_dict, self._dag)
+        self._compact_gids(parts, init_c, self._part_dict, self._dag)
         edt = time.time() - stt
         self._parts = parts
         if self._dump_progress:
             with open("/tmp/%.3f_lpl_parts.csv" % time.time(), "w") as of:
                 of.writelines(os.linesep.join(plots_data))
         if curr_lpl is None:
-            path, curr_lpl = DAGUtil.get_longest_path(
-                self._dag, show_path=False, topo_sort=topo_sorted
-            )
+            curr_lpl = critical_path.length
         return (st_gid - init_c), curr_lpl, edt, parts
 
 
@@ -837,6 +849,120 @@ class MinNumPartsScheduler(MySarkarScheduler):
         #     return True
 
 
+def _pso_partition(G, x, max_dop, st_gid, part_edges, changes=None):
+    """
+    Partitions G based on a given scheme x subject to constraints imposed by
+    each partition's DoP (see PSOScheduler). Edges between partitions are
+    appended to part_edges.
+
+    G is modified in place: zeroed edges, nodes' gids and edges added to
+    linearise partitions. If changes is given, they are recorded there so
+    that _undo_pso_partition can revert them.
+    """
+    el = sorted(G.edges(data=True), key=lambda ed: ed[2]["weight"] * -1)
+    g_dict = dict()
+    parts = []
+    for i, e in enumerate(el):
+        pos = int(round(x[i]))
+        if pos == 3:  # 10 non_zero + 1
+            continue
+        elif pos == 2:  # 01 zero with linearisation + 1
+            linear = True
+        elif pos == 1:  # 00 zero without linearisation + 1
+            linear = False
+        else:
+            raise SchedulerException("PSO position out of bound: {0}".format(pos))
+
+        u = e[0]
+        gu = G.nodes[u]
+        v = e[1]
+        gv = G.nodes[v]
+        ow = G.adj[u][v]["weight"]
+        if changes is not None:
+            changes.append((u, v, ow))
+        G.adj[u][v]["weight"] = 0  # edge zeroing
+        recover_edge = False
+
+        ugid = gu.get("gid", None)
+        vgid = gv.get("gid", None)
+        if ugid and (not vgid):
+            part = g_dict[ugid]
+        elif (not ugid) and vgid:
+            part = g_dict[vgid]
+        elif not ugid and (not vgid):
+            part = Partition(st_gid, max_dop)
+            g_dict[st_gid] = part
+            parts.append(part)  # will it get rejected?
+            st_gid += 1
+        else:  # elif (ugid and vgid):
+            # cannot change Partition once is in!
+            part = None
+
+        if part is None:
+            recover_edge = True
+        else:
+            ca, unew, vnew = part.can_add(u, v, gu, gv)
+            if ca:
+                # ignore linear flag, add it anyway
+                part.add(u, v, gu, gv)
+            elif linear:
+                part.add(
+                    u, v, gu, gv, sequential=True, global_dag=G, added_edges=changes
+                )
+            else:
+                recover_edge = True  # outright rejection
+            if not recover_edge:
+                gu["gid"] = part._gid
+                gv["gid"] = part._gid
+        if recover_edge:
+            G.adj[u][v]["weight"] = ow
+            part_edges.append(e)
+    return (
+        DAGUtil.get_longest_path(G, show_path=False)[1],
+        len(parts),
+        parts,
+        g_dict,
+    )
+
+
+def _undo_pso_partition(G, changes):
+    """Reverts the changes _pso_partition made to G"""
+    for u, v, weight in reversed(changes):
+        if weight is not None:
+            G.adj[u][v]["weight"] = weight
+        elif G.has_edge(u, v):
+            G.remove_edge(u, v)
+    for n in G.nodes():
+        G.nodes[n].pop("gid", None)
+
+
+def _pso_evaluate(G, x, max_dop, st_gid):
+    """
+    Returns the critical path and number of partitions of partitioning G with
+    scheme x, leaving G as it was
+    """
+    changes = []
+    try:
+        lpl, num_parts, _, _ = _pso_partition(G, x, max_dop, st_gid, [], changes)
+    finally:
+        _undo_pso_partition(G, changes)
+    return lpl, num_parts
+
+
+# The DAG and partitioning parameters of PSOScheduler's worker processes
+_pso_worker_args = None
+
+
+def _init_pso_worker(G, max_dop, st_gid):
+    global _pso_worker_args
+    _pso_worker_args = (G, max_dop, st_gid)
+
+
+def _pso_worker_evaluate(x):
+    G, max_dop, st_gid = _pso_worker_args
+    return _pso_evaluate(G, x, max_dop, st_gid)
+
+
 class PSOScheduler(Scheduler):
     """
     Use the Particle Swarm Optimisation to guide the Sarkar algorithm
@@ -863,6 +989,11 @@ class PSOScheduler(Scheduler):
             (1) DoP constrints for each partiiton are satisfied
                 based on X[i] value, reject or linearisation
             (2) returns makespan
+
+    Each particle position is evaluated once, results are kept by the
+    scheduler for the whole search. With processes > 1 the new positions of
+    each iteration are evaluated by a pool of processes, each of which
+    receives the DAG once when it starts.
     """
 
     def __init__(
@@ -873,14 +1004,20 @@ class PSOScheduler(Scheduler):
             deadline=None,
             topk=30,
             swarm_size=40,
+            processes=1,
+            seed=None,
     ):
         super(PSOScheduler, self).__init__(drop_list, max_dop=max_dop, dag=dag)
         self._deadline = deadline
-        # search space: key - combination of X[i] (string),
+        # search space: key - X rounded to integers (bytes),
         # val - a tuple of (critical_path (int), num_parts (int))
         self._sspace_dict = dict()
+        # topk used to limit the search space key to the first topk edges,
+        # it is kept for backwards compatibility
         self._topk = topk
         self._swarm_size = swarm_size if swarm_size is not None else 40
+        self._processes = processes if processes is not None else 1
+        self._seed = seed
         self._lite_dag = DAGUtil.build_dag_from_drops(
             self._drop_list, embed_drop=False
         )
@@ -890,6 +1027,7 @@ class PSOScheduler(Scheduler):
         self._topk = (
             leng if self._topk is None or leng < self._topk else self._topk
         )
+        self._pool = None
 
     def partition_dag(self):
         """
@@ -903,18 +1041,26 @@ class PSOScheduler(Scheduler):
         lb = [0.99] * self._leng
         ub = [3.01] * self._leng
         stt = time.time()
-        if self._deadline is None:
-            xopt, fopt = pso(
-                self.objective_func, lb, ub, swarmsize=self._swarm_size
+        if self._processes > 1:
+            # Forking the threaded translator server could copy held locks
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                self._processes,
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_init_pso_worker,
+                initargs=(self._lite_dag, self._max_dop, len(self._drop_list) + 1),
             )
-        else:
+        try:
             xopt, fopt = pso(
-                self.objective_func,
+                self._evaluate_swarm,
                 lb,
                 ub,
-                ieqcons=[self.constrain_func],
                 swarmsize=self._swarm_size,
+                seed=self._seed,
             )
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
 
         curr_lpl, num_parts, parts, g_dict = self._partition_G(self._dag, xopt)
         # curr_lpl, num_parts, parts, g_dict = self.objective_func(xopt)
@@ -939,77 +1085,56 @@ class PSOScheduler(Scheduler):
         A helper function to partition G based on a given scheme x
         subject to constraints imposed by each partition's DoP
         """
-        # print x
-        st_gid = len(self._drop_list) + 1
-        el = sorted(G.edges(data=True), key=lambda ed: ed[2]["weight"] * -1)
-        g_dict = dict()
-        parts = []
-        for i, e in enumerate(el):
-            pos = int(round(x[i]))
-            if pos == 3:  # 10 non_zero + 1
-                continue
-            elif pos == 2:  # 01 zero with linearisation + 1
-                linear = True
-            elif pos == 1:  # 00 zero without linearisation + 1
-                linear = False
-            else:
-                raise SchedulerException(
-                    "PSO position out of bound: {0}".format(pos)
-                )
-
-            u = e[0]
-            gu = G.nodes[u]
-            v = e[1]
-            gv = G.nodes[v]
-            ow = G.adj[u][v]["weight"]
-            G.adj[u][v]["weight"] = 0  # edge zeroing
-            recover_edge = False
-
-            ugid = gu.get("gid", None)
-            vgid = gv.get("gid", None)
-            if ugid and (not vgid):
-                part = g_dict[ugid]
-            elif (not ugid) and vgid:
-                part = g_dict[vgid]
-            elif not ugid and (not vgid):
-                part = Partition(st_gid, self._max_dop)
-                g_dict[st_gid] = part
-                parts.append(part)  # will it get rejected?
-                st_gid += 1
-            else:  # elif (ugid and vgid):
-                # cannot change Partition once is in!
-                part = None
-            # uw = gu['weight']
-            # vw = gv['weight']
-
-            if part is None:
-                recover_edge = True
-            else:
-                ca, unew, vnew = part.can_add(u, v, gu, gv)
-                if ca:
-                    # ignore linear flag, add it anyway
-                    part.add(u, v, gu, gv)
-                    gu["gid"] = part._gid
-                    gv["gid"] = part._gid
-                else:
-                    if linear:
-                        part.add(u, v, gu, gv, sequential=True, global_dag=G)
-                        gu["gid"] = part._gid
-                        gv["gid"] = part._gid
-                    else:
-                        recover_edge = True  # outright rejection
-            if recover_edge:
-                G.adj[u][v]["weight"] = ow
-                self._part_edges.append(e)
         self._call_counts += 1
-        # print "called {0} times, len parts = {1}".format(self._call_counts, len(parts))
-        return (
-            DAGUtil.get_longest_path(G, show_path=False)[1],
-            len(parts),
-            parts,
-            g_dict,
+        return _pso_partition(
+            G, x, self._max_dop, len(self._drop_list) + 1, self._part_edges
         )
 
+    @staticmethod
+    def _key(x):
+        return np.rint(x).astype(np.int8).tobytes()
+
+    def _evaluate(self, x):
+        """
+        The critical path and number of partitions of scheme x
+        """
+        sk = self._key(x)
+        stuff = self._sspace_dict.get(sk, None)
+        if stuff is None:
+            self._call_counts += 1
+            stuff = _pso_evaluate(
+                self._lite_dag, x, self._max_dop, len(self._drop_list) + 1
+            )
+            self._sspace_dict[sk] = stuff
+        return stuff
+
+    def _evaluate_swarm(self, positions):
+        """
+        Returns the objective value of each particle position, and whether it
+        satisfies the constraints. Positions not seen before are evaluated in
+        the worker processes, if any.
+        """
+        keys = [self._key(x) for x in positions]
+        new = {}
+        for sk, x in zip(keys, positions):
+            if sk not in self._sspace_dict and sk not in new:
+                new[sk] = x
+        if self._pool is not None and len(new) > 1:
+            chunksize = max(len(new) // (4 * self._processes), 1)
+            results = self._pool.map(
+                _pso_worker_evaluate, new.values(), chunksize=chunksize
+            )
+            self._sspace_dict.update(zip(new.keys(), results))
+            self._call_counts += len(new)
+        else:
+            for x in new.values():
+                self._evaluate(x)
+
+        stuff = np.array([self._sspace_dict[sk] for sk in keys])
+        if self._deadline is None:
+            return stuff[:, 0], np.ones(len(keys), dtype=bool)
+        return stuff[:, 1], self._deadline - stuff[:, 0] >= 0
+
     def constrain_func(self, x):
         """
         Deadline - critical_path >= 0
@@ -1018,39 +1143,219 @@ class PSOScheduler(Scheduler):
             raise SchedulerException(
                 "Deadline is None, cannot apply constraints!"
             )
-
-        sk = "".join([str(int(round(xi))) for xi in x[: self._topk]])
-        stuff = self._sspace_dict.get(sk, None)
-        if not stuff:
-            G = self._lite_dag.copy()
-            stuff = self._partition_G(G, x)
-            self._sspace_dict[sk] = stuff[:2]
-            del G
-        return self._deadline - stuff[0]
+        return self._deadline - self._evaluate(x)[0]
 
     def objective_func(self, x):
         """
         x is a list of values, each taking one of the 3 integers: 0,1,2 for an edge
         indices of x is identical to the indices in G.edges().sort(key='weight')
         """
-        # first check if the solution is already available in the search space
-        sk = "".join([str(int(round(xi))) for xi in x[: self._topk]])
-        stuff = self._sspace_dict.get(
-            sk, None
-        )  # TODO is this atomic operation?
-        if not stuff:
-            # make a deep copy to avoid mix up multiple particles,
-            # each of which has multiple iterations
-            G = self._lite_dag.copy()
-            stuff = self._partition_G(G, x)
-            self._sspace_dict[sk] = stuff[:2]
-            del G
+        stuff = self._evaluate(x)
         if self._deadline is None:
             return stuff[0]
         else:
             return stuff[1]
 
 
+class HEFTScheduler(Scheduler):
+    """
+    Schedules the DAG onto a set of nodes with different capabilities using the
+    Heterogeneous Earliest Finish Time heuristic (see utils/heft/base.py)
+
+    Each node is described by a dictionary with
+    * ``cores`` - the number of cores of the node
+    * ``speed`` - how fast the node is relative to a reference node, which takes
+      ``weight`` time units to run an application
+    * ``memory`` - the volume of data (in the units of Data drop weights) the
+      node can hold, unlimited by default
+
+    Applications are placed, in decreasing order of upward rank, on the node
+    where they finish the earliest. They occupy ``num_cpus`` cores of that node
+    while they run, and cannot start before all their inputs are available on
+    that node. Sending the data of a Data drop to a different node takes its
+    volume (its ``weight``) divided by ``bandwidth``. As in utils/heft/base.py
+    tasks start as soon as their inputs are ready and cores are available, they
+    are not inserted in earlier gaps of a node's schedule.
+
+    Every node is a partition, with ids following the order of the nodes, so
+    that partition ``i`` is deployed on the ``i``-th node.
+    """
+
+    def __init__(self, drop_list, nodes, dag=None, bandwidth=1.0):
+        self._nodes = [
+            {
+                "cores": int(node.get("cores", 1)),
+                "speed": float(node.get("speed", 1.0)),
+                "memory": node.get("memory"),
+            }
+            for node in nodes
+        ]
+        if not self._nodes:
+            raise SchedulerException("HEFT needs at least one node to schedule on")
+        max_dop = {
+            "num_cpus": max(node["cores"] for node in self._nodes),
+            "mem_usage": max(node["memory"] or 0 for node in self._nodes),
+        }
+        super(HEFTScheduler, self).__init__(drop_list, max_dop=max_dop, dag=dag)
+        self._bandwidth = float(bandwidth)
+        self._makespan = None
+
+    def _is_app(self, n):
+        return self._dag.nodes[n].get("drop_type", 1) == 1
+
+    def _num_cpus(self, n):
+        # Data drops are placed but take no cores
+        if not self._is_app(n):
+            return 0
+        return max(int(self._dag.nodes[n].get("num_cpus", 1)), 1)
+
+    def _weight(self, n):
+        return self._dag.nodes[n].get("weight", 0) if self._is_app(n) else 0
+
+    def _ranks(self, topo_order):
+        """
+        The upward rank of each node: its average computation cost plus the
+        most costly path to an exit node, with average communication costs
+        """
+        G = self._dag
+        mean_inv_speed = sum(1.0 / node["speed"] for node in self._nodes) / len(
+            self._nodes
+        )
+        # Average cost of sending data between two different nodes
+        comm_factor = 1.0 / self._bandwidth if len(self._nodes) > 1 else 0
+        rank = {}
+        for n in reversed(topo_order):
+            succ_rank = max(
+                (
+                    G.adj[n][s]["weight"] * comm_factor + rank[s]
+                    for s in G.successors(n)
+                ),
+                default=0,
+            )
+            rank[n] = self._weight(n) * mean_inv_speed + succ_rank
+        return rank
+
+    def _schedule(self, assignment=None):
+        """
+        Places every node of the DAG on a node, or on the node given by
+        `assignment` if any. Returns the finish time of the last node, and
+        the placement and (start, end) times of each node of the DAG.
+        """
+        G = self._dag
+        topo_order = list(nx.topological_sort(G))
+        rank = self._ranks(topo_order)
+        topo_index = {n: i for i, n in enumerate(topo_order)}
+        order = sorted(topo_order, key=lambda n: (-rank[n], topo_index[n]))
+
+        nodes = self._nodes
+        # The times at which each core of each node becomes free
+        cores_free = [[0.0] * node["cores"] for node in nodes]
+        memory_left = [node["memory"] for node in nodes]
+        placement = {}
+        times = {}
+
+        for n in order:
+            ncpus = self._num_cpus(n)
+            weight = self._weight(n)
+            volume = 0 if self._is_app(n) else G.nodes[n].get("weight", 0)
+            preds = [(p, G.adj[p][n]["weight"]) for p in G.predecessors(n)]
+
+            def finish_on(j):
+                ready = 0.0
+                for p, w in preds:
+                    pend = times[p][1]
+                    if placement[p] != j:
+                        pend += w / self._bandwidth
+                    ready = max(ready, pend)
+                start = ready
+                if ncpus:
+                    free = cores_free[j]
+                    start = max(ready, sorted(free)[min(ncpus, len(free)) - 1])
+                return start, start + weight / nodes[j]["speed"]
+
+            if assignment is not None:
+                candidates = [assignment[n]]
+            else:
+                candidates = [
+                    j
+                    for j, node in enumerate(nodes)
+                    if ncpus <= node["cores"]
+                    and (memory_left[j] is None or volume <= memory_left[j])
+                ]
+                if not candidates:
+                    # Over-subscribe rather than fail
+                    candidates = range(len(nodes))
+            best = None
+            for j in candidates:
+                start, end = finish_on(j)
+                if best is None or end < best[2]:
+                    best = (j, start, end)
+
+            j, start, end = best
+            placement[n] = j
+            times[n] = (start, end)
+            if ncpus:
+                free = sorted(cores_free[j])
+                used = min(ncpus, len(free))
+                cores_free[j] = [end] * used + free[used:]
+            if memory_left[j] is not None:
+                memory_left[j] -= volume
+
+        makespan = max((end for _, end in times.values()), default=0)
+        return makespan, placement, times
+
+    def evaluate(self, assignment):
+        """
+        Returns the makespan of running the DAG with each of its nodes placed on
+        the node given by `assignment` ({DAG node: node index}), so other
+        partitioning algorithms can be compared against this one
+        """
+        return self._schedule(assignment)[0]
+
+    def partition_dag(self):
+        """
+        Returns a tuple of:
+            1. the # of partitions formed (int)
+            2. the predicted makespan (float)
+            3. partition time (seconds, float)
+            4. a list of partitions (Partition)
+        """
+        stt = time.time()
+        self._makespan, placement, times = self._schedule()
+        st_gid = len(self._drop_list) + 1
+        parts = []
+        for j, node in enumerate(self._nodes):
+            part = Partition(st_gid + j, {"num_cpus": node["cores"]})
+            part._max_dop = node["cores"]
+            parts.append(part)
+            self._part_dict[part.partition_id] = part
+        G = self._dag
+        members = defaultdict(list)
+        for n, j in placement.items():
+            G.nodes[n]["gid"] = st_gid + j
+            members[j].append(n)
+        for j, part in enumerate(parts):
+            part._dag = G.subgraph(members[j]).copy()
+        self._part_edges = [
+            e for e in G.edges(data=True) if placement[e[0]] != placement[e[1]]
+        ]
+        self._parts = parts
+        return len(parts), self._makespan, time.time() - stt, parts
+
+    def merge_partitions(self, num_partitions, bal_cond=1):
+        """
+        Groups nodes into `num_partitions` islands. Islands are always balanced
+        by the cores of their nodes, the workload-based balancing schedules
+        partitions without regard to their cores.
+        """
+        return super(HEFTScheduler, self).merge_partitions(num_partitions, bal_cond=1)
+
+    @property
+    def makespan(self):
+        """The makespan predicted by the last call to `partition_dag`"""
+        return self._makespan
+
+
 class DAGUtil(object):
     """
     Helper functions dealing with DAG
@@ -1061,11 +1366,8 @@ class DAGUtil(object):
             G, weight="weight", default_weight=1, show_path=True, topo_sort=None
     ):
         """
-        Ported from:
-        https://github.com/networkx/networkx/blob/master/networkx/algorithms/dag.py
-        Added node weight
-
-        Returns the longest path in a DAG
+        Returns the longest path in a DAG, counting node weights too
+        (see `CriticalPath`)
         If G has edges with 'weight' attribute the edge data are used as weight values.
         :param: G Graph (NetworkX DiGraph)
         :param: weight Edge data key to use for weight (string)
@@ -1073,40 +1375,9 @@ class DAGUtil(object):
         :return: a tuple with two elements: `path` (list), the longest path, and
         `path_length` (float) the length of the longest path.
         """
-        dist = {}  # stores {v : (length, u)}
-        if topo_sort is None:
-            topo_sort = nx.topological_sort(G)
-        for v in topo_sort:
-            us = [
-                (
-                    dist[u][0]
-                    + data.get(weight, default_weight)  # accumulate
-                    + G.nodes[u].get(weight, 0)  # edge weight
-                    + (  # u node weight
-                        G.nodes[v].get(weight, 0)
-                        if len(list(G.successors(v))) == 0
-                        else 0
-                    ),  # v node weight if no successor
-                    u,
-                )
-                for u, data in G.pred[v].items()
-            ]
-            # Use the best predecessor if there is one and its distance is non-negative, otherwise terminate.
-            maxu = max(us) if us else (0, v)
-            dist[v] = maxu if maxu[0] >= 0 else (0, v)
-        u = None
-        v = max(dist, key=dist.get)
-        lp = dist[v][0]
-        if not show_path:
-            path = None
-        else:
-            path = []
-            while u != v:
-                path.append(v)
-                u = v
-                v = dist[v][1]
-            path.reverse()
-        return (path, lp)
+        return CriticalPath(
+            G, weight=weight, default_weight=default_weight, topo_sort=topo_sort
+        ).longest_path(show_path)
 
     @staticmethod
     def get_max_width(G, weight="weight", default_weight=1):
@@ -1115,14 +1386,7 @@ class DAGUtil(object):
         weight: float (for example, it could be RAM consumption in GB)
         Return : float
         """
-        max_width = 0
-        for antichain in nx.antichains(G):
-            t = 0
-            for n in antichain:
-                t += G.nodes[n].get(weight, default_weight)
-            if t > max_width:
-                max_width = t
-        return max_width
+        return get_max_width(G, w_attr=weight, default_weight=default_weight)
 
     @staticmethod
     def get_max_dop(G):
@@ -1130,20 +1394,15 @@ class DAGUtil(object):
         Get the maximum degree of parallelism of this DAG
         return : int
         """
-        return max([len(antichain) for antichain in nx.antichains(G)])
-        """
-        max_dop = 0
-        for antichain in nx.antichains(G):
-            leng = len(antichain)
-            if (leng > max_dop):
-                max_dop = leng
-        return max_dop
-        """
+        return get_max_width(G)
 
     @staticmethod
     def get_max_antichains(G):
         """
         return a list of antichains with Top-2 lengths
+
+        This enumerates all antichains of G, which takes exponential time; use
+        `get_max_dop` or `get_max_width` to know the size of the largest one
         """
         return DAGUtil.prune_antichains(nx.antichains(G))
 
@@ -1164,59 +1423,67 @@ class DAGUtil(object):
         """
         for each node, label its start and end time
         """
-        if topo_sort is None:
-            topo_sort = nx.topological_sort(G)
-        for v in topo_sort:
-            gv = G.nodes[v]
-            parents = list(G.predecessors(v))
-            if len(parents) == 0:
-                gv["stt"] = 0
-            else:
-                # get the latest end time of one of its parents
-                ledt = -1
-                for parent in parents:
-                    pedt = G.nodes[parent]["edt"] + G.adj[parent][v].get(
-                        weight, 0
-                    )
-                    if pedt > ledt:
-                        ledt = pedt
-                gv["stt"] = ledt
-            gv["edt"] = gv["stt"] + gv.get(weight, 0)
+        CriticalPath(
+            G, weight=weight, default_weight=0, topo_sort=topo_sort
+        ).label_schedule()
 
     @staticmethod
-    def ganttchart_matrix(G, topo_sort=None):
+    def gantt_intervals(G, topo_sort=None):
         """
-        Return a M (# of DROPs) by N (longest path length) matrix
+        Return a tuple of three integer arrays (nodes, stt, edt) with the start
+        and end times of all DROPs in topological order, as labelled by
+        `label_schedule`
         """
-        lpl = DAGUtil.get_longest_path(G, show_path=True)
-        # N = lpl[1] - (len(lpl[0]) - 1)
-        N = lpl[1]
-        M = G.number_of_nodes()
-        ma = np.zeros((M, N), dtype=np.int)
         if topo_sort is None:
             topo_sort = nx.topological_sort(G)
-        for i, n in enumerate(topo_sort):
+        nodes, stts, edts = [], [], []
+        for n in topo_sort:
             node = G.nodes[n]
             try:
-                stt = node["stt"]
-                edt = node["edt"]
+                stts.append(node["stt"])
+                edts.append(node["edt"])
             except KeyError as ke:
                 raise SchedulerException(
                     "No schedule labels found: {0}".format(str(ke))
                 )
-            # print i, n, stt, edt
-            leng = edt - stt
-            if edt == stt:
-                continue
-            try:
-                ma[i, stt:edt] = np.ones((1, leng))
-            except:
-                logger.error(
-                    "i, stt, edt, leng = %d, %d, %d, %d", i, stt, edt, leng
-                )
-                logger.error("N, M = %d, %d", M, N)
-                raise
-            # print ma[i, :]
+            nodes.append(n)
+        return tuple(np.array(a, dtype=int) for a in (nodes, stts, edts))
+
+    @staticmethod
+    def utilisation(stt, edt, length=None, weights=None):
+        """
+        Aggregates [stt, edt) intervals into a histogram of their number (or of
+        their total `weights`) at each time unit in [0, length). It takes
+        memory and time linear in the number of intervals plus `length`
+
+        :param: stt start times (1d integer array)
+        :param: edt end times (1d integer array)
+        :param: length number of time units, the latest end time by default
+        :param: weights a weight per interval (1d array), 1 by default
+        :return: the histogram (1d array)
+        """
+        stt = np.asarray(stt, dtype=int)
+        edt = np.asarray(edt, dtype=int)
+        if length is None:
+            length = int(edt.max()) if len(edt) else 0
+        size = max(length, int(edt.max()) if len(edt) else 0) + 1
+        # +w where an interval starts, -w where it ends, then a running sum
+        delta = np.bincount(stt, weights=weights, minlength=size)
+        delta -= np.bincount(edt, weights=weights, minlength=size)
+        return np.cumsum(delta[:length])
+
+    @staticmethod
+    def ganttchart_matrix(G, topo_sort=None):
+        """
+        Return a M (# of DROPs) by N (longest path length) matrix
+        Its size grows with the longest path length, see `gantt_intervals` for
+        a compact form of the same chart
+        """
+        N = DAGUtil.get_longest_path(G, show_path=False)[1]
+        _, stts, edts = DAGUtil.gantt_intervals(G, topo_sort)
+        ma = np.zeros((len(stts), N), dtype=int)
+        for i, (stt, edt) in enumerate(zip(stts, edts)):
+            ma[i, stt:edt] = 1
         return ma
 
     @staticmethod
@@ -1250,6 +1517,61 @@ class DAGUtil(object):
             mt._dlg_patched = True
         return mt
 
+    @staticmethod
+    def to_csr(num_nodes, u, v, weights, combine=np.add):
+        """
+        Build the compressed sparse row (CSR) adjacency of the undirected graph
+        with `num_nodes` vertices and edges (u[i], v[i]), as METIS expects it:
+        each edge is listed from both of its ends, self-loops are dropped and
+        the weights of repeated edges are combined using the `combine` ufunc
+
+        :return: a tuple (xadj, adjncy, adjwgt) of numpy arrays
+        """
+        u = np.asarray(u, dtype=np.int64)
+        v = np.asarray(v, dtype=np.int64)
+        weights = np.asarray(weights)
+        keep = u != v
+        rows = np.concatenate((u[keep], v[keep]))
+        cols = np.concatenate((v[keep], u[keep]))
+        weights = np.concatenate((weights[keep], weights[keep]))
+        order = np.lexsort((cols, rows))
+        rows, cols, weights = rows[order], cols[order], weights[order]
+        if len(rows) > 0:
+            first = np.ones(len(rows), dtype=bool)
+            first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+            starts = np.flatnonzero(first)
+            weights = combine.reduceat(weights, starts)
+            rows, cols = rows[starts], cols[starts]
+        xadj = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=num_nodes), out=xadj[1:])
+        return xadj, cols, weights
+
+    @staticmethod
+    def metis_graph(xadj, adjncy, vwgt=None, vsize=None, adjwgt=None, ncon=1):
+        """
+        Wrap CSR arrays (see `to_csr`) into a graph that metis.part_graph
+        consumes directly, without going through networkx
+        """
+        mt = DAGUtil.import_metis()
+        idx_p = ctypes.POINTER(mt.idx_t)
+
+        def as_idx(a):
+            if a is None:
+                return None
+            a = np.ascontiguousarray(a, dtype=mt.idx_t)
+            # the pointer keeps a reference to its array
+            return a.ctypes.data_as(idx_p)
+
+        return mt.METIS_Graph(
+            mt.idx_t(len(xadj) - 1),
+            mt.idx_t(ncon),
+            as_idx(xadj),
+            as_idx(adjncy),
+            as_idx(vwgt),
+            as_idx(vsize),
+            as_idx(adjwgt),
+        )
+
     @staticmethod
     def build_dag_from_drops(
             drop_list, embed_drop=True, fake_super_root=False
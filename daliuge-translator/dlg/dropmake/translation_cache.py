@@ -0,0 +1,194 @@
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A content-addressed cache of translation results, so that translating the same
+logical graph with the same parameters again doesn't need to unroll and
+partition it from scratch.
+"""
+import collections
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 1024**3
+_SUFFIX = ".pickle"
+
+
+class TranslationCache(object):
+    """
+    Stores translation results on disk under `root_dir`, one file per result,
+    named after the hash of the inputs that produced it. When the results take
+    more than `max_size` bytes the least recently used ones are evicted.
+    """
+
+    def __init__(self, root_dir, max_size=DEFAULT_MAX_SIZE, salt=""):
+        self._root_dir = root_dir
+        self._max_size = max_size
+        self._salt = salt
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # {key: size}, from least to most recently used
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        os.makedirs(root_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        entries = []
+        for fname in os.listdir(self._root_dir):
+            if not fname.endswith(_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self._root_dir, fname))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, fname[: -len(_SUFFIX)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._size += size
+        with self._lock:
+            self._evict()
+
+    def _path(self, key):
+        return os.path.join(self._root_dir, key + _SUFFIX)
+
+    def key(self, *parts):
+        """
+        Returns the key under which the result of a translation step with the
+        given inputs is stored. Inputs must be JSON-serialisable; dictionaries
+        are hashed independently of the order of their keys.
+        """
+        canonical = json.dumps(
+            [self._salt, parts], sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the result stored under `key`, or None if there is none"""
+        with self._lock:
+            if key not in self._entries:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                value = pickle.load(f)
+            os.utime(self._path(key))
+        except Exception:
+            logger.warning("Cannot read cached translation %s", key, exc_info=True)
+            with self._lock:
+                self._discard(key)
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Stores `value` under `key`. Values larger than the cache itself are not
+        stored.
+        """
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self._max_size:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self._root_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            logger.warning("Cannot cache translation %s", key, exc_info=True)
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+        with self._lock:
+            self._size += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the result stored under `key`, or calls `compute` to get it and
+        stores it. Each call returns a new copy of the result, which callers
+        can freely modify.
+        """
+        value = self.get(key)
+        if value is not None:
+            logger.info("Reusing cached translation %s", key)
+            return value
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def _discard(self, key):
+        self._size -= self._entries.pop(key, 0)
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self._size > self._max_size:
+            key = next(iter(self._entries))
+            logger.debug("Evicting cached translation %s", key)
+            self._discard(key)
+            self._evictions += 1
+
+    def clear(self):
+        """Removes all results from this cache"""
+        with self._lock:
+            for key in list(self._entries):
+                self._discard(key)
+
+    @property
+    def stats(self):
+        """The usage statistics of this cache"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "size": self._size,
+                "max_size": self._max_size,
+            }
+
+
+def cached(cache, compute, *key_parts):
+    """
+    Returns the result of calling `compute`, whose result depends only on
+    `key_parts`, reusing it from `cache` if possible. `cache` can be None, in
+    which case `compute` is always called.
+    """
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(cache.key(*key_parts), compute)
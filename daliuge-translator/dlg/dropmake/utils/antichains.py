@@ -29,84 +29,290 @@ A special case (K = 1) of the Maximum Weighted K-families based on
 
 A detailed proof can be found on Page 2 (Corollary)
     https://link.springer.com/article/10.1007/BF00333130
+
+By Dilworth's theorem the maximum weighted antichain of a DAG has the same
+weight as its minimum (weighted) chain cover, which is a minimum flow in which
+each node carries at least as much flow as its weight. That minimum flow is
+the total weight of the DAG minus a maximum flow on a network with one
+"out" and one "in" vertex per node:
+
+    s -> out(v) -> in(x) -> out(x) -> ... -> in(y) -> t
+
+where s -> out(v) and in(y) -> t have the weight of their node as capacity,
+and out(v) -> in(x) (one per DAG edge) and in(x) -> out(x) are unlimited. For
+unit weights this is the bipartite matching between a node and its
+descendants used in Fulkerson's proof of Dilworth's theorem, but the
+descendants are reached through the DAG edges, so the transitive closure of
+the DAG is never built.
 """
 from asyncio.log import logger
-import sys
+import collections
 
 import networkx as nx
 
+_SOURCE = -1
+_SINK = -2
+_INF = float("inf")
+_EPS = 1e-9
 
-def _create_split_graph(dag, w_attr="weight"):
-    """
-    Given a normal DiGraph, create its equivalent split graph
-    """
-    bpg = nx.DiGraph()
-    for el in dag.nodes(data=True):
-        xi = "{0}_x".format(el[0])
-        yi = "{0}_y".format(el[0])
-        # print(el)
-        bpg.add_edge("s", xi, capacity=int(el[1].get(w_attr, 1)), weight=0)
-        bpg.add_edge(xi, yi, capacity=int(sys.maxsize), weight=1)
-        bpg.add_edge(yi, "t", capacity=int(el[1].get(w_attr, 1)), weight=0)
 
-        el_des = nx.descendants(dag, el[0])
-        el_pred = nx.ancestors(dag, el[0])
+class DAGWidth(object):
+    """
+    Keeps track of the maximum weighted antichain (or width) of a DAG as
+    nodes and edges are added to it.
 
-        for udown in el_des:
-            bpg.add_edge(
-                xi, "{0}_y".format(udown), capacity=float(sys.maxsize), weight=0
-            )
-        for uup in el_pred:
-            bpg.add_edge("{0}_x".format(uup), yi, capacity=float(sys.maxsize), weight=0)
+    Adding nodes and edges can only increase the maximum flow, so the flow
+    found so far is kept and only augmented when the width is next needed.
+    The nodes and edges of other DAGWidths can be added in the same way (see
+    `update`), which is how partitions are merged.
+    """
 
-    return bpg
+    def __init__(self, dag=None, w_attr=None, default_weight=1):
+        self._index = {}
+        self._nodes = []
+        self._weight = []
+        self._succ = []
+        self._pred = []
+        self._fs = []  # flow through s -> out(v)
+        self._ft = []  # flow through in(v) -> t
+        self._fn = []  # flow through in(v) -> out(v)
+        self._fe = {}  # flow through out(v) -> in(x), keyed by (v, x)
+        self._total_weight = 0
+        self._flow = 0
+        self._dirty = False
+        if dag is not None:
+            for n, data in dag.nodes(data=True):
+                weight = data.get(w_attr, default_weight) if w_attr else 1
+                self.add_node(n, weight)
+            for u in nx.topological_sort(dag):
+                for v in dag.successors(u):
+                    self.add_edge(u, v)
+
+    def __contains__(self, n):
+        return n in self._index
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def copy(self):
+        other = DAGWidth()
+        other._index = dict(self._index)
+        other._nodes = list(self._nodes)
+        other._weight = list(self._weight)
+        other._succ = [list(succ) for succ in self._succ]
+        other._pred = [list(pred) for pred in self._pred]
+        other._fs = list(self._fs)
+        other._ft = list(self._ft)
+        other._fn = list(self._fn)
+        other._fe = dict(self._fe)
+        other._total_weight = self._total_weight
+        other._flow = self._flow
+        other._dirty = self._dirty
+        return other
+
+    def add_node(self, n, weight=1):
+        """Adds node `n` with the given `weight`, if it's not there yet"""
+        if n in self._index:
+            return
+        self._index[n] = len(self._nodes)
+        self._nodes.append(n)
+        self._weight.append(weight)
+        self._succ.append([])
+        self._pred.append([])
+        self._fs.append(0)
+        self._ft.append(0)
+        self._fn.append(0)
+        self._total_weight += weight
+
+    def add_edge(self, u, v):
+        """Adds the edge `u` -> `v`, adding its nodes with unit weight if needed"""
+        self.add_node(u)
+        self.add_node(v)
+        i, j = self._index[u], self._index[v]
+        if (i, j) in self._fe:
+            return
+        self._fe[(i, j)] = 0
+        self._succ[i].append(j)
+        self._pred[j].append(i)
+        # Greedily send flow straight through the new edge, which usually
+        # leaves little for the augmenting path search to do
+        d = min(self._weight[i] - self._fs[i], self._weight[j] - self._ft[j])
+        if d > _EPS:
+            self._fs[i] += d
+            self._fe[(i, j)] += d
+            self._ft[j] += d
+            self._flow += d
+        self._dirty = True
+
+    def update(self, other):
+        """Adds the nodes and edges of DAGWidth `other`"""
+        if self._index.keys().isdisjoint(other._index):
+            # The union of both flows is a valid flow, keep it
+            offset = len(self._nodes)
+            for n in other._nodes:
+                self._index[n] = len(self._nodes)
+                self._nodes.append(n)
+            self._weight.extend(other._weight)
+            self._succ.extend([j + offset for j in succ] for succ in other._succ)
+            self._pred.extend([i + offset for i in pred] for pred in other._pred)
+            self._fs.extend(other._fs)
+            self._ft.extend(other._ft)
+            self._fn.extend(other._fn)
+            for (i, j), f in other._fe.items():
+                self._fe[(i + offset, j + offset)] = f
+            self._total_weight += other._total_weight
+            self._flow += other._flow
+            self._dirty = self._dirty or other._dirty
+            return
+        for n, weight in zip(other._nodes, other._weight):
+            self.add_node(n, weight)
+        for (i, j) in other._fe:
+            self.add_edge(other._nodes[i], other._nodes[j])
+
+    @property
+    def width(self):
+        """The weight of the maximum weighted antichain"""
+        self._maximize_flow()
+        return self._total_weight - self._flow
+
+    def antichain(self):
+        """Returns the nodes of a maximum weighted antichain"""
+        self._maximize_flow()
+        reached = self._levels(stop_at_sink=False)
+        return [
+            n
+            for i, n in enumerate(self._nodes)
+            if 2 * i in reached and 2 * i + 1 not in reached
+        ]
+
+    # Vertices of the flow network are _SOURCE, _SINK, and 2i (out) and
+    # 2i + 1 (in) for the i-th node
+    def _neighbours(self, x):
+        if x == _SOURCE:
+            yield from range(0, 2 * len(self._nodes), 2)
+            return
+        i = x >> 1
+        if x & 1:
+            yield _SINK
+            yield x - 1
+            for p in self._pred[i]:
+                yield 2 * p
+        else:
+            for s in self._succ[i]:
+                yield 2 * s + 1
+            yield x + 1
+
+    def _residual(self, x, y):
+        if x == _SOURCE:
+            i = y >> 1
+            return self._weight[i] - self._fs[i]
+        if y == _SINK:
+            i = x >> 1
+            return self._weight[i] - self._ft[i]
+        i, j = x >> 1, y >> 1
+        if x & 1:
+            # in(i) -> out(i), or backwards through out(j) -> in(i)
+            return _INF if i == j else self._fe[(j, i)]
+        # out(i) -> in(j), or backwards through in(i) -> out(i)
+        return self._fn[i] if i == j else _INF
+
+    def _push(self, x, y, d):
+        if x == _SOURCE:
+            self._fs[y >> 1] += d
+        elif y == _SINK:
+            self._ft[x >> 1] += d
+            self._flow += d
+        else:
+            i, j = x >> 1, y >> 1
+            if x & 1:
+                if i == j:
+                    self._fn[i] += d
+                else:
+                    self._fe[(j, i)] -= d
+            elif i == j:
+                self._fn[i] -= d
+            else:
+                self._fe[(i, j)] += d
+
+    def _levels(self, stop_at_sink=True):
+        level = {_SOURCE: 0}
+        queue = collections.deque([_SOURCE])
+        while queue:
+            x = queue.popleft()
+            for y in self._neighbours(x):
+                if y in level or self._residual(x, y) <= _EPS:
+                    continue
+                level[y] = level[x] + 1
+                if y == _SINK and stop_at_sink:
+                    return level
+                if y != _SINK:
+                    queue.append(y)
+        return level
+
+    def _maximize_flow(self):
+        # Dinic's algorithm, with an iterative DFS since paths can be as long
+        # as the DAG
+        if not self._dirty:
+            return
+        while True:
+            level = self._levels()
+            if _SINK not in level:
+                break
+            arcs = {}
+            current = {}
+
+            def next_arc(x):
+                y = current.get(x)
+                if (
+                    y is not None
+                    and level.get(y) == level[x] + 1
+                    and self._residual(x, y) > _EPS
+                ):
+                    return y
+                if x not in arcs:
+                    arcs[x] = self._neighbours(x)
+                for y in arcs[x]:
+                    if level.get(y) == level[x] + 1 and self._residual(x, y) > _EPS:
+                        current[x] = y
+                        return y
+                current[x] = None
+                return None
+
+            path = [_SOURCE]
+            while path:
+                x = path[-1]
+                if x == _SINK:
+                    d = min(self._residual(a, b) for a, b in zip(path, path[1:]))
+                    for a, b in zip(path, path[1:]):
+                        self._push(a, b, d)
+                    path = [_SOURCE]
+                    continue
+                y = next_arc(x)
+                if y is None:
+                    # Dead end, don't come back here during this phase
+                    level[x] = None
+                    path.pop()
+                else:
+                    path.append(y)
+        self._dirty = False
+
+
+def get_max_width(dag, w_attr=None, default_weight=1):
+    """
+    Returns the weight of the maximum weighted antichain of `dag`, taking the
+    weight of each node from its `w_attr` attribute (or `default_weight`).
+    Without `w_attr` all nodes weigh 1, and the result is the maximum degree of
+    parallelism of `dag`.
+    """
+    return DAGWidth(dag, w_attr=w_attr, default_weight=default_weight).width
 
 
-def _get_pi_solution(split_graph):
+def get_max_antichain(dag, w_attr=None, default_weight=1):
     """
-        1. create H (admissable graph) based on Section 3
-        http://fmdb.cs.ucla.edu/Treports/930014.pdf
-
-        2. calculate the max flow f' on H using networkx
-
-        3. construct Residual graph from f' on H based on
-        https://www.topcoder.com/community/data-science/\
-        data-science-tutorials/minimum-cost-flow-part-two-algorithms/
-
-        4. calculate Pi based on Section 3 again
-        """
-    # Step 1
-    H = nx.DiGraph()
-    H.add_nodes_from(split_graph)
-    for ed in split_graph.edges(data=True):
-        Cxy = int(ed[2].get("capacity", sys.maxsize))
-        Axy = int(ed[2]["weight"])
-        if Axy == 0 and Cxy > 0:
-            H.add_edge(ed[0], ed[1], capacity=Cxy, weight=Axy)
-
-    # Step 2
-    flow_value, flow_dict = nx.maximum_flow(H, "s", "t")
-
-    # Step 3
-    R = nx.DiGraph()
-    R.add_nodes_from(H)
-    for ed in H.edges(data=True):
-        Xij = flow_dict[ed[0]][ed[1]]
-        Uij = ed[2].get("capacity", sys.maxsize)
-        Cij = ed[2]["weight"]
-        if (Uij - Xij) > 0:
-            R.add_edge(ed[0], ed[1], weight=Cij)
-        if Xij > 0:
-            R.add_edge(ed[1], ed[0], weight=-1 * Cij)
-
-    # Step 4
-    pai = dict()
-    for n in R.nodes():
-        if nx.has_path(R, "s", n):
-            pai[n] = 0
-        else:
-            pai[n] = 1
-    return pai
+    Returns the nodes of a maximum (weighted, see `get_max_width`) antichain
+    of `dag`
+    """
+    return DAGWidth(dag, w_attr=w_attr, default_weight=default_weight).antichain()
 
 
 def get_max_weighted_antichain(dag, w_attr="weight"):
@@ -117,23 +323,8 @@ def get_max_weighted_antichain(dag, w_attr="weight"):
 
     Assume each node in `dag` has a field "weight", which is, well, the weight
     """
-
-    # Step 1 - Create the "split" graph
-    bpg = _create_split_graph(dag, w_attr=w_attr)
-    pai = _get_pi_solution(bpg)
-
-    w_antichain_len = 0  # weighted antichain length
-    antichain_names = []
-    for h in range(2):
-        for nd in bpg.nodes():
-            if nd.endswith("_x"):
-                y_nd = nd.split("_x")[0] + "_y"
-                if (1 - pai[nd] + pai["s"] == h) and (pai[y_nd] - pai[nd] == 1):
-                    w_antichain_len += bpg.adj["s"][nd]["capacity"]
-                    # print(' *** %d' % bpg.edge['s'][nd]['capacity'])
-                    antichain_names.append(nd)
-
-    return w_antichain_len, antichain_names
+    width = DAGWidth(dag, w_attr=w_attr)
+    return width.width, width.antichain()
 
 
 def create_small_seq_graph():
@@ -0,0 +1,342 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+
+"""
+Longest path and schedule labelling of a DAG using numpy.
+
+The DAG is compiled once into its topological levels, with its nodes
+numbered level by level, and CSR arrays holding the predecessors (and
+successors) of each node. Every node of a level only depends on nodes of
+earlier levels, so a whole level is computed at once with a few numpy
+operations. Levels with too few edges for numpy to pay off, such as those of
+long chains, are grouped into runs that are computed one node at a time over
+plain lists instead.
+"""
+import heapq
+
+import networkx as nx
+import numpy as np
+
+# Levels with fewer incoming edges than this are not vectorised
+_MIN_VECTOR_EDGES = 32
+
+
+class CriticalPath(object):
+    """
+    A DAG compiled for computing its longest path and the start/end time of
+    each of its nodes, with the same semantics as `DAGUtil.get_longest_path`
+    and `DAGUtil.label_schedule`.
+
+    Changing the weight of an edge (see `set_edge_weight`) only recomputes
+    the distances of the nodes that the change reaches.
+    """
+
+    def __init__(self, G, weight="weight", default_weight=1, topo_sort=None):
+        """
+        G:              the DAG (networkx DiGraph)
+        weight:         node and edge data key to use for weights
+        default_weight: the weight of edges without a `weight`; nodes
+                        without it weigh nothing
+        topo_sort:      a topological sort of G, computed if not given
+        """
+        self._G = G
+        if topo_sort is None:
+            topo_sort = nx.topological_sort(G)
+        topo_nodes = list(topo_sort)
+        n = len(topo_nodes)
+        topo_index = {v: i for i, v in enumerate(topo_nodes)}
+        node_weights = dict(G.nodes(data=weight, default=0))
+        node_weights = [node_weights[v] for v in topo_nodes]
+        src = []
+        dst = []
+        edge_weights = []
+        for u, v, w in G.edges(data=weight, default=default_weight):
+            src.append(topo_index[u])
+            dst.append(topo_index[v])
+            edge_weights.append(w)
+        src = np.array(src, dtype=np.int64)
+        dst = np.array(dst, dtype=np.int64)
+        ew = np.array(edge_weights) if edge_weights else np.zeros(0, int)
+        nw = np.array(node_weights) if node_weights else np.zeros(0, int)
+
+        # the level of each node is one more than that of its last predecessor
+        edge_order = np.lexsort((src, dst))
+        srcs = src[edge_order].tolist()
+        ptrs = np.searchsorted(dst[edge_order], np.arange(n + 1)).tolist()
+        topo_levels = [0] * n
+        for j in range(n):
+            level = 0
+            for k in range(ptrs[j], ptrs[j + 1]):
+                if topo_levels[srcs[k]] >= level:
+                    level = topo_levels[srcs[k]] + 1
+            topo_levels[j] = level
+
+        # number the nodes level by level, and by topological order within
+        topo_levels = np.array(topo_levels, dtype=np.int64)
+        order = np.argsort(topo_levels, kind="stable")
+        new_index = np.empty(n, dtype=np.int64)
+        new_index[order] = np.arange(n)
+        self._nodes = [topo_nodes[i] for i in order.tolist()]
+        self._index = {v: i for i, v in enumerate(self._nodes)}
+        self._topo_pos = order
+        level_ptr = np.searchsorted(
+            topo_levels[order], np.arange(topo_levels.max(initial=-1) + 2)
+        )
+
+        # predecessors, with their edges sorted by destination
+        src = new_index[src]
+        dst = new_index[dst]
+        edge_order = np.lexsort((src, dst))
+        self._src = src[edge_order]
+        self._dst = dst[edge_order]
+        self._pred_ptr = np.searchsorted(self._dst, np.arange(n + 1))
+        # successors, as positions of their edges in the predecessor arrays
+        self._succ_edges = np.argsort(self._src, kind="stable")
+        self._succ_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self._src, minlength=n), out=self._succ_ptr[1:])
+
+        dtype = np.result_type(nw, ew)
+        self._ew = ew[edge_order].astype(dtype)
+        self._nw = nw[order].astype(dtype)
+        # the length a path grows by through each edge, and the weight of
+        # sinks, which also count their own weight in the path leading to them
+        self._cost = self._ew + self._nw[self._src]
+        self._tail = np.where(self._succ_ptr[1:] == self._succ_ptr[:-1], self._nw, 0)
+
+        # Predecessors of equal distance are told apart by their label, as
+        # with max() over (distance, predecessor) tuples
+        labels = np.array(self._nodes)
+        if labels.ndim == 1 and labels.dtype.kind in "iuf":
+            self._by_rank = np.argsort(labels, kind="stable")
+        else:
+            try:
+                rank_order = sorted(range(n), key=self._nodes.__getitem__)
+            except TypeError:
+                rank_order = range(n)
+            self._by_rank = np.array(rank_order, dtype=np.int64)
+        self._rank = np.empty(n, dtype=np.int64)
+        self._rank[self._by_rank] = np.arange(n)
+
+        # Consecutive levels are grouped into runs of nodes computed together:
+        # each wide level is a run of its own, narrow ones are grouped
+        level_edges = np.diff(self._pred_ptr[level_ptr])[1:]
+        wide = level_edges >= _MIN_VECTOR_EDGES
+        run_starts = np.flatnonzero(wide | np.r_[True, wide[:-1]])
+        bounds = level_ptr[1:][run_starts].tolist() + [n]
+        self._runs = list(zip(bounds[:-1], bounds[1:], wide[run_starts].tolist()))
+
+        self._dist = None
+        self._pred = None
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def _relax(self, a, b):
+        """
+        Computes the distance and best predecessor of nodes a to b - 1, which
+        all have predecessors
+        """
+        ptr = self._pred_ptr
+        pa, pb = ptr[a], ptr[b]
+        src = self._src[pa:pb]
+        cost = self._cost[pa:pb]
+        starts = ptr[a:b] - pa
+        best = np.maximum.reduceat(self._dist[src] + cost, starts)
+        ties = np.where(
+            self._dist[src] + cost == np.repeat(best, np.diff(ptr[a : b + 1])),
+            self._rank[src],
+            -1,
+        )
+        bu = self._by_rank[np.maximum.reduceat(ties, starts)]
+        best += self._tail[a:b]
+        negative = best < 0
+        best[negative] = 0
+        bu[negative] = np.arange(a, b)[negative]
+        self._dist[a:b] = best
+        self._pred[a:b] = bu
+
+    def _relax_run(self, a, b):
+        """Like `_relax`, one node at a time"""
+        ptr = self._pred_ptr
+        pa, pb = ptr[a], ptr[b]
+        src = self._src[pa:pb]
+        srcs = src.tolist()
+        # the distance of predecessors before the run, final already
+        before = self._dist[src].tolist()
+        costs = self._cost[pa:pb].tolist()
+        ranks = self._rank[src].tolist()
+        bounds = (ptr[a : b + 1] - pa).tolist()
+        tails = self._tail[a:b].tolist()
+        dists = []
+        preds = []
+        for j in range(b - a):
+            best = None
+            for k in range(bounds[j], bounds[j + 1]):
+                u = srcs[k]
+                d = (dists[u - a] if u >= a else before[k]) + costs[k]
+                if best is None or d > best or (d == best and ranks[k] > bu_rank):
+                    best, bu, bu_rank = d, u, ranks[k]
+            best += tails[j]
+            if best < 0:
+                best, bu = 0, a + j
+            dists.append(best)
+            preds.append(bu)
+        self._dist[a:b] = dists
+        self._pred[a:b] = preds
+
+    def _forward(self):
+        n = len(self._nodes)
+        self._dist = np.zeros(n, dtype=self._cost.dtype)
+        self._pred = np.arange(n)
+        for a, b, wide in self._runs:
+            if wide:
+                self._relax(a, b)
+            else:
+                self._relax_run(a, b)
+
+    def set_edge_weight(self, u, v, weight):
+        """
+        Changes the weight of edge (u, v), updating the distances of the
+        nodes after it if they were already computed
+        """
+        i = self._index[u]
+        j = self._index[v]
+        pa, pb = self._pred_ptr[j], self._pred_ptr[j + 1]
+        k = pa + np.flatnonzero(self._src[pa:pb] == i)[0]
+        if self._ew[k] == weight:
+            return
+        if np.asarray(weight).dtype.kind == "f" and self._ew.dtype.kind != "f":
+            self._ew = self._ew.astype(np.float64)
+            self._nw = self._nw.astype(np.float64)
+            self._cost = self._cost.astype(np.float64)
+            self._tail = self._tail.astype(np.float64)
+            if self._dist is not None:
+                self._dist = self._dist.astype(np.float64)
+        self._ew[k] = weight
+        self._cost[k] = weight + self._nw[i]
+        if self._dist is None:
+            return
+        # nodes are numbered in topological order, so the changes reach each
+        # node after all of its predecessors have been updated. Only changes
+        # of distance affect the successors of a node.
+        queue = [j]
+        queued = {j}
+        while queue:
+            x = heapq.heappop(queue)
+            if not self._update(x):
+                continue
+            sa, sb = self._succ_ptr.item(x), self._succ_ptr.item(x + 1)
+            for y in self._dst[self._succ_edges[sa:sb]].tolist():
+                if y not in queued:
+                    queued.add(y)
+                    heapq.heappush(queue, y)
+
+    def _update(self, x):
+        """
+        Recomputes the distance and best predecessor of node x, which has
+        predecessors, returning whether its distance changed
+        """
+        src, cost, dist, rank = self._src, self._cost, self._dist, self._rank
+        best = None
+        for k in range(self._pred_ptr.item(x), self._pred_ptr.item(x + 1)):
+            u = src.item(k)
+            d = dist.item(u) + cost.item(k)
+            if best is None or d > best or (d == best and rank.item(u) > bu_rank):
+                best, bu, bu_rank = d, u, rank.item(u)
+        best += self._tail.item(x)
+        if best < 0:
+            best, bu = 0, x
+        changed = best != dist.item(x)
+        dist[x] = best
+        self._pred[x] = bu
+        return changed
+
+    @property
+    def length(self):
+        """The length of the longest path"""
+        return self.longest_path(show_path=False)[1]
+
+    def longest_path(self, show_path=True):
+        """
+        Returns a tuple with the longest path (list, None if not `show_path`)
+        and its length
+        """
+        if not self._nodes:
+            return ([] if show_path else None), 0
+        if self._dist is None:
+            self._forward()
+        dist, pred = self._dist, self._pred
+        ends = np.flatnonzero(dist == dist.max())
+        ranks = self._rank[pred[ends]]
+        ends = ends[ranks == ranks.max()]
+        v = int(ends[np.argmin(self._topo_pos[ends])])
+        lp = dist[v].item()
+        if not show_path:
+            return None, lp
+        path = [v]
+        while pred[v] != v:
+            v = int(pred[v])
+            path.append(v)
+        path.reverse()
+        return [self._nodes[i] for i in path], lp
+
+    def label_schedule(self):
+        """
+        Labels each node of the DAG with its start ("stt") and end ("edt")
+        time, each node starting as soon as all its predecessors have ended
+        and their edges have been traversed
+        """
+        n = len(self._nodes)
+        ptr, ew, nw = self._pred_ptr, self._ew, self._nw
+        stt = np.zeros(n, dtype=nw.dtype)
+        edt = nw.copy()
+        for a, b, wide in self._runs:
+            pa, pb = ptr[a], ptr[b]
+            src = self._src[pa:pb]
+            if wide:
+                ends = np.maximum.reduceat(edt[src] + ew[pa:pb], ptr[a:b] - pa)
+                stt[a:b] = np.maximum(ends, -1)
+                edt[a:b] = stt[a:b] + nw[a:b]
+                continue
+            srcs = src.tolist()
+            before = edt[src].tolist()
+            ews = ew[pa:pb].tolist()
+            nws = nw[a:b].tolist()
+            bounds = (ptr[a : b + 1] - pa).tolist()
+            stts = []
+            edts = []
+            for j in range(b - a):
+                ledt = -1
+                for k in range(bounds[j], bounds[j + 1]):
+                    u = srcs[k]
+                    pedt = (edts[u - a] if u >= a else before[k]) + ews[k]
+                    if pedt > ledt:
+                        ledt = pedt
+                stts.append(ledt)
+                edts.append(ledt + nws[j])
+            stt[a:b] = stts
+            edt[a:b] = edts
+        G = self._G
+        for v, s, e in zip(self._nodes, stt.tolist(), edt.tolist()):
+            gv = G.nodes[v]
+            gv["stt"] = s
+            gv["edt"] = e
@@ -0,0 +1,123 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+
+"""
+Particle Swarm Optimisation with whole-swarm evaluation
+
+The update rules and stopping criteria are those of pyswarm.pso (0.6), but the
+objective and the constraints of all particles are computed by a single call
+at each iteration, so callers can evaluate the swarm in parallel and skip
+positions they have seen before.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def pso(
+    evaluate,
+    lb,
+    ub,
+    swarmsize=100,
+    omega=0.5,
+    phip=0.5,
+    phig=0.5,
+    maxiter=100,
+    minstep=1e-8,
+    minfunc=1e-8,
+    seed=None,
+):
+    """
+    Minimises an objective over the box [lb, ub] with a swarm of particles
+
+    evaluate:   called with a (swarmsize, D) array with the position of each
+                particle, returns a tuple of two arrays with the objective
+                value of each particle and whether it satisfies the constraints
+    lb, ub:     lower and upper bounds of each of the D dimensions
+    swarmsize:  the number of particles
+    omega:      particle velocity scaling factor
+    phip:       scaling factor to search away from each particle's best position
+    phig:       scaling factor to search away from the swarm's best position
+    maxiter:    the maximum number of iterations
+    minstep:    the minimum step size of the swarm's best position
+    minfunc:    the minimum change of the swarm's best objective value
+    seed:       seed of the random number generator
+
+    Returns the swarm's best position and its objective value
+    """
+    lb = np.array(lb, dtype=float)
+    ub = np.array(ub, dtype=float)
+    if lb.shape != ub.shape or not np.all(ub > lb):
+        raise ValueError("Upper bounds must be greater than lower bounds")
+    rnd = np.random.RandomState(seed)
+    vhigh = np.abs(ub - lb)
+    vlow = -vhigh
+    S, D = swarmsize, len(lb)
+
+    # Initial positions and velocities
+    x = lb + rnd.rand(S, D) * (ub - lb)
+    p = np.zeros_like(x)
+    fp = np.full(S, np.inf)
+    fx, fs = evaluate(x)
+    i_update = np.logical_and(fx < fp, fs)
+    p[i_update] = x[i_update]
+    fp[i_update] = fx[i_update]
+    i_min = np.argmin(fp)
+    fg = fp[i_min]
+    g = p[i_min].copy() if fg < np.inf else x[0].copy()
+    v = vlow + rnd.rand(S, D) * (vhigh - vlow)
+
+    for _ in range(maxiter):
+        rp = rnd.uniform(size=(S, D))
+        rg = rnd.uniform(size=(S, D))
+        v = omega * v + phip * rp * (p - x) + phig * rg * (g - x)
+        x = np.clip(x + v, lb, ub)
+        fx, fs = evaluate(x)
+
+        # Update the best position of each particle and of the swarm
+        i_update = np.logical_and(fx < fp, fs)
+        p[i_update] = x[i_update]
+        fp[i_update] = fx[i_update]
+        i_min = np.argmin(fp)
+        if fp[i_min] < fg:
+            p_min = p[i_min].copy()
+            stepsize = np.sqrt(np.sum((g - p_min) ** 2))
+            if np.abs(fg - fp[i_min]) <= minfunc:
+                logger.info(
+                    "Stopping search: swarm best objective change less than %g",
+                    minfunc,
+                )
+                return p_min, fp[i_min]
+            if stepsize <= minstep:
+                logger.info(
+                    "Stopping search: swarm best position change less than %g",
+                    minstep,
+                )
+                return p_min, fp[i_min]
+            g = p_min
+            fg = fp[i_min]
+
+    logger.info("Stopping search: maximum iterations reached (%d)", maxiter)
+    return g, fg
@@ -72,6 +72,7 @@ from dlg.common.k8s_utils import check_k8s_env
 from dlg.dropmake.lg import GraphException
 from dlg.dropmake.pg_manager import PGManager
 from dlg.dropmake.scheduler import SchedulerException
+from dlg.dropmake.translation_cache import TranslationCache, cached
 from dlg.dropmake.web.translator_utils import (
     file_as_string,
     lg_repo_contents,
@@ -139,6 +140,7 @@ gen_pgt_sem = threading.Semaphore(1)
 global lg_dir
 global pgt_dir
 global pg_mgr
+translation_cache = None
 LG_SCHEMA = json.loads(file_as_string("lg.graph.schema", package="dlg.dropmake"))
 
 
@@ -290,7 +292,8 @@ def get_gantt_chart(
     ),
 ):
     """
-    Interface to retrieve a Gantt Chart matrix associated with a PGT
+    Interface to retrieve the Gantt Chart associated with a PGT, as the start
+    and end times and partitions of its drops, and their number at each time
     """
     try:
         ret = pg_mgr.get_gantt_chart(pgt_id)
@@ -330,7 +333,8 @@ def get_schedule_matrices(
     ),
 ):
     """
-    Interface to return all schedule matrices for a single pgt_id
+    Interface to return the schedules of all partitions for a single pgt_id,
+    as the start and end times and lanes of their drops
     """
     try:
         ret = pg_mgr.get_schedule_matrices(pgt_id)
@@ -795,7 +799,10 @@ class AlgoParams(BaseModel):
     deadline: Union[int, None] = None
     topk: Union[int, None] = None
     swarm_size: Union[int, None] = None
+    processes: Union[int, None] = None
     max_mem: Union[int, None] = None
+    nodes: Union[str, None] = None
+    bandwidth: Union[float, None] = None
 
 
 class KnownAlgorithms(str, Enum):
@@ -809,6 +816,7 @@ class KnownAlgorithms(str, Enum):
     ALGO_MY_SARKAR = ("mysarkar",)
     ALGO_MIN_NUM_PARTS = ("min_num_parts",)
     ALGO_PSO = "pso"
+    ALGO_HEFT = "heft"
 
 
 def load_graph(graph_content: str, graph_name: str):
@@ -875,6 +883,38 @@ def lg_fill(
     return JSONResponse(output_graph)
 
 
+def _unroll(lg_graph, oid_prefix, zero_run, default_app):
+    # Without a prefix the OIDs are made unique with the current time, so
+    # results can only be reused when a prefix is given
+    return cached(
+        translation_cache if oid_prefix else None,
+        lambda: dlg.dropmake.pg_generator.unroll(
+            lg_graph, oid_prefix, zero_run, default_app
+        ),
+        "unroll",
+        lg_graph,
+        oid_prefix,
+        zero_run,
+        default_app,
+    )
+
+
+def _partition(pgt, algorithm, num_partitions, num_islands, algo_params, reuse=True):
+    algo_params = algo_params.dict()
+    return cached(
+        translation_cache if reuse else None,
+        lambda: dlg.dropmake.pg_generator.partition(
+            pgt, algorithm, num_partitions, num_islands, algo_params
+        ),
+        "partition",
+        pgt,
+        algorithm,
+        num_partitions,
+        num_islands,
+        algo_params,
+    )
+
+
 @app.post("/unroll", response_class=JSONResponse, tags=["Updated"])
 def lg_unroll(
     lg_name: str = Form(
@@ -903,7 +943,7 @@ def lg_unroll(
     One of lg_name or lg_content, but not both, needs to be specified.
     """
     lg_graph = load_graph(lg_content, lg_name)
-    pgt = dlg.dropmake.pg_generator.unroll(lg_graph, oid_prefix, zero_run, default_app)
+    pgt = _unroll(lg_graph, oid_prefix, zero_run, default_app)
     pgt = init_pgt_unroll_repro_data(pgt)
     return JSONResponse(pgt)
 
@@ -942,9 +982,7 @@ def pgt_partition(
     reprodata = {}
     if not graph[-1].get("oid"):
         reprodata = graph.pop()
-    pgt = dlg.dropmake.pg_generator.partition(
-        graph, algorithm, num_partitions, num_islands, algo_params.dict()
-    )
+    pgt = _partition(graph, algorithm, num_partitions, num_islands, algo_params)
     pgt.append(reprodata)
     pgt = init_pgt_partition_repro_data(pgt)
     return JSONResponse(pgt)
@@ -992,11 +1030,16 @@ def lg_unroll_and_partition(
     One of lg_name and lg_content, but not both, must be specified.
     """
     lg_graph = load_graph(lg_content, lg_name)
-    pgt = dlg.dropmake.pg_generator.unroll(lg_graph, oid_prefix, zero_run, default_app)
+    pgt = _unroll(lg_graph, oid_prefix, zero_run, default_app)
     pgt = init_pgt_unroll_repro_data(pgt)
     reprodata = pgt.pop()
-    pgt = dlg.dropmake.pg_generator.partition(
-        pgt, algorithm, num_partitions, num_islands, algo_params.dict()
+    pgt = _partition(
+        pgt,
+        algorithm,
+        num_partitions,
+        num_islands,
+        algo_params,
+        reuse=bool(oid_prefix),
     )
     pgt.append(reprodata)
     pgt = init_pgt_partition_repro_data(pgt)
@@ -1056,6 +1099,17 @@ def pgt_map(
     return JSONResponse(pg)
 
 
+@app.get("/translation_cache", response_class=JSONResponse, tags=["Updated"])
+def get_translation_cache_stats():
+    """
+    Returns the hit, miss and eviction counts of the translation cache, and how
+    many results it holds and their total size in bytes.
+    """
+    if translation_cache is None:
+        raise HTTPException(status_code=404, detail="Translation cache is disabled")
+    return JSONResponse(translation_cache.stats)
+
+
 @app.get("/api/submission_method")
 def get_submission_method(
     dlg_mgr_url: str = Query(
@@ -1131,6 +1185,16 @@ def run(_, args):
         default="/tmp",
         help="physical graph template path (output)",
     )
+    parser.add_argument(
+        "-c",
+        "--cache-size",
+        action="store",
+        type=int,
+        dest="cache_size",
+        default=1024,
+        help="Maximum size in MB of the cache of translation results kept in "
+        "the pgt directory (1024 by default, 0 disables it)",
+    )
     parser.add_argument(
         "-H",
         "--host",
@@ -1202,10 +1266,17 @@ def run(_, args):
     global lg_dir
     global pgt_dir
     global pg_mgr
+    global translation_cache
 
     lg_dir = options.lg_path
     pgt_dir = options.pgt_path
     pg_mgr = PGManager(pgt_dir)
+    if options.cache_size > 0:
+        translation_cache = TranslationCache(
+            os.path.join(pgt_dir, ".translation_cache"),
+            options.cache_size * 1024**2,
+            salt=dlg.version.version,
+        )
 
     def handler(*_args):
         raise KeyboardInterrupt
@@ -26,7 +26,10 @@ ALGO_PARAMS = [
     ("deadline", int),
     ("topk", int),
     ("swarm_size", int),
+    ("processes", int),
     ("max_mem", int),
+    ("nodes", str),
+    ("bandwidth", float),
 ]  # max_mem is only relevant for the old editor, not used in EAGLE
 
 
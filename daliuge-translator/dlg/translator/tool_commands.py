@@ -72,7 +72,10 @@ _param_types = {
     "deadline": int,
     "topk": int,
     "swarm_size": int,
+    "processes": int,
     "max_mem": int,
+    "nodes": json.loads,
+    "bandwidth": float,
 }
 
 
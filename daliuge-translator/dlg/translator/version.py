@@ -0,0 +1,9 @@
+# THIS FILE IS GENERATED BY SETUP.PY
+# DO NOT MODIFY BY HAND
+version = '4.7.2'
+git_version = 'e24a72d96d27e3a9f44299b6d2df76cec2e365b7'
+full_version = '4.7.2'
+is_release = True
+
+if not is_release:
+    version = full_version
\ No newline at end of file
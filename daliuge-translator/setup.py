@@ -116,7 +116,6 @@ install_requires = [
     "numpy",
     "parameterized",
     "psutil",
-    "pyswarm",
     "python-multipart",
     # "ruamel.yaml.clib<=0.2.2",
     "uvicorn==0.18",
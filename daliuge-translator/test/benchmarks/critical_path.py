@@ -0,0 +1,85 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures the time taken to compute the longest path of
+the DAGs of physical graph templates of an increasing number of drops, and to
+update it after zeroing the weight of their heaviest edges one at a time, as
+the MySarkar algorithm does.
+"""
+
+import sys
+import time
+from optparse import OptionParser
+
+from dlg.dropmake.scheduler import DAGUtil
+from dlg.dropmake.utils.critical_path import CriticalPath
+
+from mysarkar_partition import random_pgt
+
+
+def measure(drops, edges):
+    """
+    Returns the time it takes to compute the longest path of a random graph of
+    `drops` drops, and the average time it takes to update it after zeroing
+    each of its `edges` heaviest edges
+    """
+    G = DAGUtil.build_dag_from_drops(random_pgt(drops // 2))
+    start = time.time()
+    critical_path = CriticalPath(G)
+    critical_path.length
+    duration = time.time() - start
+    heaviest = sorted(G.edges(data="weight"), key=lambda e: -e[2])[:edges]
+    start = time.time()
+    for u, v, _ in heaviest:
+        critical_path.set_edge_weight(u, v, 0)
+        critical_path.length
+    return duration, (time.time() - start) / len(heaviest)
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--drops",
+        action="store",
+        type="int",
+        dest="drops",
+        help="Maximum number of drops of the graphs",
+        default=1000000,
+    )
+    parser.add_option(
+        "-e",
+        "--edges",
+        action="store",
+        type="int",
+        dest="edges",
+        help="Number of edges zeroed in each graph",
+        default=100,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    print("drops,longest path [s],update [ms]")
+    drops = 10000
+    while drops <= options.drops:
+        duration, update = measure(drops, options.edges)
+        print("%d,%.3f,%.2f" % (drops, duration, update * 1000))
+        drops *= 10
@@ -0,0 +1,89 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures the wall time, peak memory and JSON size of the
+gantt chart and partition schedules served by the translator for physical
+graph templates of an increasing number of drops. Each graph is handled in a
+fresh process so its peak RSS can be told apart.
+"""
+
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+from dlg.dropmake.pg_manager import PGManager
+from dlg.dropmake.pgtp import MySarkarPGTP
+
+from mysarkar_partition import random_pgt
+
+
+def measure(drops, max_dop):
+    """
+    Partitions a random graph of `drops` drops, returning the time it takes to
+    serialise its gantt chart and schedules, their size in bytes and the peak
+    RSS increase of the process in MB
+    """
+    pgt = MySarkarPGTP(random_pgt(drops // 2), max_dop=max_dop)
+    pgt.to_gojs_json(visual=False)
+    pg_mgr = PGManager(tempfile.mkdtemp())
+    pg_mgr._pgt_dict["pgt"] = pgt
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    size = len(pg_mgr.get_gantt_chart("pgt"))
+    size += len(pg_mgr.get_schedule_matrices("pgt"))
+    duration = time.time() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return duration, size, (peak - rss) / 1024.0
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--drops",
+        action="store",
+        type="int",
+        dest="drops",
+        help="Maximum number of drops of the graphs",
+        default=100000,
+    )
+    parser.add_option(
+        "-m",
+        "--max_dop",
+        action="store",
+        type="int",
+        dest="max_dop",
+        help="Maximum degree of parallelism of each partition",
+        default=8,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    print("drops,gantt and schedules [s],JSON [kB],RSS increase [MB]")
+    drops = 1000
+    while drops <= options.drops:
+        with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+            duration, size, rss = pool.apply(measure, (drops, options.max_dop))
+        print("%d,%.3f,%.1f,%.1f" % (drops, duration, size / 1024.0, rss))
+        drops *= 10
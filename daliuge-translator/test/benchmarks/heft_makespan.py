@@ -0,0 +1,154 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that compares the makespan of the placements produced by the
+HEFT, METIS and MySarkar partitioning algorithms on a set of heterogeneous
+nodes. All placements are evaluated with the same HEFT cost model, so the
+numbers are comparable even though METIS and MySarkar ignore node speeds.
+Graphs are either random physical graph templates of increasing size, or the
+logical graphs given as arguments.
+"""
+
+import copy
+import json
+import random
+import sys
+import time
+from optparse import OptionParser
+
+from dlg.dropmake import pg_generator
+from dlg.dropmake.scheduler import HEFTScheduler
+
+
+def random_pgt(n_apps, seed=0):
+    """
+    A physical graph template of n_apps applications, each producing one Data
+    drop consumed by up to two of the applications that follow
+    """
+    rnd = random.Random(seed)
+    pgt = []
+    for i in range(n_apps):
+        pgt.append(
+            {
+                "oid": f"A{i}",
+                "name": f"A{i}",
+                "categoryType": "Application",
+                "weight": rnd.randint(1, 10),
+                "num_cpus": 1,
+                "outputs": [f"D{i}"],
+            }
+        )
+        pgt.append(
+            {
+                "oid": f"D{i}",
+                "name": f"D{i}",
+                "categoryType": "Data",
+                "weight": rnd.randint(1, 10),
+                "consumers": [],
+            }
+        )
+    for i in range(1, n_apps):
+        for j in rnd.sample(range(i), min(i, 2)):
+            pgt[2 * j + 1]["consumers"].append(f"A{i}")
+    return pgt
+
+
+def measure(pgt, algo, nodes, bandwidth):
+    """
+    Partitions `pgt` into one partition per node with `algo`, returning the
+    time it took and the makespan of the resulting placement
+    """
+    max_cpu = max(node.get("cores", 1) for node in nodes)
+    start = time.time()
+    partitioned = pg_generator.partition(
+        copy.deepcopy(pgt),
+        algo,
+        num_partitions=len(nodes),
+        nodes=nodes,
+        bandwidth=bandwidth,
+        max_cpu=max_cpu,
+        show_gojs=True,
+    )
+    duration = time.time() - start
+    if partitioned._num_parts_done > len(nodes):
+        # MySarkar may produce more partitions than nodes, merge them balancing
+        # their number of cores
+        partitioned.merge_partitions(len(nodes), island_type=1)
+    pg_spec = partitioned.to_pg_spec(
+        [], ret_str=False, tpl_nodes_len=len(nodes) + 1
+    )
+    node_of = {
+        drop["oid"]: int(drop["node"][1:]) % len(nodes) for drop in pg_spec
+    }
+
+    # DAG nodes are numbered after the position of their drop in the template
+    scheduler = HEFTScheduler(copy.deepcopy(pgt), nodes, bandwidth=bandwidth)
+    assignment = {i + 1: node_of[drop["oid"]] for i, drop in enumerate(pgt)}
+    return duration, scheduler.evaluate(assignment)
+
+
+if __name__ == "__main__":
+    parser = OptionParser(usage="%prog [options] [logical_graph.graph ...]")
+    parser.add_option(
+        "-n",
+        "--apps",
+        action="store",
+        type="int",
+        dest="apps",
+        help="Maximum number of applications of the random graphs",
+        default=1000,
+    )
+    parser.add_option(
+        "-N",
+        "--nodes",
+        action="store",
+        dest="nodes",
+        help="JSON list of nodes, each with cores, speed and memory",
+        default='[{"cores": 8, "speed": 4}, {"cores": 4}, {"cores": 4}]',
+    )
+    parser.add_option(
+        "-b",
+        "--bandwidth",
+        action="store",
+        type="float",
+        dest="bandwidth",
+        help="Data volume sent between two nodes per unit of time",
+        default=10,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+    nodes = json.loads(options.nodes)
+
+    graphs = []
+    for fname in args[1:]:
+        with open(fname) as f:
+            graphs.append((fname, pg_generator.unroll(json.load(f))))
+    if not graphs:
+        apps = 10
+        while apps <= options.apps:
+            graphs.append(("random-%d" % apps, random_pgt(apps)))
+            apps *= 10
+
+    print("graph,drops,algorithm,partitioning [s],makespan")
+    for name, pgt in graphs:
+        for algo in ("heft", "metis", "mysarkar"):
+            duration, makespan = measure(pgt, algo, nodes, options.bandwidth)
+            print("%s,%d,%s,%.3f,%.1f" % (name, len(pgt), algo, duration, makespan))
@@ -0,0 +1,83 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures the wall time and peak memory used by the METIS
+algorithm to partition physical graph templates of an increasing number of
+drops, including building its input from the drop list. Each graph is
+partitioned in a fresh process so its peak RSS can be told apart.
+"""
+
+import multiprocessing
+import resource
+import sys
+import time
+from optparse import OptionParser
+
+from dlg.dropmake.pgtp import MetisPGTP
+
+from mysarkar_partition import random_pgt
+
+
+def measure(drops, num_partitions):
+    """
+    Partitions a random graph of `drops` drops, returning the time it took
+    and the peak RSS of the process in MB
+    """
+    pgt = random_pgt(drops // 2)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    pgtp = MetisPGTP(pgt, num_partitions)
+    pgtp.to_gojs_json(visual=False)
+    duration = time.time() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return duration, (peak - rss) / 1024.0
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--drops",
+        action="store",
+        type="int",
+        dest="drops",
+        help="Maximum number of drops of the graphs",
+        default=1000000,
+    )
+    parser.add_option(
+        "-p",
+        "--partitions",
+        action="store",
+        type="int",
+        dest="partitions",
+        help="Number of partitions",
+        default=16,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    print("drops,partitioning [s],us/drop,RSS increase [MB]")
+    drops = 10000
+    while drops <= options.drops:
+        with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+            duration, rss = pool.apply(measure, (drops, options.partitions))
+        print("%d,%.3f,%.1f,%.1f" % (drops, duration, duration * 1e6 / drops, rss))
+        drops *= 10
@@ -0,0 +1,107 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures how long the MySarkar algorithm takes to
+partition physical graph templates of an increasing number of drops. The
+graphs are random chains of applications, each producing one Data drop
+consumed by up to two of the applications that follow.
+"""
+
+import random
+import sys
+import time
+from optparse import OptionParser
+
+from dlg.dropmake.scheduler import MySarkarScheduler
+
+
+def random_pgt(n_apps, seed=0):
+    rnd = random.Random(seed)
+    pgt = []
+    for i in range(n_apps):
+        pgt.append(
+            {
+                "oid": f"A{i}",
+                "name": f"A{i}",
+                "categoryType": "Application",
+                "weight": rnd.randint(1, 10),
+                "num_cpus": rnd.randint(1, 2),
+                "outputs": [f"D{i}"],
+            }
+        )
+        pgt.append(
+            {
+                "oid": f"D{i}",
+                "name": f"D{i}",
+                "categoryType": "Data",
+                "weight": rnd.randint(1, 10),
+                "consumers": [],
+            }
+        )
+    for i in range(1, n_apps):
+        # mostly local dependencies, as produced by scatters and gathers
+        for j in rnd.sample(range(max(0, i - 20), i), min(i, 2)):
+            pgt[2 * j + 1]["consumers"].append(f"A{i}")
+    return pgt
+
+
+def measure(drops, max_dop):
+    """
+    Partitions a random graph of `drops` drops, returning the time it took and
+    the number of partitions
+    """
+    scheduler = MySarkarScheduler(random_pgt(drops // 2), max_dop=max_dop)
+    start = time.time()
+    _, _, _, parts = scheduler.partition_dag()
+    return time.time() - start, len(parts)
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--drops",
+        action="store",
+        type="int",
+        dest="drops",
+        help="Maximum number of drops of the graphs",
+        default=1000000,
+    )
+    parser.add_option(
+        "-d",
+        "--max-dop",
+        action="store",
+        type="int",
+        dest="max_dop",
+        help="Maximum degree of parallelism of each partition",
+        default=8,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    print("drops,partitions,partitioning [s],us/drop")
+    drops = 10000
+    while drops <= options.drops:
+        duration, num_parts = measure(drops, options.max_dop)
+        print(
+            "%d,%d,%.3f,%.1f" % (drops, num_parts, duration, duration * 1e6 / drops)
+        )
+        drops *= 10
@@ -0,0 +1,143 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures how long the PSO scheduler takes to partition a
+random physical graph template when the particles are evaluated serially or
+by an increasing number of processes. The swarm is seeded, so every run finds
+the same solution, which is printed along with the time.
+"""
+
+import copy
+import multiprocessing
+import random
+import sys
+import time
+from optparse import OptionParser
+
+from dlg.dropmake.scheduler import PSOScheduler
+
+
+def random_pgt(n_apps, seed=0):
+    """
+    A physical graph template of n_apps applications, each producing one Data
+    drop consumed by up to two of the applications that follow
+    """
+    rnd = random.Random(seed)
+    pgt = []
+    for i in range(n_apps):
+        pgt.append(
+            {
+                "oid": f"A{i}",
+                "name": f"A{i}",
+                "categoryType": "Application",
+                "weight": rnd.randint(1, 10),
+                "num_cpus": rnd.randint(1, 2),
+                "outputs": [f"D{i}"],
+            }
+        )
+        pgt.append(
+            {
+                "oid": f"D{i}",
+                "name": f"D{i}",
+                "categoryType": "Data",
+                "weight": rnd.randint(1, 10),
+                "consumers": [],
+            }
+        )
+    for i in range(1, n_apps):
+        for j in rnd.sample(range(i), min(i, 2)):
+            pgt[2 * j + 1]["consumers"].append(f"A{i}")
+    return pgt
+
+
+def measure(pgt, processes, deadline, swarm_size):
+    """
+    Partitions `pgt` with the PSO scheduler, returning the time it took, the
+    number of partitions and critical path of the solution, and the number
+    of particle positions that were evaluated
+    """
+    scheduler = PSOScheduler(
+        copy.deepcopy(pgt),
+        max_dop={"num_cpus": 4},
+        deadline=deadline,
+        swarm_size=swarm_size,
+        processes=processes,
+        seed=0,
+    )
+    start = time.time()
+    num_parts, lpl, _, _ = scheduler.partition_dag()
+    return time.time() - start, num_parts, lpl, scheduler._call_counts
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--apps",
+        action="store",
+        type="int",
+        dest="apps",
+        help="Number of applications of the graph",
+        default=200,
+    )
+    parser.add_option(
+        "-s",
+        "--swarm-size",
+        action="store",
+        type="int",
+        dest="swarm_size",
+        help="Number of particles",
+        default=40,
+    )
+    parser.add_option(
+        "-d",
+        "--deadline",
+        action="store",
+        type="int",
+        dest="deadline",
+        help="Deadline of the graph, none by default",
+        default=None,
+    )
+    parser.add_option(
+        "-p",
+        "--processes",
+        action="store",
+        type="int",
+        dest="processes",
+        help="Maximum number of processes evaluating the swarm",
+        default=multiprocessing.cpu_count(),
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    pgt = random_pgt(options.apps)
+    print("processes,time [s],partitions,critical path,evaluations")
+    processes = 1
+    while True:
+        duration, num_parts, lpl, evaluations = measure(
+            pgt, processes, options.deadline, options.swarm_size
+        )
+        print(
+            "%d,%.2f,%d,%d,%d" % (processes, duration, num_parts, lpl, evaluations)
+        )
+        if processes >= options.processes:
+            break
+        processes = min(processes * 2, options.processes)
@@ -0,0 +1,80 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+"""
+A small module that measures how long it takes to link an increasing number
+of scattered DROPs into a single gathering DROP, the way LG.unroll_to_tpl does
+for each link of a logical graph, and to serialise the result. Linking cost
+should grow linearly with the fan-in.
+"""
+
+import json
+import sys
+import time
+from optparse import OptionParser
+
+from dlg.common import dropdict
+
+
+def measure(fanin):
+    """
+    Links `fanin` data DROPs into a single application DROP, returning the
+    time it took to link them and to serialise the application DROP
+    """
+    app = dropdict({"oid": "gather", "categoryType": "Application"})
+    data = [
+        dropdict({"oid": "data_%d" % i, "categoryType": "Data"})
+        for i in range(fanin)
+    ]
+    start = time.time()
+    for drop in data:
+        drop.addConsumer(app, name="in")
+        app.addInput(drop, name="in")
+    linking = time.time() - start
+
+    start = time.time()
+    json.dumps(app)
+    serialising = time.time() - start
+    return linking, serialising
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option(
+        "-n",
+        "--fanin",
+        action="store",
+        type="int",
+        dest="fanin",
+        help="Maximum number of DROPs to gather",
+        default=1000000,
+    )
+    (options, args) = parser.parse_args(sys.argv)
+
+    print("fan-in,linking [s],serialising [s],us/link")
+    fanin = 10000
+    while fanin <= options.fanin:
+        linking, serialising = measure(fanin)
+        print(
+            "%d,%.3f,%.3f,%.3f"
+            % (fanin, linking, serialising, linking * 1e6 / fanin)
+        )
+        fanin *= 10
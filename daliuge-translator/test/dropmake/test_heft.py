@@ -0,0 +1,122 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+import collections
+import random
+import unittest
+
+from dlg.dropmake import pg_generator
+from dlg.dropmake.scheduler import HEFTScheduler
+
+
+def random_pgt(n_apps, seed=0):
+    """
+    A physical graph template of n_apps applications, each producing one Data
+    drop consumed by up to two of the applications that follow
+    """
+    rnd = random.Random(seed)
+    pgt = []
+    for i in range(n_apps):
+        pgt.append(
+            {
+                "oid": f"A{i}",
+                "name": f"A{i}",
+                "categoryType": "Application",
+                "weight": rnd.randint(1, 10),
+                "num_cpus": 1,
+                "outputs": [f"D{i}"],
+            }
+        )
+        pgt.append(
+            {
+                "oid": f"D{i}",
+                "name": f"D{i}",
+                "categoryType": "Data",
+                "weight": rnd.randint(1, 10),
+                "consumers": [],
+            }
+        )
+    for i in range(1, n_apps):
+        for j in rnd.sample(range(i), min(i, 2)):
+            pgt[2 * j + 1]["consumers"].append(f"A{i}")
+    return pgt
+
+
+class TestHEFT(unittest.TestCase):
+    nodes = [
+        {"cores": 4, "speed": 4},
+        {"cores": 2, "speed": 1},
+        {"cores": 2, "speed": 1},
+    ]
+
+    def _apps_per_node(self, pg_spec):
+        return collections.Counter(
+            drop["node"] for drop in pg_spec if drop["categoryType"] == "Application"
+        )
+
+    def test_heterogeneous_nodes(self):
+        pgt = pg_generator.partition(
+            random_pgt(100), "heft", nodes=self.nodes, show_gojs=True
+        )
+        self.assertEqual(len(self.nodes), pgt.result()["num_parts"])
+        self.assertGreater(pgt.result()["makespan"], 0)
+
+        pg_spec = pgt.to_pg_spec([], ret_str=False, tpl_nodes_len=len(self.nodes) + 1)
+        apps = self._apps_per_node(pg_spec)
+        self.assertEqual(100, sum(apps.values()))
+        self.assertLessEqual(set(apps), {"#0", "#1", "#2"})
+        # The fast node gets the most work
+        self.assertEqual("#0", apps.most_common(1)[0][0])
+
+    def test_nodes_as_json(self):
+        pgt = pg_generator.partition(
+            random_pgt(20), "heft", nodes='[{"cores": 2}, {"cores": 2}]', show_gojs=True
+        )
+        self.assertEqual(2, pgt.result()["num_parts"])
+
+    def test_evaluate(self):
+        scheduler = HEFTScheduler(random_pgt(100), self.nodes)
+        _, _, _, parts = scheduler.partition_dag()
+        self.assertEqual(len(self.nodes), len(parts))
+
+        # HEFT does at least as well as putting everything in one node
+        dag = scheduler._dag
+        for j in range(len(self.nodes)):
+            single = scheduler.evaluate({n: j for n in dag.nodes})
+            self.assertLessEqual(scheduler.makespan, single)
+
+        # Placing HEFT's own choices gives back its makespan
+        placement = {n: dag.nodes[n]["gid"] - parts[0].partition_id for n in dag}
+        self.assertEqual(scheduler.makespan, scheduler.evaluate(placement))
+
+    def test_num_cpus(self):
+        pgt = random_pgt(30)
+        for drop in pgt:
+            if drop["categoryType"] == "Application":
+                drop["num_cpus"] = 4
+        scheduler = HEFTScheduler(pgt, self.nodes)
+        _, placement, times = scheduler._schedule()
+        # Only the first node has enough cores, and can run a single app at once
+        apps = [n for n in placement if scheduler._is_app(n)]
+        self.assertEqual({0}, {placement[n] for n in apps})
+        intervals = sorted(times[n] for n in apps)
+        for (_, end), (start, _) in zip(intervals, intervals[1:]):
+            self.assertLessEqual(end, start)
@@ -258,6 +258,42 @@ class TestPGPartition(unittest.TestCase):
             self.assertEqual(2, pgtp.result()['num_islands'],
                              f"Incorrect number of islands in PG spec for: {lg_name}")
 
+    def test_metis_pgtp_partition_input(self):
+        """
+        The METIS input is built as CSR arrays indexed by drop position, and
+        the partition of each drop is mapped back to its GOJS node
+        """
+        drop_list = [
+            {"oid": "A", "categoryType": "Application", "weight": 3,
+             "outputs": ["X"]},
+            {"oid": "X", "categoryType": "Data", "weight": 4,
+             "consumers": ["C"]},
+            {"oid": "B", "categoryType": "Application", "weight": 2,
+             "outputs": ["Y"]},
+            {"oid": "C", "categoryType": "Application", "weight": 1,
+             "inputs": ["X", "Y"]},
+            {"oid": "Y", "categoryType": "Data", "weight": 0,
+             "producers": ["B"], "consumers": ["C"]},
+        ]
+        for drop in drop_list:
+            drop["name"] = drop["oid"]
+        pgtp = MetisPGTP(drop_list, 2, merge_parts=True)
+        csr = {k: v.tolist() for k, v in pgtp._csr.items()}
+        self.assertEqual([0, 1, 3, 4, 6, 8], csr["xadj"])
+        self.assertEqual([1, 0, 3, 4, 1, 4, 2, 3], csr["adjncy"])
+        self.assertEqual([4, 4, 4, 1, 4, 1, 1, 1], csr["adjwgt"])
+        self.assertEqual([3, 1, 2, 1, 1], csr["vwgt"])
+        self.assertEqual([1, 4, 1, 1, 0], csr["vsize"])
+
+        jsobj = pgtp.to_gojs_json(string_rep=False, visual=True)
+        start_k = len(drop_list) + 1
+        for node in jsobj["nodeDataArray"]:
+            if not node.get("isGroup"):
+                gid = pgtp._oid_gid_map[node["oid"]]
+                self.assertEqual(gid + start_k, node["group"])
+        pgtp.to_pg_spec(["10.128.0.11", "10.128.0.12"])
+        self.assertEqual(1, len(set(pgtp._oid_gid_map.values())))
+
     def test_mysarkar_pgtp(self):
         """
         Confirm that basic Sarkar paritioning has not regressed
@@ -19,20 +19,28 @@
 #    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
 #    MA 02111-1307  USA
 
+import concurrent.futures
 import os
+import random
 import unittest
+from unittest import mock
 
+import networkx as nx
 import pkg_resources
 import psutil
 from dlg.dropmake.lg import LG
 from dlg.dropmake.scheduler import (
     Scheduler,
+    Schedule,
     MySarkarScheduler,
     DAGUtil,
     Partition,
     MinNumPartsScheduler,
     PSOScheduler,
+    KFamilyPartition,
 )
+from dlg.dropmake.utils.antichains import DAGWidth, get_max_antichain
+from dlg.dropmake.utils.critical_path import CriticalPath
 
 from dlg.dropmake.path_utils import get_lg_fpath
 
@@ -47,6 +55,101 @@ else:
         skip_long_tests = True
 
 
+def _random_dag(n, p, seed):
+    rnd = random.Random(seed)
+    G = nx.DiGraph()
+    for i in range(n):
+        G.add_node(i, weight=rnd.choice([0, 1, 2, 5]))
+    for i in range(n):
+        for j in range(i + 1, n):
+            if rnd.random() < p:
+                G.add_edge(i, j)
+    return G
+
+
+def _brute_force_width(G, weight=None):
+    return max(
+        sum(G.nodes[n][weight] if weight else 1 for n in antichain)
+        for antichain in nx.antichains(G)
+    )
+
+
+class TestMaxDoP(unittest.TestCase):
+    def test_against_brute_force(self):
+        for seed in range(100):
+            G = _random_dag(seed % 10 + 1, 0.3, seed)
+            self.assertEqual(_brute_force_width(G), DAGUtil.get_max_dop(G))
+            self.assertEqual(
+                _brute_force_width(G, "weight"), DAGUtil.get_max_width(G)
+            )
+            antichain = get_max_antichain(G, "weight")
+            self.assertEqual(
+                _brute_force_width(G, "weight"),
+                sum(G.nodes[n]["weight"] for n in antichain),
+            )
+            for n in antichain:
+                self.assertFalse(nx.descendants(G, n) & set(antichain))
+
+    def test_wide_scatter(self):
+        G = nx.DiGraph()
+        for i in range(1, 10001):
+            G.add_edge(0, i)
+            G.add_edge(i, 10001)
+        self.assertEqual(10000, DAGUtil.get_max_dop(G))
+        self.assertEqual(1, DAGUtil.get_max_dop(nx.path_graph(10000, nx.DiGraph)))
+
+    def test_incremental(self):
+        for seed in range(50):
+            G = _random_dag(10, 0.3, seed)
+            edges = list(G.edges())
+            random.Random(seed).shuffle(edges)
+            width = DAGWidth()
+            H = nx.DiGraph()
+            for n in G:
+                width.add_node(n)
+                H.add_node(n)
+            for u, v in edges:
+                width.add_edge(u, v)
+                H.add_edge(u, v)
+                self.assertEqual(_brute_force_width(H), width.width)
+
+    def test_merge(self):
+        for seed in range(50):
+            G = _random_dag(10, 0.3, seed)
+            left = DAGWidth(G.subgraph(range(5)), w_attr="weight")
+            right = DAGWidth(G.subgraph(range(5, 10)), w_attr="weight")
+            merged = left.copy()
+            merged.update(right)
+            for u, v in G.edges():
+                if u < 5 <= v:
+                    merged.add_edge(u, v)
+            self.assertEqual(_brute_force_width(G, "weight"), merged.width)
+            # the merged partitions are left untouched
+            self.assertEqual(
+                _brute_force_width(G.subgraph(range(5)), "weight"), left.width
+            )
+
+    def test_kfamily_partition_merge(self):
+        G = nx.DiGraph()
+        G.add_edges_from([(1, 2), (1, 3), (4, 5)])
+        for n in G:
+            G.nodes[n].update(weight=1, num_cpus=1)
+        parts = []
+        for n in G:
+            part = KFamilyPartition(n, 2, global_dag=G)
+            part.add_node(n)
+            parts.append(part)
+        p1, p2, p3, p4, p5 = parts
+        self.assertTrue(p1.can_merge(p2, 1, 2))
+        p1.merge(p2, 1, 2)
+        self.assertTrue(p1.can_merge(p3, 1, 3))
+        p1.merge(p3, 1, 3)
+        self.assertEqual(2, p1._max_dop["num_cpus"])
+        # {2, 3, 4} would be an antichain
+        self.assertFalse(p1.can_merge(p4, None, None))
+        self.assertTrue(p4.can_merge(p5, 4, 5))
+
+
 class TestScheduler(unittest.TestCase):
     def test_incremental_antichain(self):
         part = Partition(100, 8)
@@ -65,6 +168,68 @@ class TestScheduler(unittest.TestCase):
         r = DAGUtil.get_max_dop(part._dag)
         assert l == r, "l = {0}, r = {1}".format(l, r)
 
+    def test_to_csr(self):
+        # repeated edges are summed up, self-loops dropped
+        xadj, adjncy, adjwgt = DAGUtil.to_csr(
+            4, [0, 2, 1, 3], [1, 0, 0, 3], [2, 3, 5, 7]
+        )
+        self.assertEqual([0, 2, 3, 4, 4], xadj.tolist())
+        self.assertEqual([1, 2, 0, 0], adjncy.tolist())
+        self.assertEqual([7, 3, 7, 3], adjwgt.tolist())
+
+    def test_critical_path(self):
+        G = nx.DiGraph()
+        G.add_nodes_from([(1, {"weight": 2}), (2, {"weight": 3}), (3, {"weight": 1})])
+        G.add_node(4, weight=4)
+        G.add_edges_from([(1, 2, {"weight": 5}), (1, 3, {"weight": 1})])
+        G.add_edges_from([(2, 4, {"weight": 1}), (3, 4, {"weight": 2})])
+        self.assertEqual(([1, 2, 4], 15), DAGUtil.get_longest_path(G))
+        DAGUtil.label_schedule(G)
+        self.assertEqual([0, 7, 3, 11], [G.nodes[n]["stt"] for n in range(1, 5)])
+        self.assertEqual([2, 10, 4, 15], [G.nodes[n]["edt"] for n in range(1, 5)])
+
+    def test_critical_path_incremental(self):
+        for seed in range(30):
+            G = _random_dag(seed % 15 + 2, 0.3, seed)
+            rnd = random.Random(seed)
+            for u, v in G.edges():
+                G.edges[u, v]["weight"] = rnd.randint(0, 5)
+            critical_path = CriticalPath(G)
+            critical_path.length
+            edges = list(G.edges())
+            rnd.shuffle(edges)
+            for u, v in edges:
+                G.edges[u, v]["weight"] = 0
+                critical_path.set_edge_weight(u, v, 0)
+                self.assertEqual(
+                    DAGUtil.get_longest_path(G), critical_path.longest_path()
+                )
+
+    def test_schedule_intervals(self):
+        G = nx.DiGraph()
+        G.add_nodes_from([(1, {"weight": 2}), (2, {"weight": 3}), (3, {"weight": 1})])
+        G.add_node(4, weight=4)
+        G.add_edges_from([(1, 2, {"weight": 5}), (1, 3, {"weight": 1})])
+        G.add_edges_from([(2, 4, {"weight": 1}), (3, 4, {"weight": 2})])
+        schedule = Schedule(G, 2)
+        nodes, lanes, stts, edts = schedule.intervals
+        self.assertEqual([1, 2, 3, 4], nodes.tolist())
+        self.assertEqual([0, 0, 1, 1], lanes.tolist())
+        self.assertEqual([0, 7, 3, 11], stts.tolist())
+        self.assertEqual([2, 10, 4, 15], edts.tolist())
+        utilisation = [1, 1, 0, 1, 0, 0, 0, 1, 1, 1, 0, 1, 1, 1, 1]
+        self.assertEqual(utilisation, schedule.utilisation.tolist())
+        matrix = schedule.schedule_matrix
+        self.assertEqual(utilisation, matrix.astype(bool).sum(0).tolist())
+        self.assertEqual(0, schedule.workload)
+
+        _, stts, edts = DAGUtil.gantt_intervals(G)
+        gantt = DAGUtil.ganttchart_matrix(G)
+        self.assertEqual((4, 15), gantt.shape)
+        self.assertEqual(utilisation, gantt.sum(0).tolist())
+        weighted = DAGUtil.utilisation(stts, edts, 5, weights=[1, 2, 3, 4])
+        self.assertEqual([1, 1, 0, 3, 0], weighted.tolist())
+
     def test_basic_scheduler(self):
         fp = get_lg_fpath("logical_graphs", "cont_img_mvp.graph")
         lg = LG(fp)
@@ -112,6 +277,96 @@ class TestScheduler(unittest.TestCase):
                 """
             # mys.merge_partitions(numparts)
 
+    def test_mysarkar_partition_gids(self):
+        # Applications needing more CPUs than max_dop, so that partitions are
+        # further reduced after edge zeroing
+        rnd = random.Random(1)
+        drop_list = []
+        for i in range(40):
+            drop_list.append(
+                {
+                    "oid": f"A{i}",
+                    "name": f"A{i}",
+                    "categoryType": "Application",
+                    "weight": rnd.randint(1, 10),
+                    "num_cpus": rnd.choice([1, 2, 3]),
+                    "outputs": [f"D{i}"],
+                }
+            )
+            drop_list.append(
+                {
+                    "oid": f"D{i}",
+                    "name": f"D{i}",
+                    "categoryType": "Data",
+                    "weight": rnd.randint(0, 10),
+                    "consumers": [],
+                }
+            )
+        for i in range(1, 40):
+            for j in rnd.sample(range(i), min(i, rnd.randint(0, 3))):
+                drop_list[2 * j + 1]["consumers"].append(f"A{i}")
+
+        mys = MySarkarScheduler(drop_list, max_dop=2)
+        _, _, _, parts = mys.partition_dag()
+        st_gid = len(drop_list) + 1
+        self.assertEqual(
+            list(range(st_gid, st_gid + len(parts))),
+            sorted(part.partition_id for part in parts),
+        )
+        for part in parts:
+            self.assertIs(part, mys._part_dict[part.partition_id])
+            for n in part._dag.nodes():
+                self.assertEqual(part.partition_id, mys._dag.nodes[n]["gid"])
+        self.assertEqual(len(mys._dag), sum(len(part._dag) for part in parts))
+
+    def test_pso_scheduler_processes(self):
+        drop_list = []
+        for i in range(15):
+            drop_list.append(
+                {
+                    "oid": f"A{i}",
+                    "name": f"A{i}",
+                    "categoryType": "Application",
+                    "weight": i % 5 + 1,
+                    "num_cpus": 1,
+                    "outputs": [f"D{i}"],
+                }
+            )
+            drop_list.append(
+                {
+                    "oid": f"D{i}",
+                    "name": f"D{i}",
+                    "categoryType": "Data",
+                    "weight": i % 3,
+                    "consumers": [f"A{j}" for j in (i + 1, i + 2) if j < 15],
+                }
+            )
+        results = []
+        for processes in (1, 2):
+            psps = PSOScheduler(
+                drop_list,
+                max_dop={"num_cpus": 2},
+                deadline=60,
+                swarm_size=10,
+                processes=processes,
+                seed=1,
+            )
+            with mock.patch.object(
+                concurrent.futures,
+                "ProcessPoolExecutor",
+                wraps=concurrent.futures.ProcessPoolExecutor,
+            ) as pool:
+                num_parts, lpl, _, _ = psps.partition_dag()
+            if processes > 1:
+                # Workers are never forked from the (threaded) translator
+                mp_context = pool.call_args.kwargs["mp_context"]
+                self.assertEqual("forkserver", mp_context.get_start_method())
+            self.assertLessEqual(lpl, 60)
+            # Each distinct position is evaluated once
+            self.assertEqual(len(psps._sspace_dict), psps._call_counts - 1)
+            results.append((num_parts, lpl, psps._part_edges))
+        self.assertEqual(results[0], results[1])
+
     @unittest.skipIf(
         skip_long_tests,
         "Skipping because they take too long. Chen to eventually shorten them",
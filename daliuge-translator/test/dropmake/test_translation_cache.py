@@ -0,0 +1,143 @@
+#
+#    ICRAR - International Centre for Radio Astronomy Research
+#    (c) UWA - The University of Western Australia, 2024
+#    Copyright by UWA (in the framework of the ICRAR)
+#    All rights reserved
+#
+#    This library is free software; you can redistribute it and/or
+#    modify it under the terms of the GNU Lesser General Public
+#    License as published by the Free Software Foundation; either
+#    version 2.1 of the License, or (at your option) any later version.
+#
+#    This library is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public
+#    License along with this library; if not, write to the Free Software
+#    Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+#    MA 02111-1307  USA
+#
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from dlg.dropmake import pg_generator
+from dlg.dropmake.web import translator_rest
+from dlg.dropmake.translation_cache import TranslationCache, cached
+
+
+def chain(n):
+    """A physical graph template with a chain of n applications"""
+    pgt = [{"oid": "D0", "name": "D0", "categoryType": "Data", "weight": 1}]
+    for i in range(1, n + 1):
+        pgt[-1]["consumers"] = [f"A{i}"]
+        pgt.append(
+            {
+                "oid": f"A{i}",
+                "name": f"A{i}",
+                "categoryType": "Application",
+                "weight": 1,
+                "outputs": [f"D{i}"],
+            }
+        )
+        pgt.append(
+            {"oid": f"D{i}", "name": f"D{i}", "categoryType": "Data", "weight": 1}
+        )
+    return pgt
+
+
+class TestTranslationCache(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.root_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+        super().tearDown()
+
+    def test_get_or_compute(self):
+        cache = TranslationCache(self.root_dir)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return [{"oid": "A"}]
+
+        key = cache.key("unroll", {"a": 1, "b": [1, 2]}, None)
+        self.assertEqual(key, cache.key("unroll", {"b": [1, 2], "a": 1}, None))
+        self.assertNotEqual(key, cache.key("unroll", {"a": 2, "b": [1, 2]}, None))
+        salted = TranslationCache(self.root_dir, salt="x")
+        self.assertNotEqual(key, salted.key("unroll", {"a": 1, "b": [1, 2]}, None))
+
+        result = cache.get_or_compute(key, compute)
+        result[0]["oid"] = "B"
+        self.assertEqual([{"oid": "A"}], cache.get_or_compute(key, compute))
+        self.assertEqual(1, len(calls))
+        stats = cache.stats
+        self.assertEqual((1, 1, 1), (stats["hits"], stats["misses"], stats["entries"]))
+
+        # Results survive restarts
+        cache = TranslationCache(self.root_dir)
+        self.assertEqual([{"oid": "A"}], cache.get(key))
+        cache.clear()
+        self.assertIsNone(cache.get(key))
+        self.assertEqual([], os.listdir(self.root_dir))
+
+        self.assertEqual(2, cached(None, lambda: 2, "x"))
+
+    def test_eviction(self):
+        value = b"x" * 1000
+        cache = TranslationCache(self.root_dir, max_size=3500)
+        for i in range(3):
+            cache.put(str(i), value)
+        cache.get("0")
+        cache.put("3", value)
+        self.assertIsNone(cache.get("1"))
+        for key in ("0", "2", "3"):
+            self.assertEqual(value, cache.get(key))
+        self.assertEqual(1, cache.stats["evictions"])
+
+        # Too big to be stored at all
+        cache.put("4", value * 4)
+        self.assertIsNone(cache.get("4"))
+
+        # The most recently used results are kept when the cache shrinks
+        cache = TranslationCache(self.root_dir, max_size=2500)
+        self.assertEqual(2, cache.stats["entries"])
+        self.assertIsNone(cache.get("0"))
+
+    def test_cached_partition(self):
+        cache = TranslationCache(self.root_dir)
+        pgt = chain(20)
+        key_parts = ("partition", pgt, "metis", 2, 1, {})
+
+        def partition():
+            return pg_generator.partition(chain(20), "metis", 2, 1)
+
+        expected = cached(cache, partition, *key_parts)
+        self.assertEqual(expected, cached(cache, None, *key_parts))
+        self.assertEqual(1, cache.stats["hits"])
+
+    def test_cached_unroll_needs_oid_prefix(self):
+        calls = []
+
+        def unroll(lg, oid_prefix=None, zerorun=False, app=None):
+            calls.append(oid_prefix)
+            return [{"oid": f"{oid_prefix or len(calls)}_A"}]
+
+        cache = TranslationCache(self.root_dir)
+        with mock.patch.object(
+            translator_rest, "translation_cache", cache
+        ), mock.patch.object(pg_generator, "unroll", unroll):
+            # Without a prefix each unroll gets its own unique OIDs
+            pgts = [translator_rest._unroll({}, None, False, None) for _ in range(2)]
+            self.assertEqual([[{"oid": "1_A"}], [{"oid": "2_A"}]], pgts)
+            for _ in range(2):
+                pgt = translator_rest._unroll({}, "p", False, None)
+                self.assertEqual([{"oid": "p_A"}], pgt)
+        self.assertEqual([None, None, "p"], calls)
+        self.assertEqual(1, cache.stats["entries"])
@@ -51,6 +51,7 @@ MOCK_MODULES = (
     "gevent",
     "lockfile",
     "metis",
+    "msgpack",
     "netifaces",
     "networkx",
     "numpy",
@@ -59,7 +60,6 @@ MOCK_MODULES = (
     "paramiko.client",
     "paramiko.rsakey",
     "psutil",
-    "pyswarm",
     "python-daemon",
     "pyzmq",
     "scp",